@@ -0,0 +1,97 @@
+"""
+Benchmark herméticos de las funciones de los módulos de gestión.
+
+Uso:
+    # 1. Grabar los comandos reales de un servidor (requiere los servicios reales)
+    python benchmarks/benchmark_modules.py record fixtures/servidor.jsonl.gz
+
+    # 2. Reproducir en cualquier máquina (sin root ni servicios), opcionalmente
+    #    con las latencias originales y varios hilos para pruebas de carga
+    python benchmarks/benchmark_modules.py replay fixtures/servidor.jsonl.gz --repeat 50 --threads 4 [--latency]
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils import command_backend
+from utils import metrics
+
+# Funciones de solo lectura que se ejercitan: (módulo, función, argumentos)
+DEFAULT_TARGETS = [
+    ("modules.firewall.firewall_management", "view_firewall_status", ()),
+    ("modules.firewall.firewall_management", "list_firewall_rules", ()),
+    ("modules.docker.docker_management", "list_docker_containers", ()),
+    ("modules.services.service_management", "list_services", ()),
+    ("modules.package.package_management", "list_installed_packages", ()),
+    ("modules.package.package_management", "search_package", ("nginx",)),
+    ("modules.user.user_group_management", "list_users", ()),
+    ("modules.user.user_group_management", "list_groups", ()),
+    ("modules.network.network_management", "view_ip_config", ()),
+    ("modules.network.network_management", "view_routing_tables", ()),
+    ("modules.resource.resource_monitoring", "get_disk_usage", ()),
+    ("modules.disk.disk_partition_management", "list_disks_partitions", ()),
+]
+
+def _load_targets():
+    targets = []
+    for module_name, func_name, args in DEFAULT_TARGETS:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"[AVISO] Se omite {module_name}: {e}")
+            continue
+        metrics.instrument_module(module)
+        targets.append((module_name.rsplit(".", 1)[-1], getattr(module, func_name), args))
+    return targets
+
+def _quiet():
+    """Descarta lo que imprimen las funciones de los módulos (sys.stdout es global a todos los hilos)."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def record(archive_path):
+    command_backend.use_recording(archive_path)
+    targets = _load_targets()
+    with _quiet():
+        for _, func, args in targets:
+            func(*args)
+    print(f"Grabación guardada en {archive_path}")
+
+def replay(archive_path, repeat, threads, honor_latency):
+    command_backend.use_replay(archive_path, honor_latency)
+    targets = _load_targets()
+    calls = [(func, args) for _ in range(repeat) for _, func, args in targets]
+    start = time.perf_counter()
+    with _quiet(), concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda call: call[0](*call[1]), calls))
+    elapsed = time.perf_counter() - start
+    print(metrics.format_summary(sorted(metrics.snapshot("action"), key=lambda r: r["p95"], reverse=True)))
+    print(f"\n{len(calls)} llamadas en {elapsed:.3f}s ({len(calls) / elapsed:.1f} llamadas/s, {threads} hilo(s))")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de módulos con grabación/reproducción de comandos.")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    record_parser = subparsers.add_parser("record", help="Graba los comandos reales en un archivo")
+    record_parser.add_argument("archive")
+    replay_parser = subparsers.add_parser("replay", help="Reproduce una grabación y mide las funciones")
+    replay_parser.add_argument("archive")
+    replay_parser.add_argument("--repeat", type=int, default=20)
+    replay_parser.add_argument("--threads", type=int, default=1)
+    replay_parser.add_argument("--latency", action="store_true", help="Respetar las latencias originales")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args.archive)
+    else:
+        replay(args.archive, args.repeat, args.threads, args.latency)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Benchmark del cliente del Docker Engine API (utils/docker_api.py) contra un
+daemon falso que escucha en un socket Unix temporal (no necesita Docker ni root).
+
+Uso:
+    python benchmarks/docker_api_benchmark.py [--containers 500] [--repeat 200] [--threads 1]
+
+Mide el listado de contenedores (conexiones keep-alive del pool), las operaciones
+start/stop, la lectura de logs multiplexados, las operaciones en lote, las estadísticas de los contenedores en
+ejecución (un flujo del API por contenedor), el arranque de un proyecto Compose por
+dependencias (modules/docker/compose_engine.py) y el inventario en memoria
+(utils/docker_inventory.py): listado sin consultar al daemon y tiempo desde que el
+daemon emite un evento hasta que el inventario lo refleja. Si el CLI `docker` está
+instalado y hay un daemon real, también mide `docker ps -a` como referencia.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import queue
+import shutil
+import socketserver
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import urllib.parse
+from utils import docker_api
+from utils import docker_inventory
+from utils import docker_stats
+from utils import docker_logs
+from utils import display
+from modules.docker import docker_management
+from modules.docker import compose_engine
+import config
+
+def _fake_containers(count):
+    return [{
+        "Id": f"{index:064x}",
+        "Names": [f"/servicio-{index}"],
+        "Image": "nginx:latest",
+        "State": "running" if index % 3 else "exited",
+        "Status": "Up 2 hours" if index % 3 else "Exited (0) 5 minutes ago",
+        "Ports": [{"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8000 + index, "Type": "tcp"}],
+    } for index in range(count)]
+
+class FakeDockerHandler(BaseHTTPRequestHandler):
+    """Subconjunto del Docker Engine API suficiente para el benchmark."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code, body=b"", content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/_ping":
+            return self._send(200, b"OK", "text/plain")
+        if path == "/containers/json":
+            filters = json.loads(urllib.parse.parse_qs(query).get("filters", ["{}"])[0])
+            if "label" in filters:
+                return self._send(200, [c for c in self.server.compose_containers
+                                        if all(label.split("=", 1)[1] == c["Labels"].get(label.split("=", 1)[0])
+                                               for label in filters["label"])])
+            if "id" in filters:
+                return self._send(200, [c for c in self.server.containers if c["Id"] in filters["id"]])
+            return self._send(200, self.server.containers_json)
+        if path in ("/images/json", "/networks"):
+            return self._send(200, [])
+        if path == "/volumes":
+            return self._send(200, {"Volumes": []})
+        if path == "/events":
+            return self._stream_events()
+        if path.startswith("/containers/") and path.split("/")[2] in self.server.health_delays:
+            return self._send(200, self.server.compose_state(path.split("/")[2]))
+        if path.startswith("/containers/") and path.endswith("/json"):
+            # Pid 0: sin cgroup accesible, las estadísticas van por el flujo del API
+            return self._send(200, {"Id": path.split("/")[2], "State": {"Status": "running", "Pid": 0}})
+        if path.endswith("/stats"):
+            return self._stream_stats()
+        if path.endswith("/logs"):
+            params = urllib.parse.parse_qs(query)
+            if params.get("follow") == ["true"]:
+                return self._stream_logs(path.split("/")[2], params.get("timestamps") == ["true"])
+            lines = b"".join(struct.pack(">BxxxL", 1, len(line)) + line
+                             for line in (f"linea {i}\n".encode() for i in range(100)))
+            return self._send(200, lines, "application/vnd.docker.multiplexed-stream")
+        self._send(404, {"message": "No such container"})
+
+    def _stream_events(self):
+        subscriber = queue.Queue()
+        self.server.subscribers.append(subscriber)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+        try:
+            while True:
+                line = json.dumps(subscriber.get()).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+        except OSError:
+            self.server.subscribers.remove(subscriber)
+
+    def _stream_logs(self, container, timestamps):
+        """Logs en modo follow: lotes de 100 líneas sin pausa (el ritmo lo marca el consumidor)."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        counter = 0
+        try:
+            while True:
+                frames = []
+                for _ in range(100):
+                    stamp = "2024-05-01T10:00:00.000000000Z " if timestamps else ""
+                    line = f"{stamp}{container} GET /index.html 200 peticion {counter}\n".encode()
+                    frames.append(struct.pack(">BxxxL", 1 if counter % 10 else 2, len(line)) + line)
+                    counter += 1
+                batch = b"".join(frames)
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(batch), batch))
+                self.wfile.flush()
+        except OSError:
+            pass
+
+    def _stream_stats(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        usage = 0
+        try:
+            while True:
+                usage += 250_000_000 # 25% de un núcleo por segundo
+                stats = {"cpu_stats": {"cpu_usage": {"total_usage": usage}},
+                         "memory_stats": {"usage": 64 << 20, "limit": 512 << 20, "stats": {"inactive_file": 4 << 20}},
+                         "networks": {"eth0": {"rx_bytes": usage // 1000, "tx_bytes": usage // 2000}},
+                         "pids_stats": {"current": 3}}
+                line = json.dumps(stats).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+                time.sleep(self.server.stats_interval)
+        except OSError:
+            pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = self.path.split("?")[0]
+        if path.endswith("/stop"):
+            time.sleep(self.server.stop_delay) # Lo que tarda el contenedor en terminar
+        if path.endswith("/start") and path.split("/")[-2] in self.server.health_delays:
+            self.server.compose_started.setdefault(path.split("/")[-2], time.monotonic())
+        if path.endswith(("/start", "/stop", "/restart")):
+            self.server.emit("container", path.rsplit("/", 1)[1], path.split("/")[-2])
+            return self._send(204)
+        self._send(404, {"message": "page not found"})
+
+class FakeDockerDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128 # dockerd escucha con la cola del sistema (somaxconn)
+
+    def __init__(self, path, containers):
+        super().__init__(path, FakeDockerHandler)
+        self.containers = containers
+        self.containers_json = json.dumps(containers).encode()
+        self.subscribers = []
+        self.stats_interval = 1.0
+        self.stop_delay = 0.0
+        self.compose_containers = [] # Contenedores de un proyecto Compose (con sus etiquetas)
+        self.health_delays = {} # id -> segundos hasta 'healthy' tras arrancar (None: sin healthcheck)
+        self.compose_started = {}
+
+    def compose_state(self, container_id):
+        started = self.compose_started.get(container_id)
+        state = {"Status": "running" if started else "created", "Pid": 0, "ExitCode": 0}
+        delay = self.health_delays[container_id]
+        if started and delay is not None:
+            state["Health"] = {"Status": "healthy" if time.monotonic() - started >= delay else "starting"}
+        return {"Id": container_id, "State": state}
+
+    def emit(self, kind, action, actor_id):
+        for subscriber in list(self.subscribers):
+            subscriber.put({"Type": kind, "Action": action, "Actor": {"ID": actor_id}, "time": int(time.time())})
+
+def _measure(func, repeat, threads):
+    timings = []
+    def one():
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+    if threads > 1:
+        with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+            timings = list(pool.map(lambda _: one(), range(repeat)))
+    else:
+        timings = [one() for _ in range(repeat)]
+    timings.sort()
+    return (statistics.median(timings) * 1000, timings[int(len(timings) * 0.95) - 1] * 1000)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--containers", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="docker-bench-")
+    socket_path = os.path.join(directory, "docker.sock")
+    daemon = FakeDockerDaemon(socket_path, _fake_containers(args.containers))
+    threading.Thread(target=daemon.serve_forever, daemon=True).start()
+    # Las funciones del módulo de Docker (operaciones en lote) usan el socket de DOCKER_HOST
+    os.environ["DOCKER_HOST"] = f"unix://{socket_path}"
+    client = docker_api.DockerClient(socket_path=socket_path)
+    try:
+        print(f"Daemon falso en {socket_path} con {args.containers} contenedores "
+              f"({args.repeat} repeticiones, {args.threads} hilo(s))\n")
+        benchmarks = [
+            (f"listar {args.containers} contenedores", lambda: client.containers(all=True)),
+            ("iniciar contenedor", lambda: client.start("servicio-1")),
+            ("detener contenedor", lambda: client.stop("servicio-1")),
+            ("logs (100 líneas multiplexadas)", lambda: client.logs("servicio-1", tail=100)),
+            ("ping", client.ping),
+        ]
+        inventory = docker_inventory.DockerInventory(client).start()
+        if not inventory.wait_ready(5):
+            sys.exit("El inventario no pudo cargarse desde el daemon falso")
+        target = daemon.containers[1]["Id"]
+        def event_roundtrip():
+            seen = inventory.version
+            client.start(target) # El daemon falso emite el evento "start" del contenedor
+            inventory.wait_for_change(seen, 5)
+        benchmarks += [
+            (f"listar {args.containers} (inventario en memoria)", lambda: inventory.containers()),
+            ("filtrar por nombre (inventario)", lambda: inventory.containers(name="servicio-4*", state="running")),
+            ("evento -> inventario actualizado", event_roundtrip),
+        ]
+        running = sum(1 for c in daemon.containers if c["State"] == "running")
+        stats = docker_stats.StatsEngine(client, source="api")
+        stats.sample()
+        time.sleep(2.5) # Dos muestras de cada flujo para tener tasas
+        benchmarks.append((f"estadísticas de {running} contenedores", lambda: stats.top("cpu")))
+        print(f"{'Operación':<40} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+        for name, func in benchmarks:
+            # El ida y vuelta de eventos depende del orden: siempre en un solo hilo
+            threads = 1 if func is event_roundtrip else args.threads
+            p50, p95 = _measure(func, args.repeat, threads)
+            print(f"{name:<40} {p50:>10.2f} {p95:>10.2f}")
+        inventory.stop()
+        rows = stats.top("cpu")
+        print(f"\nEstadísticas: {len(rows)} contenedores, {sum(row['ready'] for row in rows)} con tasas "
+              f"(CPU del primero: {rows[0]['cpu_percent']:.1f}%)")
+        stats.close()
+
+        # Detener todos los contenedores en lote, con 100 ms de parada cada uno
+        daemon.stop_delay = 0.1
+        for parallel in ("1", "10", str(args.containers)):
+            if parallel == "1" and args.containers > 100:
+                continue # En serie tardaría más de 10 s
+            start = time.perf_counter()
+            with display.capture_stdout():
+                results = docker_management.bulk_stop_containers("servicio-*", parallel)
+            print(f"Detener {len(results)} contenedores en lote ({parallel} a la vez): {time.perf_counter() - start:.2f} s")
+        daemon.stop_delay = 0.0
+
+        # Seguimiento de logs de tres contenedores a la vez: líneas por segundo que llegan al consumidor
+        names = [c["Names"][0].lstrip("/") for c in daemon.containers[:3]]
+        mux = docker_logs.LogMultiplexer(names, pattern=r"peticion \d*7$", follow=True, client=client)
+        consumed, start = 0, time.perf_counter()
+        for _ in mux.lines():
+            consumed += 1
+            if time.perf_counter() - start > 1.0:
+                break
+        mux.close()
+        print(f"Logs de {len(names)} contenedores (follow, filtro regex): {consumed / (time.perf_counter() - start):,.0f} "
+              f"líneas/s consumidas, cola acotada a {docker_logs.config.DOCKER_LOG_QUEUE_SIZE} líneas")
+
+        # Proyecto Compose como el incluido: cuatro servicios independientes (dos con healthcheck
+        # que tarda en pasar) y dos clientes que esperan al firewall y al DNS
+        compose_file = os.path.join(directory, "docker-compose.yml")
+        with open(compose_file, "w") as f:
+            f.write("name: bench\nservices:\n"
+                    "  firewall: {image: debian, healthcheck: {test: [CMD, 'true']}}\n"
+                    "  web: {image: nginx}\n"
+                    "  db: {image: mysql, healthcheck: {test: [CMD, 'true']}}\n"
+                    "  dns: {image: dnsmasq, healthcheck: {test: [CMD, 'true']}}\n"
+                    "  cliente1: {image: ubuntu, depends_on: {firewall: {condition: service_healthy}, dns: {condition: service_started}}}\n"
+                    "  cliente2: {image: ubuntu, depends_on: {firewall: {condition: service_healthy}, dns: {condition: service_started}}}\n")
+        delays = {"firewall": 0.6, "web": None, "db": 0.4, "dns": 0.2, "cliente1": None, "cliente2": None}
+        for index, (service, delay) in enumerate(delays.items()):
+            container_id = f"c{index:063x}"
+            daemon.compose_containers.append({"Id": container_id, "Names": [f"/{service}"], "Labels": {
+                "com.docker.compose.project": "bench", "com.docker.compose.service": service}})
+            daemon.health_delays[container_id] = delay
+        config.DOCKER_COMPOSE_POLL_INTERVAL = 0.02
+        for parallelism in (1, config.DOCKER_COMPOSE_PARALLELISM):
+            daemon.compose_started.clear()
+            project, services = compose_engine.load_compose(compose_file)
+            with display.capture_stdout():
+                total = compose_engine.execute_services(services, "docker compose", project, parallelism)
+            critical, path = compose_engine.critical_path(services)
+            print(f"Compose ({len(services)} servicios, {parallelism} a la vez): {total:.2f} s hasta todos listos "
+                  f"(suma {sum(service.duration for service in services):.2f} s, camino crítico {critical:.2f} s: "
+                  f"{' -> '.join(path)})")
+        for service in services:
+            print(f"    {service.id:<10} inicio {service.started:5.2f} s  arranque {service.start_time:5.2f} s  "
+                  f"hasta listo {service.ready_time:5.2f} s  ({service.wait}, {service.status})")
+
+        if shutil.which("docker"):
+            def cli():
+                subprocess.run(["docker", "ps", "-a"], capture_output=True)
+            p50, p95 = _measure(cli, min(args.repeat, 20), 1)
+            print(f"{'docker ps -a (CLI, daemon real)':<40} {p50:>10.2f} {p95:>10.2f}")
+    finally:
+        client.close()
+        daemon.shutdown()
+        daemon.server_close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
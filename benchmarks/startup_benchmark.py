@@ -0,0 +1,104 @@
+"""
+Benchmark del arranque en frío de la CLI y del lanzador de la GUI.
+
+Lanza varias veces un intérprete nuevo con `python -X importtime` importando el
+punto de entrada, toma la mediana del tiempo de importación acumulado y falla
+(código de salida 1) si supera el presupuesto o si se cargan módulos pesados que
+deberían importarse de forma diferida (gradio, psutil, los módulos de gestión).
+
+Uso:
+    python benchmarks/startup_benchmark.py                # CLI (main.py) y GUI (run_gui.py)
+    python benchmarks/startup_benchmark.py --target cli --budget-ms 120 --runs 10
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Punto de entrada, presupuesto por defecto (ms de importación acumulada) y módulos que no deben cargarse
+TARGETS = {
+    "cli": ("main", 150, ["gradio", "psutil", "modules.docker.docker_management",
+                          "modules.process.process_management", "modules.package.package_management"]),
+    "gui": ("run_gui", 150, ["gradio", "psutil", "modules.gui.gui_interface"]),
+}
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+def _parse_importtime(stderr):
+    """Retorna [(módulo, propio_us, acumulado_us, profundidad)] de la salida de -X importtime."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+def measure(entry_module, runs):
+    """Mide `runs` arranques en frío. Retorna (tiempos de importación en ms, tiempos de proceso en ms, entradas)."""
+    check = f"import {entry_module}, sys, json; print(json.dumps(sorted(sys.modules)))"
+    import_times, wall_times = [], []
+    entries, loaded = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", check],
+                                 cwd=project_root, capture_output=True, text=True)
+        wall_times.append((time.perf_counter() - start) * 1000)
+        if process.returncode != 0:
+            raise RuntimeError(f"No se pudo importar {entry_module}:\n{process.stderr[-2000:]}")
+        entries = _parse_importtime(process.stderr)
+        # Solo cuenta lo importado hasta terminar el punto de entrada (no el código de comprobación)
+        end = next((i for i, (name, _, _, depth) in enumerate(entries)
+                    if name == entry_module and depth == 0), len(entries) - 1)
+        entries = entries[:end + 1]
+        import_times.append(entries[-1][2] / 1000 if entries else 0)
+        loaded = json.loads(process.stdout.strip().splitlines()[-1])
+    return import_times, wall_times, entries, loaded
+
+def run_target(name, runs, budget_ms, top):
+    entry_module, default_budget, forbidden = TARGETS[name]
+    budget_ms = budget_ms or default_budget
+    import_times, wall_times, entries, loaded = measure(entry_module, runs)
+    median_import = statistics.median(import_times)
+    print(f"== {name} ({entry_module}) ==")
+    print(f"Importación: mediana {median_import:.1f} ms (mín {min(import_times):.1f}, máx {max(import_times):.1f}) "
+          f"| Proceso completo: mediana {statistics.median(wall_times):.1f} ms | Presupuesto: {budget_ms} ms")
+
+    print("Importaciones más costosas (acumulado, última ejecución):")
+    for module, self_us, cumulative_us, _ in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  (propio {self_us / 1000:6.1f} ms)  {module}")
+
+    failures = []
+    if median_import > budget_ms:
+        failures.append(f"el arranque ({median_import:.1f} ms) supera el presupuesto de {budget_ms} ms")
+    eager = [module for module in forbidden if module in loaded]
+    if eager:
+        failures.append(f"se cargan en el arranque módulos que deberían ser diferidos: {', '.join(eager)}")
+    for failure in failures:
+        print(f"[FALLO] {failure}")
+    if not failures:
+        print("[OK] Dentro del presupuesto.")
+    print()
+    return not failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío con presupuesto.")
+    parser.add_argument("--target", choices=sorted(TARGETS) + ["all"], default="all")
+    parser.add_argument("--runs", type=int, default=5, help="Arranques a medir (se usa la mediana)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Presupuesto de importación en ms (por defecto, el de cada objetivo)")
+    parser.add_argument("--top", type=int, default=10, help="Importaciones más costosas a mostrar")
+    args = parser.parse_args()
+
+    targets = sorted(TARGETS) if args.target == "all" else [args.target]
+    results = [run_target(name, args.runs, args.budget_ms, args.top) for name in targets]
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,130 @@ import os
 # Directorio para almacenar los logs
 LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
 
-# Puedes añadir más configuraciones aquí si es necesario
\ No newline at end of file
+# Escritura de logs en segundo plano (utils.logger).
+# LOG_FSYNC_POLICY: 'never' (solo flush al SO), 'batch' (fsync por lote) o 'interval' (cada LOG_FSYNC_INTERVAL s)
+LOG_FSYNC_POLICY = os.environ.get('SYSADMIN_LOG_FSYNC', 'interval')
+LOG_FSYNC_INTERVAL = 5.0
+LOG_BATCH_SIZE = 256 # Registros máximos por lote de escritura
+LOG_FLUSH_INTERVAL = 0.5 # Segundos que el escritor espera nuevos registros antes de comprobar de nuevo
+
+# Formato de los logs: 'text' ([ts] [módulo] [acción] detalles) o 'json' (JSON-lines con campos
+# module, action, target, details, duration, status y user).
+LOG_FORMAT = os.environ.get('SYSADMIN_LOG_FORMAT', 'text')
+LOG_MAX_BYTES = 10 * 1024 * 1024 # Tamaño máximo del archivo activo antes de abrir un nuevo segmento
+LOG_RETENTION_DAYS = 90 # Días de logs que se conservan (None: sin límite)
+LOG_COMPRESS = True # Comprimir con gzip los segmentos cerrados
+LOG_FOLLOW_IDLE_TIMEOUT = 60 # Segundos sin leer tras los que se cierra un seguimiento de log abierto desde la GUI
+
+# Pool de shells persistentes para execute_command (solo Linux).
+# Evita un fork/exec de /bin/sh por comando en sesiones con muchos comandos.
+USE_SHELL_POOL = os.environ.get('SYSADMIN_SHELL_POOL', '0') == '1'
+SHELL_POOL_SIZE = 4
+SHELL_POOL_TIMEOUT = 300 # Segundos máximos por comando antes de reiniciar el worker
+
+# Captura de salida de comandos: por encima de OUTPUT_CAPTURE_LIMIT bytes la salida
+# completa se vuelca a un archivo temporal y en memoria solo se conserva el inicio y el final.
+OUTPUT_CAPTURE_LIMIT = 8 * 1024 * 1024
+OUTPUT_HEAD_BYTES = 256 * 1024
+OUTPUT_TAIL_BYTES = 256 * 1024
+OUTPUT_SPILL_DIR = None # None: directorio temporal del sistema
+OUTPUT_MAX_SPILLS = 20 # Archivos volcados que se conservan por sesión
+
+# Grabación/reproducción de comandos (benchmarks y pruebas sin tocar el sistema real).
+# SYSADMIN_RECORD=ruta graba cada comando; SYSADMIN_REPLAY=ruta los reproduce desde la grabación.
+COMMAND_RECORD_PATH = os.environ.get('SYSADMIN_RECORD') or None
+COMMAND_REPLAY_PATH = os.environ.get('SYSADMIN_REPLAY') or None
+COMMAND_REPLAY_LATENCY = os.environ.get('SYSADMIN_REPLAY_LATENCY', '0') == '1' # Respetar la duración original
+
+# Capacidades del sistema (gestor de paquetes, init, firewall, Docker, psutil).
+# Se sondean una vez al arrancar y se cachean en disco junto a una huella del sistema.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+CAPABILITIES_CACHE_PATH = os.path.join(CACHE_DIR, 'capabilities.json')
+DOCKER_SOCKET_PATH = '/var/run/docker.sock'
+
+# Peticiones que la GUI atiende en paralelo (cada una con su propio contexto de salida)
+GUI_CONCURRENCY_LIMIT = 8
+
+# Trabajos en segundo plano (utils.jobs): trabajos simultáneos por categoría
+JOB_CATEGORY_LIMITS = {"paquetes": 1, "docker": 2, "firewall": 1}
+JOB_DEFAULT_LIMIT = 2 # Categorías no listadas
+JOB_HISTORY = 100 # Trabajos terminados que se conservan en la lista
+
+# Resultados estructurados (utils.result): filas por página en las tablas de la GUI
+# y resultados recientes que se conservan para paginarlos en el servidor
+RESULT_PAGE_SIZE = 50
+RESULT_STORE_SIZE = 32
+
+# Vistas compartidas de la GUI (utils.snapshot_hub): cada vista (docker ps, servicios,
+# recursos) se recoge como mucho una vez por intervalo, la vean una o muchas sesiones
+SNAPSHOT_INTERVAL = 5.0 # segundos
+
+# API HTTP (main.py --serve): acciones de los módulos como endpoints JSON.
+# Conexiones keep-alive atendidas por un pool acotado y acciones ejecutadas en otro,
+# cada una con su tiempo máximo (el de la acción o API_DEFAULT_TIMEOUT).
+API_HOST = os.environ.get('SYSADMIN_API_HOST', '127.0.0.1')
+API_PORT = int(os.environ.get('SYSADMIN_API_PORT', '8080'))
+# Siempre se exige "Authorization: Bearer <token>": el de SYSADMIN_API_TOKEN o, si no se define,
+# uno aleatorio que se genera la primera vez en API_TOKEN_PATH (legible solo por el propietario)
+API_TOKEN = os.environ.get('SYSADMIN_API_TOKEN') or None
+API_TOKEN_PATH = os.path.join(CACHE_DIR, 'api_token')
+# Nombres aceptados en la cabecera Host (además de localhost y la dirección de escucha): evita el DNS rebinding
+API_ALLOWED_HOSTS = [h.strip() for h in os.environ.get('SYSADMIN_API_ALLOWED_HOSTS', '').split(',') if h.strip()]
+API_WORKERS = 8 # Acciones ejecutándose a la vez
+API_MAX_CONNECTIONS = 64 # Conexiones atendidas a la vez
+API_KEEPALIVE_TIMEOUT = 30 # Segundos que una conexión inactiva se mantiene abierta
+API_DEFAULT_TIMEOUT = 120 # Segundos máximos por acción
+API_MAX_BODY = 1024 * 1024 # Tamaño máximo del cuerpo de una petición
+
+# Playbooks (modules/playbook): pasos independientes que se ejecutan a la vez si el
+# playbook no indica su propia `concurrency`. Los límites por categoría de
+# JOB_CATEGORY_LIMITS también se aplican a los pasos (ej. una operación de paquetes a la vez).
+PLAYBOOK_CONCURRENCY = 4
+
+# Panel en vivo de la terminal (main.py --tui): segundos entre muestras de recursos y
+# procesos, y entre recogidas de las vistas que lanzan comandos (contenedores, servicios fallidos)
+TUI_REFRESH_INTERVAL = 1.0
+TUI_SLOW_REFRESH_INTERVAL = 5.0
+
+# Docker Engine API (utils.docker_api): con el socket disponible, las operaciones de
+# contenedores e imágenes van por HTTP sobre el socket en lugar de lanzar el CLI `docker`
+DOCKER_USE_API = os.environ.get('SYSADMIN_DOCKER_API', '1') == '1'
+DOCKER_API_VERSION = '' # Prefijo de versión de la API (ej. 'v1.43'); vacío: la del daemon
+DOCKER_API_POOL_SIZE = 8 # Conexiones keep-alive inactivas que se conservan
+DOCKER_API_TIMEOUT = 30 # Segundos por petición (las de stop/restart suman el tiempo de parada)
+DOCKER_EXEC_TIMEOUT = 300 # Segundos máximos de un comando ejecutado con exec
+# Estado del daemon (vivo o no): se comprueba con /_ping y se cachea estos segundos
+DOCKER_PING_TTL = 5.0
+DOCKER_PING_FAILURE_TTL = 1.0 # Si no respondió, se vuelve a comprobar antes
+DOCKER_PING_TIMEOUT = 2.0
+
+# Inventario de Docker en memoria (utils/docker_inventory.py), al día con el flujo /events
+DOCKER_INVENTORY = os.environ.get('SYSADMIN_DOCKER_INVENTORY', '1') == '1'
+DOCKER_INVENTORY_RETRY = 5.0 # Segundos antes de volver a suscribirse si se corta el flujo
+DOCKER_INVENTORY_SEED_TIMEOUT = 2.0 # Espera máxima a la primera carga antes de consultar al daemon
+
+# Estadísticas de contenedores (utils/docker_stats.py): 'auto' lee cgroup v2 si es
+# accesible y si no usa el flujo de estadísticas del API; 'cgroup' o 'api' fuerzan uno
+DOCKER_STATS_SOURCE = os.environ.get('SYSADMIN_DOCKER_STATS', 'auto')
+DOCKER_STATS_WARMUP = 3.0 # Espera máxima a la segunda muestra (para las tasas) en la primera consulta
+DOCKER_STATS_IDLE_TIMEOUT = 60 # Segundos sin consultas tras los que se cierran los flujos del API
+
+# Seguimiento de logs de varios contenedores (utils/docker_logs.py)
+DOCKER_LOG_QUEUE_SIZE = 1000 # Líneas en espera del consumidor; con la cola llena los lectores se detienen
+DOCKER_LOG_RING_LINES = 500 # Últimas líneas que se conservan por contenedor
+DOCKER_LOG_MAX_LINE = 16384 # Bytes; las líneas más largas se truncan
+DOCKER_LOG_IDLE_TIMEOUT = 60 # Segundos sin consumir tras los que se cierran los flujos
+DOCKER_LOG_DEFAULT_TAIL = 100 # Líneas previas por contenedor al seguir sin 'since'
+
+# Operaciones en lote sobre contenedores (iniciar, detener, reiniciar, eliminar varios)
+DOCKER_BULK_PARALLELISM = 10 # Contenedores a la vez
+DOCKER_BULK_STOP_TIMEOUT = 10 # Segundos de gracia de cada contenedor antes de SIGKILL (como `docker stop`)
+
+# Motor de Docker Compose (modules/docker/compose_engine.py): arranca los servicios en
+# orden de depends_on, los independientes en paralelo, esperando healthchecks o sondas
+DOCKER_COMPOSE_ENGINE = os.environ.get('SYSADMIN_COMPOSE_ENGINE', '1') == '1' # '0': `compose up -d` sin más
+DOCKER_COMPOSE_PARALLELISM = 8 # Servicios arrancando a la vez
+DOCKER_COMPOSE_READY_TIMEOUT = 300 # Segundos máximos hasta que un servicio esté listo
+DOCKER_COMPOSE_POLL_INTERVAL = 1.0 # Segundos entre comprobaciones (sin inventario de eventos) y entre sondas
+
+# Puedes añadir más configuraciones aquí si es necesario
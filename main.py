@@ -1,21 +1,29 @@
 import sys
 import os
 import ctypes
-
-# Importaciones de módulos principales
-from modules.disk import disk_partition_management
-from modules.docker import docker_management
-from modules.firewall import firewall_management
-from modules.network import network_management
-from modules.resource import resource_monitoring
-from modules.user import user_group_management
-from modules.process import process_management
-from modules.services import service_management
-from modules.package import package_management
+import atexit
 
 # Importaciones de utilidades (se consolida una sola vez)
 from utils.display import clear_screen, print_menu, print_header, print_error, get_user_input
 from utils.system_info import get_os_type
+from utils import metrics
+from utils import capabilities
+from utils import cli
+from utils.lazy import lazy_module
+
+# Módulos principales: se importan (e instrumentan para utils.metrics) la primera vez
+# que se elige su opción en el menú, así el arranque no carga lo que no se usa.
+disk_partition_management = lazy_module("modules.disk.disk_partition_management")
+docker_management = lazy_module("modules.docker.docker_management")
+firewall_management = lazy_module("modules.firewall.firewall_management")
+network_management = lazy_module("modules.network.network_management")
+resource_monitoring = lazy_module("modules.resource.resource_monitoring")
+user_group_management = lazy_module("modules.user.user_group_management")
+process_management = lazy_module("modules.process.process_management")
+service_management = lazy_module("modules.services.service_management")
+package_management = lazy_module("modules.package.package_management")
+log_management = lazy_module("modules.logs.log_management")
+tui_dashboard = lazy_module("modules.tui.tui_dashboard")
 
 # --- Comprobación de Permisos ---
 def is_admin():
@@ -79,6 +87,8 @@ def main_menu():
             "7": "Gestión de Docker",
             "8": "Gestión de Servicios/Daemons",
             "9": "Gestión de Paquetes/Software",
+            "10": "Consulta de Logs",
+            "11": "Panel en Vivo (TUI)",
             "0": "Salir"
             }
         else:
@@ -91,6 +101,8 @@ def main_menu():
             "6": "Gestión de Procesos",
             "7": "Gestión de Docker",
             "8": "Gestión de Servicios/Daemons",
+            "10": "Consulta de Logs",
+            "11": "Panel en Vivo (TUI)",
             "0": "Salir"
             }
             
@@ -121,6 +133,10 @@ def main_menu():
             else:
                 print_error("La gestión de paquetes/software está disponible solo para sistemas Linux.")
                 get_user_input("Presione Enter para continuar...")
+        elif choice == '10':
+            log_management.logs_menu()
+        elif choice == '11':
+            tui_dashboard.run_dashboard()
         elif choice == '0':
             print_header("Saliendo del script. ¡Hasta luego!")
             sys.exit()
@@ -130,8 +146,28 @@ def main_menu():
 
 # --- Punto de Entrada del Script ---
 if __name__ == "__main__":
+    # Orden directa (ej. `main.py firewall add-rule --port 443 --proto tcp --json`): sin menús
+    oneshot_args = None
+    argv = [arg for arg in sys.argv[1:] if arg != "--profile"]
+    if cli.is_oneshot(argv):
+        oneshot_args = cli.parse_args(argv)
+    # --profile: imprime un resumen p50/p95/p99 de comandos y acciones al salir
+    if "--profile" in sys.argv:
+        atexit.register(metrics.print_summary)
     if not is_admin():
         print("Detectado: No se está ejecutando como administrador/root.")
         relaunch_as_admin()
         sys.exit(1) 
-    main_menu()
\ No newline at end of file
+    # Sondeo único de capacidades del sistema (o lectura de la caché en disco)
+    capabilities.get_capabilities()
+    # --serve: API HTTP con las acciones de los módulos en lugar del menú interactivo
+    if oneshot_args is not None:
+        sys.exit(cli.run(oneshot_args))
+    elif "--serve" in sys.argv:
+        from modules.api import api_server
+        api_server.serve()
+    # --tui: panel en vivo (recursos, procesos, contenedores) con acceso a los menús de cada módulo
+    elif "--tui" in sys.argv:
+        tui_dashboard.run_dashboard()
+    else:
+        main_menu()
\ No newline at end of file
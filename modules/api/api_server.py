@@ -0,0 +1,278 @@
+import concurrent.futures
+import hmac
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import config
+from utils import actions
+from utils import display
+from utils import jobs
+from utils import result as result_utils
+
+# Estado de las respuestas de acciones que no terminaron dentro de su tiempo máximo
+STATUS_TIMEOUT = "timeout"
+# Estado de las respuestas de acciones descartadas antes de empezar (cierre del servidor)
+STATUS_CANCELLED = "cancelled"
+
+LOOPBACK_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+def load_or_create_token(path=None):
+    """
+    Token de la API guardado en `path` (API_TOKEN_PATH). La primera vez se genera
+    uno aleatorio y se crea el archivo con permisos 0600; si ya existe con permisos
+    más abiertos, se restringen.
+    """
+    path = path or config.API_TOKEN_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        if os.name != 'nt' and os.stat(path).st_mode & 0o077:
+            os.chmod(path, 0o600)
+        with open(path, encoding="utf-8") as f:
+            token = f.read().strip()
+        if token:
+            return token
+        fd = os.open(path, os.O_WRONLY | os.O_TRUNC)
+    token = secrets.token_urlsafe(32)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    return token
+
+class ApiServer(HTTPServer):
+    """
+    Servidor HTTP/1.1 de la API. Cada conexión (keep-alive) se atiende en un pool
+    acotado de API_MAX_CONNECTIONS hilos, y las acciones se ejecutan en otro pool de
+    API_WORKERS hilos, de modo que un pico de peticiones no crea hilos sin límite.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address, max_connections=None, workers=None, token=None):
+        super().__init__(address, ApiRequestHandler)
+        # Sin token no se atiende nada: las acciones ejecutan comandos como root
+        self.token = token or config.API_TOKEN or load_or_create_token()
+        bound = {address[0]} if address[0] not in ("", "0.0.0.0", "::") else set()
+        self.allowed_hosts = LOOPBACK_HOSTS | bound | {host.lower() for host in config.API_ALLOWED_HOSTS}
+        self.connections = concurrent.futures.ThreadPoolExecutor(
+            max_connections or config.API_MAX_CONNECTIONS, thread_name_prefix="api-conn")
+        self.workers = concurrent.futures.ThreadPoolExecutor(
+            workers or config.API_WORKERS, thread_name_prefix="api-worker")
+        self._ids = itertools.count(1)
+
+    def process_request(self, request, client_address):
+        self.connections.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.connections.shutdown(wait=False, cancel_futures=True)
+        self.workers.shutdown(wait=False, cancel_futures=True)
+
+    def execute(self, action, values):
+        """
+        Ejecuta una acción en el pool de trabajo con su tiempo máximo.
+        Retorna (código HTTP, cuerpo de la respuesta). Lanza ValueError si los
+        parámetros no son válidos.
+        """
+        args, inputs = action.bind(values, remote=True)
+        func = action.load()
+        job = jobs.Job(next(self._ids), action.full_name, "api", func, args, inputs)
+        start = time.monotonic()
+        started = threading.Event()
+
+        def run():
+            started.set()
+            job.run()
+
+        future = self.workers.submit(run)
+        # El tiempo máximo cuenta desde que la acción empieza, no mientras espera en la cola
+        while not started.wait(1) and not future.done():
+            pass
+        try:
+            future.result(timeout=action.timeout)
+        except concurrent.futures.CancelledError:
+            job.cancel()
+            code, status = 503, STATUS_CANCELLED
+        except concurrent.futures.TimeoutError:
+            # Se matan los comandos en curso y se cortan las conexiones con Docker; los bucles
+            # largos (esperas de Compose, playbooks...) consultan jobs.cancel_requested()
+            future.cancel()
+            job.cancel()
+            code, status = 504, STATUS_TIMEOUT
+        else:
+            if job.status == jobs.FAILED:
+                code, status = 500, result_utils.STATUS_ERROR
+            else:
+                code, status = 200, job.result.status
+        result = job.result
+        body = {
+            "action": action.full_name,
+            "status": status,
+            "duration": round(time.monotonic() - start, 3),
+            "result": result.to_dict() if result is not None else None,
+            "value": result_utils.jsonable(result.value) if result is not None and code == 200 else None,
+        }
+        if job.error:
+            body["error"] = job.error
+        return code, body
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints:
+      GET  /api/health              estado del servidor
+      GET  /api/actions[?module=m]  catálogo de acciones con sus parámetros
+      GET  /api/actions/<acción>    descripción de una acción (ej. docker.list)
+      POST /api/actions/<acción>    ejecuta la acción; el cuerpo es un objeto JSON con los parámetros
+    """
+
+    protocol_version = "HTTP/1.1" # Conexiones persistentes
+    server_version = "SysAdminAPI/1.0"
+    timeout = config.API_KEEPALIVE_TIMEOUT # Se cierra la conexión tras este tiempo sin peticiones
+    disable_nagle_algorithm = True # Cabeceras y cuerpo van en escrituras separadas: sin esto, cada respuesta espera al ACK retardado
+
+    def log_message(self, format, *args):
+        # Las acciones ya quedan en los logs de los módulos (utils.logger)
+        pass
+
+    def _send_json(self, code, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error_json(self, code, message):
+        self._send_json(code, {"status": result_utils.STATUS_ERROR, "error": message})
+
+    def _authorized(self):
+        header = self.headers.get("Authorization", "")
+        return header.startswith("Bearer ") and hmac.compare_digest(header[7:], self.server.token)
+
+    def _host_allowed(self):
+        """La cabecera Host debe nombrar a este servidor (protección contra DNS rebinding)."""
+        host = self.headers.get("Host", "")
+        if host.startswith("["):
+            host = host[1:].partition("]")[0]
+        elif host.count(":") == 1:
+            host = host.partition(":")[0]
+        return host.lower() in self.server.allowed_hosts
+
+    def _check_request(self):
+        """Host y token. Retorna False si ya se respondió con un error."""
+        if not self._host_allowed():
+            self.close_connection = True
+            self._send_error_json(403, "Host no permitido (ver SYSADMIN_API_ALLOWED_HOSTS)")
+            return False
+        if not self._authorized():
+            self.close_connection = True
+            self._send_error_json(401, "No autorizado")
+            return False
+        return True
+
+    def _read_body(self):
+        """Cuerpo JSON de la petición (objeto). Retorna None si ya se respondió con un error."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > config.API_MAX_BODY:
+            self.close_connection = True
+            self._send_error_json(413 if length > 0 else 400, "Content-Length no válido")
+            return None
+        raw = self.rfile.read(length) if length else b""
+        # Un formulario de otra web no puede enviar application/json sin una petición CORS previa
+        if self.headers.get_content_type() != "application/json":
+            self._send_error_json(415, "El cuerpo debe enviarse con Content-Type: application/json")
+            return None
+        if not raw.strip():
+            return {}
+        try:
+            body = json.loads(raw)
+        except ValueError as e:
+            self._send_error_json(400, f"JSON no válido: {e}")
+            return None
+        if not isinstance(body, dict):
+            self._send_error_json(400, "El cuerpo debe ser un objeto JSON con los parámetros")
+            return None
+        return body
+
+    def _route(self):
+        url = urllib.parse.urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        return parts, urllib.parse.parse_qs(url.query)
+
+    def do_GET(self):
+        if not self._check_request():
+            return
+        parts, query = self._route()
+        if parts == ["api", "health"]:
+            return self._send_json(200, {"status": result_utils.STATUS_OK, "actions": len(actions.ACTIONS)})
+        if parts == ["api", "actions"]:
+            module = query.get("module", [None])[0]
+            return self._send_json(200, {"actions": [action.to_dict() for action in actions.list_actions(module)]})
+        if len(parts) == 3 and parts[:2] == ["api", "actions"]:
+            action = actions.get_action(parts[2])
+            if action is None:
+                return self._send_error_json(404, f"Acción desconocida: {parts[2]}")
+            return self._send_json(200, action.to_dict())
+        self._send_error_json(404, "Ruta no encontrada")
+
+    def do_POST(self):
+        if not self._check_request():
+            return
+        body = self._read_body()
+        if body is None:
+            return
+        parts, _ = self._route()
+        if len(parts) != 3 or parts[:2] != ["api", "actions"]:
+            return self._send_error_json(404, "Ruta no encontrada")
+        action = actions.get_action(parts[2])
+        if action is None:
+            return self._send_error_json(404, f"Acción desconocida: {parts[2]}")
+        try:
+            code, response = self.server.execute(action, body)
+        except ValueError as e:
+            return self._send_error_json(400, str(e))
+        self._send_json(code, response)
+
+def create_server(host=None, port=None, **kwargs):
+    """Crea el servidor de la API (sin arrancarlo). Las funciones de los módulos se ejecutan sin preguntar."""
+    # Modo no interactivo: las funciones usan sus argumentos en lugar de pedir confirmación
+    display.IS_GUI_MODE = True
+    display.install_context_stdout()
+    return ApiServer((host or config.API_HOST, config.API_PORT if port is None else port), **kwargs)
+
+def serve(host=None, port=None):
+    """Arranca la API HTTP y atiende peticiones hasta Ctrl+C."""
+    server = create_server(host, port)
+    address, bound_port = server.server_address[:2]
+    # Mensajes directos a la terminal: en modo no interactivo print_* no se muestran
+    print(f"API escuchando en http://{address}:{bound_port}/api/ "
+          f"({len(actions.ACTIONS)} acciones, {config.API_WORKERS} workers)")
+    if not config.API_TOKEN:
+        print(f"Token de acceso en {config.API_TOKEN_PATH} (cabecera 'Authorization: Bearer <token>').")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Deteniendo la API...")
+    finally:
+        server.server_close()
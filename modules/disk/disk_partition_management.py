@@ -1,4 +1,5 @@
-from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input, IS_GUI_MODE
+from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input, print_output, print_table, IS_GUI_MODE
+from utils.result import returns_result, parse_columns
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
 import os
@@ -108,12 +109,13 @@ def _format_windows_logical_disk_info(data: list[dict]) -> str:
         lines.append(f"{caption:<10} {file_system[:14]:<15} {total_size_gb:<20} {free_space_gb:<20}")
     return "\n".join(lines)
 
+@returns_result
 def list_disks_partitions():
     """
     Lista discos y particiones del sistema operativo.
-    La salida es impresa y capturada por la redirección de sys.stdout.
+    La salida se recoge en el resultado de la función (utils.result).
     """
-    print_header("Listar Discos y Particiones") # Esta función ahora solo imprime
+    print_header("Listar Discos y Particiones") # Esta función solo imprime
     os_type = get_os_type()
     
     if os_type == 'windows':
@@ -132,7 +134,7 @@ def list_disks_partitions():
             parsed_data = _parse_wmic_output(output_disk)
             formatted_output = _format_windows_disk_info(parsed_data)
             print_info("\n--- Discos Físicos ---")
-            print("```\n" + formatted_output + "\n```") # Usamos print para la salida del comando
+            print_output(formatted_output)
         else:
             print_error(f"Error al listar discos físicos: {output_disk}")
             all_status_ok = False
@@ -143,7 +145,7 @@ def list_disks_partitions():
             parsed_data = _parse_wmic_output(output_partition)
             formatted_output = _format_windows_partition_info(parsed_data)
             print_info("\n--- Particiones ---")
-            print("```\n" + formatted_output + "\n```")
+            print_output(formatted_output)
         else:
             print_error(f"Error al listar particiones: {output_partition}")
             all_status_ok = False
@@ -154,7 +156,7 @@ def list_disks_partitions():
             parsed_data = _parse_wmic_output(output_logicaldisk)
             formatted_output = _format_windows_logical_disk_info(parsed_data)
             print_info("\n--- Unidades Lógicas (Volúmenes) ---")
-            print("```\n" + formatted_output + "\n```")
+            print_output(formatted_output)
         else:
             print_error(f"Error al listar unidades lógicas: {output_logicaldisk}")
             all_status_ok = False
@@ -170,17 +172,17 @@ def list_disks_partitions():
         output, status = execute_command(command)
         if status == 0:
             print_success("Información de Discos y Particiones (Linux):")
-            print("```\n" + output + "\n```")
+            print_output(output)
             log_action("DiskPartition", "List Disks/Partitions", "Discos y particiones listados exitosamente (Linux).")
         else:
             print_error(f"Error al listar discos y particiones: {output}")
             log_action("DiskPartition", "List Disks/Partitions", f"Error al listar discos y particiones: {output}")
-    # Esta función ya no devuelve nada explícitamente; su salida se captura por redirección.
 
+@returns_result
 def view_mounted_partition_usage():
     """
     Muestra el uso de las particiones montadas.
-    La salida es impresa y capturada por la redirección de sys.stdout.
+    La salida se recoge en el resultado de la función (utils.result).
     """
     print_header("Ver Uso de Particiones Montadas")
     os_type = get_os_type()
@@ -192,7 +194,7 @@ def view_mounted_partition_usage():
         if status == 0:
             parsed_data = _parse_wmic_output(output)
             formatted_output = _format_windows_logical_disk_info(parsed_data)
-            print("```\n" + formatted_output + "\n```")
+            print_output(formatted_output)
             log_action("DiskPartition", "View Mounted Usage", "Uso de particiones montadas listado exitosamente (Windows).")
         else:
             print_error(f"Error al ver uso de particiones montadas: {output}")
@@ -201,16 +203,19 @@ def view_mounted_partition_usage():
         command = "df -hT" # -h: humano, -T: tipo de sistema de archivos
         output, status = execute_command(command)
         if status == 0:
-            print("```\n" + output + "\n```")
+            # La cabecera de df tiene una columna de dos palabras ("Mounted on"): se usan nombres propios
+            columns = ["Filesystem", "Type", "Size", "Used", "Avail", "Use%", "Mounted on"]
+            print_table(*parse_columns(output.split("\n", 1)[-1] if "\n" in output else "", columns))
             log_action("DiskPartition", "View Mounted Usage", "Uso de particiones montadas listado exitosamente (Linux).")
         else:
             print_error(f"Error al ver uso de particiones montadas: {output}")
             log_action("DiskPartition", "View Mounted Usage", f"Error al ver uso de particiones montadas: {output}")
 
+@returns_result
 def generate_disk_partition_log():
     """
     Genera un log consolidado de la gestión de particiones de disco.
-    La salida es impresa y capturada por la redirección de sys.stdout.
+    La salida se recoge en el resultado de la función (utils.result).
     """
     print_header("Generar Log de Particiones")
     log_action("DiskPartition", "Generate Log", "Generando log de gestión de particiones.")
@@ -0,0 +1,398 @@
+import collections
+import concurrent.futures
+import contextvars
+import os
+import queue
+import re
+import time
+import config
+from utils.display import print_success, print_error, print_warning
+from utils.system_info import execute_command
+from utils import capabilities
+from utils import docker_api
+from utils import docker_inventory
+from utils import jobs
+
+# Estados de los servicios
+PENDING = "pendiente"
+READY = "listo"
+FAILED = "error"
+SKIPPED = "omitido" # Depende de un servicio que falló
+
+# Qué se espera de cada servicio antes de arrancar los que dependen de él
+WAIT_PROBE = "sonda" # x-readiness: comando propio dentro del contenedor
+WAIT_HEALTH = "healthcheck"
+WAIT_COMPLETED = "finalizado" # condition: service_completed_successfully
+WAIT_RUNNING = "en ejecución"
+
+CONDITIONS = {"service_started", "service_healthy", "service_completed_successfully"}
+
+class ComposeService:
+    """Servicio de un archivo Compose con sus dependencias y los tiempos de su arranque."""
+
+    def __init__(self, name, depends_on, container_name=None, healthcheck=False, probe=None):
+        self.id = name
+        self.depends_on = depends_on # {servicio: condición}
+        self.container_name = container_name
+        self.healthcheck = healthcheck
+        self.probe = probe # {"command", "timeout", "interval"} o None
+        self.wait = WAIT_RUNNING
+        self.status = PENDING
+        self.started = None # Segundos desde el inicio del despliegue
+        self.start_time = 0.0 # Lo que tardó el arranque del contenedor
+        self.ready_time = 0.0 # Lo que tardó en estar listo después de arrancar
+        self.duration = 0.0
+        self.changed = True # False si el contenedor ya estaba en ejecución
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "service": self.id,
+            "status": self.status,
+            "depends_on": dict(self.depends_on),
+            "wait": self.wait,
+            "started": None if self.started is None else round(self.started, 3),
+            "start_time": round(self.start_time, 3),
+            "ready_time": round(self.ready_time, 3),
+            "duration": round(self.duration, 3),
+            "changed": self.changed,
+            "error": self.error,
+        }
+
+def _probe_settings(raw, name):
+    if isinstance(raw, str):
+        raw = {"command": raw}
+    if not isinstance(raw, dict) or not raw.get("command"):
+        raise ValueError(f"Servicio '{name}': 'x-readiness' necesita un 'command'.")
+    command = raw["command"]
+    try:
+        return {"command": command if isinstance(command, list) else str(command),
+                "timeout": float(raw.get("timeout") or config.DOCKER_COMPOSE_READY_TIMEOUT),
+                "interval": float(raw.get("interval") or config.DOCKER_COMPOSE_POLL_INTERVAL)}
+    except (TypeError, ValueError):
+        raise ValueError(f"Servicio '{name}': 'timeout' e 'interval' de 'x-readiness' deben ser números.")
+
+def load_compose(path):
+    """
+    Lee un archivo Compose y retorna (proyecto, servicios en orden). `depends_on`
+    puede ser una lista o un objeto con `condition` (service_started, service_healthy
+    o service_completed_successfully). Cada servicio puede declarar una sonda de
+    disponibilidad propia con `x-readiness: {command, timeout, interval}`, que se
+    ejecuta dentro del contenedor hasta que termina con código 0.
+    Lanza ValueError si el archivo no es válido o hay dependencias circulares.
+    """
+    try:
+        import yaml # Importación diferida: solo hace falta para el motor de Compose
+    except ImportError:
+        raise ValueError("El motor de Compose necesita PyYAML (pip install -r requirements.txt).")
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ValueError(f"YAML no válido: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get("services"), dict) or not data["services"]:
+        raise ValueError("El archivo debe contener un objeto 'services' con al menos un servicio.")
+
+    services = collections.OrderedDict()
+    for name, raw in data["services"].items():
+        raw = raw or {}
+        depends_on = raw.get("depends_on") or {}
+        if isinstance(depends_on, list):
+            depends_on = {str(dep): "service_started" for dep in depends_on}
+        elif isinstance(depends_on, dict):
+            depends_on = {str(dep): (options or {}).get("condition", "service_started")
+                          for dep, options in depends_on.items()}
+        else:
+            raise ValueError(f"Servicio '{name}': 'depends_on' debe ser una lista o un objeto.")
+        for dep, condition in depends_on.items():
+            if condition not in CONDITIONS:
+                raise ValueError(f"Servicio '{name}': condición desconocida '{condition}' para '{dep}'.")
+        healthcheck = raw.get("healthcheck") or {}
+        probe = _probe_settings(raw["x-readiness"], name) if raw.get("x-readiness") else None
+        services[str(name)] = ComposeService(str(name), depends_on, raw.get("container_name"),
+                                             bool(healthcheck) and not healthcheck.get("disable"), probe)
+
+    for service in services.values():
+        for dep, condition in service.depends_on.items():
+            if dep not in services:
+                raise ValueError(f"Servicio '{service.id}': depende de '{dep}', que no existe.")
+            if condition == "service_healthy" and not (services[dep].healthcheck or services[dep].probe):
+                # Como Compose: sin forma de comprobar la salud, la condición no puede cumplirse
+                raise ValueError(f"Servicio '{service.id}': la condición service_healthy exige que '{dep}' "
+                                 f"declare un 'healthcheck' o 'x-readiness'.")
+            if condition == "service_completed_successfully":
+                services[dep].wait = WAIT_COMPLETED
+        if service.wait != WAIT_COMPLETED:
+            service.wait = WAIT_PROBE if service.probe else WAIT_HEALTH if service.healthcheck else WAIT_RUNNING
+    _topological_order(services)
+    return project_name(path, data), list(services.values())
+
+def project_name(path, data):
+    """Nombre del proyecto como lo calcula Compose: `name`, COMPOSE_PROJECT_NAME o el directorio del archivo."""
+    name = data.get("name") or os.environ.get("COMPOSE_PROJECT_NAME") \
+        or os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return re.sub(r"[^a-z0-9_-]", "", str(name).lower())
+
+def compose_command(path, project):
+    """Prefijo de las órdenes de Compose: el plugin (docker compose) o, si no está, docker-compose."""
+    return f"{capabilities.get_compose_command()} -f \"{path}\" -p {project}"
+
+def _topological_order(services):
+    """Orden compatible con las dependencias. Lanza ValueError si hay un ciclo."""
+    remaining = {name: set(service.depends_on) for name, service in services.items()}
+    order = []
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependencias circulares entre los servicios: {', '.join(remaining)}.")
+        for name in ready:
+            del remaining[name]
+            order.append(name)
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+def plan_waves(services):
+    """Niveles de arranque (servicios cuyas dependencias están en niveles anteriores)."""
+    by_name = collections.OrderedDict((service.id, service) for service in services)
+    level = {}
+    for name in _topological_order(by_name):
+        level[name] = 1 + max((level[dep] for dep in by_name[name].depends_on), default=0)
+    waves = collections.defaultdict(list)
+    for service in services:
+        waves[level[service.id]].append(service)
+    return [waves[number] for number in sorted(waves)]
+
+def critical_path(services):
+    """
+    Camino más largo por las dependencias con los tiempos medidos: (segundos, servicios).
+    Por una arista service_started solo cuenta el arranque de la dependencia; por las
+    demás, hasta que estuvo lista.
+    """
+    by_name = collections.OrderedDict((service.id, service) for service in services)
+    begin, finish, previous = {}, {}, {}
+    for name in _topological_order(by_name):
+        service = by_name[name]
+        release = {dep: begin[dep] + (by_name[dep].start_time if condition == "service_started" else by_name[dep].duration)
+                   for dep, condition in service.depends_on.items()}
+        before = max(release, key=release.get, default=None)
+        begin[name] = release[before] if before is not None else 0.0
+        finish[name] = begin[name] + service.duration
+        previous[name] = before
+    if not finish:
+        return 0.0, []
+    last = max(finish, key=finish.get)
+    path = []
+    while last is not None:
+        path.append(last)
+        last = previous[last]
+    return finish[path[0]], list(reversed(path))
+
+class _Docker:
+    """
+    Operaciones sobre los contenedores del proyecto con el Docker Engine API si está
+    disponible y, si no, con el CLI. Las esperas se despiertan con los eventos del
+    inventario (utils.docker_inventory) cuando está activo, en lugar de consultar
+    al daemon a intervalos fijos.
+    """
+
+    def __init__(self, compose, project):
+        self.compose = compose
+        self.project = project
+        self.client = docker_api.get_client() if docker_api.is_enabled() else None
+        self.inventory = docker_inventory.get_inventory(wait=False)
+
+    def find(self, service):
+        """ID del contenedor del servicio (creado por `compose create`); None si no existe."""
+        if self.client is not None:
+            labels = [f"com.docker.compose.project={self.project}", f"com.docker.compose.service={service.id}"]
+            found = self.client.containers(all=True, filters={"label": labels})
+            return found[0]["Id"] if found else None
+        output, status = execute_command(f"{self.compose} ps -a -q {service.id}", sudo=True)
+        ids = output.split() if status == 0 else []
+        return ids[0] if ids else None
+
+    def start(self, container_id):
+        """Inicia el contenedor. Retorna False si ya estaba en ejecución."""
+        if self.client is not None:
+            return self.client.start(container_id)
+        output, status = execute_command(f"docker start {container_id}")
+        if status != 0:
+            raise docker_api.DockerAPIError(None, output.strip())
+        return True
+
+    def state(self, container_id):
+        """(estado, salud o '', código de salida) del contenedor."""
+        if self.client is not None:
+            state = self.client.inspect_container(container_id).get("State") or {}
+            return state.get("Status", ""), (state.get("Health") or {}).get("Status", ""), state.get("ExitCode", 0)
+        output, status = execute_command(
+            f'docker inspect --format "{{{{.State.Status}}}}|{{{{if .State.Health}}}}{{{{.State.Health.Status}}}}{{{{end}}}}|{{{{.State.ExitCode}}}}" {container_id}')
+        if status != 0:
+            raise docker_api.DockerAPIError(None, output.strip())
+        parts = output.strip().split("|")
+        return parts[0], parts[1] if len(parts) > 1 else "", int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 0
+
+    def probe(self, container_id, command, timeout):
+        """Ejecuta la sonda dentro del contenedor. Retorna True si terminó con código 0."""
+        if self.client is not None:
+            return self.client.exec(container_id, command, timeout=timeout)[1] == 0
+        if isinstance(command, list):
+            command = " ".join(f'"{part}"' for part in command)
+        else:
+            command = f"sh -c \"{command}\""
+        return execute_command(f"docker exec {container_id} {command}")[1] == 0
+
+    def pause(self, seconds):
+        """Espera hasta `seconds`, o menos si el inventario recibe un evento del daemon."""
+        if self.inventory is not None and self.inventory.is_live():
+            self.inventory.wait_for_change(self.inventory.version, seconds)
+        else:
+            time.sleep(seconds)
+
+def _wait_ready(docker, service, container_id):
+    """Espera a que el servicio cumpla su condición de disponibilidad. Lanza RuntimeError si no la cumple."""
+    timeout = service.probe["timeout"] if service.probe else config.DOCKER_COMPOSE_READY_TIMEOUT
+    interval = service.probe["interval"] if service.probe else config.DOCKER_COMPOSE_POLL_INTERVAL
+    deadline = time.monotonic() + timeout
+    while True:
+        if jobs.cancel_requested():
+            raise RuntimeError("despliegue cancelado")
+        status, health, exit_code = docker.state(container_id)
+        if service.wait == WAIT_COMPLETED:
+            if status in ("exited", "dead"):
+                if exit_code == 0:
+                    return
+                raise RuntimeError(f"terminó con código {exit_code}")
+        elif status in ("exited", "dead"):
+            raise RuntimeError(f"el contenedor se detuvo (código {exit_code})")
+        elif status == "running":
+            if service.wait == WAIT_RUNNING and health:
+                service.wait = WAIT_HEALTH # La imagen trae su propio HEALTHCHECK
+            if service.wait == WAIT_PROBE:
+                if docker.probe(container_id, service.probe["command"], max(1.0, deadline - time.monotonic())):
+                    return
+            elif service.wait == WAIT_HEALTH:
+                if health == "healthy":
+                    return
+                if health == "unhealthy":
+                    raise RuntimeError("el healthcheck lo marcó como 'unhealthy'")
+            else:
+                return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RuntimeError(f"no estuvo listo en {timeout:.0f}s (espera: {service.wait}, estado: {health or status})")
+        docker.pause(min(interval, remaining))
+
+def _start_service(docker, service, started):
+    """
+    Arranca el contenedor del servicio, avisa con `started()` (las dependencias
+    service_started ya se cumplen) y espera a que esté listo. Retorna el error o None.
+    """
+    begin = time.monotonic()
+    try:
+        container_id = docker.find(service)
+        if container_id is None:
+            return "no se encontró su contenedor (¿falló 'compose create'?)"
+        service.changed = docker.start(container_id)
+        service.start_time = time.monotonic() - begin
+        started()
+        _wait_ready(docker, service, container_id)
+        return None
+    except docker_api.DockerAPIError as e:
+        return e.message
+    except Exception as e:
+        return str(e)
+    finally:
+        service.ready_time = time.monotonic() - begin - service.start_time
+        service.duration = time.monotonic() - begin
+
+def _skip_dependents(service, dependents, remaining, by_name):
+    """Omite los servicios que aún esperaban a `service` (y los que dependen de ellos)."""
+    pending = [dependent_id for dependent_id in dependents[service.id] if service.id in remaining[dependent_id]]
+    while pending:
+        dependent = by_name[pending.pop()]
+        if dependent.status == PENDING:
+            dependent.status = SKIPPED
+            dependent.error = f"depende de '{service.id}', que falló"
+            pending.extend(dependents[dependent.id])
+
+def execute_services(services, compose, project, parallelism):
+    """
+    Arranca los contenedores ya creados del proyecto respetando `depends_on`, con la
+    condición de cada arista: service_started en cuanto la dependencia arranca,
+    service_healthy cuando está lista (healthcheck o sonda) y
+    service_completed_successfully cuando termina con código 0. Los independientes
+    arrancan en paralelo (como mucho `parallelism` a la vez). Si un servicio falla,
+    los que aún lo esperaban se omiten; si se cancela el trabajo, no se arranca
+    ninguno más. Retorna el tiempo total.
+    """
+    docker = _Docker(compose, project)
+    by_name = {service.id: service for service in services}
+    dependents = {service.id: [] for service in services}
+    remaining = {}
+    for service in services:
+        remaining[service.id] = set(service.depends_on)
+        for dep in service.depends_on:
+            dependents[dep].append(service.id)
+
+    def release(service, started_only):
+        for dependent_id in dependents[service.id]:
+            dependent = by_name[dependent_id]
+            if started_only and dependent.depends_on[service.id] != "service_started":
+                continue
+            remaining[dependent_id].discard(service.id)
+            if not remaining[dependent_id] and dependent.status == PENDING and dependent not in ready:
+                ready.append(dependent)
+
+    # Los hilos avisan por esta cola: (servicio, True) al arrancar y (servicio, False) al terminar
+    events = queue.Queue()
+    def run(service):
+        error = _start_service(docker, service, lambda: events.put((service, True)))
+        service.error = error
+        events.put((service, False))
+
+    ready = [service for service in services if not service.depends_on]
+    running = 0
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max(1, parallelism), thread_name_prefix="compose") as pool:
+        while ready or running:
+            if jobs.cancel_requested():
+                _skip_cancelled(ready)
+                ready.clear()
+                if not running:
+                    break
+            while ready and running < parallelism:
+                service = ready.pop(0)
+                service.started = time.monotonic() - start
+                running += 1
+                pool.submit(contextvars.copy_context().run, run, service)
+
+            service, started = events.get()
+            if started:
+                release(service, started_only=True)
+                continue
+            running -= 1
+            service.status = FAILED if service.error else READY
+            _report_service(service)
+            if service.status == FAILED:
+                _skip_dependents(service, dependents, remaining, by_name)
+            else:
+                release(service, started_only=False)
+    _skip_cancelled(service for service in services if service.status == PENDING)
+    return time.monotonic() - start
+
+def _skip_cancelled(services):
+    for service in services:
+        service.status = SKIPPED
+        service.error = "despliegue cancelado"
+
+
+def _report_service(service):
+    label = f"[{service.id}] arranque {service.start_time:.2f}s + espera ({service.wait}) {service.ready_time:.2f}s"
+    if service.status == FAILED:
+        print_error(f"{label}: {service.error}")
+    elif not service.changed:
+        print_warning(f"{label} (ya estaba en ejecución)")
+    else:
+        print_success(label)
@@ -1,61 +1,68 @@
+import concurrent.futures
+import contextvars
+import fnmatch
 import os
+import re
 import sys
-from utils.display import clear_screen, print_menu, print_warning, print_header, print_info, print_success, print_error, get_user_input, IS_GUI_MODE
+import time
+import config
+from utils.display import clear_screen, print_menu, print_warning, print_header, print_info, print_success, print_error, get_user_input, print_output, print_table, IS_GUI_MODE
+from utils.result import returns_result
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
+from utils import docker_api
+from utils import docker_inventory
+from utils import docker_stats
+from utils import docker_logs
+from utils import jobs
+from modules.docker import compose_engine
 
 #Funciones Auxiliares Internas
 
 #Comprobar que docker este corriendo
+def _probe_docker_cli():
+    """
+    Comprobación sin socket local (Windows, DOCKER_HOST remoto): pregunta al daemon
+    a través del CLI. Retorna (vivo, error).
+    """
+    output, status = execute_command('docker version --format "{{.Server.Version}}"')
+    if status == 0 and output.strip():
+        return True, None
+    return False, output.strip() or "el daemon no respondió"
+
 def _check_docker_daemon_status():
     """
-    Verifica si el demonio de Docker está corriendo.
+    Verifica si el demonio de Docker responde (con /_ping sobre su socket, lo que
+    también cubre Docker rootless o activado por socket). El estado se cachea unos
+    segundos (utils.docker_api.daemon_status), así que las operaciones seguidas no
+    lanzan una comprobación cada una.
     Retorna True si está corriendo, False en caso contrario.
     """
-    os_type = get_os_type()
-    command = ""
-    
-    if os_type == 'linux':
-        command = "systemctl is-active docker"
-    elif os_type == 'windows':
-        # Comprobamos si el proceso 'Docker Desktop.exe' está en ejecución.
-        command = "tasklist /FI \"IMAGENAME eq Docker Desktop.exe\""
-    else:
-        print_warning("No se puede verificar el estado del demonio de Docker en este sistema operativo.")
-        return True # Asumimos que está bien si no podemos verificar (caso inesperado de SO)
-
-    output, status = execute_command(command)
+    alive, error = docker_api.daemon_status(probe=None if docker_api.is_enabled() else _probe_docker_cli)
+    if alive:
+        return True
 
-    if os_type == 'linux':
-        if status == 0 and "active" in output.lower():
-            return True
-        else:
-            print_error("El demonio de Docker NO está activo. Por favor, inícielo (`sudo systemctl start docker`).")
-            log_action("Docker", "Check Daemon Status", "Demón de Docker no activo (Linux).")
-            return False
-    elif os_type == 'windows':
-        if status == 0 and "Docker Desktop.exe" in output:
-            return True
-        else:
-            print_error("El proceso 'Docker Desktop.exe' NO está corriendo. Por favor, inicie Docker Desktop.")
-            log_action("Docker", "Check Daemon Status", "Proceso Docker Desktop.exe no encontrado (Windows).")
-            return False
-    
-    return True # Fallback en caso de que ninguna condición se cumpla
+    if get_os_type() == 'windows':
+        print_error("El daemon de Docker NO responde. Por favor, inicie Docker Desktop.")
+    else:
+        print_error("El demonio de Docker NO está activo. Por favor, inícielo (`sudo systemctl start docker`).")
+    log_action("Docker", "Check Daemon Status", f"Daemon de Docker no disponible: {error}")
+    return False
 
 #Ejecutar comando de docker
-def _execute_docker_command(command: str, action_type: str, success_msg: str, error_prefix: str, cwd: str = None):
+def _execute_docker_command(command: str, action_type: str, success_msg: str, error_prefix: str, cwd: str = None,
+                            columns: list = None):
     """
     Función auxiliar para ejecutar comandos de Docker y manejar la salida.
-    Adapta el comportamiento si está en modo GUI o CLI.
     Añade un parámetro 'cwd' para especificar el directorio de trabajo.
+    Si se indican 'columns', la salida (campos separados por tabuladores) se muestra como tabla.
     """
     # 1. Verificar el estado del demonio de Docker antes de ejecutar cualquier comando
     if not _check_docker_daemon_status():
         err_msg = "El demonio de Docker no está activo. No se puede ejecutar el comando."
         print_error(err_msg)
         log_action("Docker", action_type, f"Fallo (Demón no activo): {err_msg}")
-        return err_msg if IS_GUI_MODE else None # Retorna el mensaje de error para la GUI
+        return err_msg
 
     print_info(f"Ejecutando: docker {command}")
     
@@ -66,15 +73,12 @@ def _execute_docker_command(command: str, action_type: str, success_msg: str, er
         if success_msg:
             print_success(success_msg)
         
-        # 3. Manejo de la salida: imprimir en CLI, retornar en GUI
-        if output.strip():
-            if IS_GUI_MODE:
-                result = output.strip()
-            else:
-                print(output.strip())
-                result = "" # No retorna nada si ya lo imprimió
-        else:
-            result = "" # No hay salida, retorna vacío
+        # 3. Manejo de la salida: queda en el resultado (utils.result) para la CLI y la GUI
+        result = output.strip()
+        if result and columns:
+            print_table(columns, [line.split("\t") for line in result.splitlines()])
+        elif result:
+            print_output(result)
 
         log_action("Docker", action_type, f"Comando 'docker {command}' ejecutado exitosamente.")
         return result
@@ -85,27 +89,196 @@ def _execute_docker_command(command: str, action_type: str, success_msg: str, er
         log_action("Docker", action_type, full_error_msg)
         return full_error_msg # Retorna el error para mostrar en la GUI
 
+#Ejecutar operación con el Docker Engine API
+def _execute_docker_api(operation, action_type: str, success_msg: str, error_prefix: str, show=None):
+    """
+    Equivalente a _execute_docker_command para las operaciones que van por el
+    Docker Engine API (utils.docker_api): `operation` recibe el cliente y retorna
+    el resultado estructurado de la operación, que es lo que se retorna (y lo que
+    recibe `show`, si se indica, para mostrarlo). Si el daemon responde con un
+    error, se imprime y se retorna el mensaje.
+    """
+    start = time.monotonic()
+    try:
+        value = operation(docker_api.get_client())
+    except docker_api.DockerCancelled:
+        # Trabajo cancelado (GUI o API): se cortó la conexión y el daemon interrumpe la operación
+        print_warning(f"{error_prefix}: operación cancelada.")
+        log_action("Docker", action_type, "Operación cancelada.", duration=time.monotonic() - start, status=1)
+        return "Operación cancelada."
+    except docker_api.DockerAPIError as e:
+        full_error_msg = f"{error_prefix}: {e.message}"
+        print_error(full_error_msg)
+        log_action("Docker", action_type, full_error_msg, duration=time.monotonic() - start, status=1)
+        return full_error_msg
+    if success_msg:
+        print_success(success_msg)
+    if show is not None:
+        show(value)
+    log_action("Docker", action_type, f"Operación '{action_type}' ejecutada exitosamente (Docker Engine API).",
+               duration=time.monotonic() - start, status=0)
+    return value
+
+def _format_ports(ports: list) -> str:
+    """Puertos de /containers/json con el formato de `docker ps`."""
+    formatted = []
+    for port in ports or []:
+        private = f"{port.get('PrivatePort')}/{port.get('Type', 'tcp')}"
+        if port.get("PublicPort"):
+            formatted.append(f"{port.get('IP', '0.0.0.0')}:{port['PublicPort']}->{private}")
+        else:
+            formatted.append(private)
+    return ", ".join(dict.fromkeys(formatted))
+
+def _container_rows(containers: list) -> list:
+    """Filas de la tabla de contenedores a partir de los dicts de /containers/json."""
+    return [[container["Id"][:12], ", ".join(name.lstrip("/") for name in container.get("Names") or []),
+             container.get("Image", ""), container.get("Status", ""), _format_ports(container.get("Ports"))]
+            for container in containers]
+
+CONTAINER_COLUMNS = ["CONTAINER ID", "NAMES", "IMAGE", "STATUS", "PORTS"]
+
 #Funciones de Gestion de Docker
 #Listamos todos los contenedores de docker
-def list_docker_containers():
-    """Lista todos los contenedores Docker (activos e inactivos)."""
+@returns_result
+def list_docker_containers(name_filter: str = '', state: str = ''):
+    """
+    Lista todos los contenedores Docker (activos e inactivos), opcionalmente filtrados
+    por nombre (subcadena o comodines) y estado (running, exited...). Con el inventario
+    en memoria (utils.docker_inventory) se responde sin consultar al daemon.
+    """
     print_header("Listar Contenedores Docker")
-    # Formato de tabla para una salida legible
-    command = 'ps -a --format "table {{.ID}}\t{{.Names}}\t{{.Image}}\t{{.Status}}\t{{.Ports}}"'
+    inventory = docker_inventory.get_inventory()
+    if inventory is not None:
+        containers = inventory.containers(name=name_filter or None, state=state or None)
+        print_success("Contenedores Docker:")
+        print_table(CONTAINER_COLUMNS, _container_rows(containers))
+        log_action("Docker", "List Containers", f"{len(containers)} contenedores listados desde el inventario en memoria.")
+        return containers
+    filters = {key: [value] for key, value in (("name", name_filter), ("status", state)) if value}
+    if docker_api.is_enabled():
+        return _execute_docker_api(
+            lambda client: client.containers(all=True, filters=filters or None),
+            "List Containers",
+            "Contenedores Docker:",
+            "Error al listar contenedores",
+            show=lambda containers: print_table(CONTAINER_COLUMNS, _container_rows(containers))
+        )
+    # Campos separados por tabuladores, que se muestran como tabla
+    command = 'ps -a --format "{{.ID}}\t{{.Names}}\t{{.Image}}\t{{.Status}}\t{{.Ports}}"'
+    command += "".join(f' --filter "{key}={values[0]}"' for key, values in filters.items())
     return _execute_docker_command(
         command,
         "List Containers",
         "Contenedores Docker:",
-        "Error al listar contenedores"
+        "Error al listar contenedores",
+        columns=CONTAINER_COLUMNS
     )
 
+#Consultamos el estado de un contenedor
+@returns_result
+def get_docker_container_status(container_id_name: str):
+    """
+    Muestra el estado (y el del healthcheck, si lo tiene) de un contenedor.
+    Retorna un dict con name, state, health y status, o None si no existe.
+    """
+    print_header(f"Estado del Contenedor Docker: {container_id_name}")
+    if not container_id_name:
+        return print_error("El ID o nombre del contenedor no puede estar vacío.")
+
+    inventory = docker_inventory.get_inventory()
+    if inventory is not None:
+        container = inventory.get_container(container_id_name)
+        info = container and {"name": docker_inventory.container_name(container), "state": container.get("State", ""),
+                              "health": docker_inventory.container_health(container), "status": container.get("Status", "")}
+    elif docker_api.is_enabled():
+        try:
+            state = docker_api.get_client().inspect_container(container_id_name)
+        except docker_api.DockerAPIError as e:
+            if e.status != 404:
+                return print_error(f"Error al consultar el contenedor '{container_id_name}': {e.message}")
+            state = None
+        info = state and {"name": state.get("Name", "").lstrip("/"), "state": state["State"].get("Status", ""),
+                          "health": (state["State"].get("Health") or {}).get("Status", ""),
+                          "status": state["State"].get("Status", "")}
+    else:
+        output, status = execute_command(
+            f'docker inspect --format "{{{{.Name}}}}\t{{{{.State.Status}}}}\t'
+            f'{{{{if .State.Health}}}}{{{{.State.Health.Status}}}}{{{{end}}}}" {container_id_name}')
+        fields = output.strip().split("\t") if status == 0 else None
+        info = fields and {"name": fields[0].lstrip("/"), "state": fields[1],
+                           "health": fields[2] if len(fields) > 2 else "", "status": fields[1]}
+
+    if not info:
+        print_error(f"El contenedor '{container_id_name}' no existe.")
+        return None
+    print_table(["NOMBRE", "ESTADO", "SALUD", "STATUS"],
+                [[info["name"], info["state"], info["health"] or "-", info["status"]]])
+    log_action("Docker", f"Container Status {container_id_name}", f"Estado: {info['state']} {info['health']}".strip())
+    return info
+
+#Uso de recursos de los contenedores
+@returns_result
+def show_docker_container_stats(sort_by: str = 'cpu', limit: str = ''):
+    """
+    Muestra los contenedores en ejecución ordenados por uso de recursos (cpu, mem,
+    net, io o name): CPU, memoria frente a su límite y tasas de red y disco.
+    limit puede ser un string vacío (todos) o un número.
+    """
+    print_header("Uso de Recursos de Contenedores Docker")
+    if sort_by not in docker_stats.SORT_KEYS:
+        return print_error(f"Orden no válido: '{sort_by}'. Opciones: {', '.join(docker_stats.SORT_KEYS)}.")
+    top = int(limit) if limit and str(limit).isdigit() else None
+
+    if not docker_api.is_enabled():
+        # Sin socket solo queda `docker stats`, que muestra totales acumulados de red y disco
+        return _execute_docker_command(
+            'stats --no-stream --format "{{.ID}}\t{{.Name}}\t{{.CPUPerc}}\t{{.MemUsage}}\t{{.MemPerc}}\t{{.NetIO}}\t{{.BlockIO}}\t{{.PIDs}}"',
+            "Container Stats",
+            "Uso de recursos de los contenedores:",
+            "Error al obtener las estadísticas de los contenedores",
+            columns=["CONTAINER ID", "NAME", "CPU %", "MEM", "MEM %", "NET I/O", "BLOCK I/O", "PIDS"]
+        )
+
+    start = time.monotonic()
+    engine = docker_stats.get_stats_engine()
+    try:
+        rows = engine.top(sort_by, top)
+        # La primera consulta necesita una segunda muestra para calcular las tasas
+        deadline = start + config.DOCKER_STATS_WARMUP
+        while any(not row["ready"] for row in rows) and time.monotonic() < deadline and not jobs.cancel_requested():
+            time.sleep(0.25)
+            rows = engine.top(sort_by, top)
+    except docker_api.DockerAPIError as e:
+        full_error_msg = f"Error al obtener las estadísticas de los contenedores: {e.message}"
+        print_error(full_error_msg)
+        log_action("Docker", "Container Stats", full_error_msg, duration=time.monotonic() - start, status=1)
+        return full_error_msg
+
+    if not rows:
+        print_info("No hay contenedores en ejecución.")
+    else:
+        print_table(docker_stats.STATS_COLUMNS, [docker_stats.format_row(row) for row in rows])
+    log_action("Docker", "Container Stats", f"Estadísticas de {len(rows)} contenedores (orden: {sort_by}).",
+               duration=time.monotonic() - start, status=0)
+    return rows
+
 #Arrancamos contenedor docker por nombre
+@returns_result
 def start_docker_container(container_id_name: str):
     """Inicia un contenedor Docker."""
     print_header(f"Iniciar Contenedor Docker: {container_id_name}")
     if not container_id_name:
         return print_error("El ID o nombre del contenedor no puede estar vacío.")
 
+    if docker_api.is_enabled():
+        return _execute_docker_api(
+            lambda client: client.start(container_id_name),
+            f"Start Container {container_id_name}",
+            f"Contenedor '{container_id_name}' iniciado exitosamente.",
+            f"Error al iniciar contenedor '{container_id_name}'"
+        )
+
     return _execute_docker_command(
         f"start {container_id_name}",
         f"Start Container {container_id_name}",
@@ -113,7 +286,17 @@ def start_docker_container(container_id_name: str):
         f"Error al iniciar contenedor '{container_id_name}'"
     )
 
+def _execute_in_container_cli(container_name: str, command: str) -> tuple[str, int]:
+    """docker exec con el CLI (sin socket del Docker Engine API)."""
+    # Usamos sh -c para que el comando se interprete correctamente,
+    # lo que es útil para comandos con pipes, redirecciones, etc.
+    docker_command = f'docker exec {container_name} sh -c "{command}"'
+
+    print_info(f"Ejecutando '{command}' en el contenedor '{container_name}'...")
+    return execute_command(docker_command, sudo=True) # docker commands usually require sudo
+
 #Ejecutar comando en contenedor
+@returns_result
 def execute_command_in_container(container_name: str, command: str) -> tuple[str, int]:
     """
     Ejecuta un comando dentro de un contenedor Docker específico.
@@ -138,18 +321,19 @@ def execute_command_in_container(container_name: str, command: str) -> tuple[str
         log_action("Docker", "Execute Command in Container", "Error: Comando vacío.")
         return "Error: El comando a ejecutar no puede estar vacío.", 1
     
-    # Construir el comando docker exec
-    # Usamos sh -c para que el comando se interprete correctamente,
-    # lo que es útil para comandos con pipes, redirecciones, etc.
-    docker_command = f'docker exec {container_name} sh -c "{command}"'
-    
-    print_info(f"Ejecutando '{command}' en el contenedor '{container_name}'...")
-    output, status = execute_command(docker_command, sudo=True) # docker commands usually require sudo
+    if docker_api.is_enabled():
+        print_info(f"Ejecutando '{command}' en el contenedor '{container_name}' (Docker Engine API)...")
+        try:
+            output, status = docker_api.get_client().exec(container_name, command)
+        except docker_api.DockerAPIError as e:
+            output, status = e.message, 1
+    else:
+        output, status = _execute_in_container_cli(container_name, command)
 
     if status == 0:
         print_success(f"Comando ejecutado exitosamente en '{container_name}'.")
         print_info("Salida del comando:")
-        print_info(output) # Imprime la salida del comando dentro del contenedor
+        print_output(output) # Imprime la salida del comando dentro del contenedor
         log_action("Docker", "Execute Command in Container", 
                    f"Comando '{command}' ejecutado en '{container_name}'. Salida: {output.strip()[:100]}...")
     else:
@@ -160,12 +344,21 @@ def execute_command_in_container(container_name: str, command: str) -> tuple[str
     return output, status
 
 #Paramos contenedor docker por nombre
+@returns_result
 def stop_docker_container(container_id_name: str):
     """Detiene un contenedor Docker."""
     print_header(f"Detener Contenedor Docker: {container_id_name}")
     if not container_id_name:
         return print_error("El ID o nombre del contenedor no puede estar vacío.")
 
+    if docker_api.is_enabled():
+        return _execute_docker_api(
+            lambda client: client.stop(container_id_name),
+            f"Stop Container {container_id_name}",
+            f"Contenedor '{container_id_name}' detenido exitosamente.",
+            f"Error al detener contenedor '{container_id_name}'"
+        )
+
     return _execute_docker_command(
         f"stop {container_id_name}",
         f"Stop Container {container_id_name}",
@@ -174,12 +367,21 @@ def stop_docker_container(container_id_name: str):
     )
 
 #Reiniciamos un contenedor docker por nombre
+@returns_result
 def restart_docker_container(container_id_name: str):
     """Reinicia un contenedor Docker."""
     print_header(f"Reiniciar Contenedor Docker: {container_id_name}")
     if not container_id_name:
         return print_error("El ID o nombre del contenedor no puede estar vacío.")
 
+    if docker_api.is_enabled():
+        return _execute_docker_api(
+            lambda client: client.restart(container_id_name),
+            f"Restart Container {container_id_name}",
+            f"Contenedor '{container_id_name}' reiniciado exitosamente.",
+            f"Error al reiniciar contenedor '{container_id_name}'"
+        )
+
     return _execute_docker_command(
         f"restart {container_id_name}",
         f"Restart Container {container_id_name}",
@@ -188,6 +390,7 @@ def restart_docker_container(container_id_name: str):
     )
 
 #Eliminamos contenedor docker por nombre
+@returns_result
 def remove_docker_container(container_id_name: str, confirm: str = 'n'):
     """Elimina un contenedor Docker."""
     print_header(f"Eliminar Contenedor Docker: {container_id_name}")
@@ -206,6 +409,14 @@ def remove_docker_container(container_id_name: str, confirm: str = 'n'):
         print_info("Operación de eliminación cancelada por el usuario.")
         return "Operación de eliminación cancelada por el usuario."
 
+    if docker_api.is_enabled():
+        return _execute_docker_api(
+            lambda client: client.remove(container_id_name),
+            f"Remove Container {container_id_name}",
+            f"Contenedor '{container_id_name}' eliminado exitosamente.",
+            f"Error al eliminar contenedor '{container_id_name}'"
+        )
+
     return _execute_docker_command(
         f"rm {container_id_name}",
         f"Remove Container {container_id_name}",
@@ -213,7 +424,175 @@ def remove_docker_container(container_id_name: str, confirm: str = 'n'):
         f"Error al eliminar contenedor '{container_id_name}'"
     )
 
+#OPERACIONES EN LOTE
+def _all_containers() -> list:
+    """Todos los contenedores como dicts de /containers/json (inventario, API o CLI)."""
+    inventory = docker_inventory.get_inventory()
+    if inventory is not None:
+        return inventory.containers()
+    if docker_api.is_enabled():
+        return docker_api.get_client().containers(all=True)
+    output, status = execute_command('docker ps -a --format "{{.ID}}\t{{.Names}}\t{{.State}}\t{{.Labels}}"')
+    if status != 0:
+        raise docker_api.DockerAPIError(None, output.strip() or "no se pudieron listar los contenedores")
+    containers = []
+    for line in output.splitlines():
+        fields = (line.split("\t") + ["", "", ""])[:4]
+        labels = dict(label.partition("=")[::2] for label in fields[3].split(",") if label)
+        containers.append({"Id": fields[0], "Names": ["/" + fields[1]], "State": fields[2], "Labels": labels})
+    return containers
+
+def _select_containers(selector: str) -> list:
+    """
+    Nombres de los contenedores que indica un selector: lista separada por comas o
+    espacios de nombres o IDs, comodines (cliente*) y etiquetas (label=clave o
+    label=clave=valor). Los nombres exactos se mantienen aunque no existan (el
+    daemon informa del error en su fila).
+    """
+    tokens = [token for token in re.split(r"[,\s]+", selector or "") if token]
+    containers = None
+    selected = []
+    for token in tokens:
+        if token.startswith("label=") or any(c in token for c in "*?["):
+            if containers is None:
+                containers = _all_containers()
+            if token.startswith("label="):
+                matches = [c for c in containers if docker_inventory.container_matches(c, label=token[6:])]
+            else:
+                matches = [c for c in containers if any(fnmatch.fnmatchcase(name.lstrip("/"), token)
+                                                         for name in c.get("Names") or [])]
+            names = [docker_inventory.container_name(c) for c in matches]
+        else:
+            names = [token]
+        selected.extend(name for name in names if name not in selected)
+    return selected
+
+def _bulk_operation(title: str, operation: str, selector: str, run_one, parallel: str = ''):
+    """
+    Ejecuta `run_one(contenedor)` para cada contenedor del selector con como mucho
+    `parallel` (o DOCKER_BULK_PARALLELISM) a la vez, así que el total lo marca el
+    más lento y no la suma. El daemon se comprueba una sola vez. `run_one` retorna
+    False si el contenedor ya estaba en el estado pedido. Muestra y retorna una fila
+    por contenedor (container, status, duration, message).
+    """
+    if not selector:
+        return print_error("Indique los contenedores: nombres, comodines (web*) o etiquetas (label=clave=valor).")
+    if not _check_docker_daemon_status():
+        return print_error("El demonio de Docker no está activo. No se puede ejecutar la operación.")
+    try:
+        names = _select_containers(selector)
+    except docker_api.DockerAPIError as e:
+        return print_error(f"Error al seleccionar contenedores: {e.message}")
+    if not names:
+        print_warning(f"Ningún contenedor coincide con '{selector}'.")
+        return []
+    workers = max(1, min(int(parallel) if str(parallel).isdigit() else config.DOCKER_BULK_PARALLELISM, len(names)))
+    print_info(f"{title}: {len(names)} contenedores, {workers} a la vez...")
+
+    def run(name):
+        start = time.monotonic()
+        if jobs.cancel_requested():
+            return {"container": name, "status": "error", "duration": 0.0, "message": "operación cancelada"}
+        try:
+            changed = run_one(name)
+            status, message = ("ok", "") if changed is not False else ("sin cambios", "ya estaba en ese estado")
+        except docker_api.DockerAPIError as e:
+            status, message = "error", e.message
+        except Exception as e:
+            status, message = "error", str(e)
+        return {"container": name, "status": status, "duration": round(time.monotonic() - start, 3), "message": message}
+
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docker-bulk") as pool:
+        # Con el contexto del trabajo: al cancelarlo se cortan las peticiones en curso
+        results = list(pool.map(lambda name: contextvars.copy_context().run(run, name), names))
+    elapsed = time.monotonic() - start
+
+    print_table(["CONTENEDOR", "RESULTADO", "DURACIÓN (s)", "MENSAJE"],
+                [[r["container"], r["status"], f"{r['duration']:.2f}", r["message"]] for r in results])
+    failed = [r for r in results if r["status"] == "error"]
+    summary = (f"{len(results) - len(failed)} de {len(results)} contenedores correctos en {elapsed:.2f} s "
+               f"(suma de las operaciones: {sum(r['duration'] for r in results):.2f} s).")
+    if failed:
+        print_error(summary)
+    else:
+        print_success(summary)
+    log_action("Docker", f"Bulk {operation}", f"{summary} Selector: '{selector}'." +
+               "".join(f" {r['container']}: {r['message']}." for r in failed),
+               duration=elapsed, status=1 if failed else 0)
+    return results
+
+def _cli_operation(command: str):
+    """Operación de un contenedor con el CLI, para cuando no hay Docker Engine API."""
+    def run_one(name):
+        output, status = execute_command(command.format(name=name))
+        if status != 0:
+            raise docker_api.DockerAPIError(None, output.strip())
+        return True
+    return run_one
+
+def _stop_timeout(timeout: str) -> int:
+    return int(timeout) if str(timeout).isdigit() else config.DOCKER_BULK_STOP_TIMEOUT
+
+@returns_result
+def bulk_start_containers(selector: str, parallel: str = ''):
+    """Inicia a la vez varios contenedores (nombres, comodines o label=clave=valor)."""
+    print_header(f"Iniciar Contenedores en Lote: {selector}")
+    if docker_api.is_enabled():
+        run_one = lambda name: docker_api.get_client().start(name)
+    else:
+        run_one = _cli_operation("docker start {name}")
+    return _bulk_operation("Iniciando", "Start", selector, run_one, parallel)
+
+@returns_result
+def bulk_stop_containers(selector: str, parallel: str = '', timeout: str = ''):
+    """
+    Detiene a la vez varios contenedores. `timeout` son los segundos que tiene cada
+    contenedor para terminar antes de recibir SIGKILL (DOCKER_BULK_STOP_TIMEOUT por defecto).
+    """
+    print_header(f"Detener Contenedores en Lote: {selector}")
+    seconds = _stop_timeout(timeout)
+    if docker_api.is_enabled():
+        run_one = lambda name: docker_api.get_client().stop(name, timeout=seconds)
+    else:
+        run_one = _cli_operation(f"docker stop -t {seconds} {{name}}")
+    return _bulk_operation("Deteniendo", "Stop", selector, run_one, parallel)
+
+@returns_result
+def bulk_restart_containers(selector: str, parallel: str = '', timeout: str = ''):
+    """Reinicia a la vez varios contenedores (`timeout` como en bulk_stop_containers)."""
+    print_header(f"Reiniciar Contenedores en Lote: {selector}")
+    seconds = _stop_timeout(timeout)
+    if docker_api.is_enabled():
+        run_one = lambda name: docker_api.get_client().restart(name, timeout=seconds)
+    else:
+        run_one = _cli_operation(f"docker restart -t {seconds} {{name}}")
+    return _bulk_operation("Reiniciando", "Restart", selector, run_one, parallel)
+
+@returns_result
+def bulk_remove_containers(selector: str, confirm: str = 'n', parallel: str = ''):
+    """Elimina a la vez varios contenedores (detenidos; los que estén en ejecución dan error)."""
+    print_header(f"Eliminar Contenedores en Lote: {selector}")
+    if not IS_GUI_MODE:
+        user_confirm = get_user_input(
+            f"¿Está seguro de que desea eliminar los contenedores '{selector}'? Esta acción es irreversible (s/N)"
+        ).lower()
+        if user_confirm != 's':
+            print_info("Operación de eliminación cancelada.")
+            log_action("Docker", "Bulk Remove", "Eliminación en lote cancelada por el usuario.")
+            return None
+    elif confirm.lower() != 's':
+        print_info("Operación de eliminación cancelada por el usuario.")
+        return "Operación de eliminación cancelada por el usuario."
+
+    if docker_api.is_enabled():
+        run_one = lambda name: docker_api.get_client().remove(name)
+    else:
+        run_one = _cli_operation("docker rm {name}")
+    return _bulk_operation("Eliminando", "Remove", selector, run_one, parallel)
+
 #Miramos los logs del contenedor docker
+@returns_result
 def view_docker_logs(container_id_name: str, num_lines: str = ''):
     """
     Muestra los logs de un contenedor Docker.
@@ -223,6 +602,16 @@ def view_docker_logs(container_id_name: str, num_lines: str = ''):
     if not container_id_name:
         return print_error("El ID o nombre del contenedor no puede estar vacío.")
 
+    if docker_api.is_enabled():
+        tail = num_lines if num_lines and num_lines.isdigit() else None
+        return _execute_docker_api(
+            lambda client: client.logs(container_id_name, tail=tail),
+            f"View Logs {container_id_name}",
+            f"Logs del contenedor '{container_id_name}':",
+            f"Error al ver logs del contenedor '{container_id_name}'",
+            show=lambda logs: print_output(logs.rstrip()) if logs.strip() else None
+        )
+
     command = f"logs {container_id_name}"
     if num_lines and num_lines.isdigit():
         command += f" -n {num_lines}"
@@ -234,7 +623,64 @@ def view_docker_logs(container_id_name: str, num_lines: str = ''):
         f"Error al ver logs del contenedor '{container_id_name}'"
     )
 
+#Seguimos los logs de varios contenedores a la vez
+@returns_result
+def follow_docker_logs(containers: str = '', pattern: str = '', since: str = '', until: str = '',
+                       follow: str = 's', tail: str = ''):
+    """
+    Muestra los logs de varios contenedores a la vez, cada línea con el nombre de su
+    contenedor (ej. "web,db,dns" o "cliente*"; vacío para todos los que están en
+    ejecución), filtrados por una expresión regular y una ventana de tiempo (since y
+    until: 10m, 2h, AAAA-MM-DD HH:MM...). Con follow='s' sigue mostrando las líneas
+    nuevas hasta Ctrl+C; si no, muestra las existentes y retorna la lista de líneas.
+    """
+    print_header("Seguir Logs de Contenedores Docker")
+    follow_mode = follow.lower() == 's'
+    try:
+        names = docker_logs.resolve_containers(containers)
+    except docker_api.DockerAPIError as e:
+        return print_error(f"Error al obtener los contenedores: {e.message}")
+    if not names:
+        return print_error("No hay contenedores en ejecución que coincidan.")
+    if not tail and not since:
+        tail = str(config.DOCKER_LOG_DEFAULT_TAIL)
+    try:
+        mux = docker_logs.LogMultiplexer(names, pattern or None, since or None, until or None, follow_mode,
+                                         tail if tail and tail.isdigit() else None)
+    except (ValueError, re.error) as e:
+        return print_error(f"Parámetros no válidos: {e}")
+
+    width = max(len(name) for name in names)
+    start = time.monotonic()
+    lines = []
+    count = 0 # En modo follow solo se cuentan: guardar cada línea crecería sin límite
+    print_info(f"Contenedores: {', '.join(names)}" + (f". Filtro: {pattern}" if pattern else ""))
+    unregister = jobs.on_cancel(mux.close) # Un trabajo cancelado deja de seguir los logs
+    try:
+        if follow_mode:
+            print_info("Presione Ctrl+C para dejar de seguir los logs.")
+            for line in mux.lines():
+                print(docker_logs.format_line(line, width), flush=True)
+                count += 1
+        else:
+            lines = list(mux.lines())
+            count = len(lines)
+            if lines:
+                print_output("\n".join(docker_logs.format_line(line, width) for line in lines))
+    except KeyboardInterrupt:
+        print()
+    finally:
+        unregister()
+        mux.close()
+
+    for container, error in mux.errors().items():
+        print_warning(f"No se pudieron leer los logs de '{container}': {error}")
+    log_action("Docker", "Follow Logs", f"{count} líneas de {', '.join(names)}" + (f" (filtro '{pattern}')" if pattern else ""),
+               duration=time.monotonic() - start, status=1 if len(mux.errors()) == len(names) else 0)
+    return count if follow_mode else [line._asdict() for line in lines]
+
 #Función para limpiar todas las imagenes docker instaladas
+@returns_result
 def clean_docker_images(confirm: str = 'n'):
     """Elimina todas las imágenes Docker no utilizadas."""
     print_header("Limpiar Imágenes Docker No Utilizadas")
@@ -251,6 +697,17 @@ def clean_docker_images(confirm: str = 'n'):
         print_info("Operación de limpieza de imágenes cancelada por el usuario.")
         return "Operación de limpieza de imágenes cancelada por el usuario."
 
+    if docker_api.is_enabled():
+        return _execute_docker_api(
+            lambda client: client.prune_images(),
+            "Clean Images",
+            "Imágenes Docker no utilizadas limpiadas exitosamente.",
+            "Error al limpiar imágenes Docker",
+            show=lambda pruned: print_info(
+                f"Imágenes eliminadas: {len(pruned.get('ImagesDeleted') or [])}. Espacio liberado: "
+                f"{(pruned.get('SpaceReclaimed') or 0) / (1024 * 1024):.1f} MB")
+        )
+
     # -a para all (incluye imágenes colgadas)
     return _execute_docker_command(
         "image prune -a -f", # -f para forzar y no pedir confirmación en CLI
@@ -268,10 +725,11 @@ if not os.path.exists(STATIC_DOCKER_COMPOSE_PATH):
     print_warning("Por favor, asegúrese de que la ruta sea correcta o cree el archivo.")
 
 #Desplegar docker compose por archivo
+@returns_result
 def deploy_docker_compose(compose_file_path: str):
     """
-    Levanta los servicios definidos en un archivo docker-compose.yml.
-    Usa 'docker compose up -d'.
+    Levanta los servicios definidos en un archivo docker-compose.yml: por dependencias
+    con deploy_compose_services (config.DOCKER_COMPOSE_ENGINE) o con 'docker compose up -d'.
     """
     print_header(f"Levantar Docker Compose: {compose_file_path}")
     if not compose_file_path:
@@ -284,6 +742,9 @@ def deploy_docker_compose(compose_file_path: str):
     if os.path.isdir(compose_file_path):
         return print_error(f"'{compose_file_path}' es un directorio, no un archivo docker-compose.yml.")
 
+    if config.DOCKER_COMPOSE_ENGINE:
+        return deploy_compose_services(compose_file_path)
+
     # Comando 'docker compose' (compatible con versiones más nuevas de Docker)
     # Se usa -f para especificar el archivo y -d para detached mode
     command = f"compose -f \"{compose_file_path}\" up -d"
@@ -296,9 +757,11 @@ def deploy_docker_compose(compose_file_path: str):
     )
 
 #Detener docker comopose
+@returns_result
 def docker_compose_up():
     """
-    Inicia los servicios definidos en el archivo Docker Compose de la ruta estática.
+    Inicia los servicios definidos en el archivo Docker Compose de la ruta estática
+    (por dependencias con deploy_compose_services si config.DOCKER_COMPOSE_ENGINE).
     """
     print_header("Docker Compose: Iniciar Servicios")
     
@@ -307,6 +770,9 @@ def docker_compose_up():
         log_action("Docker Compose", "Up", f"Error: Archivo no encontrado en '{STATIC_DOCKER_COMPOSE_PATH}'.")
         return
 
+    if config.DOCKER_COMPOSE_ENGINE:
+        return deploy_compose_services(STATIC_DOCKER_COMPOSE_PATH)
+
     # Usamos -d para ejecutar en modo 'detached' (segundo plano)
     command = f"docker-compose -f \"{STATIC_DOCKER_COMPOSE_PATH}\" up -d"
     
@@ -321,6 +787,7 @@ def docker_compose_up():
         print_error(f"Error al iniciar servicios Docker Compose: {output}")
         log_action("Docker Compose", "Up", f"Error al iniciar servicios desde '{STATIC_DOCKER_COMPOSE_PATH}': {output}")
 
+@returns_result
 def docker_compose_down():
     """
     Detiene y remueve los servicios definidos en el archivo Docker Compose de la ruta estática.
@@ -346,6 +813,7 @@ def docker_compose_down():
         print_error(f"Error al detener servicios Docker Compose: {output}")
         log_action("Docker Compose", "Down", f"Error al detener servicios desde '{STATIC_DOCKER_COMPOSE_PATH}': {output}")
 
+@returns_result
 def docker_compose_build():
     """
     Reconstruye las imágenes de los servicios definidos en el archivo Docker Compose de la ruta estática.
@@ -370,6 +838,81 @@ def docker_compose_build():
         print_error(f"Error al reconstruir imágenes Docker Compose: {output}")
         log_action("Docker Compose", "Build", f"Error al reconstruir imágenes desde '{STATIC_DOCKER_COMPOSE_PATH}': {output}")
 
+@returns_result
+def deploy_compose_services(compose_file_path: str = '', dry_run: bool = False, parallel: str = ''):
+    """
+    Despliega un archivo Compose por dependencias (modules/docker/compose_engine.py):
+    crea todos los contenedores con una sola orden `compose create` y después arranca
+    cada servicio en cuanto sus dependencias están listas (healthcheck, sonda
+    x-readiness o en ejecución), los independientes en paralelo. Con `dry_run` solo
+    muestra el plan. Retorna el informe (dict) con los tiempos de cada servicio.
+    """
+    compose_file_path = compose_file_path or STATIC_DOCKER_COMPOSE_PATH
+    print_header(f"Docker Compose por Dependencias: {compose_file_path}")
+    if not os.path.isfile(compose_file_path):
+        return print_error(f"El archivo '{compose_file_path}' no existe o no es un archivo docker-compose.yml.")
+    try:
+        project, services = compose_engine.load_compose(compose_file_path)
+    except (OSError, ValueError) as e:
+        return print_error(f"No se pudo leer el archivo Compose: {e}")
+    depends = lambda service: ", ".join(f"{dep} ({condition.replace('service_', '')})"
+                                        for dep, condition in service.depends_on.items())
+
+    if dry_run:
+        rows = [[str(number), service.id, depends(service), service.wait]
+                for number, wave in enumerate(compose_engine.plan_waves(services), 1) for service in wave]
+        print_info(f"Proyecto '{project}': {len(services)} servicios. Plan de arranque:")
+        print_table(["NIVEL", "SERVICIO", "DEPENDE DE", "ESPERA"], rows)
+        return {"project": project, "services": [service.to_dict() for service in services], "dry_run": True}
+
+    if not _check_docker_daemon_status():
+        return print_error("El demonio de Docker no está activo. No se puede desplegar.")
+    compose = compose_engine.compose_command(compose_file_path, project)
+    # Una sola orden crea redes, volúmenes y contenedores (y descarga las imágenes que falten);
+    # el arranque, que es lo que depende del orden, se hace servicio a servicio
+    print_info(f"Creando los contenedores del proyecto '{project}'...")
+    start = time.monotonic()
+    output, status = execute_command(f"{compose} create", sudo=True)
+    create_time = time.monotonic() - start
+    if status != 0:
+        print_error(f"Error al crear los contenedores: {output}")
+        log_action("Docker Compose", "Up", f"Error al crear los contenedores de '{compose_file_path}': {output}",
+                   status=status)
+        return
+    parallelism = int(parallel) if str(parallel).isdigit() and int(parallel) > 0 else config.DOCKER_COMPOSE_PARALLELISM
+    print_info(f"Contenedores creados en {create_time:.2f}s. Arrancando {len(services)} servicios "
+               f"({parallelism} a la vez) en orden de dependencias...")
+    total = compose_engine.execute_services(services, compose, project, parallelism)
+    critical, critical_services = compose_engine.critical_path(services)
+
+    print_table(["SERVICIO", "DEPENDE DE", "ESPERA", "INICIO (s)", "ARRANQUE (s)", "HASTA LISTO (s)", "ESTADO"],
+                [[service.id, depends(service), service.wait,
+                  "" if service.started is None else f"{service.started:.2f}",
+                  f"{service.start_time:.2f}", f"{service.ready_time:.2f}",
+                  service.status if not service.error else f"{service.status}: {service.error}"]
+                 for service in services])
+    print_info(f"Creación: {create_time:.2f}s | Arranque: {total:.2f}s | "
+               f"Suma de los servicios: {sum(service.duration for service in services):.2f}s | "
+               f"Camino crítico: {critical:.2f}s ({' -> '.join(critical_services)})")
+    failed = [service.id for service in services if service.status == compose_engine.FAILED]
+    skipped = [service.id for service in services if service.status == compose_engine.SKIPPED]
+    if failed:
+        print_error(f"Servicios fallidos: {', '.join(failed)}" + (f". Omitidos: {', '.join(skipped)}" if skipped else ""))
+    else:
+        print_success(f"Los {len(services)} servicios de '{project}' están listos.")
+    log_action("Docker Compose", "Up",
+               f"Proyecto '{project}': {len(services) - len(failed) - len(skipped)} listos, {len(failed)} fallidos, "
+               f"{len(skipped)} omitidos en {create_time + total:.2f}s.", target=compose_file_path,
+               duration=create_time + total, status=1 if failed else 0)
+    return {
+        "project": project,
+        "services": [service.to_dict() for service in services],
+        "create": round(create_time, 3),
+        "total": round(total, 3),
+        "critical_path": round(critical, 3),
+        "critical_services": critical_services,
+    }
+
 #Menu de docker principal
 def docker_menu():
     """
@@ -387,6 +930,11 @@ def docker_menu():
             "6": "Docker Compose: Iniciar Servicios (Up)", # Nueva opción
             "7": "Docker Compose: Detener Servicios (Down)", # Nueva opción
             "8": "Docker Compose: Reconstruir Imágenes (Build)", # Nueva opción
+            "9": "Estado de un Contenedor",
+            "10": "Uso de Recursos de Contenedores (Top)",
+            "11": "Seguir Logs de Varios Contenedores",
+            "12": "Operaciones en Lote (Iniciar/Detener/Reiniciar/Eliminar)",
+            "13": "Docker Compose: Plan de Arranque por Dependencias",
             "0": "Volver al Menú Principal"
         }
         print_menu(options)
@@ -415,6 +963,33 @@ def docker_menu():
             docker_compose_down()
         elif choice == '8':
             docker_compose_build()
+        elif choice == '9':
+            container_name = get_user_input("Ingrese el nombre o ID del contenedor")
+            get_docker_container_status(container_name)
+        elif choice == '10':
+            sort_by = get_user_input("Ordenar por (cpu, mem, net, io, name) [cpu]") or 'cpu'
+            show_docker_container_stats(sort_by)
+        elif choice == '11':
+            containers = get_user_input("Contenedores (ej: web,db,dns o cliente*; vacío para todos)")
+            pattern = get_user_input("Filtrar por expresión regular (opcional)")
+            since = get_user_input("Desde (ej: 10m, 2h, AAAA-MM-DD HH:MM; opcional)")
+            follow_docker_logs(containers, pattern, since)
+        elif choice == '12':
+            operation = get_user_input("Operación (iniciar, detener, reiniciar, eliminar)").lower()
+            selector = get_user_input("Contenedores (nombres, comodines como cliente* o label=clave=valor)")
+            if operation == 'iniciar':
+                bulk_start_containers(selector)
+            elif operation == 'detener':
+                bulk_stop_containers(selector)
+            elif operation == 'reiniciar':
+                bulk_restart_containers(selector)
+            elif operation == 'eliminar':
+                bulk_remove_containers(selector)
+            else:
+                print_error("Operación inválida.")
+        elif choice == '13':
+            compose_file = get_user_input(f"Archivo Compose [{STATIC_DOCKER_COMPOSE_PATH}]")
+            deploy_compose_services(compose_file, dry_run=True)
         elif choice == '0':
             break
         else:
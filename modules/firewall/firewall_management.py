@@ -1,6 +1,8 @@
-from utils.display import print_header, print_info, print_success, print_error, print_warning, get_user_input, print_menu, clear_screen
+from utils.display import print_header, print_info, print_success, print_error, print_warning, get_user_input, print_menu, clear_screen, print_output
+from utils.result import returns_result
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
+from utils import capabilities
 import os
 
 def firewall_menu():
@@ -74,6 +76,20 @@ def firewall_menu():
             print_error("Opción inválida. Por favor, intente de nuevo.")
         get_user_input("Presione Enter para continuar...")
 
+def _ufw_missing(log_name: str) -> bool:
+    """
+    En Linux las reglas se gestionan con UFW. Comprueba con el firewall detectado al
+    arrancar (utils.capabilities), sin lanzar comandos, que UFW esté instalado; si no
+    lo está, informa de ello y retorna True.
+    """
+    backend = capabilities.get_firewall_backend()
+    if backend == 'ufw':
+        return False
+    print_error(f"UFW no está instalado (firewall detectado: {backend or 'ninguno'}). Esta operación requiere UFW.")
+    log_action("Firewall", log_name, f"Error: UFW no instalado (firewall detectado: {backend or 'ninguno'}).")
+    return True
+
+@returns_result
 def view_firewall_status():
     """
     Verifica y muestra el estado actual del firewall (Windows o Linux) con un formato mejorado
@@ -116,7 +132,10 @@ def view_firewall_status():
         # Primero intentamos con UFW
         firewall_name = "UFW (Uncomplicated Firewall)"
         command = "ufw status"
-        output, status = execute_command(command, sudo=True)
+        if capabilities.has_firewall('ufw'):
+            output, status = execute_command(command, sudo=True)
+        else:
+            output, status = "", 1 # ufw no instalado: se evita lanzar el comando
 
         if status == 0:
             if "Status: active" in output or "Status: inactive" in output:
@@ -175,11 +194,12 @@ def view_firewall_status():
         print_success(status_summary)
         # Para el éxito, el detalle se muestra en color normal (info)
         if detailed_output:
-            print_info(detailed_output)
+            print_output(detailed_output)
     
     # Mensaje final de cierre (siempre en info)
     print_info("-" * 30)
 
+@returns_result
 def enable_firewall(confirm: str):
     """
     Habilita el firewall (Windows o Linux).
@@ -196,6 +216,8 @@ def enable_firewall(confirm: str):
     if os_type == 'windows':
         command = "netsh advfirewall set allprofiles state on"
     else: # linux
+        if _ufw_missing("Enable Firewall"):
+            return
         command = "ufw enable"
         print_info("Consideraciones en Linux: Si UFW no está instalado o en uso, esta operación puede fallar.")
         print_info("Para RHEL/CentOS, considere 'sudo systemctl enable firewalld' y 'sudo systemctl start firewalld'.")
@@ -205,12 +227,13 @@ def enable_firewall(confirm: str):
     output, status = execute_command(command, sudo=True)
     if status == 0:
         print_success("Firewall habilitado exitosamente.")
-        print_info(output) # Mostrar salida del comando si existe
+        print_output(output) # Mostrar salida del comando si existe
         log_action("Firewall", "Enable Firewall", "Firewall habilitado.")
     else:
         print_error(f"Error al habilitar firewall: {output}")
         log_action("Firewall", "Enable Firewall", f"Error al habilitar firewall: {output}")
 
+@returns_result
 def disable_firewall(confirm: str):
     """
     Deshabilita el firewall (Windows o Linux).
@@ -227,6 +250,8 @@ def disable_firewall(confirm: str):
     if os_type == 'windows':
         command = "netsh advfirewall set allprofiles state off"
     else: # linux
+        if _ufw_missing("Disable Firewall"):
+            return
         command = "ufw disable"
         print_info("Consideraciones en Linux: Si UFW no está instalado o en uso, esta operación puede fallar.")
         print_info("Para RHEL/CentOS, considere 'sudo systemctl stop firewalld' y 'sudo systemctl disable firewalld'.")
@@ -236,12 +261,13 @@ def disable_firewall(confirm: str):
     output, status = execute_command(command, sudo=True)
     if status == 0:
         print_success("Firewall deshabilitado exitosamente.")
-        print_info(output) # Mostrar salida del comando si existe
+        print_output(output) # Mostrar salida del comando si existe
         log_action("Firewall", "Disable Firewall", "Firewall deshabilitado.")
     else:
         print_error(f"Error al deshabilitar firewall: {output}")
         log_action("Firewall", "Disable Firewall", f"Error al deshabilitar firewall: {output}")
 
+@returns_result
 def list_firewall_rules():
     """
     Lista todas las reglas del firewall (Windows o Linux).
@@ -253,7 +279,10 @@ def list_firewall_rules():
         output, status = execute_command(command)
     else: # linux
         command = "ufw status verbose"
-        output, status = execute_command(command, sudo=True)
+        if capabilities.has_firewall('ufw'):
+            output, status = execute_command(command, sudo=True)
+        else:
+            output, status = "", 1 # ufw no instalado: se evita lanzar el comando
         if status != 0:
             print_info("UFW no encontrado o no activo. Intentando con iptables...")
             command = "sudo iptables -L -n -v" # Más completo que iptables -S para visualización
@@ -261,12 +290,13 @@ def list_firewall_rules():
     
     if status == 0:
         print_info("Reglas del Firewall:")
-        print_info(output) # Usamos print_info
+        print_output(output)
         log_action("Firewall", "List Rules", "Reglas del firewall listadas exitosamente.")
     else:
         print_error(f"Error al listar reglas del firewall: {output}")
         log_action("Firewall", "List Rules", f"Error al listar reglas del firewall: {output}")
 
+@returns_result
 def add_allow_port_rule(rule_name: str, port: str, protocol: str = "any", direction: str = "in"):
     """
     Añade una regla para permitir el tráfico en un puerto específico.
@@ -291,6 +321,8 @@ def add_allow_port_rule(rule_name: str, port: str, protocol: str = "any", direct
     if os_type == 'windows':
         command = f'netsh advfirewall firewall add rule name="{rule_name}" dir={direction} action=allow protocol={protocol} localport={port}'
     else: # linux (ufw)
+        if _ufw_missing("Add Rule"):
+            return
         if direction == 'in':
             command = f"ufw allow {port}/{protocol}"
         elif direction == 'out':
@@ -305,12 +337,13 @@ def add_allow_port_rule(rule_name: str, port: str, protocol: str = "any", direct
     output, status = execute_command(command, sudo=True)
     if status == 0:
         print_success(f"Regla '{rule_name}' (permitir puerto {port}/{protocol}, {direction}) añadida exitosamente.")
-        print_info(output)
+        print_output(output)
         log_action("Firewall", "Add Rule", f"Regla '{rule_name}' (permitir puerto {port}/{protocol}, {direction}) añadida.")
     else:
         print_error(f"Error al añadir regla: {output}")
         log_action("Firewall", "Add Rule", f"Error al añadir regla '{rule_name}': {output}")
 
+@returns_result
 def delete_allow_port_rule(rule_name: str, port: str, protocol: str = "any", confirm: str = "n"):
     
     """
@@ -340,6 +373,8 @@ def delete_allow_port_rule(rule_name: str, port: str, protocol: str = "any", con
     if os_type == 'windows':
         command = f'netsh advfirewall firewall delete rule name="{rule_name}"'
     else: # linux (ufw)
+        if _ufw_missing("Delete Rule"):
+            return
         # UFW no permite eliminar por nombre directo. Usamos puerto/protocolo.
         print_warning("En Linux (UFW), la eliminación de reglas por nombre exacto no es directa. Se usa puerto/protocolo.")
         print_info("Considere 'ufw status numbered' y eliminar por número para mayor precisión.")
@@ -349,12 +384,13 @@ def delete_allow_port_rule(rule_name: str, port: str, protocol: str = "any", con
     output, status = execute_command(command, sudo=True)
     if status == 0:
         print_success(f"Regla '{rule_name or f'{port}/{protocol}'}' eliminada exitosamente.")
-        print_info(output)
+        print_output(output)
         log_action("Firewall", "Delete Rule", f"Regla '{rule_name or f'{port}/{protocol}'}' eliminada.")
     else:
         print_error(f"Error al eliminar regla: {output}")
         log_action("Firewall", "Delete Rule", f"Error al eliminar regla '{rule_name or f'{port}/{protocol}'}': {output}")
 
+@returns_result
 def add_deny_port_rule(rule_name: str, port: str, protocol: str = "any", direction: str = "in"):
     """
     Añade una regla para denegar el tráfico en un puerto específico.
@@ -379,6 +415,8 @@ def add_deny_port_rule(rule_name: str, port: str, protocol: str = "any", directi
     if os_type == 'windows':
         command = f'netsh advfirewall firewall add rule name="{rule_name}" dir={direction} action=block protocol={protocol} localport={port}'
     else: # linux (ufw)
+        if _ufw_missing("Add Deny Rule"):
+            return
         if direction == 'in':
             command = f"ufw deny {port}/{protocol}"
         elif direction == 'out':
@@ -393,12 +431,13 @@ def add_deny_port_rule(rule_name: str, port: str, protocol: str = "any", directi
     output, status = execute_command(command, sudo=True)
     if status == 0:
         print_success(f"Regla '{rule_name}' (denegar puerto {port}/{protocol}, {direction}) añadida exitosamente.")
-        print_info(output)
+        print_output(output)
         log_action("Firewall", "Add Deny Rule", f"Regla '{rule_name}' (denegar puerto {port}/{protocol}, {direction}) añadida.")
     else:
         print_error(f"Error al añadir regla de denegación: {output}")
         log_action("Firewall", "Add Deny Rule", f"Error al añadir regla de denegación '{rule_name}': {output}")
 
+@returns_result
 def add_app_rule(rule_name: str, app_path: str, action: str = "allow", direction: str = "in"):
     """
     Añade una regla para permitir/denegar una aplicación. Principalmente para Windows.
@@ -437,12 +476,13 @@ def add_app_rule(rule_name: str, app_path: str, action: str = "allow", direction
     output, status = execute_command(command, sudo=True)
     if status == 0:
         print_success(f"Regla '{rule_name}' ({action} aplicación '{app_path}', {direction}) añadida exitosamente.")
-        print_info(output)
+        print_output(output)
         log_action("Firewall", f"Add {action.capitalize()} App Rule", f"Regla '{rule_name}' ({action} aplicación '{app_path}', {direction}) añadida.")
     else:
         print_error(f"Error al añadir regla de aplicación '{rule_name}': {output}")
         log_action("Firewall", f"Add {action.capitalize()} App Rule", f"Error al añadir regla de aplicación '{rule_name}': {output}")
 
+@returns_result
 def delete_app_rule(rule_name: str, confirm: str = "n"):
     """
     Elimina una regla de aplicación por su nombre.
@@ -476,12 +516,13 @@ def delete_app_rule(rule_name: str, confirm: str = "n"):
     output, status = execute_command(command, sudo=True)
     if status == 0:
         print_success(f"Regla de aplicación '{rule_name}' eliminada exitosamente.")
-        print_info(output)
+        print_output(output)
         log_action("Firewall", "Delete App Rule", f"Regla de aplicación '{rule_name}' eliminada.")
     else:
         print_error(f"Error al eliminar regla de aplicación '{rule_name}': {output}")
         log_action("Firewall", "Delete App Rule", f"Error al eliminar regla de aplicación '{rule_name}': {output}")
 
+@returns_result
 def show_rule_by_name(rule_name: str):
     """
     Muestra la información detallada de una regla de firewall por su nombre.
@@ -502,11 +543,11 @@ def show_rule_by_name(rule_name: str):
         if status == 0:
             if rule_name.lower() in output.lower(): # Case-insensitive check
                 print_info(f"Información de la regla '{rule_name}':")
-                print_info(output)
+                print_output(output)
                 log_action("Firewall", "Show Rule by Name", f"Información de la regla '{rule_name}' mostrada exitosamente.")
             else:
                 print_error(f"No se encontró ninguna regla con el nombre '{rule_name}'.")
-                print_info(output) # Mostrar la salida completa para ayudar a depurar
+                print_output(output) # Mostrar la salida completa para ayudar a depurar
                 log_action("Firewall", "Show Rule by Name", f"No se encontró la regla '{rule_name}'.")
         else:
             print_error(f"Error al mostrar información de la regla: {output}")
@@ -517,7 +558,10 @@ def show_rule_by_name(rule_name: str):
         print_info("Considere revisar la salida de 'ufw status verbose' o 'sudo iptables -S' para buscar manualmente.")
         
         command = "ufw status verbose"
-        output, status = execute_command(command, sudo=True)
+        if capabilities.has_firewall('ufw'):
+            output, status = execute_command(command, sudo=True)
+        else:
+            output, status = "", 1 # ufw no instalado: se evita lanzar el comando
         if status != 0:
             print_info("UFW no encontrado o no activo. Intentando con iptables...")
             command = "sudo iptables -S" # Muestra las reglas de iptables en formato que se pueden volver a añadir
@@ -525,12 +569,13 @@ def show_rule_by_name(rule_name: str):
         
         if status == 0:
             print_info(f"Salida completa de las reglas del firewall (busque '{rule_name}' manualmente):")
-            print_info(output)
+            print_output(output)
             log_action("Firewall", "Show Rule by Name", f"Reglas del firewall listadas para buscar '{rule_name}'.")
         else:
             print_error(f"Error al listar reglas para buscar por nombre: {output}")
             log_action("Firewall", "Show Rule by Name", f"Error al listar reglas para buscar '{rule_name}': {output}")
 
+@returns_result
 def generate_firewall_log():
     """
     Genera un informe consolidado del estado y reglas del firewall.
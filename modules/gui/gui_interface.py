@@ -1,78 +1,174 @@
 import gradio as gr
-import io
-import sys
 import os # Necesario para deploy/stop docker compose con cwd
-
-# Importar todos los módulos de gestión
-from modules.process import process_management
-from modules.docker import docker_management
-from modules.services import service_management
-from modules.package import package_management
-from modules.user import user_group_management
-from modules.network import network_management
-from modules.resource import resource_monitoring
-from modules.disk import disk_partition_management
-from modules.firewall import firewall_management
+import config
+import datetime
+import html
+import re
+
+# Módulos de gestión: se importan (e instrumentan para utils.metrics) la primera vez
+# que se usa una de sus acciones, no al construir la interfaz.
+from utils.lazy import lazy_module
+process_management = lazy_module("modules.process.process_management")
+docker_management = lazy_module("modules.docker.docker_management")
+service_management = lazy_module("modules.services.service_management")
+package_management = lazy_module("modules.package.package_management")
+user_group_management = lazy_module("modules.user.user_group_management")
+network_management = lazy_module("modules.network.network_management")
+resource_monitoring = lazy_module("modules.resource.resource_monitoring")
+disk_partition_management = lazy_module("modules.disk.disk_partition_management")
+firewall_management = lazy_module("modules.firewall.firewall_management")
+log_management = lazy_module("modules.logs.log_management")
 
 # Importar las utilidades modificadas
 import utils.display as display_utils
 import utils.system_info as system_info_utils
 import utils.logger as logger_utils
-
+import utils.metrics as metrics_utils
+import utils.output_capture as output_capture_utils
+import utils.log_query as log_query_utils
+import utils.log_tail as log_tail_utils
+import utils.jobs as jobs_utils
+import utils.result as result_utils
+import utils.snapshot_hub as snapshot_hub_utils
+import utils.docker_inventory as docker_inventory_utils
+import utils.docker_stats as docker_stats_utils
+import utils.docker_api as docker_api_utils
+import utils.docker_logs as docker_logs_utils
 
 # --- Funciones auxiliares para Gradio ---
 
 # Función genérica para ejecutar cualquier función de módulo en modo GUI
-def _run_module_function(func, *input_args):
+def _call_module_function(func, *input_args):
     """
-    Ejecuta una función de módulo en modo GUI, gestionando la entrada y la salida.
+    Ejecuta una función de módulo en modo GUI y retorna su CommandResult (utils.result).
     input_args son los valores que se pondrán en la cola de input si la función los pide (e.g., para confirmaciones).
     """
-    # Si la función necesita input (ej. confirmación s/N), lo pasamos a la cola de display_utils
-    if input_args:
-        display_utils.set_gui_input_queue(list(input_args)) # Convertir a lista para que sea mutable y pop funcione
-    
-    display_utils.clear_screen() # Limpia el buffer de salida antes de cada ejecución
-
-    old_stdout = sys.stdout
-    redirected_output = io.StringIO()
-    sys.stdout = redirected_output
-
-    try:
-        # Llamar a la función principal del módulo
-        # Si la función del módulo retorna un valor, lo capturamos
-        result = func(*input_args) # Pasar los argumentos directamente a la función si ella los espera
-
-        cli_direct_prints = redirected_output.getvalue()
+    # Cada ejecución tiene su propia cola de entradas (ej. confirmación s/N), así varias
+    # peticiones concurrentes de la GUI no se mezclan. La salida no se captura: los
+    # print_* de la función quedan en su resultado.
+    with display_utils.gui_input_context(input_args):
+        return result_utils.call_with_result(func, *input_args) # Pasar los argumentos directamente a la función si ella los espera
 
-    finally:
-        sys.stdout = old_stdout # Restaurar stdout
-
-    # Obtener y limpiar el buffer de Gradio después de que la función haya terminado de imprimir
-    gui_formatted_output = display_utils.get_gui_output_buffer_and_clear()
-
-    final_output = ""
-    # Incluir la salida directa del CLI (si la hay)
-    if cli_direct_prints.strip():
-        final_output += f"### Salida Directa de Consola:\n<pre>{cli_direct_prints}</pre>\n"
-    
-    # Incluir los mensajes formateados por display_utils (si los hay)
-    if gui_formatted_output.strip():
-        final_output += f"### Mensajes del Script:\n{gui_formatted_output}"
-
-    # Si la función del módulo devolvió algo (ej. una lista formateada de Docker, o un mensaje de error), lo añadimos
-    # Asegúrate de que este 'result' no duplique la salida ya capturada por gui_formatted_output o cli_direct_prints
-    if result is not None and isinstance(result, str) and result.strip() and result.strip() not in final_output:
-        final_output += f"\n### Resultado de la Operación:\n{result}"
-
-    return final_output
+def _run_module_function(func, *input_args):
+    """Ejecuta una función de módulo y retorna su resultado en Markdown."""
+    return _call_module_function(func, *input_args).render_markdown()
 
+def _run_table_function(func, *input_args):
+    """
+    Como _run_module_function, pero la tabla del resultado se muestra en un gr.Dataframe
+    paginado en el servidor (ver _result_table_view). Retorna (Markdown, tabla, página, id, nº de página).
+    """
+    result = _call_module_function(func, *input_args)
+    result_id = result_utils.store_result(result) if result.has_table else None
+    return (result.render_markdown(include_table=False), *_table_page(result_id, 1))
+
+def _table_page(result_id, page):
+    """Una página de la tabla de un resultado guardado."""
+    result = result_utils.get_stored_result(result_id)
+    if result is None or not result.has_table:
+        return gr.update(value=None, visible=False), "", None, 1
+    rows, page, total_pages = result.page(page)
+    return (gr.update(value={"headers": result.columns, "data": rows}, visible=True),
+            f"Página {page} de {total_pages} ({len(result.rows)} filas)", result_id, page)
+
+def gui_table_previous(result_id, page):
+    return _table_page(result_id, int(page or 1) - 1)
+
+def gui_table_next(result_id, page):
+    return _table_page(result_id, int(page or 1) + 1)
+
+def _result_table_view():
+    """
+    Crea (dentro de gr.Blocks) un gr.Dataframe con botones de página para la tabla de un
+    resultado. Retorna los componentes que deben añadirse a los outputs de la acción.
+    """
+    table = gr.Dataframe(interactive=False, wrap=True, visible=False)
+    with gr.Row():
+        previous_btn = gr.Button("◀ Anterior", size="sm")
+        page_info = gr.Markdown()
+        next_btn = gr.Button("Siguiente ▶", size="sm")
+    result_id = gr.State(None)
+    page = gr.State(1)
+    outputs = [table, page_info, result_id, page]
+    previous_btn.click(gui_table_previous, inputs=[result_id, page], outputs=outputs)
+    next_btn.click(gui_table_next, inputs=[result_id, page], outputs=outputs)
+    return outputs
+
+## Vistas compartidas entre sesiones (utils.snapshot_hub)
+# Vistas que muchas sesiones refrescan a la vez: cada una se recoge como mucho una vez por
+# intervalo y su resultado se reparte a todas las sesiones que la muestran.
+# (lambda: el módulo solo se importa cuando se recoge la vista por primera vez)
+SHARED_VIEWS = {
+    "docker.containers": lambda: docker_management.list_docker_containers,
+    "services.list": lambda: service_management.list_services,
+    "resources.cpu": lambda: resource_monitoring.get_cpu_usage,
+    "resources.memory": lambda: resource_monitoring.get_memory_usage,
+    "resources.disk": lambda: resource_monitoring.get_disk_usage,
+    "resources.network": lambda: resource_monitoring.get_network_stats,
+    "resources.uptime": lambda: resource_monitoring.get_system_uptime,
+}
+
+def _collect_shared_view(key, func):
+    result = _call_module_function(func)
+    # La tabla se fija con un id propio de la vista: así no la desalojan los resultados de otras sesiones
+    return result, (result_utils.pin_result(f"vista:{key}", result) if result.has_table else None)
+
+def _register_shared_views():
+    hub = snapshot_hub_utils.get_snapshot_hub()
+    for key, get_function in SHARED_VIEWS.items():
+        hub.register(key, lambda key=key, get_function=get_function: _collect_shared_view(key, get_function()))
+
+def _render_shared_view(key, seen_version, page, with_table):
+    """
+    Salidas de una vista compartida: Markdown, (tabla paginada), versión mostrada y
+    temporizador. Si la sesión ya muestra la última instantánea no se actualiza nada.
+    """
+    snapshot = snapshot_hub_utils.get_snapshot_hub().get(key)
+    output_count = 7 if with_table else 3
+    if snapshot.version == seen_version:
+        return tuple(gr.update() for _ in range(output_count))
+    result, result_id = snapshot.value
+    collected = datetime.datetime.fromtimestamp(snapshot.timestamp).strftime("%H:%M:%S")
+    header = (f"*Instantánea de las {collected}, compartida entre sesiones "
+              f"(se actualiza cada {snapshot_hub_utils.get_snapshot_hub().interval:g} s).*\n\n")
+    outputs = [header + result.render_markdown(include_table=not with_table)]
+    if with_table:
+        outputs += list(_table_page(result_id, page))
+    return (*outputs, snapshot.version, gr.update(active=True))
+
+def _shared_view(key, button, output, table=None):
+    """
+    Conecta `button` a la vista compartida `key`: al pulsarlo se muestra la instantánea y
+    se activa un temporizador que la mantiene al día (sin volver a pintar si no cambió).
+    `table` son los componentes de _result_table_view, si la vista tiene tabla.
+    """
+    version = gr.State(None)
+    timer = gr.Timer(snapshot_hub_utils.get_snapshot_hub().interval, active=False)
+    outputs = [output, *(table or []), version, timer]
+    if table:
+        page = table[3]
+        button.click(lambda: _render_shared_view(key, None, 1, True), inputs=None, outputs=outputs)
+        timer.tick(lambda seen, current_page: _render_shared_view(key, seen, current_page, True),
+                   inputs=[version, page], outputs=outputs)
+    else:
+        button.click(lambda: _render_shared_view(key, None, 1, False), inputs=None, outputs=outputs)
+        timer.tick(lambda seen: _render_shared_view(key, seen, 1, False), inputs=[version], outputs=outputs)
+
+# Función genérica para lanzar una función de módulo como trabajo en segundo plano
+def _submit_background_job(name, category, func, *input_args):
+    """
+    Lanza la función como trabajo (utils.jobs) y retorna inmediatamente; el progreso
+    y el resultado se consultan en la pestaña Trabajos.
+    """
+    job = jobs_utils.submit_job(name, category, func, *input_args)
+    return (f"**[INFO]** Trabajo **#{job.id}** ({name}) lanzado en segundo plano. "
+            f"Siga su progreso o cancélelo en la pestaña **Trabajos**.")
 
 # --- Funciones auxiliares por módulos (adaptadas para Gradio) ---
 
 ## Procesos
 def gui_list_processes():
-    return _run_module_function(process_management.list_processes)
+    return _run_table_function(process_management.list_processes)
 
 def gui_terminate_process_by_pid(pid: str, confirm: bool):
     confirm_str = 's' if confirm else 'n'
@@ -87,9 +183,6 @@ def gui_find_process_info_by_name(name: str):
 
 
 ## Docker
-def gui_list_docker_containers():
-    return _run_module_function(docker_management.list_docker_containers)
-
 def gui_start_docker_container(container_id_name: str):
     return _run_module_function(docker_management.start_docker_container, container_id_name)
 
@@ -99,6 +192,20 @@ def gui_stop_docker_container(container_id_name: str):
 def gui_restart_docker_container(container_id_name: str):
     return _run_module_function(docker_management.restart_docker_container, container_id_name)
 
+def gui_docker_container_status(container_id_name: str):
+    return _run_module_function(docker_management.get_docker_container_status, container_id_name)
+
+def gui_bulk_docker_operation(operation: str, selector: str, parallel: float, timeout: float, confirm: bool):
+    parallel_str = str(int(parallel)) if parallel else ''
+    timeout_str = str(int(timeout)) if timeout else ''
+    if operation == "Iniciar":
+        return _run_table_function(docker_management.bulk_start_containers, selector, parallel_str)
+    if operation == "Detener":
+        return _run_table_function(docker_management.bulk_stop_containers, selector, parallel_str, timeout_str)
+    if operation == "Reiniciar":
+        return _run_table_function(docker_management.bulk_restart_containers, selector, parallel_str, timeout_str)
+    return _run_table_function(docker_management.bulk_remove_containers, selector, 's' if confirm else 'n', parallel_str)
+
 def gui_remove_docker_container(container_id_name: str, confirm: bool):
     confirm_str = 's' if confirm else 'n'
     return _run_module_function(docker_management.remove_docker_container, container_id_name, confirm_str)
@@ -108,25 +215,97 @@ def gui_view_docker_logs(container_id_name: str, num_lines: str = ''):
     return _run_module_function(docker_management.view_docker_logs, container_id_name, num_lines)
 
 def gui_exec_docker_command(container_id_name: str, command_to_exec: str):
-    return _run_module_function(docker_management.exec_docker_command, container_id_name, command_to_exec)
+    return _run_module_function(docker_management.execute_command_in_container, container_id_name, command_to_exec)
 
 def gui_clean_docker_images(confirm: bool):
     confirm_str = 's' if confirm else 'n'
-    return _run_module_function(docker_management.clean_docker_images, confirm_str)
+    return _submit_background_job("Limpiar imágenes Docker", "docker", docker_management.clean_docker_images, confirm_str)
+
+def _docker_inventory_view(name_filter, state, seen_version):
+    """Salidas del inventario en vivo: resumen, tabla, versión mostrada y temporizador."""
+    inventory = docker_inventory_utils.get_inventory(wait=seen_version is None)
+    if inventory is None:
+        return ("[ERROR] El inventario en vivo necesita el Docker Engine API (socket de Docker) y un daemon activo.",
+                gr.update(visible=False), None, gr.update(active=seen_version is not None))
+    if inventory.version == seen_version:
+        return gr.update(), gr.update(), seen_version, gr.update()
+    version = inventory.version
+    containers = inventory.containers(name=name_filter or None, state=state or None)
+    stats = inventory.stats()
+    summary = (f"**{len(containers)} contenedores** (de {stats['containers']}), {stats['images']} imágenes, "
+               f"{stats['networks']} redes y {stats['volumes']} volúmenes. "
+               f"*Actualizado con los eventos del daemon ({stats['events']} recibidos).*")
+    table = {"headers": docker_management.CONTAINER_COLUMNS, "data": docker_management._container_rows(containers)}
+    return summary, gr.update(value=table, visible=True), version, gr.update(active=True)
+
+def gui_start_docker_inventory(name_filter: str, state: str):
+    return _docker_inventory_view(name_filter, state, None)
+
+def gui_docker_inventory_tick(name_filter: str, state: str, seen_version):
+    # Sin eventos nuevos la vista no se vuelve a pintar (la consulta es solo en memoria)
+    return _docker_inventory_view(name_filter, state, seen_version)
+
+def gui_start_docker_stats(sort_by: str, limit: float):
+    """Primera consulta con la función del módulo (espera a tener tasas) y activa el refresco."""
+    result = _call_module_function(docker_management.show_docker_container_stats, sort_by, str(int(limit or 0) or ''))
+    table = {"headers": result.columns, "data": result.rows} if result.has_table else None
+    return (result.render_markdown(include_table=False), gr.update(value=table, visible=table is not None),
+            gr.update(active=result.ok and table is not None and docker_api_utils.is_enabled()))
+
+def gui_docker_stats_tick(sort_by: str, limit: float):
+    # En cada tick solo se lee la última muestra de cada contenedor (sin cabeceras ni log)
+    try:
+        rows = docker_stats_utils.get_stats_engine().top(sort_by, int(limit or 0) or None)
+    except docker_api_utils.DockerAPIError:
+        return gr.update()
+    return gr.update(value={"headers": docker_stats_utils.STATS_COLUMNS,
+                            "data": [docker_stats_utils.format_row(row) for row in rows]})
+
+def gui_start_docker_logs(containers: str, pattern: str, since: str, until: str, mux_id):
+    """Empieza a seguir los logs de varios contenedores y activa el temporizador de refresco."""
+    docker_logs_utils.close_multiplexer(mux_id)
+    try:
+        names = docker_logs_utils.resolve_containers(containers)
+        if not names:
+            return None, "[ERROR] No hay contenedores en ejecución que coincidan.", gr.update(active=False)
+        mux_id, _ = docker_logs_utils.open_multiplexer(
+            names, pattern=pattern or None, since=since or None, until=until or None, follow=True,
+            tail=None if since else config.DOCKER_LOG_DEFAULT_TAIL)
+    except (docker_api_utils.DockerAPIError, ValueError, re.error) as e:
+        return None, f"[ERROR] {e}", gr.update(active=False)
+    return mux_id, f"Siguiendo: {', '.join(names)}", gr.update(active=True)
+
+def gui_docker_logs_tick(mux_id):
+    """En cada tick solo se recogen las líneas nuevas; si no las hay, la vista no se actualiza."""
+    mux = docker_logs_utils.get_multiplexer(mux_id)
+    if mux is None or not mux.drain():
+        return gr.update()
+    width = max(len(stream.container) for stream in mux.streams)
+    return "\n".join(docker_logs_utils.format_line(line, width) for line in mux.history)
+
+def gui_stop_docker_logs(mux_id):
+    docker_logs_utils.close_multiplexer(mux_id)
+    return None, gr.update(active=False)
+
+def gui_stop_docker_inventory():
+    return None, gr.update(active=False)
 
 def gui_docker_compose_up():
+    # Con el motor de Compose espera a que cada servicio esté listo: puede tardar minutos
+    if config.DOCKER_COMPOSE_ENGINE:
+        return _submit_background_job("Docker Compose up", "docker", docker_management.docker_compose_up)
     return _run_module_function(docker_management.docker_compose_up)
 
+def gui_docker_compose_plan():
+    return _run_module_function(docker_management.deploy_compose_services, docker_management.STATIC_DOCKER_COMPOSE_PATH, True)
+
 def gui_docker_compose_down():
     return _run_module_function(docker_management.docker_compose_down)
 
 def gui_docker_compose_build():
-    return _run_module_function(docker_management.docker_compose_build)
+    return _submit_background_job("Docker Compose build", "docker", docker_management.docker_compose_build)
 
 ## Servicios
-def gui_list_services():
-    return _run_module_function(service_management.list_services)
-
 def gui_start_service(service_name: str):
     return _run_module_function(service_management.start_service, service_name)
 
@@ -144,7 +323,7 @@ def gui_disable_service(service_name: str):
 
 ## Paquetes
 def gui_update_system_packages():
-    return _run_module_function(package_management.update_system_packages)
+    return _submit_background_job("Actualizar todos los paquetes", "paquetes", package_management.upgrade_all_packages)
 
 def gui_install_package(package_name: str):
     return _run_module_function(package_management.install_package, package_name)
@@ -157,10 +336,10 @@ def gui_search_package(search_query: str):
 
 ## Usuarios y Grupos
 def gui_list_users():
-    return _run_module_function(user_group_management.list_users)
+    return _run_table_function(user_group_management.list_users)
 
 def gui_list_groups():
-    return _run_module_function(user_group_management.list_groups)
+    return _run_table_function(user_group_management.list_groups)
 
 def gui_add_user(username: str, password: str):
     return _run_module_function(user_group_management.add_user, username, password)
@@ -204,57 +383,17 @@ def gui_generate_network_log():
     return _run_module_function(network_management.generate_network_log)
 
 ## Monitorización de Recursos
-def gui_get_cpu_usage():
-    return _run_module_function(resource_monitoring.get_cpu_usage)
-
-def gui_get_memory_usage():
-    return _run_module_function(resource_monitoring.get_memory_usage)
-
-def gui_get_disk_usage():
-    return _run_module_function(resource_monitoring.get_disk_usage)
-
-def gui_get_network_stats():
-    return _run_module_function(resource_monitoring.get_network_stats)
-
-def gui_get_system_uptime():
-    return _run_module_function(resource_monitoring.get_system_uptime)
+# Las vistas de recursos son compartidas (ver SHARED_VIEWS y _shared_view)
 
 ## Disco y Particiones
 def gui_list_disk_partitions():
-    old_stdout = sys.stdout
-    redirected_output = io.StringIO()
-    sys.stdout = redirected_output
-    
-    try:
-        disk_partition_management.list_disks_partitions() # Calls the function that prints
-    finally:
-        sys.stdout = old_stdout # Ensures stdout is always restored
-
-    return redirected_output.getvalue() # Returns everything that was printed
+    return _run_module_function(disk_partition_management.list_disks_partitions)
 
 def gui_get_mount_points():
-    old_stdout = sys.stdout
-    redirected_output = io.StringIO()
-    sys.stdout = redirected_output
-    
-    try:
-        disk_partition_management.view_mounted_partition_usage() # Calls the function that prints
-    finally:
-        sys.stdout = old_stdout
-
-    return redirected_output.getvalue()
+    return _run_table_function(disk_partition_management.view_mounted_partition_usage)
 
 def gui_generate_disk_log():
-    old_stdout = sys.stdout
-    redirected_output = io.StringIO()
-    sys.stdout = redirected_output
-    
-    try:
-        disk_partition_management.generate_disk_partition_log() # Calls the function that prints
-    finally:
-        sys.stdout = old_stdout
-
-    return redirected_output.getvalue()
+    return _run_module_function(disk_partition_management.generate_disk_partition_log)
 
 ## Firewall
 def gui_view_firewall_status():
@@ -295,9 +434,139 @@ def gui_show_rule_by_name_gui(rule_name: str):
     return _run_module_function(firewall_management.show_rule_by_name, rule_name)
 
 def gui_generate_firewall_log_gui():
-    return _run_module_function(firewall_management.generate_firewall_log)
+    return _submit_background_job("Log completo del firewall", "firewall", firewall_management.generate_firewall_log)
+
+## Rendimiento
+def gui_show_slowest_operations(limit: float = 10):
+    """Tabla Markdown con las operaciones más lentas (por p95) registradas en esta sesión."""
+    rows = metrics_utils.slowest_operations(int(limit or 10))
+    return "### Operaciones Más Lentas (p95)\n" + metrics_utils.format_summary(rows, markdown=True)
+
+def gui_show_metrics_summary():
+    summary = "### Resumen Completo\n" + metrics_utils.format_summary(markdown=True)
+    stats = snapshot_hub_utils.get_snapshot_hub().stats()
+    if stats:
+        lines = ["| Vista | Recogidas | Peticiones | Servidas sin recoger |", "|---|---|---|---|"]
+        lines += [f"| {key} | {values['collections']} | {values['served']} | {values['shared']} |"
+                  for key, values in sorted(stats.items())]
+        summary += "\n\n### Vistas Compartidas\n" + "\n".join(lines)
+    return summary
+
+def gui_reset_metrics():
+    metrics_utils.reset()
+    return "Métricas reiniciadas."
+
+## Salidas Grandes
+def gui_list_spilled_outputs():
+    """Actualiza la lista de salidas de comandos volcadas a disco por superar el límite de captura."""
+    spills = output_capture_utils.list_spilled_outputs()
+    choices = [str(spill_id) for spill_id, _, _ in spills]
+    if spills:
+        lines = ["| Id | Tamaño (MB) | Archivo |", "|---|---|---|"]
+        lines += [f"| {spill_id} | {size / (1024 * 1024):.2f} | `{path}` |" for spill_id, size, path in spills]
+        summary = "\n".join(lines)
+    else:
+        summary = "No hay salidas volcadas a disco en esta sesión."
+    return gr.update(choices=choices, value=choices[0] if choices else None), summary
+
+def gui_read_spilled_page(spill_id: str, page: float, lines_per_page: float):
+    """Muestra una página de una salida completa volcada a disco."""
+    output = output_capture_utils.get_spilled_output(spill_id) if spill_id else None
+    if output is None:
+        return "**[ERROR]** Seleccione una salida válida."
+    lines_per_page = int(lines_per_page or 500)
+    total_pages = output.page_count(lines_per_page)
+    page = min(max(1, int(page or 1)), total_pages)
+    return f"**Página {page} de {total_pages}** (salida {spill_id})\n<pre>{html.escape(output.read_page(page, lines_per_page))}</pre>"
+
+## Logs
+def gui_search_logs(since: str, until: str, module: str, action: str, text: str, page: float, page_size: float):
+    """Busca en los logs (índice por archivo) y retorna una página de resultados y el número de página mostrado."""
+    page_size = max(1, int(page_size or 50))
+    page = max(1, int(page or 1))
+    try:
+        records, total = log_query_utils.query_logs(since or None, until or None, module or None, action or None,
+                                                    text or None, page=page, page_size=page_size)
+    except ValueError as e:
+        return f"**[ERROR]** Parámetros de búsqueda no válidos: {e}", page
+    total_pages = max(1, -(-total // page_size))
+    if page > total_pages:
+        page = total_pages
+        records, total = log_query_utils.query_logs(since or None, until or None, module or None, action or None,
+                                                    text or None, page=page, page_size=page_size)
+    header = f"**{total} registros encontrados. Página {page} de {total_pages}.**\n\n"
+    return header + log_query_utils.format_records(records, markdown=True), page
+
+def gui_search_logs_previous(since, until, module, action, text, page, page_size):
+    return gui_search_logs(since, until, module, action, text, max(1, int(page or 1) - 1), page_size)
+
+def gui_search_logs_next(since, until, module, action, text, page, page_size):
+    return gui_search_logs(since, until, module, action, text, int(page or 1) + 1, page_size)
+
+def _followable_log(path: str):
+    """Una sesión de la GUI solo puede seguir los logs ofrecidos en la lista o los del directorio de logs."""
+    if not path:
+        return False
+    real_path = os.path.realpath(path)
+    if os.path.commonpath([real_path, os.path.realpath(config.LOG_DIR)]) == os.path.realpath(config.LOG_DIR):
+        return True
+    return real_path in {os.path.realpath(log_file) for log_file in log_management.available_log_files()}
+
+def gui_start_follow(path: str, lines: float, follower_id):
+    """Empieza a seguir un log: muestra sus últimas líneas y activa el temporizador de refresco."""
+    log_tail_utils.close_follower(follower_id)
+    if not _followable_log(path):
+        return None, f"[ERROR] Solo se pueden seguir los logs de la lista o los de {config.LOG_DIR}.", gr.update(active=False)
+    if not os.path.exists(path):
+        return None, f"[ERROR] El archivo '{path}' no existe.", gr.update(active=False)
+    logger_utils.flush_logs()
+    follower_id, initial = log_tail_utils.open_follower(path, initial_lines=int(lines or 100), max_lines=int(lines or 100))
+    text = "\n".join(log_management.format_log_line(line) for line in initial)
+    return follower_id, text, gr.update(active=True)
+
+def gui_follow_tick(follower_id):
+    """En cada tick solo se leen las líneas nuevas; si no las hay, la vista no se actualiza."""
+    follower = log_tail_utils.get_follower(follower_id)
+    if follower is None or not follower.read_new():
+        return gr.update()
+    return "\n".join(log_management.format_log_line(line) for line in follower.lines)
+
+def gui_stop_follow(follower_id):
+    log_tail_utils.close_follower(follower_id)
+    return None, gr.update(active=False)
+
+## Trabajos
+def gui_refresh_jobs(job_id):
+    """Tabla de trabajos y detalle (progreso o resultado) del trabajo seleccionado."""
+    table = jobs_utils.format_jobs_table(jobs_utils.get_job_manager().list())
+    return table, gui_job_detail(job_id)
+
+def gui_job_detail(job_id):
+    job = jobs_utils.get_job_manager().get(job_id) if job_id else None
+    if job is None:
+        return "Introduzca el id de un trabajo para ver su progreso."
+    duration = job.duration()
+    header = f"### Trabajo #{job.id}: {job.name}\n**Estado:** {job.status}"
+    if duration is not None:
+        header += f" — {duration:.1f} s"
+    if job.error:
+        header += f"\n\n**[ERROR]** {job.error}"
+    body = job.messages()
+    console = job.console_output()
+    if console.strip():
+        body += f"\n### Salida Directa de Consola:\n<pre>{html.escape(console)}</pre>"
+    progress = job.progress()
+    if progress.strip() and job.status not in jobs_utils.FINISHED_STATES:
+        body += f"\n### Salida en Curso:\n<pre>{html.escape(progress[-20000:])}</pre>"
+    return header + "\n\n" + body
+
+def gui_cancel_job(job_id):
+    if not job_id or not jobs_utils.get_job_manager().cancel(job_id):
+        return "**[ERROR]** El trabajo no existe o ya ha terminado."
+    return gui_job_detail(job_id)
 
 def create_gradio_interface():
+    _register_shared_views()
     with gr.Blocks(title="System Administration Tool",theme=gr.themes.Soft()) as demo:
         gr.Markdown(f"# Herramienta de Administración de Sistemas (GUI)")
         gr.Markdown(f"### Sistema Operativo Detectado: **{system_info_utils.get_os_type().capitalize()}**")
@@ -308,11 +577,13 @@ def create_gradio_interface():
             with gr.Accordion("Listar Usuarios y Grupos", open=True):
                 list_users_btn = gr.Button("Listar Usuarios")
                 output_list_users = gr.Markdown()
-                list_users_btn.click(gui_list_users, inputs=None, outputs=output_list_users)
+                users_table = _result_table_view()
+                list_users_btn.click(gui_list_users, inputs=None, outputs=[output_list_users, *users_table])
 
                 list_groups_btn = gr.Button("Listar Grupos")
                 output_list_groups = gr.Markdown()
-                list_groups_btn.click(gui_list_groups, inputs=None, outputs=output_list_groups)
+                groups_table = _result_table_view()
+                list_groups_btn.click(gui_list_groups, inputs=None, outputs=[output_list_groups, *groups_table])
 
             with gr.Accordion("Añadir Usuario", open=False):
                 add_username = gr.Textbox(label="Nombre de Usuario")
@@ -441,27 +712,28 @@ def create_gradio_interface():
             with gr.Accordion("Uso de CPU", open=True):
                 get_cpu_btn = gr.Button("Obtener Uso de CPU")
                 output_cpu_usage = gr.Markdown()
-                get_cpu_btn.click(gui_get_cpu_usage, inputs=None, outputs=output_cpu_usage)
+                _shared_view("resources.cpu", get_cpu_btn, output_cpu_usage)
             
             with gr.Accordion("Uso de Memoria", open=False):
                 get_mem_btn = gr.Button("Obtener Uso de Memoria")
                 output_mem_usage = gr.Markdown()
-                get_mem_btn.click(gui_get_memory_usage, inputs=None, outputs=output_mem_usage)
+                _shared_view("resources.memory", get_mem_btn, output_mem_usage)
 
             with gr.Accordion("Uso de Disco", open=False):
                 get_disk_usage_btn = gr.Button("Obtener Uso de Disco")
                 output_disk_usage = gr.Markdown()
-                get_disk_usage_btn.click(gui_get_disk_usage, inputs=None, outputs=output_disk_usage)
+                disk_usage_table = _result_table_view()
+                _shared_view("resources.disk", get_disk_usage_btn, output_disk_usage, disk_usage_table)
             
             with gr.Accordion("Estadísticas de Red", open=False):
                 get_net_stats_btn = gr.Button("Obtener Estadísticas de Red")
                 output_net_stats = gr.Markdown()
-                get_net_stats_btn.click(gui_get_network_stats, inputs=None, outputs=output_net_stats)
+                _shared_view("resources.network", get_net_stats_btn, output_net_stats)
             
             with gr.Accordion("Tiempo de Actividad (Uptime)", open=False):
                 get_uptime_btn = gr.Button("Obtener Tiempo de Actividad")
                 output_uptime = gr.Markdown()
-                get_uptime_btn.click(gui_get_system_uptime, inputs=None, outputs=output_uptime)
+                _shared_view("resources.uptime", get_uptime_btn, output_uptime)
 
         # --- Pestaña de Servicios ---
         with gr.Tab("Servicios"):
@@ -469,7 +741,8 @@ def create_gradio_interface():
             with gr.Accordion("Listar Servicios", open=True):
                 list_services_btn = gr.Button("Listar Servicios")
                 output_services_list = gr.Markdown()
-                list_services_btn.click(gui_list_services, inputs=None, outputs=output_services_list)
+                services_table = _result_table_view()
+                _shared_view("services.list", list_services_btn, output_services_list, services_table)
             
             with gr.Accordion("Control de Servicios", open=False):
                 service_name_control = gr.Textbox(label="Nombre del Servicio")
@@ -492,7 +765,49 @@ def create_gradio_interface():
             with gr.Accordion("Listar Contenedores", open=True):
                 list_docker_btn = gr.Button("Listar Contenedores")
                 output_docker_list = gr.Markdown()
-                list_docker_btn.click(gui_list_docker_containers, inputs=None, outputs=output_docker_list)
+                docker_table = _result_table_view()
+                _shared_view("docker.containers", list_docker_btn, output_docker_list, docker_table)
+
+            with gr.Accordion("Inventario en Vivo", open=False):
+                gr.Markdown("Contenedores, imágenes, redes y volúmenes en memoria, actualizados con los eventos del daemon de Docker.")
+                with gr.Row():
+                    inventory_name = gr.Textbox(label="Filtrar por nombre", placeholder="Ej: web o web-*")
+                    inventory_state = gr.Dropdown(label="Estado", value="",
+                                                  choices=["", "running", "exited", "paused", "restarting", "created", "dead"])
+                with gr.Row():
+                    inventory_start_btn = gr.Button("Ver en Vivo")
+                    inventory_stop_btn = gr.Button("Detener")
+                output_inventory = gr.Markdown()
+                inventory_table = gr.Dataframe(interactive=False, wrap=True, visible=False)
+                inventory_version = gr.State(None)
+                inventory_timer = gr.Timer(1.0, active=False)
+                inventory_outputs = [output_inventory, inventory_table, inventory_version, inventory_timer]
+                inventory_start_btn.click(gui_start_docker_inventory, inputs=[inventory_name, inventory_state],
+                                          outputs=inventory_outputs)
+                inventory_timer.tick(gui_docker_inventory_tick, inputs=[inventory_name, inventory_state, inventory_version],
+                                     outputs=inventory_outputs)
+                inventory_stop_btn.click(gui_stop_docker_inventory, inputs=None, outputs=[inventory_version, inventory_timer])
+
+            with gr.Accordion("Uso de Recursos (Top)", open=False):
+                with gr.Row():
+                    stats_sort = gr.Dropdown(label="Ordenar por", value="cpu", choices=["cpu", "mem", "net", "io", "name"])
+                    stats_limit = gr.Number(label="Número de contenedores (0 = todos)", value=0, precision=0)
+                with gr.Row():
+                    stats_start_btn = gr.Button("Ver Uso de Recursos")
+                    stats_stop_btn = gr.Button("Detener")
+                output_docker_stats = gr.Markdown()
+                docker_stats_table = gr.Dataframe(interactive=False, wrap=True, visible=False)
+                docker_stats_timer = gr.Timer(2.0, active=False)
+                stats_start_btn.click(gui_start_docker_stats, inputs=[stats_sort, stats_limit],
+                                      outputs=[output_docker_stats, docker_stats_table, docker_stats_timer])
+                docker_stats_timer.tick(gui_docker_stats_tick, inputs=[stats_sort, stats_limit], outputs=docker_stats_table)
+                stats_stop_btn.click(lambda: gr.update(active=False), inputs=None, outputs=docker_stats_timer)
+
+            with gr.Accordion("Estado de un Contenedor", open=False):
+                container_id_name_status = gr.Textbox(label="ID o Nombre del Contenedor")
+                status_docker_btn = gr.Button("Consultar Estado")
+                output_docker_status = gr.Markdown()
+                status_docker_btn.click(gui_docker_container_status, inputs=[container_id_name_status], outputs=output_docker_status)
 
             with gr.Accordion("Control de Contenedores", open=False):
                 container_id_name_control = gr.Textbox(label="ID o Nombre del Contenedor")
@@ -505,6 +820,20 @@ def create_gradio_interface():
                 stop_docker_btn.click(gui_stop_docker_container, inputs=[container_id_name_control], outputs=output_docker_control)
                 restart_docker_btn.click(gui_restart_docker_container, inputs=[container_id_name_control], outputs=output_docker_control)
             
+            with gr.Accordion("Operaciones en Lote", open=False):
+                bulk_selector = gr.Textbox(label="Contenedores", placeholder="web,db,dns, cliente* o label=com.docker.compose.project=docker")
+                with gr.Row():
+                    bulk_operation = gr.Radio(label="Operación", choices=["Iniciar", "Detener", "Reiniciar", "Eliminar"], value="Detener")
+                    bulk_parallel = gr.Number(label="Contenedores a la vez (0 = por defecto)", value=0, precision=0)
+                    bulk_timeout = gr.Number(label="Segundos de gracia al detener (0 = por defecto)", value=0, precision=0)
+                confirm_bulk_remove = gr.Checkbox(label="Confirmar Eliminación", info="Necesario para eliminar")
+                bulk_btn = gr.Button("Ejecutar en Lote")
+                output_docker_bulk = gr.Markdown()
+                docker_bulk_table = _result_table_view()
+                bulk_btn.click(gui_bulk_docker_operation,
+                               inputs=[bulk_operation, bulk_selector, bulk_parallel, bulk_timeout, confirm_bulk_remove],
+                               outputs=[output_docker_bulk, *docker_bulk_table])
+
             with gr.Accordion("Eliminar Contenedor", open=False):
                 container_id_name_remove = gr.Textbox(label="ID o Nombre del Contenedor a Eliminar")
                 confirm_remove_docker = gr.Checkbox(label="Confirmar Eliminación", info="Marque para confirmar la eliminación")
@@ -519,6 +848,27 @@ def create_gradio_interface():
                 output_docker_logs = gr.Markdown()
                 view_logs_btn.click(gui_view_docker_logs, inputs=[container_id_name_logs, num_lines_logs], outputs=output_docker_logs)
 
+            with gr.Accordion("Seguir Logs de Varios Contenedores", open=False):
+                with gr.Row():
+                    multi_logs_containers = gr.Textbox(label="Contenedores", placeholder="web,db,dns o cliente* (vacío: todos)")
+                    multi_logs_pattern = gr.Textbox(label="Filtro (expresión regular)", placeholder="Ej: error|warn")
+                with gr.Row():
+                    multi_logs_since = gr.Textbox(label="Desde", placeholder="Ej: 10m, 2h, 2024-05-01 10:00")
+                    multi_logs_until = gr.Textbox(label="Hasta", placeholder="Vacío: sin límite")
+                with gr.Row():
+                    multi_logs_start_btn = gr.Button("Empezar a Seguir")
+                    multi_logs_stop_btn = gr.Button("Detener")
+                output_multi_logs = gr.Textbox(label="Logs", lines=20, max_lines=20, autoscroll=True, interactive=False)
+                multi_logs_state = gr.State(None) # Id del multiplexor de esta sesión
+                multi_logs_timer = gr.Timer(1.0, active=False)
+                multi_logs_start_btn.click(gui_start_docker_logs,
+                                           inputs=[multi_logs_containers, multi_logs_pattern, multi_logs_since,
+                                                   multi_logs_until, multi_logs_state],
+                                           outputs=[multi_logs_state, output_multi_logs, multi_logs_timer])
+                multi_logs_stop_btn.click(gui_stop_docker_logs, inputs=[multi_logs_state],
+                                          outputs=[multi_logs_state, multi_logs_timer])
+                multi_logs_timer.tick(gui_docker_logs_tick, inputs=[multi_logs_state], outputs=output_multi_logs)
+
             with gr.Accordion("Ejecutar Comando en Contenedor", open=False):
                 container_id_name_exec = gr.Textbox(label="ID o Nombre del Contenedor")
                 command_to_exec = gr.Textbox(label="Comando a Ejecutar (ej: ls -l /)", placeholder="ls -l /app")
@@ -537,8 +887,10 @@ def create_gradio_interface():
                     deploy_compose_btn = gr.Button("Levantar Servicios (Up -d)")
                     stop_compose_btn = gr.Button("Detener y Eliminar Servicios (Down)")
                     build_compose_btn = gr.Button("Reconstruir Imágenes (Build)")
+                    plan_compose_btn = gr.Button("Ver Plan de Arranque")
                 
                 output_docker_compose = gr.Markdown()
+                plan_compose_btn.click(gui_docker_compose_plan, inputs=None, outputs=output_docker_compose)
                 deploy_compose_btn.click(gui_docker_compose_up, inputs=None, outputs=output_docker_compose)
                 stop_compose_btn.click(gui_docker_compose_down, inputs=None, outputs=output_docker_compose)
                 build_compose_btn.click(gui_docker_compose_build, inputs=None, outputs=output_docker_compose)
@@ -695,7 +1047,8 @@ def create_gradio_interface():
                 list_disk_parts_btn.click(gui_list_disk_partitions, inputs=None, outputs=output_disk_parts)
                 get_mount_points_btn = gr.Button("Ver Uso de Particiones Montadas")
                 output_mount_points = gr.Markdown()
-                get_mount_points_btn.click(gui_get_mount_points, inputs=None, outputs=output_mount_points)
+                mount_points_table = _result_table_view()
+                get_mount_points_btn.click(gui_get_mount_points, inputs=None, outputs=[output_mount_points, *mount_points_table])
             
             with gr.Accordion("Generar Log de Discos", open=False): # Nuevo acordeón para el log
                 generate_disk_log_btn = gr.Button("Generar Log de Discos")
@@ -709,7 +1062,8 @@ def create_gradio_interface():
             with gr.Accordion("Listar Procesos", open=True):
                 list_proc_btn = gr.Button("Listar Procesos")
                 output_proc_list = gr.Markdown()
-                list_proc_btn.click(gui_list_processes, inputs=None, outputs=output_proc_list)
+                proc_table = _result_table_view()
+                list_proc_btn.click(gui_list_processes, inputs=None, outputs=[output_proc_list, *proc_table])
             
             with gr.Accordion("Terminar Proceso por PID", open=False):
                 pid_to_terminate = gr.Textbox(label="PID del Proceso")
@@ -743,6 +1097,93 @@ def create_gradio_interface():
                     outputs=output_proc_search
                 )
 
+        # --- Pestaña de Salidas Grandes ---
+        with gr.Tab("Salidas Grandes"):
+            gr.Markdown("## Salidas de Comandos Truncadas")
+            gr.Markdown("Las salidas que superan el límite de captura se muestran truncadas (inicio y final); aquí puede paginar la salida completa.")
+            refresh_spills_btn = gr.Button("Actualizar Lista")
+            spill_id_dropdown = gr.Dropdown(label="Salida", choices=[])
+            output_spills_list = gr.Markdown()
+            with gr.Row():
+                spill_page = gr.Number(label="Página", value=1, precision=0)
+                spill_lines_per_page = gr.Number(label="Líneas por página", value=500, precision=0)
+            read_spill_btn = gr.Button("Ver Página")
+            output_spill_page = gr.Markdown()
+            refresh_spills_btn.click(gui_list_spilled_outputs, inputs=None, outputs=[spill_id_dropdown, output_spills_list])
+            read_spill_btn.click(gui_read_spilled_page, inputs=[spill_id_dropdown, spill_page, spill_lines_per_page], outputs=output_spill_page)
+
+        # --- Pestaña de Logs ---
+        with gr.Tab("Logs"):
+            gr.Markdown("## Consulta de Logs")
+            gr.Markdown("Busque acciones registradas por la herramienta. Deje vacío cualquier campo para no filtrar por él.")
+            with gr.Row():
+                logs_since = gr.Textbox(label="Desde (AAAA-MM-DD [HH:MM:SS])")
+                logs_until = gr.Textbox(label="Hasta (AAAA-MM-DD [HH:MM:SS])")
+            with gr.Row():
+                logs_module = gr.Textbox(label="Módulo (ej: Firewall, Docker, Service)")
+                logs_action = gr.Textbox(label="Acción (ej: Add Rule, Start Service)")
+                logs_text = gr.Textbox(label="Texto en los detalles")
+            with gr.Row():
+                logs_page = gr.Number(label="Página", value=1, precision=0)
+                logs_page_size = gr.Number(label="Registros por página", value=50, precision=0)
+            with gr.Row():
+                logs_previous_btn = gr.Button("Anterior")
+                logs_search_btn = gr.Button("Buscar")
+                logs_next_btn = gr.Button("Siguiente")
+            output_logs = gr.Markdown()
+            logs_inputs = [logs_since, logs_until, logs_module, logs_action, logs_text, logs_page, logs_page_size]
+            logs_search_btn.click(gui_search_logs, inputs=logs_inputs, outputs=[output_logs, logs_page])
+            logs_previous_btn.click(gui_search_logs_previous, inputs=logs_inputs, outputs=[output_logs, logs_page])
+            logs_next_btn.click(gui_search_logs_next, inputs=logs_inputs, outputs=[output_logs, logs_page])
+
+            with gr.Accordion("Seguir un Log en Vivo", open=False):
+                log_files = log_management.available_log_files()
+                follow_path = gr.Dropdown(label="Archivo de log", choices=log_files, value=log_files[0], allow_custom_value=True)
+                follow_lines = gr.Number(label="Líneas visibles", value=100, precision=0)
+                with gr.Row():
+                    follow_start_btn = gr.Button("Empezar a Seguir")
+                    follow_stop_btn = gr.Button("Detener")
+                output_follow = gr.Textbox(label="Log", lines=20, max_lines=20, autoscroll=True, interactive=False)
+                follow_state = gr.State(None) # Id del seguimiento de esta sesión
+                follow_timer = gr.Timer(1.0, active=False)
+                follow_start_btn.click(gui_start_follow, inputs=[follow_path, follow_lines, follow_state],
+                                       outputs=[follow_state, output_follow, follow_timer])
+                follow_stop_btn.click(gui_stop_follow, inputs=[follow_state], outputs=[follow_state, follow_timer])
+                follow_timer.tick(gui_follow_tick, inputs=[follow_state], outputs=output_follow)
+
+        # --- Pestaña de Trabajos ---
+        with gr.Tab("Trabajos"):
+            gr.Markdown("## Trabajos en Segundo Plano")
+            gr.Markdown("Las operaciones largas (actualizar paquetes, Docker Compose up y build, limpiar imágenes, log del firewall) se ejecutan en segundo plano. La lista se actualiza automáticamente.")
+            output_jobs_table = gr.Markdown()
+            with gr.Row():
+                job_id_input = gr.Number(label="Id del trabajo", precision=0)
+                job_view_btn = gr.Button("Ver Trabajo")
+                job_cancel_btn = gr.Button("Cancelar Trabajo")
+            output_job_detail = gr.Markdown()
+            jobs_timer = gr.Timer(2.0)
+            jobs_timer.tick(gui_refresh_jobs, inputs=[job_id_input], outputs=[output_jobs_table, output_job_detail])
+            job_view_btn.click(gui_refresh_jobs, inputs=[job_id_input], outputs=[output_jobs_table, output_job_detail])
+            job_cancel_btn.click(gui_cancel_job, inputs=[job_id_input], outputs=output_job_detail)
+
+        # --- Pestaña de Rendimiento ---
+        with gr.Tab("Rendimiento"):
+            gr.Markdown("## Rendimiento de Operaciones")
+            gr.Markdown("Latencias, CPU de procesos hijos y tamaño de salida de los comandos y acciones ejecutados en esta sesión.")
+            with gr.Accordion("Operaciones Más Lentas", open=True):
+                slowest_limit = gr.Number(label="Número de operaciones", value=10, precision=0)
+                slowest_btn = gr.Button("Ver Operaciones Más Lentas")
+                output_slowest = gr.Markdown()
+                slowest_btn.click(gui_show_slowest_operations, inputs=[slowest_limit], outputs=output_slowest)
+
+            with gr.Accordion("Resumen Completo", open=False):
+                with gr.Row():
+                    metrics_summary_btn = gr.Button("Ver Resumen")
+                    metrics_reset_btn = gr.Button("Reiniciar Métricas")
+                output_metrics_summary = gr.Markdown()
+                metrics_summary_btn.click(gui_show_metrics_summary, inputs=None, outputs=output_metrics_summary)
+                metrics_reset_btn.click(gui_reset_metrics, inputs=None, outputs=output_metrics_summary)
+
     return demo
 
 # --- Lanzamiento de la Interfaz (ya proporcionado y validado en la respuesta anterior) ---
@@ -751,5 +1192,8 @@ def start_gui():
     display_utils.IS_GUI_MODE = True
     print("Iniciando la interfaz gráfica de Gradio...")
     app = create_gradio_interface()
+    # Cada petición tiene su propio contexto de salida (utils.display), por lo que la
+    # cola de Gradio puede atender varias peticiones a la vez
+    app.queue(default_concurrency_limit=config.GUI_CONCURRENCY_LIMIT)
     # Aseguramos que Gradio se lance en el navegador automáticamente
     app.launch(share=False, inbrowser=True)
\ No newline at end of file
@@ -0,0 +1,116 @@
+from utils.display import print_header, print_info, print_error, print_warning, clear_screen, print_menu, get_user_input, print_output
+from utils.result import returns_result
+from utils import log_query
+from utils import log_tail
+from utils import logger
+import json
+import os
+
+# Logs del sistema que se ofrecen para seguir en vivo (además del log de la herramienta)
+SYSTEM_LOG_FILES = ["/var/log/syslog", "/var/log/auth.log", "/var/log/messages", "/var/log/secure"]
+
+def logs_menu():
+    """
+    Muestra un menú para consultar los logs de la herramienta.
+    """
+    while True:
+        clear_screen()
+        print_header("Consulta de Logs")
+        options = {
+            "1": "Ver Últimos Registros",
+            "2": "Buscar en los Logs",
+            "3": "Seguir un Log en Vivo",
+            "0": "Volver al Menú Principal"
+        }
+        print_menu(options)
+
+        choice = get_user_input("Seleccione una opción")
+
+        if choice == '1':
+            search_logs()
+        elif choice == '2':
+            print_info("Deje vacío cualquier campo para no filtrar por él.")
+            since = get_user_input("Desde (AAAA-MM-DD [HH:MM:SS])")
+            until = get_user_input("Hasta (AAAA-MM-DD [HH:MM:SS])")
+            module = get_user_input("Módulo (ej: Firewall, Docker, Service)")
+            action = get_user_input("Acción (ej: Add Rule, Start Service)")
+            text = get_user_input("Texto a buscar en los detalles")
+            page = 1
+            while True:
+                total = search_logs(since, until, module, action, text, page)
+                if total <= page * 50:
+                    break
+                if get_user_input("¿Ver la página siguiente? (s/n)").lower() != 's':
+                    break
+                page += 1
+                clear_screen()
+        elif choice == '3':
+            paths = available_log_files()
+            print_menu({str(i): path for i, path in enumerate(paths, 1)})
+            selection = get_user_input("Seleccione un log o escriba una ruta")
+            path = paths[int(selection) - 1] if selection.isdigit() and 0 < int(selection) <= len(paths) else selection
+            follow_log(path)
+        elif choice == '0':
+            break
+        else:
+            print_error("Opción inválida. Por favor, intente de nuevo.")
+        get_user_input("Presione Enter para continuar...")
+
+@returns_result
+def search_logs(since: str = "", until: str = "", module: str = "", action: str = "", text: str = "",
+                page: int = 1, page_size: int = 50):
+    """
+    Busca registros en los logs (del más reciente al más antiguo) y muestra una página de resultados.
+    El valor del resultado es el número total de coincidencias.
+    """
+    print_header("Búsqueda en los Logs")
+    try:
+        records, total = log_query.query_logs(since or None, until or None, module or None, action or None,
+                                              text or None, page=page, page_size=page_size)
+    except ValueError as e:
+        print_error(f"Parámetros de búsqueda no válidos: {e}")
+        return 0
+
+    if total == 0:
+        print_warning("No se encontraron registros con esos filtros.")
+        return 0
+    page_size = max(1, int(page_size or 50))
+    total_pages = -(-total // page_size)
+    print_info(f"{total} registros encontrados. Página {page} de {total_pages}:")
+    print_output(log_query.format_records(records))
+    return total
+
+def available_log_files():
+    """Log activo de la herramienta seguido de los logs del sistema que existen."""
+    return [logger.current_log_file()] + [path for path in SYSTEM_LOG_FILES if os.path.exists(path)]
+
+def format_log_line(line: str):
+    """Las líneas JSON del log de auditoría se muestran con el formato de texto clásico."""
+    if line.startswith("{"):
+        try:
+            return logger.render_text(json.loads(line)).rstrip("\n")
+        except (ValueError, KeyError):
+            pass
+    return line
+
+def follow_log(path: str, lines: int = 50):
+    """
+    Muestra las últimas líneas de un log y las nuevas según se escriben (como 'tail -F').
+    Se detiene con Ctrl+C.
+    """
+    print_header(f"Siguiendo: {path}")
+    if not path or not os.path.exists(path):
+        print_error(f"El archivo '{path}' no existe.")
+        return
+    logger.flush_logs()
+    follower = log_tail.LogFollower(path, initial_lines=lines)
+    print_info("Presione Ctrl+C para dejar de seguir el log.")
+    try:
+        for line in follower.lines:
+            print(format_log_line(line))
+        for line in follower.follow():
+            print(format_log_line(line), flush=True)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        follower.close()
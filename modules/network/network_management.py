@@ -1,4 +1,5 @@
-from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
+from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input, print_output, print_table
+from utils.result import returns_result, parse_columns
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
 import os
@@ -52,6 +53,7 @@ def network_menu():
             print_error("Opción inválida. Por favor, intente de nuevo.")
         get_user_input("Presione Enter para continuar...")
 
+@returns_result
 def view_ip_config():
     """
     Muestra la configuración IP del sistema.
@@ -67,12 +69,13 @@ def view_ip_config():
     output, status = execute_command(command)
     if status == 0:
         print_info("Configuración IP:")
-        print(output) # Usa print() para la salida bruta del comando
+        print_output(output) # Salida bruta del comando
         log_action("Network", "View IP Config", "Configuración IP listada exitosamente.")
     else:
         print_error(f"Error al ver configuración IP: {output}")
         log_action("Network", "View IP Config", f"Error al ver configuración IP: {output}")
 
+@returns_result
 def configure_static_ip(interface_name: str, ip_address: str, subnet_mask: str, gateway: str, confirm: str):
     """
     Configura una dirección IP estática para una interfaz de red.
@@ -123,6 +126,7 @@ def configure_static_ip(interface_name: str, ip_address: str, subnet_mask: str,
         print_info("Operación de configuración IP estática cancelada por el usuario.")
         log_action("Network", "Configure Static IP", "Configuración de IP estática cancelada.")
 
+@returns_result
 def toggle_interface_status(interface_name: str, action: str, confirm: str):
     """
     Habilita o deshabilita una interfaz de red.
@@ -170,6 +174,7 @@ def toggle_interface_status(interface_name: str, action: str, confirm: str):
         print_info(f"Operación de {action} interfaz cancelada por el usuario.")
         log_action("Network", "Toggle Interface", f"Operación {action} interfaz cancelada.")
 
+@returns_result
 def view_routing_tables():
     """
     Muestra las tablas de enrutamiento del sistema.
@@ -185,12 +190,13 @@ def view_routing_tables():
     output, status = execute_command(command)
     if status == 0:
         print_info("Tablas de enrutamiento:")
-        print(output)
+        print_output(output)
         log_action("Network", "View Routing Tables", "Tablas de enrutamiento listadas exitosamente.")
     else:
         print_error(f"Error al ver tablas de enrutamiento: {output}")
         log_action("Network", "View Routing Tables", f"Error al ver tablas de enrutamiento: {output}")
 
+@returns_result
 def view_network_connections():
     """
     Muestra las conexiones de red activas del sistema.
@@ -206,12 +212,18 @@ def view_network_connections():
     output, status = execute_command(command)
     if status == 0:
         print_info("Conexiones de red activas:")
-        print(output)
+        if os_type == 'windows':
+            print_output(output)
+        else:
+            # La cabecera de ss tiene columnas de dos palabras ("Local Address:Port"): se usan nombres propios
+            columns = ["Netid", "State", "Recv-Q", "Send-Q", "Local", "Peer", "Process"]
+            print_table(*parse_columns(output.split("\n", 1)[-1] if "\n" in output else "", columns))
         log_action("Network", "View Network Connections", "Conexiones de red listadas exitosamente.")
     else:
         print_error(f"Error al ver conexiones de red: {output}")
         log_action("Network", "View Network Connections", f"Error al ver conexiones de red: {output}")
 
+@returns_result
 def generate_network_log():
     """
     Genera un log consolidado de la configuración y estado de la red.
@@ -1,6 +1,8 @@
-from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
+from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input, print_output, print_table
+from utils.result import returns_result, parse_columns
 from utils.system_info import execute_command, get_os_type
 from utils.logger import log_action
+from utils import capabilities
 import os
 
 def package_menu():
@@ -49,27 +51,17 @@ def _get_package_manager():
     """
     Determina el gestor de paquetes del sistema operativo (solo Linux).
     Retorna 'apt', 'dnf', 'yum', o None si no es Linux o no se detecta.
-    Prioriza 'dnf' sobre 'yum'.
+    Prioriza 'dnf' sobre 'yum'. El sondeo se hace una sola vez al arrancar
+    (utils.capabilities), sin lanzar procesos 'which'.
     """
-    os_type = get_os_type()
-    if os_type == 'linux':
-        if os.path.exists('/etc/debian_version'):
-            return 'apt'
-        elif os.path.exists('/etc/redhat-release'):
-            # Check for dnf first, then yum
-            output, status = execute_command("which dnf")
-            if status == 0:
-                return 'dnf'
-            output, status = execute_command("which yum")
-            if status == 0:
-                return 'yum'
-    return None # Returns None for Windows or unsupported Linux distros
+    return capabilities.get_package_manager()
 
 def _unsupported_os_message(operation: str):
     """Prints a message for unsupported OS/package manager."""
     print_error(f"Operación de gestión de paquetes '{operation}' no soportada en este sistema operativo (solo Linux compatible con apt/dnf/yum).")
     log_action("PackageManager", operation, "Operación no soportada: OS no es Linux o gestor no detectado.")
 
+@returns_result
 def list_installed_packages():
     """
     Lista los paquetes instalados en el sistema (solo Linux).
@@ -99,8 +91,10 @@ def list_installed_packages():
 
     if status == 0:
         print_success("Paquetes instalados:")
-        if output.strip():
-            print("```\n" + output + "\n```")
+        if output.strip() and manager == 'apt':
+            print_table(*parse_columns(output, ["Estado", "Paquete", "Versión", "Arquitectura", "Descripción"]))
+        elif output.strip():
+            print_output(output)
         else:
             print_info("No se encontraron paquetes instalados o la lista está vacía.")
         log_action("PackageManager", "List Packages", "Paquetes listados exitosamente.")
@@ -108,6 +102,7 @@ def list_installed_packages():
         print_error(f"Error al listar paquetes: {output}")
         log_action("PackageManager", "List Packages", f"Error al listar paquetes: {output}")
 
+@returns_result
 def search_package(package_name: str):
     """
     Busca un paquete por nombre (solo Linux).
@@ -135,8 +130,12 @@ def search_package(package_name: str):
     
     if status == 0:
         print_success(f"Resultados de búsqueda para '{package_name}':")
-        if output.strip():
-            print("```\n" + output + "\n```")
+        if output.strip() and manager == 'apt':
+            # apt-cache search: "paquete - descripción"
+            print_table(["Paquete", "Descripción"],
+                        [line.split(" - ", 1) for line in output.splitlines() if line.strip()])
+        elif output.strip():
+            print_output(output)
         else:
             print_info(f"No se encontraron resultados para '{package_name}'.")
         log_action("PackageManager", "Search Package", f"Búsqueda de '{package_name}' exitosa.")
@@ -144,6 +143,7 @@ def search_package(package_name: str):
         print_error(f"Error al buscar paquete: {output}")
         log_action("PackageManager", "Search Package", f"Error al buscar '{package_name}': {output}")
 
+@returns_result
 def install_package(package_name: str):
     """
     Instala un paquete específico (solo Linux).
@@ -171,12 +171,13 @@ def install_package(package_name: str):
     
     if status == 0:
         print_success(f"Paquete '{package_name}' instalado exitosamente.")
-        print("```\n" + output + "\n```")
+        print_output(output)
         log_action("PackageManager", "Install Package", f"Paquete '{package_name}' instalado exitosamente.")
     else:
         print_error(f"Error al instalar paquete '{package_name}': {output}")
         log_action("PackageManager", "Install Package", f"Error al instalar '{package_name}': {output}")
 
+@returns_result
 def remove_package(package_name: str):
     """
     Desinstala un paquete específico (solo Linux).
@@ -204,12 +205,13 @@ def remove_package(package_name: str):
     
     if status == 0:
         print_success(f"Paquete '{package_name}' desinstalado exitosamente.")
-        print("```\n" + output + "\n```")
+        print_output(output)
         log_action("PackageManager", "Remove Package", f"Paquete '{package_name}' desinstalado exitosamente.")
     else:
         print_error(f"Error al desinstalar paquete '{package_name}': {output}")
         log_action("PackageManager", "Remove Package", f"Error al desinstalar '{package_name}': {output}")
 
+@returns_result
 def update_package_list():
     """
     Actualiza la lista de paquetes disponibles (solo Linux).
@@ -233,12 +235,13 @@ def update_package_list():
     
     if status == 0:
         print_success("Lista de paquetes actualizada exitosamente.")
-        print("```\n" + output + "\n```")
+        print_output(output)
         log_action("PackageManager", "Update List", "Lista de paquetes actualizada exitosamente.")
     else:
         print_error(f"Error al actualizar lista de paquetes: {output}")
         log_action("PackageManager", "Update List", f"Error al actualizar lista de paquetes: {output}")
 
+@returns_result
 def upgrade_all_packages():
     """
     Actualiza todos los paquetes instalados a sus últimas versiones (solo Linux).
@@ -262,7 +265,7 @@ def upgrade_all_packages():
     
     if status == 0:
         print_success("Todos los paquetes actualizados exitosamente.")
-        print("```\n" + output + "\n```")
+        print_output(output)
         log_action("PackageManager", "Upgrade All", "Todos los paquetes actualizados exitosamente.")
     else:
         print_error(f"Error al actualizar todos los paquetes: {output}")
@@ -0,0 +1,362 @@
+import collections
+import concurrent.futures
+import contextvars
+import json
+import os
+import time
+import config
+from utils.display import print_header, print_info, print_success, print_error, print_warning, print_table
+from utils.result import returns_result
+from utils.system_info import get_os_type
+from utils.logger import log_action
+from utils import actions
+from utils import jobs
+
+# Estados de los pasos
+PENDING = "pendiente"
+OK = "correcto"
+WARNING = "advertencia"
+FAILED = "error"
+SKIPPED = "omitido" # Depende de un paso que falló
+
+# Acciones que se pueden agrupar en una sola ejecución cuando varios pasos están listos a la vez:
+# acción -> parámetro cuyos valores se unen con espacios (apt/dnf y systemctl aceptan varios nombres)
+BATCHABLE = {
+    "packages.install": "name",
+    "packages.remove": "name",
+    "services.start": "service",
+    "services.stop": "service",
+    "services.restart": "service",
+    "services.enable": "service",
+    "services.disable": "service",
+}
+
+# Categoría de trabajos (config.JOB_CATEGORY_LIMITS) de cada módulo: limita los pasos
+# simultáneos que compiten por el mismo recurso (el lock de dpkg, las reglas del firewall...)
+MODULE_CATEGORIES = {"packages": "paquetes", "docker": "docker", "firewall": "firewall"}
+
+class Step:
+    """Paso de un playbook: una acción del catálogo (utils.actions) con sus parámetros."""
+
+    def __init__(self, step_id, action, values, depends_on):
+        self.id = step_id
+        self.action = action
+        self.values = values
+        self.depends_on = depends_on
+        self.status = PENDING
+        self.started = None # Segundos desde el inicio del playbook
+        self.duration = 0.0
+        self.batch = None # Pasos ejecutados junto a este (incluido él mismo)
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "action": self.action.full_name,
+            "status": self.status,
+            "depends_on": list(self.depends_on),
+            "started": None if self.started is None else round(self.started, 3),
+            "duration": round(self.duration, 3),
+            "batch": list(self.batch) if self.batch else None,
+            "error": self.error,
+        }
+
+def load_playbook(path):
+    """
+    Lee un playbook YAML o JSON: un objeto con `name`, `concurrency` opcional y
+    `steps` (o directamente la lista de pasos). Cada paso tiene `action`
+    ("modulo.accion"), `params`, `id` opcional y `depends_on` (lista de ids).
+    Retorna (nombre, concurrencia, pasos en orden). Lanza ValueError si no es válido.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith((".yml", ".yaml")):
+        try:
+            import yaml # Importación diferida: solo hace falta para playbooks YAML
+        except ImportError:
+            raise ValueError("Los playbooks YAML necesitan PyYAML (pip install -r requirements.txt); use JSON si no está disponible.")
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"YAML no válido: {e}")
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"JSON no válido: {e}")
+
+    if isinstance(data, list):
+        data = {"steps": data}
+    if not isinstance(data, dict) or not isinstance(data.get("steps"), list) or not data["steps"]:
+        raise ValueError("El playbook debe contener una lista 'steps' con al menos un paso.")
+
+    steps = collections.OrderedDict()
+    for index, raw in enumerate(data["steps"], 1):
+        if not isinstance(raw, dict) or "action" not in raw:
+            raise ValueError(f"Paso {index}: falta 'action'.")
+        step_id = str(raw.get("id") or f"paso{index}")
+        if step_id in steps:
+            raise ValueError(f"Paso {index}: id duplicado '{step_id}'.")
+        action = actions.get_action(str(raw["action"]))
+        if action is None or action.module == "playbook":
+            raise ValueError(f"Paso '{step_id}': acción desconocida '{raw['action']}'.")
+        values = raw.get("params") or {}
+        if not isinstance(values, dict):
+            raise ValueError(f"Paso '{step_id}': 'params' debe ser un objeto.")
+        try:
+            action.bind(values) # Valida los parámetros antes de ejecutar nada
+        except ValueError as e:
+            raise ValueError(f"Paso '{step_id}': {e}")
+        depends_on = raw.get("depends_on") or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        steps[step_id] = Step(step_id, action, values, [str(dep) for dep in depends_on])
+
+    for step in steps.values():
+        for dep in step.depends_on:
+            if dep not in steps:
+                raise ValueError(f"Paso '{step.id}': depende de '{dep}', que no existe.")
+    _topological_order(steps)
+    concurrency = _valid_concurrency(data.get("concurrency") or config.PLAYBOOK_CONCURRENCY)
+    if concurrency is None:
+        raise ValueError(f"'concurrency' debe ser un entero mayor o igual que 1 (valor: {data.get('concurrency')!r}).")
+    return str(data.get("name") or os.path.basename(path)), concurrency, list(steps.values())
+
+def _valid_concurrency(value):
+    """`value` como entero si es 1 o más; None si no es un número entero positivo."""
+    try:
+        concurrency = int(value)
+    except (TypeError, ValueError):
+        return None
+    return concurrency if concurrency >= 1 else None
+
+def _topological_order(steps):
+    """Orden de ejecución compatible con las dependencias. Lanza ValueError si hay un ciclo."""
+    remaining = {step_id: set(step.depends_on) for step_id, step in steps.items()}
+    order = []
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependencias circulares entre los pasos: {', '.join(remaining)}.")
+        for step_id in ready:
+            del remaining[step_id]
+            order.append(step_id)
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+def _group_ready(ready):
+    """Agrupa los pasos listos que se pueden ejecutar juntos (mismo tipo y demás parámetros iguales)."""
+    groups = collections.OrderedDict()
+    batching = get_os_type() == 'linux' # En Windows, net start/stop solo acepta un servicio
+    for step in ready:
+        name = step.action.full_name
+        batch_param = BATCHABLE.get(name) if batching else None
+        if batch_param is None:
+            key = step.id
+        else:
+            others = sorted((k, str(v)) for k, v in step.values.items() if k != batch_param)
+            key = (name, tuple(others))
+        groups.setdefault(key, []).append(step)
+    return list(groups.values())
+
+def _run_group(group):
+    """Ejecuta un paso o un lote de pasos. Retorna (CommandResult o None, error, duración)."""
+    step = group[0]
+    values = dict(step.values)
+    if len(group) > 1:
+        batch_param = BATCHABLE[step.action.full_name]
+        values[batch_param] = " ".join(str(member.values[batch_param]) for member in group)
+    start = time.monotonic()
+    try:
+        result = actions.run_action(step.action, values, echo=False)
+        return result, None, time.monotonic() - start
+    except Exception as e:
+        return None, str(e), time.monotonic() - start
+
+def _skip_dependents(step, dependents, steps):
+    pending = list(dependents[step.id])
+    while pending:
+        dependent = steps[pending.pop()]
+        if dependent.status == PENDING:
+            dependent.status = SKIPPED
+            dependent.error = f"depende de '{step.id}', que falló"
+            pending.extend(dependents[dependent.id])
+
+def execute_steps(steps, concurrency):
+    """
+    Ejecuta los pasos respetando sus dependencias: los independientes en paralelo
+    (como mucho `concurrency` a la vez y según los límites por categoría) y los del
+    mismo tipo listos a la vez, en un solo lote. Si se cancela el trabajo, no se
+    lanza ningún paso más. Retorna el tiempo total. Lanza ValueError si `concurrency` es menor que 1.
+    """
+    if concurrency < 1:
+        raise ValueError(f"La concurrencia debe ser mayor o igual que 1 (valor: {concurrency}).")
+    steps_by_id = {step.id: step for step in steps}
+    dependents = {step.id: [] for step in steps}
+    remaining = {}
+    for step in steps:
+        remaining[step.id] = set(step.depends_on)
+        for dep in step.depends_on:
+            dependents[dep].append(step.id)
+
+    ready = [step for step in steps if not step.depends_on]
+    running = {}
+    category_running = collections.Counter()
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max(1, concurrency), thread_name_prefix="playbook") as pool:
+        while ready or running:
+            if jobs.cancel_requested():
+                _skip_cancelled(ready)
+                ready.clear()
+                if not running:
+                    break
+            for group in _group_ready(ready):
+                if len(running) >= concurrency:
+                    break
+                category = MODULE_CATEGORIES.get(group[0].action.module)
+                limit = config.JOB_CATEGORY_LIMITS.get(category) if category else None
+                if limit is not None and category_running[category] >= limit:
+                    continue
+                category_running[category] += 1
+                batch = [member.id for member in group] if len(group) > 1 else None
+                for member in group:
+                    ready.remove(member)
+                    member.started = time.monotonic() - start
+                    member.batch = batch
+                # Con el contexto del playbook: si se cancela (trabajo de la GUI o de la API), también se matan los comandos de los pasos
+                running[pool.submit(contextvars.copy_context().run, _run_group, group)] = (group, category)
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                group, category = running.pop(future)
+                category_running[category] -= 1
+                result, error, duration = future.result()
+                for member in group:
+                    member.result = result
+                    member.duration = duration
+                    member.error = error
+                    if result is None or not result.ok:
+                        member.status = FAILED
+                    else:
+                        member.status = WARNING if result.status == "warning" else OK
+                _report_group(group)
+                for member in group:
+                    if member.status == FAILED:
+                        _skip_dependents(member, dependents, steps_by_id)
+                        continue
+                    for dependent_id in dependents[member.id]:
+                        remaining[dependent_id].discard(member.id)
+                        dependent = steps_by_id[dependent_id]
+                        if not remaining[dependent_id] and dependent.status == PENDING and dependent not in ready:
+                            ready.append(dependent)
+    _skip_cancelled(step for step in steps if step.status == PENDING)
+    return time.monotonic() - start
+
+def _skip_cancelled(steps):
+    for step in steps:
+        step.status = SKIPPED
+        step.error = "playbook cancelado"
+
+def _report_group(group):
+    step = group[0]
+    names = ", ".join(member.id for member in group)
+    label = f"[{names}] {step.action.full_name} ({step.duration:.2f}s)"
+    if step.status == FAILED:
+        detail = step.error or "; ".join(text for level, text in step.result.messages if level == "error")
+        print_error(f"{label}: {detail}")
+    elif step.status == WARNING:
+        print_warning(label)
+    else:
+        print_success(label)
+
+def critical_path(steps):
+    """Camino más largo por las dependencias con las duraciones medidas: (segundos, ids)."""
+    steps_by_id = collections.OrderedDict((step.id, step) for step in steps)
+    finish, previous = {}, {}
+    for step_id in _topological_order(steps_by_id):
+        step = steps_by_id[step_id]
+        before = max(step.depends_on, key=lambda dep: finish[dep], default=None)
+        finish[step_id] = (finish[before] if before is not None else 0.0) + step.duration
+        previous[step_id] = before
+    if not finish:
+        return 0.0, []
+    last = max(finish, key=finish.get)
+    path = []
+    while last is not None:
+        path.append(last)
+        last = previous[last]
+    return finish[path[0]], list(reversed(path))
+
+def _plan_waves(steps):
+    """Niveles de ejecución (pasos cuyas dependencias están en niveles anteriores)."""
+    steps_by_id = collections.OrderedDict((step.id, step) for step in steps)
+    level = {}
+    for step_id in _topological_order(steps_by_id):
+        step = steps_by_id[step_id]
+        level[step_id] = 1 + max((level[dep] for dep in step.depends_on), default=0)
+    waves = collections.defaultdict(list)
+    for step in steps:
+        waves[level[step.id]].append(step)
+    return [waves[number] for number in sorted(waves)]
+
+@returns_result
+def run_playbook(playbook_path: str, concurrency: int = 0, dry_run: bool = False):
+    """
+    Ejecuta un playbook (YAML o JSON) de acciones de los módulos en orden de
+    dependencias, con los pasos independientes en paralelo. Con `dry_run` solo
+    muestra el plan. Retorna el informe (dict) con los tiempos de cada paso.
+    """
+    print_header(f"Playbook: {playbook_path}")
+    try:
+        name, file_concurrency, steps = load_playbook(playbook_path)
+    except (OSError, ValueError) as e:
+        print_error(f"No se pudo cargar el playbook: {e}")
+        return None
+    requested = concurrency
+    concurrency = _valid_concurrency(concurrency or file_concurrency)
+    if concurrency is None:
+        print_error(f"La concurrencia debe ser un entero mayor o igual que 1 (valor: {requested!r}).")
+        return None
+
+    if dry_run:
+        rows = []
+        for number, wave in enumerate(_plan_waves(steps), 1):
+            for group in _group_ready(wave):
+                rows.append([str(number), ", ".join(step.id for step in group), group[0].action.full_name,
+                             ", ".join(sorted({dep for step in group for dep in step.depends_on}))])
+        print_info(f"'{name}': {len(steps)} pasos, concurrencia {concurrency}. Plan de ejecución:")
+        print_table(["Nivel", "Pasos", "Acción", "Depende de"], rows)
+        return {"name": name, "steps": [step.to_dict() for step in steps], "dry_run": True}
+
+    print_info(f"Ejecutando '{name}': {len(steps)} pasos, concurrencia {concurrency}...")
+    log_action("Playbook", "Run", f"Inicio del playbook '{name}' ({len(steps)} pasos).", target=playbook_path)
+    total = execute_steps(steps, concurrency)
+    critical, critical_steps = critical_path(steps)
+    step_sum = sum(step.duration for step in steps if not step.batch or step.batch[0] == step.id)
+
+    print_table(["Paso", "Acción", "Estado", "Inicio (s)", "Duración (s)", "Lote"],
+                [[step.id, step.action.full_name, step.status,
+                  "" if step.started is None else f"{step.started:.2f}", f"{step.duration:.2f}",
+                  ", ".join(step.batch) if step.batch else ""] for step in steps])
+    print_info(f"Tiempo total: {total:.2f}s | Suma de los pasos: {step_sum:.2f}s | "
+               f"Camino crítico: {critical:.2f}s ({' -> '.join(critical_steps)})")
+    failed = [step.id for step in steps if step.status == FAILED]
+    skipped = [step.id for step in steps if step.status == SKIPPED]
+    if failed:
+        print_error(f"Pasos fallidos: {', '.join(failed)}" + (f". Omitidos: {', '.join(skipped)}" if skipped else ""))
+    else:
+        print_success(f"Playbook '{name}' completado.")
+    log_action("Playbook", "Run",
+               f"Playbook '{name}': {len(steps) - len(failed) - len(skipped)} correctos, {len(failed)} fallidos, "
+               f"{len(skipped)} omitidos en {total:.2f}s.", target=playbook_path, duration=total,
+               status=1 if failed else 0)
+    return {
+        "name": name,
+        "steps": [step.to_dict() for step in steps],
+        "total": round(total, 3),
+        "sum": round(step_sum, 3),
+        "critical_path": round(critical, 3),
+        "critical_steps": critical_steps,
+    }
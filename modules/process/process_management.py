@@ -1,8 +1,8 @@
-from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
+from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input, print_output, print_table
+from utils.result import returns_result, parse_columns
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
 import os
-import psutil
 
 def process_menu():
     while True:
@@ -36,6 +36,7 @@ def process_menu():
             print_error("Opción inválida. Por favor, intente de nuevo.")
         get_user_input("Presione Enter para continuar...")
 
+@returns_result
 def list_processes():
     print_header("Listar Procesos")
     os_type = get_os_type()
@@ -47,12 +48,16 @@ def list_processes():
     output, status = execute_command(command)
     if status == 0:
         print_info("Procesos del sistema:")
-        print(output)
+        if os_type == 'windows':
+            print_output(output)
+        else:
+            print_table(*parse_columns(output)) # ps aux: la última columna (COMMAND) conserva sus espacios
         log_action("Process", "List Processes", "Procesos listados exitosamente.")
     else:
         print_error(f"Error al listar procesos: {output}")
         log_action("Process", "List Processes", f"Error al listar procesos: {output}")
 
+@returns_result
 def terminate_process_by_pid():
     print_header("Terminar Proceso por PID")
     pid = get_user_input("Ingrese el PID del proceso a terminar")
@@ -77,6 +82,7 @@ def terminate_process_by_pid():
         print_info("Operación cancelada.")
         log_action("Process", "Terminate by PID", f"Terminación de proceso PID {pid} cancelada.")
 
+@returns_result
 def terminate_process_by_name():
     print_header("Terminar Proceso por Nombre")
     process_name = get_user_input("Ingrese el nombre del proceso a terminar (ej. 'chrome.exe', 'apache2')")
@@ -103,6 +109,7 @@ def terminate_process_by_name():
         print_info("Operación cancelada.")
         log_action("Process", "Terminate by Name", f"Terminación de proceso '{process_name}' cancelada.")
 
+@returns_result
 def find_process_info_by_name():
     """
     Busca procesos por nombre o parte del nombre y muestra su información.
@@ -114,6 +121,8 @@ def find_process_info_by_name():
         "Ingrese el nombre o parte del nombre del proceso a buscar"
     )
 
+    import psutil # Importación diferida: psutil es costoso de cargar y solo se usa aquí
+
     found_processes = []
     try:
         for proc in psutil.process_iter(["pid", "name", "username", "cpu_percent", "memory_info"]):
@@ -125,10 +134,7 @@ def find_process_info_by_name():
 
     if found_processes:
         print_success(f"Se encontraron los siguientes procesos para '{process_name_query}':")
-        # Encabezados de la tabla
-        print(f"{'PID':<10} {'Nombre':<30} {'Usuario':<20} {'CPU %':<10} {'Mem (MB)':<12}")
-        print(f"{'-'*10:<10} {'-'*30:<30} {'-'*20:<20} {'-'*10:<10} {'-'*12:<12}")
-
+        rows = []
         for proc in found_processes:
             try:
                 pid = proc.info["pid"]
@@ -138,11 +144,10 @@ def find_process_info_by_name():
                 mem_info = proc.info["memory_info"]
                 memory_mb = round(mem_info.rss / (1024 * 1024), 2) if mem_info else 0
 
-                print(
-                    f"{pid:<10} {name:<30} {username:<20} {cpu_percent:<10.2f} {memory_mb:<12.2f}"
-                )
+                rows.append([pid, name, username, f"{cpu_percent:.2f}", f"{memory_mb:.2f}"])
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 continue # Saltar procesos si son inaccesibles
+        print_table(["PID", "Nombre", "Usuario", "CPU %", "Mem (MB)"], rows)
 
         log_action(
             "Process",
@@ -157,6 +162,7 @@ def find_process_info_by_name():
             f"No se encontraron procesos con el nombre '{process_name_query}'.",
         )
 
+@returns_result
 def terminate_process_by_pid_internal(pid):
     os_type = get_os_type()
     if os_type == 'windows':
@@ -172,6 +178,7 @@ def terminate_process_by_pid_internal(pid):
         print_error(f"Error al terminar proceso con PID {pid}: {output}")
         log_action("Process", "Terminate from Search", f"Error al terminar proceso con PID {pid} desde la búsqueda: {output}")
 
+@returns_result
 def generate_process_log():
     print_header("Generar Log de Procesos")
     log_action("Process", "Generate Log", "Generando log de gestión de procesos.")
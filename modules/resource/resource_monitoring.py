@@ -1,10 +1,12 @@
-from utils.display import print_header, print_info, print_success, print_error, print_warning, clear_screen, print_menu, get_user_input
+from utils.display import print_header, print_info, print_success, print_error, print_warning, clear_screen, print_menu, get_user_input, print_output, print_table
+from utils.result import returns_result, parse_columns
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
 import os
 import time
 import re
 
+@returns_result
 def get_cpu_usage():
     """
     Obtiene y formatea el uso de CPU.
@@ -49,7 +51,7 @@ def get_cpu_usage():
             
             print_info("--- Detalles de CPU ---")
             if cpu_line:
-                print_info(f"```\n{cpu_line}\n```")
+                print_output(cpu_line)
             else:
                 print_warning("No se pudo parsear la línea de CPU de 'top'.")
             
@@ -58,9 +60,7 @@ def get_cpu_usage():
             print_error(f"Error al obtener uso de CPU: {output}")
             log_action("ResourceMonitoring", "Get CPU Usage", f"Error al obtener uso de CPU: {output}")
 
-    # Esta función ahora no devuelve nada, su salida es capturada por _run_module_function
-    # return "" # No es necesario devolver una cadena vacía, _run_module_function capturará lo impreso.
-
+@returns_result
 def get_memory_usage():
     """
     Obtiene y formatea el uso de memoria.
@@ -99,7 +99,7 @@ def get_memory_usage():
                 print_info(f"  Memoria Usada: {used_mem_gb:.2f} GB ({used_mem_gb/total_mem_gb:.2%})")
             else:
                 print_warning("No se pudo obtener la memoria total. Salida bruta:")
-                print_warning(f"```\n{mem_output}\n```")
+                print_output(mem_output)
             log_action("ResourceMonitoring", "Get Memory Usage", "Uso de memoria listado (Windows).")
         else:
             print_error(f"Error al obtener uso de memoria: {mem_output}")
@@ -117,7 +117,7 @@ def get_memory_usage():
             
             print_info("--- Detalles de Memoria ---")
             if mem_line:
-                print(f"```\n{mem_line}\n```")
+                print_output(mem_line)
             else:
                 print_warning("No se pudo parsear la línea de memoria de 'top'.")
             
@@ -126,6 +126,7 @@ def get_memory_usage():
             print_error(f"Error al obtener uso de memoria: {output}")
             log_action("ResourceMonitoring", "Get Memory Usage", f"Error al obtener uso de memoria: {output}")
 
+@returns_result
 def get_disk_usage():
     """
     Obtiene y formatea el uso de disco.
@@ -149,6 +150,7 @@ def get_disk_usage():
                     disk_info[current_drive][key.strip()] = value.strip()
             
             print_info("--- Detalles de Unidades de Disco ---")
+            rows = []
             for drive, info in disk_info.items():
                 size_bytes = int(info.get('Size', 0))
                 free_bytes = int(info.get('FreeSpace', 0))
@@ -160,12 +162,8 @@ def get_disk_usage():
                 
                 percentage_used = (used_bytes / size_bytes) * 100 if size_bytes > 0 else 0
 
-                print_info(f"Unidad: {drive}")
-                print_info(f"  - Tamaño Total: {total_gb:.2f} GB")
-                print_info(f"  - Espacio Libre: {free_gb:.2f} GB")
-                print_info(f"  - Espacio Usado: {used_gb:.2f} GB")
-                print_info(f"  - Uso: {percentage_used:.2f}%")
-                print("")
+                rows.append([drive, f"{total_gb:.2f}", f"{free_gb:.2f}", f"{used_gb:.2f}", f"{percentage_used:.2f}"])
+            print_table(["Unidad", "Total (GB)", "Libre (GB)", "Usado (GB)", "Uso %"], rows)
             log_action("ResourceMonitoring", "Get Disk Usage", "Uso de disco listado exitosamente (Windows).")
         else:
             print_error(f"Error al obtener uso de disco: {output}")
@@ -176,12 +174,15 @@ def get_disk_usage():
         output, status = execute_command(command)
         if status == 0:
             print_info("--- Uso de Disco ---")
-            print_info(f"```\n{output}\n```")
+            # La cabecera de df tiene una columna de dos palabras ("Mounted on"): se usan nombres propios
+            columns = ["Filesystem", "Size", "Used", "Avail", "Use%", "Mounted on"]
+            print_table(*parse_columns(output.split("\n", 1)[-1] if "\n" in output else "", columns))
             log_action("ResourceMonitoring", "Get Disk Usage", "Uso de disco listado exitosamente (Linux).")
         else:
             print_error(f"Error al obtener uso de disco: {output}")
             log_action("ResourceMonitoring", "Get Disk Usage", f"Error al obtener uso de disco: {output}")
 
+@returns_result
 def get_network_stats():
     """
     Obtiene y formatea las estadísticas de red (bytes enviados/recibidos).
@@ -238,23 +239,22 @@ def get_network_stats():
                         network_info[current_interface]["TX"]["packets"] = parts[1]
 
             print_info("--- Estadísticas por Interfaz de Red ---")
+            rows = []
             for iface, data in network_info.items():
                 rx_bytes = data.get('RX', {}).get('bytes', 'N/A')
                 tx_bytes = data.get('TX', {}).get('bytes', 'N/A')
                 rx_packets = data.get('RX', {}).get('packets', 'N/A')
                 tx_packets = data.get('TX', {}).get('packets', 'N/A')
 
-                print_info(f"Interfaz: `{iface}`")
-                print_info(f"  - Recibido (RX): {rx_bytes} bytes ({rx_packets} paquetes)")
-                print_info(f"  - Enviado (TX): {tx_bytes} bytes ({tx_packets} paquetes)")
-                print("")
+                rows.append([iface, rx_bytes, rx_packets, tx_bytes, tx_packets])
+            print_table(["Interfaz", "RX (bytes)", "RX (paquetes)", "TX (bytes)", "TX (paquetes)"], rows)
             log_action("ResourceMonitoring", "Get Network Stats", "Estadísticas de red listadas (Linux).")
         else:
             print_error(f"Error al obtener estadísticas de red: {output}")
             log_action("ResourceMonitoring", "Get Network Stats", f"Error al obtener estadísticas de red: {output}")
-            
-    # return ""
 
+
+@returns_result
 def get_system_uptime():
     """
     Obtiene y formatea el tiempo de actividad del sistema (uptime).
@@ -297,6 +297,7 @@ def get_system_uptime():
                 print_error(f"Error al obtener tiempo de actividad: {output_fallback}")
                 log_action("ResourceMonitoring", "Get System Uptime", f"Error al obtener tiempo de actividad (Linux): {output_fallback}")
 
+@returns_result
 def view_top_processes_linux():
     """
     Verifica y muestra los procesos más consumidores en Linux.
@@ -310,7 +311,7 @@ def view_top_processes_linux():
         output, status = execute_command(command)
         if status == 0:
             print_info("--- Top 10 Procesos ---")
-            print_info(f"```\n{output}\n```")
+            print_table(*parse_columns(output))
             log_action("ResourceMonitoring", "View Top Processes", "Procesos más consumidores listados (Linux).")
         else:
             print_error(f"Error al obtener procesos: {output}")
@@ -319,6 +320,7 @@ def view_top_processes_linux():
         print_error("Esta opción solo está disponible en Linux.")
         log_action("ResourceMonitoring", "View Top Processes", "Intento de ver procesos top en SO no Linux.")
     
+@returns_result
 def generate_monitoring_log():
     """
     Genera un log completo de la monitorización de recursos llamando a las funciones granular.
@@ -349,7 +351,7 @@ def generate_monitoring_log():
 
     log_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs')
     print_success(f"Log de monitorización generado. Revisa el directorio 'logs' en la raíz del proyecto para los detalles.")
-    print(f"Path del log: `{os.path.abspath(log_file_path)}`")
+    print_info(f"Path del log: `{os.path.abspath(log_file_path)}`")
     
 def resource_monitoring_menu():
     """
@@ -0,0 +1,446 @@
+import os
+import socket
+import threading
+import time
+import config
+from utils.display import print_error
+from utils.system_info import execute_command, get_os_type
+from utils.snapshot_hub import get_snapshot_hub
+from utils.lazy import lazy_module
+from utils import capabilities
+from utils import docker_inventory
+
+# Menús de los módulos a los que se entra desde el panel (tecla -> (etiqueta, módulo, función))
+MODULE_KEYS = {
+    "1": ("Usuarios", "modules.user.user_group_management", "user_group_menu"),
+    "2": ("Red", "modules.network.network_management", "network_menu"),
+    "3": ("Recursos", "modules.resource.resource_monitoring", "resource_monitoring_menu"),
+    "4": ("Discos", "modules.disk.disk_partition_management", "disk_partition_menu"),
+    "5": ("Firewall", "modules.firewall.firewall_management", "firewall_menu"),
+    "6": ("Procesos", "modules.process.process_management", "process_menu"),
+    "7": ("Docker", "modules.docker.docker_management", "docker_menu"),
+    "8": ("Servicios", "modules.services.service_management", "service_menu"),
+    "9": ("Paquetes", "modules.package.package_management", "package_menu"),
+    "0": ("Logs", "modules.logs.log_management", "logs_menu"),
+}
+
+# Sistemas de archivos que se muestran en el panel de discos
+_DISK_FS_TYPES = {"ext2", "ext3", "ext4", "xfs", "btrfs", "zfs", "vfat", "exfat", "ntfs", "f2fs", "jfs", "reiserfs"}
+
+class Sampler:
+    """
+    Muestras del sistema para el panel, leídas de /proc (Linux) o con psutil si
+    está disponible. Los porcentajes de CPU se calculan entre dos muestras.
+    """
+
+    def __init__(self):
+        self.use_psutil = capabilities.has_psutil()
+        if self.use_psutil:
+            import psutil # Importación diferida: solo con psutil instalado
+            self._psutil = psutil
+            psutil.cpu_percent(None)
+        self._clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._cpu_times = None
+        self._proc_times = {}
+        self._net = None
+        self._users = {}
+        self._last = None
+
+    def sample(self):
+        now = time.monotonic()
+        elapsed = now - self._last if self._last is not None else None
+        self._last = now
+        if self.use_psutil:
+            data = self._sample_psutil(elapsed)
+        else:
+            data = self._sample_proc(elapsed)
+        data["time"] = time.strftime("%H:%M:%S")
+        return data
+
+    # --- psutil ---
+
+    def _sample_psutil(self, elapsed):
+        psutil = self._psutil
+        memory, swap = psutil.virtual_memory(), psutil.swap_memory()
+        disks = []
+        for partition in psutil.disk_partitions(all=False):
+            try:
+                usage = psutil.disk_usage(partition.mountpoint)
+            except OSError:
+                continue
+            disks.append((partition.mountpoint, usage.used, usage.total))
+        processes = []
+        for proc in psutil.process_iter(["pid", "name", "username", "cpu_percent", "memory_percent"]):
+            info = proc.info
+            processes.append((info["pid"], info["username"] or "", info["cpu_percent"] or 0.0,
+                              info["memory_percent"] or 0.0, info["name"] or ""))
+        return {
+            "cpu": psutil.cpu_percent(None),
+            "load": os.getloadavg() if hasattr(os, "getloadavg") else None,
+            "memory": (memory.total - memory.available, memory.total),
+            "swap": (swap.used, swap.total),
+            "uptime": time.time() - psutil.boot_time(),
+            "disks": disks,
+            "network": self._rates({name: (counters.bytes_recv, counters.bytes_sent)
+                                    for name, counters in psutil.net_io_counters(pernic=True).items()}, elapsed),
+            "processes": processes,
+        }
+
+    # --- /proc ---
+
+    def _sample_proc(self, elapsed):
+        with open("/proc/stat") as f:
+            fields = [int(value) for value in f.readline().split()[1:9]]
+        total, idle = sum(fields), fields[3] + fields[4]
+        cpu = 0.0
+        if self._cpu_times is not None and total > self._cpu_times[0]:
+            cpu = 100.0 * (1 - (idle - self._cpu_times[1]) / (total - self._cpu_times[0]))
+        self._cpu_times = (total, idle)
+
+        meminfo = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = int(value.split()[0]) * 1024
+        mem_total = meminfo.get("MemTotal", 0)
+        mem_available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+
+        counters = {}
+        with open("/proc/net/dev") as f:
+            for line in f.readlines()[2:]:
+                name, values = line.split(":", 1)
+                values = values.split()
+                counters[name.strip()] = (int(values[0]), int(values[8]))
+
+        return {
+            "cpu": max(0.0, min(100.0, cpu)),
+            "load": os.getloadavg(),
+            "memory": (mem_total - mem_available, mem_total),
+            "swap": (meminfo.get("SwapTotal", 0) - meminfo.get("SwapFree", 0), meminfo.get("SwapTotal", 0)),
+            "uptime": uptime,
+            "disks": self._proc_disks(),
+            "network": self._rates(counters, elapsed),
+            "processes": self._proc_processes(elapsed, mem_total),
+        }
+
+    def _proc_disks(self):
+        disks, seen = [], set()
+        with open("/proc/mounts") as f:
+            for line in f:
+                device, mountpoint, fs_type = line.split()[:3]
+                if fs_type not in _DISK_FS_TYPES or device in seen:
+                    continue
+                seen.add(device)
+                try:
+                    stats = os.statvfs(mountpoint.replace("\\040", " "))
+                except OSError:
+                    continue
+                total = stats.f_blocks * stats.f_frsize
+                if total:
+                    disks.append((mountpoint, total - stats.f_bfree * stats.f_frsize, total))
+        return disks
+
+    def _proc_processes(self, elapsed, mem_total):
+        processes, times = [], {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    stat = f.read()
+                uid = os.stat(f"/proc/{entry}").st_uid
+            except OSError:
+                continue # El proceso terminó mientras se leía
+            pid = int(entry)
+            name = stat[stat.find("(") + 1:stat.rfind(")")]
+            fields = stat[stat.rfind(")") + 2:].split()
+            ticks = int(fields[11]) + int(fields[12]) # utime + stime
+            times[pid] = ticks
+            cpu = 0.0
+            if elapsed and pid in self._proc_times:
+                cpu = 100.0 * (ticks - self._proc_times[pid]) / self._clock_ticks / elapsed
+            memory = 100.0 * int(fields[21]) * self._page_size / mem_total if mem_total else 0.0
+            processes.append((pid, self._user(uid), cpu, memory, name))
+        self._proc_times = times
+        return processes
+
+    def _user(self, uid):
+        name = self._users.get(uid)
+        if name is None:
+            import pwd # Solo existe en sistemas POSIX (este muestreo solo se usa en Linux)
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self._users[uid] = name
+        return name
+
+    def _rates(self, counters, elapsed):
+        """(interfaz, bytes/s recibidos, bytes/s enviados) desde la muestra anterior."""
+        previous, self._net = self._net, counters
+        rates = []
+        for name, (received, sent) in sorted(counters.items()):
+            if name == "lo":
+                continue
+            if previous and elapsed and name in previous:
+                rates.append((name, (received - previous[name][0]) / elapsed, (sent - previous[name][1]) / elapsed))
+            else:
+                rates.append((name, 0.0, 0.0))
+        return rates
+
+def _collect_containers():
+    """Contenedores en ejecución: [(nombre, estado)] o None si Docker no está disponible."""
+    inventory = docker_inventory.get_inventory(wait=False)
+    if inventory is not None:
+        return [(docker_inventory.container_name(c), c.get("Status", "")) for c in inventory.containers(all=False)]
+    if not capabilities.get_capabilities()["docker"]["cli"]:
+        return None
+    output, status = execute_command('docker ps --format "{{.Names}}\t{{.Status}}"')
+    if status != 0:
+        return None
+    return [tuple((line.split("\t", 1) + [""])[:2]) for line in output.splitlines() if line.strip()]
+
+def _collect_failed_services():
+    """Unidades de systemd en estado fallido, o None si no hay systemd."""
+    if capabilities.get_init_system() != "systemd":
+        return None
+    output, status = execute_command("systemctl --failed --no-legend --plain --no-pager")
+    if status != 0:
+        return None
+    return [line.split()[0] for line in output.splitlines() if line.strip()]
+
+class SlowCollector:
+    """
+    Refresca en segundo plano las vistas que lanzan comandos (contenedores,
+    servicios fallidos) cada TUI_SLOW_REFRESH_INTERVAL segundos, a través del
+    SnapshotHub: si la GUI está abierta en el mismo proceso, comparten recogida.
+    """
+
+    VIEWS = {"tui.containers": _collect_containers, "tui.failed_services": _collect_failed_services}
+
+    def __init__(self):
+        self.values = {key: None for key in self.VIEWS}
+        self._hub = get_snapshot_hub()
+        for key, collector in self.VIEWS.items():
+            self._hub.register(key, collector)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="tui-collector", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            for key in self.VIEWS:
+                try:
+                    self.values[key] = self._hub.get(key, max_age=config.TUI_SLOW_REFRESH_INTERVAL).value
+                except Exception:
+                    self.values[key] = None
+            self._stop.wait(config.TUI_SLOW_REFRESH_INTERVAL)
+
+class Frame:
+    """
+    Pantalla anterior (texto y atributo por celda). draw() solo escribe los tramos
+    de celdas que cambiaron respecto al cuadro anterior, en lugar de borrar y
+    repintar la pantalla en cada actualización.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.cells = [[(" ", 0)] * width for _ in range(height)]
+        self.written = 0 # Celdas escritas en el último draw()
+
+    def draw(self, window, lines):
+        """`lines`: lista de filas; cada fila, lista de segmentos (texto, atributo)."""
+        self.written = 0
+        for y in range(self.height):
+            row = []
+            for text, attr in lines[y] if y < len(lines) else ():
+                row.extend((char, attr) for char in text)
+            row = (row + [(" ", 0)] * self.width)[:self.width]
+            previous = self.cells[y]
+            x = 0
+            while x < self.width:
+                if row[x] == previous[x]:
+                    x += 1
+                    continue
+                start, attr = x, row[x][1]
+                while x < self.width and row[x] != previous[x] and row[x][1] == attr:
+                    x += 1
+                text = "".join(char for char, _ in row[start:x])
+                if y == self.height - 1 and x == self.width:
+                    text = text[:-1] # La última celda de la pantalla no se puede escribir sin mover el cursor fuera
+                try:
+                    window.addstr(y, start, text, attr)
+                except Exception:
+                    pass
+                self.written += x - start
+            self.cells[y] = row
+
+def _bar(fraction, width):
+    filled = int(round(max(0.0, min(1.0, fraction)) * width))
+    return "|" * filled + " " * (width - filled)
+
+def _size(value):
+    for unit in ("B", "K", "M", "G", "T"):
+        if abs(value) < 1024 or unit == "T":
+            return f"{value:.1f}{unit}" if unit != "B" else f"{int(value)}B"
+        value /= 1024
+
+def _duration(seconds):
+    days, rest = divmod(int(seconds), 86400)
+    hours, rest = divmod(rest, 3600)
+    return (f"{days}d " if days else "") + f"{hours:02d}:{rest // 60:02d}"
+
+class Dashboard:
+    """Panel en vivo tipo top: recursos, procesos, contenedores y servicios fallidos."""
+
+    SORT_KEYS = {"c": (2, "CPU"), "m": (3, "MEM"), "p": (0, "PID")}
+
+    def __init__(self, stdscr, curses):
+        self.stdscr = stdscr
+        self.curses = curses
+        self.sampler = Sampler()
+        self.collector = SlowCollector()
+        self.sort = "c"
+        self.frame = None
+        self.data = None
+        self.hostname = socket.gethostname()
+        self._init_colors()
+
+    def _init_colors(self):
+        curses = self.curses
+        self.attrs = {"normal": 0, "bold": curses.A_BOLD, "header": curses.A_REVERSE}
+        if curses.has_colors():
+            curses.start_color()
+            curses.use_default_colors()
+            for number, (name, color) in enumerate((("ok", curses.COLOR_GREEN), ("warn", curses.COLOR_YELLOW),
+                                                    ("error", curses.COLOR_RED), ("title", curses.COLOR_CYAN)), 1):
+                curses.init_pair(number, color, -1)
+                self.attrs[name] = curses.color_pair(number)
+        else:
+            self.attrs.update(ok=0, warn=curses.A_BOLD, error=curses.A_BOLD, title=curses.A_BOLD)
+
+    def _level(self, percent):
+        return self.attrs["error"] if percent >= 90 else self.attrs["warn"] if percent >= 70 else self.attrs["ok"]
+
+    def _meter(self, label, used, total, width):
+        percent = 100.0 * used / total if total else 0.0
+        bar_width = max(10, width - 32)
+        return [(f"{label:<5}[", self.attrs["bold"]), (_bar(percent / 100, bar_width), self._level(percent)),
+                (f"] {percent:5.1f}% {_size(used):>7}/{_size(total):<7}", self.attrs["normal"])]
+
+    def render(self, height, width):
+        """Construye las filas del cuadro actual a partir de la última muestra."""
+        data, attrs = self.data, self.attrs
+        lines = []
+        load = " ".join(f"{value:.2f}" for value in data["load"]) if data["load"] else "N/A"
+        lines.append([(f" {self.hostname} ", attrs["header"]),
+                      (f"  {data['time']}  activo {_duration(data['uptime'])}  carga {load}", attrs["title"])])
+        cpu_bar_width = max(10, width - 32)
+        lines.append([("CPU  [", attrs["bold"]), (_bar(data["cpu"] / 100, cpu_bar_width), self._level(data["cpu"])),
+                      (f"] {data['cpu']:5.1f}%", attrs["normal"])])
+        lines.append(self._meter("Mem", *data["memory"], width))
+        lines.append(self._meter("Swap", *data["swap"], width))
+        for mountpoint, used, total in data["disks"][:4]:
+            lines.append(self._meter(mountpoint[-5:], used, total, width))
+        network = "  ".join(f"{name} ↓{_size(received)}/s ↑{_size(sent)}/s" for name, received, sent in data["network"][:4])
+        lines.append([("Red  ", attrs["bold"]), (network or "sin interfaces", attrs["normal"])])
+
+        containers = self.collector.values["tui.containers"]
+        failed = self.collector.values["tui.failed_services"]
+        side = []
+        if containers is not None:
+            side.append([(f"Contenedores en ejecución ({len(containers)})", attrs["title"])])
+            side += [[(f"  {name:<24} {status}", attrs["normal"])] for name, status in containers[:5]]
+        if failed is not None:
+            side.append([(f"Servicios fallidos ({len(failed)})", attrs["title"])])
+            side += [[(f"  {name}", attrs["error"])] for name in failed[:5]]
+
+        footer = [(" q", attrs["bold"]), (" salir ", attrs["normal"]), (" c/m/p", attrs["bold"]),
+                  (" ordenar ", attrs["normal"])]
+        for key, (label, _, _) in MODULE_KEYS.items():
+            footer += [(f" {key}", attrs["bold"]), (f" {label}", attrs["normal"])]
+
+        sort_index, sort_label = self.SORT_KEYS[self.sort]
+        process_rows = max(0, height - len(lines) - len(side) - 3)
+        lines.append([(f"{'PID':>7} {'USUARIO':<10} {'CPU%':>6} {'MEM%':>6}  COMANDO  (orden: {sort_label})".ljust(width),
+                       attrs["header"])])
+        processes = sorted(data["processes"], key=lambda proc: proc[sort_index], reverse=self.sort != "p")
+        for pid, user, cpu, memory, name in processes[:process_rows]:
+            lines.append([(f"{pid:>7} {user[:10]:<10} ", attrs["normal"]), (f"{cpu:6.1f}", self._level(cpu)),
+                          (f" {memory:6.1f}  {name}", attrs["normal"])])
+        lines += [[]] * max(0, height - len(lines) - len(side) - 1)
+        lines += side
+        lines = lines[:height - 1]
+        lines += [[]] * (height - 1 - len(lines))
+        lines.append(footer)
+        return lines
+
+    def open_module(self, key):
+        """Sale temporalmente del panel para usar el menú del módulo en la terminal."""
+        _, module_path, function = MODULE_KEYS[key]
+        curses = self.curses
+        curses.def_prog_mode()
+        curses.endwin()
+        try:
+            getattr(lazy_module(module_path), function)()
+        except (KeyboardInterrupt, EOFError):
+            pass
+        finally:
+            curses.reset_prog_mode()
+            self.stdscr.clear()
+            self.stdscr.refresh()
+            self.frame = None # La pantalla se borró: el siguiente cuadro se dibuja completo
+
+    def run(self):
+        curses = self.curses
+        curses.curs_set(0)
+        self.stdscr.timeout(int(config.TUI_REFRESH_INTERVAL * 1000))
+        self.collector.start()
+        self.data = self.sampler.sample()
+        try:
+            while True:
+                height, width = self.stdscr.getmaxyx()
+                if self.frame is None or (self.frame.height, self.frame.width) != (height, width):
+                    self.stdscr.clear()
+                    self.frame = Frame(height, width)
+                self.frame.draw(self.stdscr, self.render(height, width))
+                self.stdscr.refresh()
+
+                key = self.stdscr.getch() # Espera una tecla como mucho TUI_REFRESH_INTERVAL segundos
+                if key == -1:
+                    self.data = self.sampler.sample()
+                    continue
+                char = chr(key) if 0 <= key < 256 else ""
+                if char in ("q", "Q", "\x1b"):
+                    break
+                if char in self.SORT_KEYS:
+                    self.sort = char
+                elif char in MODULE_KEYS:
+                    self.open_module(char)
+                    self.data = self.sampler.sample()
+                elif key == curses.KEY_RESIZE:
+                    self.frame = None
+        finally:
+            self.collector.stop()
+
+def run_dashboard():
+    """Abre el panel en vivo en la terminal (requiere curses y, sin psutil, Linux)."""
+    try:
+        import curses
+    except ImportError:
+        print_error("El panel en vivo necesita el módulo curses (en Windows: pip install windows-curses).")
+        return
+    if not capabilities.has_psutil() and get_os_type() != 'linux':
+        print_error("El panel en vivo necesita psutil en este sistema (pip install -r requirements.txt).")
+        return
+    curses.wrapper(lambda stdscr: Dashboard(stdscr, curses).run())
@@ -1,8 +1,10 @@
-from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input
+from utils.display import clear_screen, print_menu, print_header, print_info, print_success, print_error, get_user_input, print_output, print_table
+from utils.result import returns_result
 from utils.system_info import get_os_type, execute_command
 from utils.logger import log_action
 import os
 
+@returns_result
 def list_users():
     """
     Lista los usuarios del sistema.
@@ -17,12 +19,16 @@ def list_users():
     output, status = execute_command(command)
     if status == 0: # Comando exitoso
         print_info("Usuarios del sistema:")
-        print_info(output) 
+        if os_type == 'windows':
+            print_output(output)
+        else:
+            print_table(["Usuario"], [[line] for line in output.splitlines() if line.strip()])
         log_action("UserGroup", "List Users", "Usuarios listados exitosamente.")
     else:
         print_error(f"Error al listar usuarios: {output}")
         log_action("UserGroup", "List Users", f"Error al listar usuarios: {output}")
 
+@returns_result
 def add_user(username: str, password: str = ""):
     """
     Crea un nuevo usuario con el nombre y la contraseña proporcionados.
@@ -52,6 +58,7 @@ def add_user(username: str, password: str = ""):
         print_error(f"Error al crear usuario '{username}': {output}")
         log_action("UserGroup", "Create User", f"Error al crear usuario '{username}': {output}")
 
+@returns_result
 def remove_user(username: str, confirm: str):
     """
     Elimina un usuario. La confirmación es un string 's' o 'n' de la GUI.
@@ -79,6 +86,7 @@ def remove_user(username: str, confirm: str):
         print_error(f"Error al eliminar usuario '{username}': {output}")
         log_action("UserGroup", "Delete User", f"Error al eliminar usuario '{username}': {output}")
 
+@returns_result
 def list_groups():
     """
     Lista los grupos del sistema.
@@ -93,12 +101,16 @@ def list_groups():
     output, status = execute_command(command)
     if status == 0:
         print_info("Grupos del sistema:")
-        print_info(output)
+        if os_type == 'windows':
+            print_output(output)
+        else:
+            print_table(["Grupo"], [[line] for line in output.splitlines() if line.strip()])
         log_action("UserGroup", "List Groups", "Grupos listados exitosamente.")
     else:
         print_error(f"Error al listar grupos: {output}")
         log_action("UserGroup", "List Groups", f"Error al listar grupos: {output}")
 
+@returns_result
 def add_group(groupname: str):
     """
     Crea un nuevo grupo con el nombre proporcionado.
@@ -123,6 +135,7 @@ def add_group(groupname: str):
         print_error(f"Error al crear grupo '{groupname}': {output}")
         log_action("UserGroup", "Create Group", f"Error al crear grupo '{groupname}': {output}")
 
+@returns_result
 def remove_group(groupname: str, confirm: str):
     """
     Elimina un grupo. La confirmación es un string 's' o 'n' de la GUI.
@@ -150,6 +163,7 @@ def remove_group(groupname: str, confirm: str):
         print_error(f"Error al eliminar grupo '{groupname}': {output}")
         log_action("UserGroup", "Delete Group", f"Error al eliminar grupo '{groupname}': {output}")
 
+@returns_result
 def add_user_to_group(username: str, groupname: str):
     """
     Añade un usuario a un grupo. Acepta los parámetros directamente para la GUI.
@@ -174,6 +188,7 @@ def add_user_to_group(username: str, groupname: str):
         print_error(f"Error al añadir usuario '{username}' al grupo '{groupname}': {output}")
         log_action("UserGroup", "Add User to Group", f"Error al añadir usuario '{username}' a '{groupname}': {output}")
 
+@returns_result
 def remove_user_from_group(username: str, groupname: str):
     """
     Remueve un usuario de un grupo. Acepta los parámetros directamente para la GUI.
@@ -198,6 +213,7 @@ def remove_user_from_group(username: str, groupname: str):
         print_error(f"Error al remover usuario '{username}' del grupo '{groupname}': {output}")
         log_action("UserGroup", "Remove User from Group", f"Error al remover usuario '{username}' de '{groupname}': {output}")
 
+@returns_result
 def generate_user_group_log():
     """
     Genera un log de usuarios y grupos.
@@ -1,12 +1,11 @@
 import sys
 import os
+import atexit
 
 project_root = os.path.dirname(os.path.abspath(__file__))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from modules.gui import gui_interface
-
 # Importa el módulo de display para establecer el modo GUI
 import utils.display as display_utils
 
@@ -71,6 +70,9 @@ def launch_gui():
         # Activa la bandera de modo GUI en utils.display
         display_utils.IS_GUI_MODE = True
         
+        # Gradio y la interfaz se importan aquí, tras la comprobación de permisos
+        from modules.gui import gui_interface
+
         # Llama a la función de inicio de la GUI del módulo gui_interface
         # La función start_gui en modules/gui/gui_interface.py
         # es la que debe contener `app.launch(share=False, inbrowser=True)`
@@ -86,9 +88,18 @@ def launch_gui():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # --profile: imprime un resumen p50/p95/p99 de comandos y acciones al salir
+    if "--profile" in sys.argv:
+        from utils import metrics
+        atexit.register(metrics.print_summary)
+
     # Asegúrate de que la raíz del proyecto esté en sys.path para importaciones
     project_root = os.path.dirname(os.path.abspath(__file__))
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
 
+    # Sondeo único de capacidades del sistema (o lectura de la caché en disco)
+    from utils import capabilities
+    capabilities.get_capabilities()
+
     launch_gui()
\ No newline at end of file
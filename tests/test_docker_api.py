@@ -0,0 +1,162 @@
+"""
+Pruebas del cliente del Docker Engine API (utils/docker_api.py) y de las operaciones
+en lote contra un daemon falso que escucha en un socket Unix temporal.
+"""
+import json
+import os
+import shutil
+import socketserver
+import struct
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+from unittest import mock
+
+import config
+from utils import capabilities
+from utils import docker_api
+
+class FakeDaemonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _send(self, code, body=b"", content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/_ping":
+            return self._send(200, b"OK", "text/plain")
+        if path == "/containers/json":
+            self._send(200, self.server.containers)
+            if self.server.drop_after_list:
+                # Cierra la conexión keep-alive sin avisar, como dockerd al reiniciarse
+                self.close_connection = True
+            return
+        if path == "/containers/texto/json":
+            return self._send(500, b"error interno en texto plano\n", "text/plain")
+        self._send(404, {"message": f"No such container: {path.split('/')[2]}"})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        parts = self.path.split("?")[0].split("/")
+        name, operation = parts[2], parts[3]
+        container = next((c for c in self.server.containers if c["Names"][0] == f"/{name}"), None)
+        if container is None:
+            return self._send(404, {"message": f"No such container: {name}"})
+        if name in self.server.failing:
+            return self._send(500, {"message": f"cannot {operation} container {name}: boom"})
+        running = container["State"] == "running"
+        if (operation == "start" and running) or (operation == "stop" and not running):
+            return self._send(304)
+        container["State"] = "running" if operation == "start" else "exited"
+        self._send(204)
+
+class FakeDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        super().__init__(path, FakeDaemonHandler)
+        self.connections = 0
+        self.drop_after_list = False
+        self.failing = set()
+        self.containers = [
+            {"Id": f"{index:064x}", "Names": [f"/{name}"], "State": state, "Labels": {}}
+            for index, (name, state) in enumerate([("web", "running"), ("db", "exited"), ("cliente1", "running")])
+        ]
+
+class DockerApiTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="docker-test-")
+        self.socket_path = os.path.join(self.directory, "docker.sock")
+        self.daemon = FakeDaemon(self.socket_path)
+        threading.Thread(target=self.daemon.serve_forever, daemon=True).start()
+        self.client = docker_api.DockerClient(socket_path=self.socket_path, timeout=5)
+        docker_api.invalidate_daemon_status()
+
+    def tearDown(self):
+        self.client.close()
+        self.daemon.shutdown()
+        self.daemon.server_close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_stale_keepalive_connection_is_retried(self):
+        self.daemon.drop_after_list = True
+        self.assertEqual(len(self.client.containers()), 3)
+        # La conexión del pool está cerrada por el daemon: se descarta y se reintenta con otra
+        self.assertEqual(len(self.client.containers()), 3)
+        self.assertEqual(self.daemon.connections, 2)
+        self.assertTrue(docker_api.daemon_status(max_age=3600)[0])
+
+    def test_keepalive_connection_is_reused(self):
+        for _ in range(5):
+            self.client.containers()
+        self.assertEqual(self.daemon.connections, 1)
+
+    def test_not_modified_maps_to_false(self):
+        self.assertFalse(self.client.start("web")) # Ya estaba en ejecución (304)
+        self.assertTrue(self.client.stop("web"))
+        self.assertFalse(self.client.stop("web"))
+        self.assertTrue(self.client.start("web"))
+
+    def test_error_messages(self):
+        with self.assertRaises(docker_api.DockerAPIError) as raised:
+            self.client.inspect_container("nada")
+        self.assertEqual(raised.exception.status, 404)
+        self.assertEqual(raised.exception.message, "No such container: nada")
+        self.assertEqual(str(raised.exception), "No such container: nada (HTTP 404)")
+
+        with self.assertRaises(docker_api.DockerAPIError) as raised:
+            self.client.inspect_container("texto")
+        self.assertEqual(raised.exception.status, 500)
+        self.assertEqual(raised.exception.message, "error interno en texto plano")
+
+    def test_unavailable_socket(self):
+        client = docker_api.DockerClient(socket_path=os.path.join(self.directory, "no-existe.sock"))
+        with self.assertRaises(docker_api.DockerUnavailable):
+            client.ping()
+        self.assertFalse(docker_api.daemon_status(max_age=3600)[0])
+
+    def test_demultiplex(self):
+        data = (struct.pack(">BxxxL", 1, 5) + b"hola\n" + struct.pack(">BxxxL", 2, 6) + b"error\n"
+                + struct.pack(">BxxxL", 1, 0))
+        self.assertTrue(docker_api._is_multiplexed(data))
+        self.assertEqual(docker_api.demultiplex(data), [(1, "hola\n"), (2, "error\n"), (1, "")])
+        # Flujo cortado: de la última trama queda lo que llegó, y una cabecera incompleta se ignora
+        self.assertEqual(docker_api.demultiplex(data[:-8] + struct.pack(">BxxxL", 1, 10) + b"abc")[-1], (1, "abc"))
+        self.assertEqual(docker_api.demultiplex(data + b"\x01\x00"), docker_api.demultiplex(data))
+        self.assertFalse(docker_api._is_multiplexed(b"texto sin tramas"))
+
+    def test_bulk_results_per_container(self):
+        from modules.docker import docker_management
+        self.daemon.failing.add("cliente1")
+        with mock.patch.object(capabilities, "get_docker_socket", return_value=self.socket_path), \
+                mock.patch.object(docker_api, "_client", self.client), \
+                mock.patch.object(config, "DOCKER_INVENTORY", False):
+            results = docker_management.bulk_stop_containers("web,db,cliente1,nada", "4")
+        by_name = {row["container"]: row for row in results}
+        self.assertEqual([row["container"] for row in results], ["web", "db", "cliente1", "nada"])
+        self.assertEqual(by_name["web"]["status"], "ok")
+        self.assertEqual(by_name["db"]["status"], "sin cambios")
+        self.assertEqual(by_name["cliente1"]["status"], "error")
+        self.assertEqual(by_name["cliente1"]["message"], "cannot stop container cliente1: boom")
+        self.assertEqual(by_name["nada"]["status"], "error")
+        self.assertEqual(by_name["nada"]["message"], "No such container: nada")
+        self.assertTrue(all(row["duration"] >= 0 for row in results))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,334 @@
+import config
+from utils import display
+from utils import result as result_utils
+from utils.lazy import lazy_module
+
+class Param:
+    """
+    Parámetro tipado de una acción. `arg`: se pasa como argumento posicional a la
+    función; `prompt`: se pone en la cola de get_user_input (funciones que lo piden
+    de forma interactiva, o confirmaciones s/N que la CLI vuelve a preguntar).
+    Tipos: "str", "int", "bool" y "confirm" (booleano que la función recibe como 's'/'n').
+    """
+
+    def __init__(self, name, type="str", required=True, default=None, choices=None, help="", arg=True, prompt=False,
+                 remote=True):
+        self.name = name
+        self.type = type
+        self.required = required and default is None
+        self.default = default
+        self.choices = choices
+        self.help = help
+        self.arg = arg
+        self.prompt = prompt
+        self.remote = remote # False: en la API solo se acepta el valor por defecto (ej. seguir logs sin fin)
+
+    def convert(self, value):
+        """Convierte el valor recibido (JSON o texto de la línea de comandos) al tipo del parámetro."""
+        if value is None:
+            if self.required:
+                raise ValueError(f"falta el parámetro obligatorio '{self.name}'")
+            value = self.default
+        if self.type == "int":
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"'{self.name}' debe ser un entero")
+        elif self.type in ("bool", "confirm"):
+            if isinstance(value, str):
+                value = value.strip().lower() in ("1", "true", "s", "si", "sí", "y", "yes")
+            value = bool(value)
+            if self.type == "confirm":
+                value = 's' if value else 'n'
+        elif value is not None:
+            value = str(value)
+        if self.choices and value not in self.choices:
+            raise ValueError(f"'{self.name}' debe ser uno de: {', '.join(self.choices)}")
+        return value
+
+    def to_dict(self):
+        return {"name": self.name, "type": self.type, "required": self.required, "default": self.default,
+                "choices": self.choices, "help": self.help}
+
+class Action:
+    """Acción de un módulo invocable sin menús (API HTTP y CLI de una sola orden)."""
+
+    def __init__(self, module, name, module_path, function, params=(), description="", timeout=None):
+        self.module = module
+        self.name = name
+        self.module_path = module_path
+        self.function = function
+        self.params = list(params)
+        self.description = description
+        self.timeout = timeout or config.API_DEFAULT_TIMEOUT
+
+    @property
+    def full_name(self):
+        return f"{self.module}.{self.name}"
+
+    def load(self):
+        """Retorna la función del módulo (el módulo se importa aquí, y solo ese)."""
+        return getattr(_module(self.module_path), self.function)
+
+    def bind(self, values, remote=False):
+        """
+        Valida y convierte los parámetros recibidos (dict). Retorna (args, inputs).
+        Lanza ValueError si falta alguno o tiene un valor no válido. Con `remote` (API
+        HTTP) se rechazan los parámetros que no admiten otro valor que el por defecto.
+        """
+        values = dict(values or {})
+        unknown = set(values) - {param.name for param in self.params}
+        if unknown:
+            raise ValueError(f"parámetros desconocidos: {', '.join(sorted(unknown))}")
+        args, inputs = [], []
+        for param in self.params:
+            value = param.convert(values.get(param.name))
+            if remote and not param.remote and value != param.convert(None):
+                raise ValueError(f"'{param.name}' no está disponible en la API (la respuesta no terminaría nunca)")
+            if param.arg:
+                args.append(value)
+            if param.prompt:
+                inputs.append(value)
+        return args, inputs
+
+    def to_dict(self):
+        return {"action": self.full_name, "description": self.description, "timeout": self.timeout,
+                "params": [param.to_dict() for param in self.params]}
+
+_modules = {}
+
+def _module(path):
+    module = _modules.get(path)
+    if module is None:
+        module = _modules[path] = lazy_module(path)
+    return module
+
+PROCESS = "modules.process.process_management"
+DOCKER = "modules.docker.docker_management"
+SERVICES = "modules.services.service_management"
+PACKAGES = "modules.package.package_management"
+USERS = "modules.user.user_group_management"
+NETWORK = "modules.network.network_management"
+RESOURCES = "modules.resource.resource_monitoring"
+DISK = "modules.disk.disk_partition_management"
+FIREWALL = "modules.firewall.firewall_management"
+LOGS = "modules.logs.log_management"
+PLAYBOOK = "modules.playbook.playbook_runner"
+
+def _confirm(prompt=False):
+    return Param("confirm", "confirm", default=False, help="Confirmar la operación", prompt=prompt)
+
+def _service(verb):
+    # Las acciones de servicios piden el nombre con get_user_input
+    return Param("service", help=f"Servicio a {verb}", arg=False, prompt=True)
+
+# Catálogo de acciones: módulo, nombre, función y parámetros tipados
+ACTIONS = [
+    Action("process", "list", PROCESS, "list_processes", description="Listar procesos"),
+    Action("process", "kill", PROCESS, "terminate_process_by_pid",
+           [Param("pid", "int", help="PID del proceso", arg=False, prompt=True),
+            Param("confirm", "confirm", default=False, help="Confirmar la operación", arg=False, prompt=True)],
+           description="Terminar un proceso por PID"),
+    Action("process", "kill-by-name", PROCESS, "terminate_process_by_name",
+           [Param("name", help="Nombre del proceso", arg=False, prompt=True),
+            Param("confirm", "confirm", default=False, help="Confirmar la operación", arg=False, prompt=True)],
+           description="Terminar procesos por nombre"),
+    Action("process", "find", PROCESS, "find_process_info_by_name",
+           [Param("name", help="Nombre o parte del nombre", arg=False, prompt=True)],
+           description="Buscar procesos por nombre"),
+    Action("process", "report", PROCESS, "generate_process_log", description="Informe de procesos"),
+
+    Action("docker", "list", DOCKER, "list_docker_containers",
+           [Param("name", default="", help="Filtrar por nombre (subcadena o comodines)"),
+            Param("state", default="", help="Filtrar por estado (running, exited...)")],
+           description="Listar contenedores"),
+    Action("docker", "status", DOCKER, "get_docker_container_status", [Param("container", help="ID o nombre")],
+           description="Estado de un contenedor"),
+    Action("docker", "stats", DOCKER, "show_docker_container_stats",
+           [Param("sort", default="cpu", choices=["cpu", "mem", "net", "io", "name"], help="Ordenar por"),
+            Param("limit", default="", help="Número de contenedores")],
+           description="Uso de recursos de los contenedores"),
+    Action("docker", "start", DOCKER, "start_docker_container", [Param("container", help="ID o nombre")],
+           description="Iniciar un contenedor"),
+    Action("docker", "stop", DOCKER, "stop_docker_container", [Param("container", help="ID o nombre")],
+           description="Detener un contenedor"),
+    Action("docker", "restart", DOCKER, "restart_docker_container", [Param("container", help="ID o nombre")],
+           description="Reiniciar un contenedor"),
+    Action("docker", "remove", DOCKER, "remove_docker_container",
+           [Param("container", help="ID o nombre"), _confirm(prompt=True)], description="Eliminar un contenedor"),
+    Action("docker", "bulk-start", DOCKER, "bulk_start_containers",
+           [Param("selector", help="Nombres, comodines (web*) o label=clave=valor"),
+            Param("parallel", default="", help="Contenedores a la vez")],
+           description="Iniciar varios contenedores", timeout=600),
+    Action("docker", "bulk-stop", DOCKER, "bulk_stop_containers",
+           [Param("selector", help="Nombres, comodines (web*) o label=clave=valor"),
+            Param("parallel", default="", help="Contenedores a la vez"),
+            Param("timeout", default="", help="Segundos de gracia por contenedor")],
+           description="Detener varios contenedores", timeout=600),
+    Action("docker", "bulk-restart", DOCKER, "bulk_restart_containers",
+           [Param("selector", help="Nombres, comodines (web*) o label=clave=valor"),
+            Param("parallel", default="", help="Contenedores a la vez"),
+            Param("timeout", default="", help="Segundos de gracia por contenedor")],
+           description="Reiniciar varios contenedores", timeout=600),
+    Action("docker", "bulk-remove", DOCKER, "bulk_remove_containers",
+           [Param("selector", help="Nombres, comodines (web*) o label=clave=valor"), _confirm(prompt=True),
+            Param("parallel", default="", help="Contenedores a la vez")],
+           description="Eliminar varios contenedores", timeout=600),
+    Action("docker", "logs", DOCKER, "view_docker_logs",
+           [Param("container", help="ID o nombre"), Param("lines", default="", help="Número de líneas")],
+           description="Ver los logs de un contenedor"),
+    Action("docker", "follow-logs", DOCKER, "follow_docker_logs",
+           [Param("containers", default="", help="Contenedores (web,db,dns o cliente*; vacío: todos)"),
+            Param("pattern", default="", help="Expresión regular"),
+            Param("since", default="", help="Desde (10m, 2h, AAAA-MM-DD HH:MM)"),
+            Param("until", default="", help="Hasta (10m, 2h, AAAA-MM-DD HH:MM)"),
+            Param("follow", "confirm", default=False, help="Seguir las líneas nuevas hasta Ctrl+C", remote=False),
+            Param("tail", default="", help="Líneas previas por contenedor")],
+           description="Logs de varios contenedores a la vez", timeout=600),
+    Action("docker", "exec", DOCKER, "execute_command_in_container",
+           [Param("container", help="ID o nombre"), Param("command", help="Comando a ejecutar")],
+           description="Ejecutar un comando en un contenedor"),
+    Action("docker", "clean-images", DOCKER, "clean_docker_images", [_confirm(prompt=True)],
+           description="Eliminar las imágenes no utilizadas", timeout=600),
+    Action("docker", "compose-deploy", DOCKER, "deploy_docker_compose", [Param("file", help="Ruta al docker-compose.yml")],
+           description="Levantar un archivo Docker Compose", timeout=600),
+    Action("docker", "compose-up", DOCKER, "docker_compose_up", description="docker compose up", timeout=600),
+    Action("docker", "compose-services", DOCKER, "deploy_compose_services",
+           [Param("file", default="", help="Ruta al docker-compose.yml (vacío: el del programa)"),
+            Param("dry_run", "bool", default=False, help="Solo mostrar el plan de arranque"),
+            Param("parallel", default="", help="Servicios a la vez (vacío: DOCKER_COMPOSE_PARALLELISM)")],
+           description="Levantar Compose por dependencias esperando healthchecks", timeout=1800),
+    Action("docker", "compose-down", DOCKER, "docker_compose_down", description="docker compose down", timeout=600),
+    Action("docker", "compose-build", DOCKER, "docker_compose_build", description="docker compose build", timeout=1800),
+
+    Action("services", "list", SERVICES, "list_services", description="Listar servicios"),
+    Action("services", "start", SERVICES, "start_service", [_service("iniciar")], description="Iniciar un servicio"),
+    Action("services", "stop", SERVICES, "stop_service", [_service("detener")], description="Detener un servicio"),
+    Action("services", "restart", SERVICES, "restart_service", [_service("reiniciar")], description="Reiniciar un servicio"),
+    Action("services", "enable", SERVICES, "enable_service", [_service("habilitar")], description="Habilitar un servicio"),
+    Action("services", "disable", SERVICES, "disable_service", [_service("deshabilitar")],
+           description="Deshabilitar un servicio"),
+
+    Action("packages", "list", PACKAGES, "list_installed_packages", description="Listar paquetes instalados"),
+    Action("packages", "search", PACKAGES, "search_package", [Param("name", help="Paquete a buscar")],
+           description="Buscar un paquete"),
+    Action("packages", "install", PACKAGES, "install_package", [Param("name", help="Paquete a instalar")],
+           description="Instalar un paquete", timeout=1800),
+    Action("packages", "remove", PACKAGES, "remove_package", [Param("name", help="Paquete a eliminar")],
+           description="Eliminar un paquete", timeout=1800),
+    Action("packages", "update", PACKAGES, "update_package_list", description="Actualizar la lista de paquetes",
+           timeout=600),
+    Action("packages", "upgrade", PACKAGES, "upgrade_all_packages", description="Actualizar todos los paquetes",
+           timeout=3600),
+
+    Action("users", "list", USERS, "list_users", description="Listar usuarios"),
+    Action("users", "add", USERS, "add_user",
+           [Param("username", help="Nombre del usuario"), Param("password", default="", help="Contraseña")],
+           description="Crear un usuario"),
+    Action("users", "remove", USERS, "remove_user", [Param("username", help="Nombre del usuario"), _confirm()],
+           description="Eliminar un usuario"),
+    Action("users", "list-groups", USERS, "list_groups", description="Listar grupos"),
+    Action("users", "add-group", USERS, "add_group", [Param("group", help="Nombre del grupo")],
+           description="Crear un grupo"),
+    Action("users", "remove-group", USERS, "remove_group", [Param("group", help="Nombre del grupo"), _confirm()],
+           description="Eliminar un grupo"),
+    Action("users", "add-to-group", USERS, "add_user_to_group",
+           [Param("username", help="Nombre del usuario"), Param("group", help="Nombre del grupo")],
+           description="Añadir un usuario a un grupo"),
+    Action("users", "remove-from-group", USERS, "remove_user_from_group",
+           [Param("username", help="Nombre del usuario"), Param("group", help="Nombre del grupo")],
+           description="Quitar un usuario de un grupo"),
+    Action("users", "report", USERS, "generate_user_group_log", description="Informe de usuarios y grupos"),
+
+    Action("network", "ip", NETWORK, "view_ip_config", description="Ver la configuración IP"),
+    Action("network", "set-static-ip", NETWORK, "configure_static_ip",
+           [Param("interface", help="Interfaz de red"), Param("ip", help="Dirección IP"),
+            Param("netmask", help="Máscara de subred"), Param("gateway", default="", help="Puerta de enlace"),
+            _confirm()],
+           description="Configurar una IP estática"),
+    Action("network", "set-interface", NETWORK, "toggle_interface_status",
+           [Param("interface", help="Interfaz de red"),
+            Param("state", choices=["habilitar", "deshabilitar"], help="habilitar o deshabilitar"), _confirm()],
+           description="Habilitar o deshabilitar una interfaz"),
+    Action("network", "routes", NETWORK, "view_routing_tables", description="Ver las tablas de enrutamiento"),
+    Action("network", "connections", NETWORK, "view_network_connections", description="Ver las conexiones de red"),
+    Action("network", "report", NETWORK, "generate_network_log", description="Informe de red"),
+
+    Action("resources", "cpu", RESOURCES, "get_cpu_usage", description="Uso de CPU"),
+    Action("resources", "memory", RESOURCES, "get_memory_usage", description="Uso de memoria"),
+    Action("resources", "disk", RESOURCES, "get_disk_usage", description="Uso de disco"),
+    Action("resources", "network", RESOURCES, "get_network_stats", description="Estadísticas de red"),
+    Action("resources", "uptime", RESOURCES, "get_system_uptime", description="Tiempo de actividad"),
+    Action("resources", "top", RESOURCES, "view_top_processes_linux", description="Procesos más consumidores"),
+    Action("resources", "report", RESOURCES, "generate_monitoring_log", description="Informe de recursos"),
+
+    Action("disk", "list", DISK, "list_disks_partitions", description="Listar discos y particiones"),
+    Action("disk", "usage", DISK, "view_mounted_partition_usage", description="Uso de las particiones montadas"),
+    Action("disk", "report", DISK, "generate_disk_partition_log", description="Informe de discos"),
+
+    Action("firewall", "status", FIREWALL, "view_firewall_status", description="Estado del firewall"),
+    Action("firewall", "enable", FIREWALL, "enable_firewall", [_confirm()], description="Habilitar el firewall"),
+    Action("firewall", "disable", FIREWALL, "disable_firewall", [_confirm()], description="Deshabilitar el firewall"),
+    Action("firewall", "rules", FIREWALL, "list_firewall_rules", description="Listar las reglas"),
+    Action("firewall", "add-rule", FIREWALL, "add_allow_port_rule",
+           [Param("name", default="", help="Nombre de la regla"), Param("port", help="Puerto"),
+            Param("proto", default="any", choices=["tcp", "udp", "any"], help="Protocolo"),
+            Param("direction", default="in", choices=["in", "out"], help="Dirección")],
+           description="Permitir un puerto"),
+    Action("firewall", "deny-rule", FIREWALL, "add_deny_port_rule",
+           [Param("name", default="", help="Nombre de la regla"), Param("port", help="Puerto"),
+            Param("proto", default="any", choices=["tcp", "udp", "any"], help="Protocolo"),
+            Param("direction", default="in", choices=["in", "out"], help="Dirección")],
+           description="Bloquear un puerto"),
+    Action("firewall", "delete-rule", FIREWALL, "delete_allow_port_rule",
+           [Param("name", default="", help="Nombre de la regla"), Param("port", help="Puerto"),
+            Param("proto", default="any", choices=["tcp", "udp", "any"], help="Protocolo"), _confirm()],
+           description="Eliminar una regla de puerto"),
+    Action("firewall", "add-app-rule", FIREWALL, "add_app_rule",
+           [Param("name", help="Nombre de la regla"), Param("path", help="Ruta del programa"),
+            Param("action", default="allow", choices=["allow", "block"], help="allow o block"),
+            Param("direction", default="in", choices=["in", "out"], help="Dirección")],
+           description="Regla para un programa (Windows)"),
+    Action("firewall", "delete-app-rule", FIREWALL, "delete_app_rule", [Param("name", help="Nombre de la regla"), _confirm()],
+           description="Eliminar una regla de programa (Windows)"),
+    Action("firewall", "show-rule", FIREWALL, "show_rule_by_name", [Param("name", help="Nombre de la regla")],
+           description="Mostrar una regla por nombre"),
+    Action("firewall", "report", FIREWALL, "generate_firewall_log", description="Informe del firewall", timeout=300),
+
+    Action("logs", "search", LOGS, "search_logs",
+           [Param("since", default="", help="Desde (AAAA-MM-DD [HH:MM:SS])"),
+            Param("until", default="", help="Hasta (AAAA-MM-DD [HH:MM:SS])"),
+            Param("module", default="", help="Módulo"), Param("action", default="", help="Acción"),
+            Param("text", default="", help="Texto a buscar"), Param("page", "int", default=1, help="Página"),
+            Param("page_size", "int", default=50, help="Registros por página")],
+           description="Buscar en los logs de la herramienta"),
+
+    Action("playbook", "run", PLAYBOOK, "run_playbook",
+           [Param("file", help="Ruta al playbook (YAML o JSON)"),
+            Param("concurrency", "int", default=0, help="Pasos simultáneos (0: el del playbook)"),
+            Param("dry_run", "bool", default=False, help="Mostrar el plan sin ejecutar")],
+           description="Ejecutar un playbook de acciones", timeout=3600),
+]
+
+_by_name = {action.full_name: action for action in ACTIONS}
+
+def get_action(module, name=None):
+    """Busca una acción por 'modulo.accion' o por (modulo, accion). Retorna None si no existe."""
+    return _by_name.get(module if name is None else f"{module}.{name}")
+
+def list_actions(module=None):
+    return [action for action in ACTIONS if module is None or action.module == module]
+
+def module_names():
+    return sorted({action.module for action in ACTIONS})
+
+def run_action(action, values=None, echo=False):
+    """
+    Ejecuta una acción de forma no interactiva: las respuestas que pida con
+    get_user_input salen de sus parámetros. Retorna el CommandResult.
+    Lanza ValueError si los parámetros no son válidos.
+    """
+    args, inputs = action.bind(values)
+    func = action.load()
+    with display.gui_input_context(inputs):
+        return result_utils.call_with_result(func, *args, echo=echo)
@@ -0,0 +1,204 @@
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import stat
+import sys
+import threading
+import config
+
+# Versión del formato de la caché; incrementarla invalida las cachés existentes
+_CACHE_VERSION = 2
+
+# Archivos cuya presencia/fecha determina el resultado del sondeo
+_FINGERPRINT_PATHS = [
+    "/etc/debian_version", "/etc/redhat-release", "/etc/os-release",
+    "/run/systemd/system", "/var/run/docker.sock",
+]
+
+_capabilities = None
+_lock = threading.Lock()
+
+def _which(name):
+    return shutil.which(name) is not None
+
+def _is_socket(path):
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+def _probe_package_manager():
+    if os.name == 'nt':
+        return None
+    if os.path.exists('/etc/debian_version'):
+        return 'apt'
+    if os.path.exists('/etc/redhat-release'):
+        # Se prioriza dnf sobre yum
+        if _which('dnf'):
+            return 'dnf'
+        if _which('yum'):
+            return 'yum'
+    return None
+
+def _probe_init_system():
+    if os.name == 'nt':
+        return 'windows-scm'
+    if os.path.isdir('/run/systemd/system') and _which('systemctl'):
+        return 'systemd'
+    if _which('service'):
+        return 'sysvinit'
+    return None
+
+def _probe_firewalls():
+    """Lista de firewalls disponibles, en orden de preferencia."""
+    if os.name == 'nt':
+        return ['netsh']
+    return [name for name, binary in (('ufw', 'ufw'), ('iptables', 'iptables'), ('nftables', 'nft')) if _which(binary)]
+
+def _docker_socket_candidates():
+    """Sockets posibles del daemon: DOCKER_HOST, el del sistema y el de Docker rootless."""
+    docker_host = os.environ.get('DOCKER_HOST', '')
+    if docker_host:
+        # Con DOCKER_HOST apuntando a TCP/SSH no hay socket local que usar
+        return [docker_host[len('unix://'):]] if docker_host.startswith('unix://') else []
+    candidates = [config.DOCKER_SOCKET_PATH]
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or (f"/run/user/{os.getuid()}" if hasattr(os, 'getuid') else None)
+    if runtime_dir:
+        candidates.append(os.path.join(runtime_dir, 'docker.sock'))
+    return candidates
+
+def _probe_docker():
+    socket_path = None
+    if os.name != 'nt':
+        socket_path = next((path for path in _docker_socket_candidates() if _is_socket(path)), None)
+    compose_plugin = any(
+        os.path.exists(os.path.join(directory, 'docker-compose'))
+        for directory in ('/usr/libexec/docker/cli-plugins', '/usr/lib/docker/cli-plugins',
+                          '/usr/local/lib/docker/cli-plugins', os.path.expanduser('~/.docker/cli-plugins'))
+    )
+    return {
+        'cli': _which('docker'),
+        'socket': socket_path,
+        'compose_plugin': compose_plugin,
+        'compose_standalone': _which('docker-compose'),
+    }
+
+def _probe_psutil():
+    """Comprueba psutil sin importarlo (la importación es costosa)."""
+    spec = importlib.util.find_spec('psutil')
+    if spec is None:
+        return {'available': False, 'version': None}
+    try:
+        from importlib.metadata import version
+        psutil_version = version('psutil')
+    except Exception:
+        psutil_version = None
+    return {'available': True, 'version': psutil_version}
+
+def probe():
+    """Sondea el sistema y retorna un diccionario con sus capacidades."""
+    firewalls = _probe_firewalls()
+    return {
+        'os': 'windows' if os.name == 'nt' else 'linux',
+        'init_system': _probe_init_system(),
+        'package_manager': _probe_package_manager(),
+        'firewalls': firewalls,
+        'firewall': firewalls[0] if firewalls else None,
+        'docker': _probe_docker(),
+        'psutil': _probe_psutil(),
+    }
+
+def fingerprint():
+    """
+    Huella barata del sistema: si cambia (se instala un binario, cambia el PATH,
+    aparece el socket de Docker...) la caché de capacidades deja de ser válida.
+    """
+    parts = [str(_CACHE_VERSION), platform.platform(), sys.version, os.environ.get('PATH', ''),
+             os.environ.get('DOCKER_HOST', '')]
+    path_dirs = os.environ.get('PATH', '').split(os.pathsep)
+    docker_sockets = _docker_socket_candidates() if os.name != 'nt' else []
+    for path in _FINGERPRINT_PATHS + docker_sockets + path_dirs:
+        try:
+            st = os.stat(path)
+            parts.append(f"{path}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:-")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+def _load_cache(current_fingerprint):
+    try:
+        with open(config.CAPABILITIES_CACHE_PATH, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('fingerprint') != current_fingerprint:
+        return None
+    return cached.get('capabilities')
+
+def _save_cache(current_fingerprint, capabilities):
+    try:
+        os.makedirs(os.path.dirname(config.CAPABILITIES_CACHE_PATH), exist_ok=True)
+        tmp_path = config.CAPABILITIES_CACHE_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': current_fingerprint, 'capabilities': capabilities}, f, indent=2)
+        os.replace(tmp_path, config.CAPABILITIES_CACHE_PATH)
+    except OSError:
+        pass # La caché es una optimización; si no se puede escribir se sondea en el próximo arranque
+
+def get_capabilities():
+    """
+    Retorna las capacidades del sistema. Se calculan una sola vez por proceso:
+    desde la caché en disco si la huella coincide o, si no, sondeando el sistema.
+    """
+    global _capabilities
+    if _capabilities is None:
+        with _lock:
+            if _capabilities is None:
+                current_fingerprint = fingerprint()
+                capabilities = _load_cache(current_fingerprint)
+                if capabilities is None:
+                    capabilities = probe()
+                    _save_cache(current_fingerprint, capabilities)
+                _capabilities = capabilities
+    return _capabilities
+
+def refresh():
+    """Fuerza un nuevo sondeo (por ejemplo, tras instalar ufw o Docker)."""
+    global _capabilities
+    with _lock:
+        current_fingerprint = fingerprint()
+        _capabilities = probe()
+        _save_cache(current_fingerprint, _capabilities)
+    return _capabilities
+
+# --- Accesos directos usados por los módulos ---
+
+def get_package_manager():
+    """'apt', 'dnf', 'yum' o None."""
+    return get_capabilities()['package_manager']
+
+def get_init_system():
+    """'systemd', 'sysvinit', 'windows-scm' o None."""
+    return get_capabilities()['init_system']
+
+def get_firewall_backend():
+    """Firewall preferido: 'ufw', 'iptables', 'nftables', 'netsh' o None."""
+    return get_capabilities()['firewall']
+
+def has_firewall(name):
+    return name in get_capabilities()['firewalls']
+
+def get_docker_socket():
+    """Ruta del socket de Docker si existe, o None."""
+    return get_capabilities()['docker']['socket']
+
+def get_compose_command():
+    """'docker compose' (plugin) o 'docker-compose' (binario independiente) si solo está este."""
+    docker = get_capabilities()['docker']
+    return 'docker-compose' if docker.get('compose_standalone') and not docker.get('compose_plugin') else 'docker compose'
+
+def has_psutil():
+    return get_capabilities()['psutil']['available']
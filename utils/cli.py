@@ -0,0 +1,90 @@
+import argparse
+import json
+import sys
+import time
+from utils import actions
+from utils import display
+from utils import result as result_utils
+
+# Códigos de salida de las órdenes de una sola línea
+EXIT_OK = 0
+EXIT_ERROR = 1 # La acción terminó con errores
+EXIT_USAGE = 2 # Argumentos no válidos (el mismo que usa argparse)
+
+def is_oneshot(argv):
+    """True si los argumentos piden una orden directa (`main.py <módulo> ...`) en lugar del menú."""
+    return bool(argv) and argv[0] in actions.module_names()
+
+def build_parser():
+    """Parser con un subcomando por módulo y, dentro de cada uno, uno por acción del catálogo."""
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="Ejecuta una acción de un módulo sin pasar por los menús.")
+    # Los destinos de los subcomandos no pueden llamarse como un parámetro (logs search tiene --module y --action)
+    modules = parser.add_subparsers(dest="cli_module", metavar="<módulo>", required=True)
+    for module in actions.module_names():
+        module_parser = modules.add_parser(module, help=f"Acciones de {module}")
+        module_actions = module_parser.add_subparsers(dest="cli_action", metavar="<acción>", required=True)
+        for action in actions.list_actions(module):
+            action_parser = module_actions.add_parser(action.name, help=action.description, description=action.description)
+            for param in action.params:
+                _add_param(action_parser, param)
+            action_parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    return parser
+
+def _add_param(parser, param):
+    flag = "--" + param.name.replace("_", "-")
+    if param.type in ("bool", "confirm"):
+        # Las confirmaciones (s/N) se responden con la opción: sin ella, la operación se cancela
+        parser.add_argument(flag, dest=param.name, action="store_true", help=param.help)
+        return
+    kwargs = {"dest": param.name, "help": param.help, "required": param.required, "default": None}
+    if param.type == "int":
+        kwargs["type"] = int
+    if param.choices:
+        kwargs["choices"] = param.choices
+    parser.add_argument(flag, **kwargs)
+
+def parse_args(argv):
+    """Analiza los argumentos (con --help o argumentos no válidos, argparse termina el proceso)."""
+    return build_parser().parse_args(argv)
+
+def run(args):
+    """
+    Ejecuta la acción elegida sin menús ni confirmaciones interactivas: solo se
+    importa el módulo de la acción. Con --json se escribe un único objeto JSON
+    en stdout (la salida de los comandos va dentro). Retorna el código de salida.
+    """
+    action = actions.get_action(args.cli_module, args.cli_action)
+    values = {param.name: getattr(args, param.name) for param in action.params}
+    values = {name: value for name, value in values.items() if value is not None}
+    start = time.monotonic()
+    if not args.json:
+        try:
+            result = actions.run_action(action, values, echo=True)
+        except ValueError as e:
+            display.print_error(str(e))
+            return EXIT_USAGE
+        return EXIT_OK if result.ok else EXIT_ERROR
+
+    # En JSON, los print() directos de los módulos no deben mezclarse con la salida
+    try:
+        with display.capture_stdout() as console:
+            result = actions.run_action(action, values, echo=False)
+    except ValueError as e:
+        _print_json({"action": action.full_name, "status": result_utils.STATUS_ERROR, "error": str(e)})
+        return EXIT_USAGE
+    body = {
+        "action": action.full_name,
+        "status": result.status,
+        "duration": round(time.monotonic() - start, 3),
+        "result": result.to_dict(),
+        "value": result_utils.jsonable(result.value),
+    }
+    if console.getvalue():
+        body["console"] = console.getvalue()
+    _print_json(body)
+    return EXIT_OK if result.ok else EXIT_ERROR
+
+def _print_json(body):
+    sys.stdout.write(json.dumps(body, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
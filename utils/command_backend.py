@@ -0,0 +1,244 @@
+import contextvars
+import gzip
+import json
+import os
+import subprocess
+import threading
+import time
+import config
+from utils import shell_pool
+from utils import output_capture
+
+# Función llamada como hook(proceso, iniciado) al lanzar y al terminar cada proceso hijo.
+# Si está definida (trabajos en segundo plano, utils.jobs), los comandos se lanzan en su
+# propio grupo de procesos, sin pasar por el pool, para poder cancelarlos con killpg.
+_process_hook = contextvars.ContextVar("process_hook", default=None)
+
+def set_process_hook(hook):
+    """Registra un hook de procesos para el contexto actual. Retorna el token para reset_process_hook."""
+    return _process_hook.set(hook)
+
+def reset_process_hook(token):
+    _process_hook.reset(token)
+
+# CPU del último comando lanzado con subprocess en cada hilo (ver last_child_cpu)
+_usage = threading.local()
+
+def last_child_cpu():
+    """
+    CPU (usuario + sistema) que consumió el último comando ejecutado en este hilo y
+    los procesos que él esperó, o None si no se pudo medir (pool de shells, Windows).
+    """
+    return getattr(_usage, "cpu", None)
+
+def _wait(process):
+    """
+    Espera al proceso y anota su CPU con wait4, que la mide solo para ese proceso:
+    os.times() sumaría la de todos los hijos del programa, incluidos los de otros hilos.
+    """
+    if hasattr(os, "wait4"):
+        try:
+            _, wait_status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            pass # Ya lo recogió otro hilo (la cancelación de un trabajo comprueba si terminó)
+        else:
+            process.returncode = os.waitstatus_to_exitcode(wait_status)
+            _usage.cpu = usage.ru_utime + usage.ru_stime
+    return process.wait()
+
+class LiveBackend:
+    """Ejecuta los comandos contra el sistema real (subprocess o pool de shells)."""
+
+    def run(self, command, shell=True):
+        """Ejecuta el comando. Retorna (stdout, stderr, status) como capturas acotadas."""
+        _usage.cpu = None
+        hook = _process_hook.get()
+        pool = self.active_pool() if shell and os.name != 'nt' and hook is None else None
+        if pool is not None:
+            try:
+                return pool.run(command, timeout=config.SHELL_POOL_TIMEOUT)
+            except Exception as e:
+                return _error_captures(f"Excepción al ejecutar comando: {e}")
+
+        stdout_capture = output_capture.new_capture()
+        stderr_capture = output_capture.new_capture()
+        try:
+            process = subprocess.Popen(
+                command,
+                shell=shell,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=hook is not None and os.name != 'nt'
+            )
+            if hook is not None:
+                hook(process, True)
+            readers = [
+                threading.Thread(target=_drain, args=(process.stdout, stdout_capture), daemon=True),
+                threading.Thread(target=_drain, args=(process.stderr, stderr_capture), daemon=True),
+            ]
+            for reader in readers:
+                reader.start()
+            try:
+                for reader in readers:
+                    reader.join()
+                return stdout_capture, stderr_capture, _wait(process)
+            finally:
+                if hook is not None:
+                    hook(process, False)
+        except Exception as e:
+            return _error_captures(f"Excepción al ejecutar comando: {e}") # Retorna un error genérico y código 1
+
+    def measures_child_cpu(self):
+        # La CPU de los workers del pool no se contabiliza hasta que terminan
+        return self.active_pool() is None or _process_hook.get() is not None
+
+    @staticmethod
+    def active_pool():
+        """Retorna el pool de shells si está habilitado (por config o explícitamente)."""
+        pool = shell_pool.get_shell_pool()
+        if pool is None and config.USE_SHELL_POOL:
+            pool = shell_pool.enable_shell_pool(config.SHELL_POOL_SIZE)
+        return pool
+
+class RecordingBackend:
+    """
+    Ejecuta los comandos con otro backend (el real por defecto) y graba cada
+    tupla (comando → salida, estado, duración) en un archivo JSON-lines
+    (comprimido con gzip si la ruta termina en .gz).
+    """
+
+    def __init__(self, archive_path, inner=None):
+        self.archive_path = archive_path
+        self.inner = inner or LiveBackend()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(archive_path))
+        os.makedirs(directory, exist_ok=True)
+
+    def run(self, command, shell=True):
+        start = time.perf_counter()
+        stdout, stderr, status = self.inner.run(command, shell)
+        duration = time.perf_counter() - start
+        # Se graba la salida completa (no el inicio + final en memoria) para que la reproducción sea fiel
+        entry = {
+            "command": command,
+            "shell": shell,
+            "stdout": stdout.full_text(),
+            "stderr": stderr.full_text(),
+            "status": status,
+            "duration": round(duration, 6),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with _open_archive(self.archive_path, "at") as f:
+                f.write(line)
+        return stdout, stderr, status
+
+    def measures_child_cpu(self):
+        return self.inner.measures_child_cpu()
+
+class ReplayBackend:
+    """
+    Reproduce de forma determinista un archivo grabado por RecordingBackend.
+    Las ejecuciones repetidas de un mismo comando devuelven las grabaciones en
+    orden y, agotadas, repiten la última. Con `honor_latency` se respeta la
+    duración original de cada comando.
+    """
+
+    def __init__(self, archive_path, honor_latency=False, latency_scale=1.0):
+        self.archive_path = archive_path
+        self.honor_latency = honor_latency
+        self.latency_scale = latency_scale
+        self._entries = {}
+        self._cursors = {}
+        self._lock = threading.Lock()
+        with _open_archive(archive_path, "rt") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = (entry["command"], entry.get("shell", True))
+                self._entries.setdefault(key, []).append(entry)
+
+    def run(self, command, shell=True):
+        key = (command, shell)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                entry = None
+            else:
+                cursor = self._cursors.get(key, 0)
+                entry = entries[min(cursor, len(entries) - 1)]
+                self._cursors[key] = cursor + 1
+        if entry is None:
+            return _error_captures(f"Comando no grabado en '{self.archive_path}': {command}", status=127)
+
+        if self.honor_latency and entry.get("duration"):
+            time.sleep(entry["duration"] * self.latency_scale)
+        stdout_capture = output_capture.new_capture()
+        stderr_capture = output_capture.new_capture()
+        stdout_capture.feed(entry.get("stdout", "").encode())
+        stderr_capture.feed(entry.get("stderr", "").encode())
+        return stdout_capture, stderr_capture, entry.get("status", 0)
+
+    def measures_child_cpu(self):
+        return False
+
+    def rewind(self):
+        """Vuelve a reproducir las grabaciones desde el principio."""
+        with self._lock:
+            self._cursors.clear()
+
+    def commands(self):
+        """Lista de comandos distintos disponibles en el archivo."""
+        return [command for command, _ in self._entries]
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """
+    Retorna el backend activo. La primera vez se elige según la configuración:
+    SYSADMIN_REPLAY (reproducir), SYSADMIN_RECORD (grabar) o el sistema real.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if config.COMMAND_REPLAY_PATH:
+                    _backend = ReplayBackend(config.COMMAND_REPLAY_PATH, config.COMMAND_REPLAY_LATENCY)
+                elif config.COMMAND_RECORD_PATH:
+                    _backend = RecordingBackend(config.COMMAND_RECORD_PATH)
+                else:
+                    _backend = LiveBackend()
+    return _backend
+
+def set_backend(backend):
+    """Sustituye el backend de ejecución de comandos (None vuelve a la configuración)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def use_recording(archive_path):
+    """Graba todos los comandos siguientes en `archive_path`."""
+    set_backend(RecordingBackend(archive_path))
+
+def use_replay(archive_path, honor_latency=False):
+    """Reproduce los comandos desde `archive_path` en lugar de ejecutarlos."""
+    set_backend(ReplayBackend(archive_path, honor_latency))
+
+def _open_archive(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def _drain(stream, capture):
+    """Lee un flujo del proceso hijo por bloques hacia una captura acotada."""
+    with stream:
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            capture.feed(chunk)
+
+def _error_captures(message, status=1):
+    stdout_capture = output_capture.new_capture()
+    stderr_capture = output_capture.new_capture()
+    stderr_capture.feed(message.encode())
+    return stdout_capture, stderr_capture, status
@@ -1,6 +1,11 @@
 import os
+import io
 import sys
 import collections
+import contextlib
+import contextvars
+import threading
+from utils import result as result_utils
 
 # Detectar si estamos en modo GUI (se setea externamente, por ejemplo, desde gui_interface.py)
 IS_GUI_MODE = False
@@ -10,6 +15,111 @@ _gui_output_buffer = []
 # Cola para almacenar las respuestas predefinidas para get_user_input en modo GUI
 _gui_input_queue = collections.deque()
 
+# Buffer de salida, cola de entradas y captura de stdout de la petición en curso.
+# Cada petición de la GUI (gui_request_context) tiene los suyos, de modo que varias
+# peticiones concurrentes no mezclan su salida ni se roban las confirmaciones.
+# Fuera de una petición se usan los globales de arriba.
+_request_output_buffer = contextvars.ContextVar("gui_output_buffer", default=None)
+_request_input_queue = contextvars.ContextVar("gui_input_queue", default=None)
+_request_stdout = contextvars.ContextVar("gui_stdout", default=None)
+
+def _output_buffer():
+    buffer = _request_output_buffer.get()
+    return _gui_output_buffer if buffer is None else buffer
+
+def _input_queue():
+    input_queue = _request_input_queue.get()
+    return _gui_input_queue if input_queue is None else input_queue
+
+class _ContextStdout:
+    """
+    Sustituto de sys.stdout que escribe en la captura de la petición en curso
+    (si la hay) o en el stdout original. Se instala una sola vez, en lugar de
+    intercambiar sys.stdout (global a todos los hilos) en cada petición.
+    """
+
+    def __init__(self, original):
+        self._original = original
+
+    def _target(self):
+        capture = _request_stdout.get()
+        return self._original if capture is None else capture
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._original, name)
+
+_stdout_install_lock = threading.Lock()
+
+def install_context_stdout():
+    """Instala (una vez) el stdout sensible al contexto de petición."""
+    with _stdout_install_lock:
+        if not isinstance(sys.stdout, _ContextStdout):
+            sys.stdout = _ContextStdout(sys.stdout)
+
+class GuiRequestContext:
+    """Salida acumulada por una petición de la GUI."""
+
+    def __init__(self):
+        self.output_buffer = []
+        self.input_queue = collections.deque()
+        self.stdout = io.StringIO()
+
+    def formatted_output(self):
+        """Mensajes de print_* en formato Markdown (ver get_gui_output_buffer_and_clear)."""
+        return "\n\n".join(self.output_buffer)
+
+@contextlib.contextmanager
+def gui_request_context(inputs=None):
+    """
+    Ejecuta un bloque con su propio buffer de salida, cola de entradas y captura
+    de stdout. Los print_*/get_user_input y los print() del bloque (y solo los
+    suyos) quedan en el GuiRequestContext retornado.
+    """
+    install_context_stdout()
+    context = GuiRequestContext()
+    if inputs:
+        context.input_queue.extend(inputs)
+    tokens = (_request_output_buffer.set(context.output_buffer),
+              _request_input_queue.set(context.input_queue),
+              _request_stdout.set(context.stdout))
+    try:
+        yield context
+    finally:
+        _request_stdout.reset(tokens[2])
+        _request_input_queue.reset(tokens[1])
+        _request_output_buffer.reset(tokens[0])
+
+@contextlib.contextmanager
+def gui_input_context(inputs=None):
+    """
+    Ejecuta un bloque con su propia cola de entradas (y buffer de salida) sin
+    capturar stdout: para funciones cuya salida se recoge en un CommandResult.
+    """
+    input_queue = collections.deque(inputs or ())
+    tokens = (_request_output_buffer.set([]), _request_input_queue.set(input_queue))
+    try:
+        yield input_queue
+    finally:
+        _request_input_queue.reset(tokens[1])
+        _request_output_buffer.reset(tokens[0])
+
+@contextlib.contextmanager
+def capture_stdout():
+    """Captura los print() del bloque en un StringIO sin afectar a otros hilos."""
+    install_context_stdout()
+    capture = io.StringIO()
+    token = _request_stdout.set(capture)
+    try:
+        yield capture
+    finally:
+        _request_stdout.reset(token)
+
 # Clase de colore personalizado para el terminal
 class Colors:
     HEADER = '\033[95m'
@@ -29,52 +139,85 @@ def clear_screen():
     Limpia la pantalla de la terminal o el buffer de salida en modo GUI.
     """
     if not IS_GUI_MODE:
-        os.system('cls' if os.name == 'nt' else 'clear')
+        result = result_utils.current_result()
+        if (result is not None and not result.echo) or not sys.stdout.isatty():
+            return # Orden no interactiva (--json, cron, tuberías): no hay pantalla que limpiar
+        if os.name == 'nt':
+            os.system('cls')
+        else:
+            # Secuencia ANSI en lugar de lanzar el comando `clear` en cada menú
+            sys.stdout.write("\033[H\033[2J\033[3J")
+            sys.stdout.flush()
     else:
         # En modo GUI, vaciamos el buffer de salida
-        _gui_output_buffer.clear()
+        _output_buffer().clear()
+
+def _emit(level, message, cli_text, gui_text):
+    """
+    Registra un mensaje en el resultado en curso (utils.result), si lo hay, y lo
+    muestra en la terminal (CLI) o en el buffer de salida (GUI sin resultado activo).
+    """
+    result = result_utils.current_result()
+    if result is not None:
+        result.add_message(level, message)
+    if not IS_GUI_MODE:
+        if result is None or result.echo:
+            print(cli_text)
+    elif result is None:
+        _output_buffer().append(gui_text)
 
 def print_header(title: str):
     """
     Imprime un encabezado formateado en la terminal o lo añade al buffer GUI.
     """
-    if not IS_GUI_MODE:
-        print(f"\n{Colors.BOLD}{Colors.OKBLUE}--- {title.upper()} ---{Colors.ENDC}\n")
-    else:
-        # Formato Markdown para encabezado en GUI: Nivel 2 y una línea
-        _gui_output_buffer.append(f"## {title}\n---")
+    # Formato Markdown para encabezado en GUI: Nivel 2 y una línea
+    _emit(result_utils.HEADER, title, f"\n{Colors.BOLD}{Colors.OKBLUE}--- {title.upper()} ---{Colors.ENDC}\n",
+          f"## {title}\n---")
 
 def print_info(message: str):
     """Imprime un mensaje de información."""
-    if not IS_GUI_MODE:
-        print(f"{Colors.OKCYAN}[INFO]{Colors.ENDC} {message}")
-    else:
-        # Formato Markdown para información
-        _gui_output_buffer.append(f"**[INFO]** {message}")
+    _emit(result_utils.INFO, message, f"{Colors.OKCYAN}[INFO]{Colors.ENDC} {message}", f"**[INFO]** {message}")
 
 def print_success(message: str):
     """Imprime un mensaje de éxito."""
-    if not IS_GUI_MODE:
-        print(f"{Colors.OKGREEN}[ÉXITO]{Colors.ENDC} {message}")
-    else:
-        # Formato Markdown para éxito
-        _gui_output_buffer.append(f"**[ÉXITO]** {message}")
+    _emit(result_utils.SUCCESS, message, f"{Colors.OKGREEN}[ÉXITO]{Colors.ENDC} {message}", f"**[ÉXITO]** {message}")
 
 def print_error(message: str):
     """Imprime un mensaje de error."""
-    if not IS_GUI_MODE:
-        print(f"{Colors.FAIL}[ERROR]{Colors.ENDC} {message}")
-    else:
-        # Formato Markdown para error (puede ser más prominente)
-        _gui_output_buffer.append(f"**[ERROR]** {message}")
+    _emit(result_utils.ERROR, message, f"{Colors.FAIL}[ERROR]{Colors.ENDC} {message}", f"**[ERROR]** {message}")
 
 def print_warning(message: str):
     """Imprime un mensaje de advertencia."""
+    _emit(result_utils.WARNING, message, f"{Colors.WARNING}[ADVERTENCIA]{Colors.ENDC} {message}",
+          f"**[ADVERTENCIA]** {message}")
+
+def print_output(text: str):
+    """
+    Imprime la salida en bruto de un comando. En la GUI se muestra como bloque
+    preformateado.
+    """
+    result = result_utils.current_result()
+    if result is not None:
+        result.add_output(text)
     if not IS_GUI_MODE:
-        print(f"{Colors.WARNING}[ADVERTENCIA]{Colors.ENDC} {message}")
-    else:
-        # Formato Markdown para advertencia
-        _gui_output_buffer.append(f"**[ADVERTENCIA]** {message}")
+        if result is None or result.echo:
+            print(text)
+    elif result is None:
+        _output_buffer().append(f"```\n{text}\n```")
+
+def print_table(columns: list, rows: list):
+    """
+    Imprime una tabla: alineada en la terminal y, en la GUI, como tabla paginada
+    (las columnas y filas quedan en el resultado en curso).
+    """
+    result = result_utils.current_result()
+    if result is not None:
+        result.set_table(columns, rows)
+    if not IS_GUI_MODE:
+        if result is None or result.echo:
+            print(result_utils.format_table(columns, rows))
+    elif result is None:
+        _output_buffer().append(result_utils.format_table(columns, rows, markdown=True))
 
 def set_gui_input_queue(inputs: list):
     """
@@ -82,8 +225,9 @@ def set_gui_input_queue(inputs: list):
     Esto permite que las funciones que esperan una interacción de usuario (como 's/N')
     obtengan sus respuestas de manera no interactiva desde la GUI.
     """
-    _gui_input_queue.clear()
-    _gui_input_queue.extend(inputs)
+    input_queue = _input_queue()
+    input_queue.clear()
+    input_queue.extend(inputs)
 
 def get_gui_output_buffer_and_clear() -> str:
     """
@@ -93,20 +237,27 @@ def get_gui_output_buffer_and_clear() -> str:
     # Unir las líneas del buffer con saltos de línea dobles para Markdown,
     # excepto para los encabezados que ya manejan sus propios saltos.
     # Podríamos añadir un salto de línea extra entre elementos para mejorar la legibilidad.
-    output = "\n\n".join(_gui_output_buffer) 
-    _gui_output_buffer.clear() # Limpiar el buffer después de recuperarlo
+    buffer = _output_buffer()
+    output = "\n\n".join(buffer) 
+    buffer.clear() # Limpiar el buffer después de recuperarlo
     return output
 
 def get_user_input(prompt: str) -> str:
     """
     Obtiene la entrada del usuario, adaptado para GUI/CLI.
-    En modo GUI, intenta obtener la entrada de la cola predefinida.
+    En modo GUI, intenta obtener la entrada de la cola predefinida. Fuera de la
+    GUI, las respuestas de una cola de petición (API, órdenes de una sola línea)
+    se consumen antes de preguntar en la terminal.
     """
+    request_queue = _request_input_queue.get()
+    if not IS_GUI_MODE and request_queue:
+        return str(request_queue.popleft()).strip()
     if not IS_GUI_MODE:
         return input(f"{Colors.OKBLUE}{prompt}: {Colors.ENDC}").strip()
     else:
-        if _gui_input_queue:
-            response = _gui_input_queue.popleft()
+        input_queue = _input_queue()
+        if input_queue:
+            response = input_queue.popleft()
             # También logeamos esta interacción en el buffer para que se vea en la GUI
             print_info(f"Respuesta automática para '{prompt}': '{response}'") 
             return str(response).strip()
@@ -129,4 +280,4 @@ def print_menu(options: dict):
         for key, value in options.items():
             menu_str += f"- **{key}**: {value}\n"
         # No imprimir directamente, añadir al buffer
-        _gui_output_buffer.append(menu_str)
\ No newline at end of file
+        _output_buffer().append(menu_str)
\ No newline at end of file
@@ -0,0 +1,415 @@
+import http.client
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+import config
+from utils import capabilities
+from utils import command_backend
+from utils import jobs
+
+class DockerAPIError(Exception):
+    """Respuesta de error del Docker Engine (status HTTP y mensaje del daemon)."""
+
+    def __init__(self, status, message):
+        super().__init__(f"{message} (HTTP {status})" if status else message)
+        self.status = status
+        self.message = message
+
+class DockerUnavailable(DockerAPIError):
+    """No se pudo conectar con el socket del daemon."""
+
+    def __init__(self, message):
+        super().__init__(None, message)
+
+class DockerTimeout(DockerAPIError):
+    """El daemon no respondió a tiempo (operación lenta): no se marca como caído."""
+
+    def __init__(self, message):
+        super().__init__(None, message)
+
+class DockerCancelled(DockerAPIError):
+    """Se canceló el trabajo que hacía la petición (no dice nada del estado del daemon)."""
+
+    def __init__(self):
+        super().__init__(None, "Operación cancelada")
+
+_CONNECT_ATTEMPTS = 10
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """Conexión HTTP sobre un socket Unix (el host solo se usa en la cabecera Host)."""
+
+    def __init__(self, socket_path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        # Con muchas conexiones a la vez (operaciones en lote) la cola de escucha del
+        # socket puede llenarse: connect() falla con EAGAIN y se reintenta en breve
+        for attempt in range(_CONNECT_ATTEMPTS):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except BlockingIOError:
+                sock.close()
+                if attempt == _CONNECT_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.01 * (attempt + 1))
+                continue
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+            return
+
+# Errores tras los que una conexión reutilizada se descarta y la petición se reintenta con una nueva
+# (el daemon cerró la conexión keep-alive mientras estaba en el pool)
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError,
+                 ConnectionResetError, ConnectionAbortedError)
+
+class DockerClient:
+    """
+    Cliente del Docker Engine API sobre el socket Unix del daemon. Reutiliza las
+    conexiones (HTTP/1.1 keep-alive) con un pool de como mucho DOCKER_API_POOL_SIZE
+    conexiones inactivas, de modo que cada operación cuesta una petición HTTP en
+    lugar de lanzar el binario `docker` y analizar su salida de texto.
+    """
+
+    def __init__(self, socket_path=None, pool_size=None, timeout=None, api_version=None):
+        self.socket_path = socket_path or capabilities.get_docker_socket() or config.DOCKER_SOCKET_PATH
+        self.timeout = timeout or config.DOCKER_API_TIMEOUT
+        self.api_version = config.DOCKER_API_VERSION if api_version is None else api_version
+        self._pool = queue.LifoQueue(maxsize=pool_size or config.DOCKER_API_POOL_SIZE)
+
+    # --- Conexiones ---
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return _UnixHTTPConnection(self.socket_path, self.timeout), False
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _url(self, path, params=None):
+        prefix = f"/{self.api_version}" if self.api_version else ""
+        query = ""
+        if params:
+            params = {key: (json.dumps(value) if isinstance(value, dict) else
+                            str(value).lower() if isinstance(value, bool) else value)
+                      for key, value in params.items() if value is not None}
+            query = "?" + urllib.parse.urlencode(params)
+        return f"{prefix}{path}{query}"
+
+    def request(self, method, path, params=None, body=None, timeout=None, stream=False):
+        """
+        Hace una petición y retorna (status, datos): JSON decodificado, bytes del
+        cuerpo o, con `stream`, el HTTPResponse abierto (la conexión no vuelve al
+        pool). Lanza DockerAPIError con las respuestas >= 400, DockerUnavailable
+        si no se puede conectar y DockerTimeout si la respuesta no llega a tiempo.
+        """
+        url = self._url(path, params)
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if jobs.cancel_requested():
+            raise DockerCancelled()
+        for attempt in range(2):
+            connection, reused = self._acquire()
+            connection.timeout = timeout or self.timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(connection.timeout)
+            # Si se cancela el trabajo (GUI o API), se corta la conexión y la petición termina ya
+            unregister = jobs.on_cancel(lambda connection=connection: _shutdown(connection))
+            try:
+                connection.request(method, url, body=payload, headers=headers)
+                response = connection.getresponse()
+            except _STALE_ERRORS as e:
+                unregister()
+                connection.close()
+                if reused and attempt == 0 and not jobs.cancel_requested():
+                    continue
+                raise _connection_error(f"Conexión con el daemon de Docker interrumpida: {e}")
+            except (FileNotFoundError, ConnectionRefusedError, PermissionError) as e:
+                unregister()
+                connection.close()
+                raise _unavailable(f"No se pudo conectar con el daemon de Docker en {self.socket_path}: {e}")
+            except (OSError, http.client.HTTPException) as e:
+                unregister()
+                connection.close()
+                raise _connection_error(f"Error de comunicación con el daemon de Docker: {e}", e)
+            break
+        # Cualquier respuesta demuestra que el daemon está vivo: las operaciones en lote no necesitan /_ping
+        _set_daemon_status(True, None)
+
+        if stream and response.status < 400:
+            return response.status, _StreamResponse(response, connection, unregister)
+        try:
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            raise _connection_error(f"Error leyendo la respuesta del daemon de Docker: {e}", e)
+        finally:
+            unregister()
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        content_type = response.getheader("Content-Type", "")
+        if data and "json" in content_type:
+            data = json.loads(data)
+        if response.status >= 400:
+            if isinstance(data, dict):
+                message = data.get("message")
+            elif isinstance(data, bytes):
+                message = data.decode("utf-8", "replace").strip()
+            else:
+                message = str(data)
+            raise DockerAPIError(response.status, message or response.reason)
+        return response.status, data
+
+    # --- Operaciones ---
+
+    def ping(self, timeout=None):
+        """True si el daemon responde a /_ping."""
+        status, data = self.request("GET", "/_ping", timeout=timeout)
+        return status == 200
+
+    def version(self):
+        return self.request("GET", "/version")[1]
+
+    def containers(self, all=True, filters=None):
+        """Lista de contenedores (dicts tal y como los retorna /containers/json)."""
+        return self.request("GET", "/containers/json", {"all": all, "filters": filters})[1]
+
+    def inspect_container(self, container):
+        return self.request("GET", f"/containers/{_quote(container)}/json")[1]
+
+    def start(self, container, timeout=None):
+        """Inicia el contenedor. Retorna False si ya estaba en ejecución (HTTP 304)."""
+        return self.request("POST", f"/containers/{_quote(container)}/start", timeout=timeout)[0] != 304
+
+    def stop(self, container, timeout=None):
+        """Detiene el contenedor. Retorna False si ya estaba detenido (HTTP 304)."""
+        wait = (timeout or 10) + self.timeout # La petición dura lo que tarde el contenedor en parar
+        return self.request("POST", f"/containers/{_quote(container)}/stop", {"t": timeout}, timeout=wait)[0] != 304
+
+    def restart(self, container, timeout=None):
+        wait = (timeout or 10) + self.timeout
+        self.request("POST", f"/containers/{_quote(container)}/restart", {"t": timeout}, timeout=wait)
+        return True
+
+    def remove(self, container, force=False, volumes=False, timeout=None):
+        self.request("DELETE", f"/containers/{_quote(container)}", {"force": force, "v": volumes}, timeout=timeout)
+        return True
+
+    def logs(self, container, tail=None, timestamps=False):
+        """Logs del contenedor como texto (stdout y stderr intercalados)."""
+        params = {"stdout": True, "stderr": True, "tail": tail or "all", "timestamps": timestamps}
+        _, data = self.request("GET", f"/containers/{_quote(container)}/logs", params)
+        return "".join(text for _, text in demultiplex(data)) if _is_multiplexed(data) else data.decode("utf-8", "replace")
+
+    def exec(self, container, command, timeout=None):
+        """
+        Ejecuta `command` (lista o texto para sh -c) en el contenedor.
+        Retorna (salida, código de salida).
+        """
+        cmd = command if isinstance(command, list) else ["sh", "-c", command]
+        _, created = self.request("POST", f"/containers/{_quote(container)}/exec",
+                                  body={"Cmd": cmd, "AttachStdout": True, "AttachStderr": True, "Tty": False})
+        exec_id = created["Id"]
+        # La respuesta es el flujo multiplexado hasta que termina el comando; la conexión no se reutiliza
+        _, stream = self.request("POST", f"/exec/{exec_id}/start", body={"Detach": False, "Tty": False},
+                                 timeout=timeout or config.DOCKER_EXEC_TIMEOUT, stream=True)
+        with stream:
+            data = stream.read_all()
+        output = "".join(text for _, text in demultiplex(data)) if _is_multiplexed(data) else data.decode("utf-8", "replace")
+        exit_code = self.request("GET", f"/exec/{exec_id}/json")[1].get("ExitCode")
+        return output, exit_code if exit_code is not None else 0
+
+    def images(self, all=False):
+        return self.request("GET", "/images/json", {"all": all})[1]
+
+    def networks(self):
+        return self.request("GET", "/networks")[1]
+
+    def volumes(self):
+        return self.request("GET", "/volumes")[1].get("Volumes") or []
+
+    def events(self, filters=None, since=None):
+        """
+        Se suscribe a /events. Retorna un _StreamResponse cuyo iter_json() produce los
+        eventos a medida que llegan; la suscripción está activa en cuanto retorna.
+        """
+        _, stream = self.request("GET", "/events", {"filters": filters, "since": since}, stream=True)
+        # Sin timeout de lectura: el flujo puede estar en silencio indefinidamente
+        if stream.connection.sock is not None:
+            stream.connection.sock.settimeout(None)
+        return stream
+
+    def remove_image(self, image, force=False):
+        return self.request("DELETE", f"/images/{_quote(image)}", {"force": force})[1]
+
+    def prune_images(self, dangling_only=False):
+        """Elimina las imágenes sin usar (todas, como `image prune -a`, salvo `dangling_only`)."""
+        filters = {"dangling": ["true" if dangling_only else "false"]}
+        return self.request("POST", "/images/prune", {"filters": filters}, timeout=self.timeout * 10)[1]
+
+class _StreamResponse:
+    """Respuesta en flujo (exec, logs en vivo, eventos). Cierra su conexión al terminar."""
+
+    def __init__(self, response, connection, unregister=None):
+        self.response = response
+        self.connection = connection
+        self._unregister = unregister or (lambda: None)
+
+    def read(self, size=65536):
+        return self.response.read1(size) if hasattr(self.response, "read1") else self.response.read(size)
+
+    def read_all(self):
+        return self.response.read()
+
+    def iter_json(self):
+        """Objetos JSON de un flujo con uno por línea (eventos). Termina cuando el daemon cierra."""
+        buffer = b""
+        while True:
+            chunk = self.read()
+            if not chunk:
+                return
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+    def interrupt(self):
+        """
+        Despierta desde otro hilo al que está bloqueado leyendo el flujo (su lectura
+        termina con un error y ese hilo lo cierra con close()).
+        """
+        _shutdown(self.connection)
+
+    def close(self):
+        self._unregister()
+        self.response.close()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _shutdown(connection):
+    sock = connection.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+def _quote(value):
+    return urllib.parse.quote(str(value), safe="")
+
+def _is_multiplexed(data):
+    # Cabecera de trama: tipo de flujo (0, 1 o 2), tres bytes a cero y la longitud
+    return len(data) >= 8 and data[0] in (0, 1, 2) and data[1:4] == b"\x00\x00\x00"
+
+def demultiplex(data):
+    """Separa un flujo multiplexado de Docker en (flujo, texto), flujo 1 = stdout y 2 = stderr."""
+    frames = []
+    offset = 0
+    while offset + 8 <= len(data):
+        stream_type, length = struct.unpack(">BxxxL", data[offset:offset + 8])
+        frames.append((stream_type, data[offset + 8:offset + 8 + length].decode("utf-8", "replace")))
+        offset += 8 + length
+    return frames
+
+# --- Estado del daemon (vivo o no) ---
+# Se cachea DOCKER_PING_TTL segundos (DOCKER_PING_FAILURE_TTL si no respondió), y se
+# actualiza con el resultado de cada petición, así que en operaciones seguidas no hace
+# falta comprobarlo antes de cada una.
+
+_daemon_status = {"alive": None, "error": None, "checked_at": 0.0}
+_daemon_status_lock = threading.Lock()
+
+def _set_daemon_status(alive, error):
+    _daemon_status.update(alive=alive, error=error, checked_at=time.monotonic())
+
+def _unavailable(message):
+    _set_daemon_status(False, message)
+    return DockerUnavailable(message)
+
+def _connection_error(message, error=None):
+    """
+    Error de una petición ya enviada. Si fue por cancelar el trabajo o porque la
+    operación superó su tiempo máximo, el daemon sigue contando como vivo.
+    """
+    if jobs.cancel_requested():
+        return DockerCancelled()
+    if isinstance(error, TimeoutError):
+        return DockerTimeout(f"El daemon de Docker no respondió a tiempo: {error}")
+    return _unavailable(message)
+
+def daemon_status(probe=None, max_age=None):
+    """
+    Retorna (vivo, error) del daemon. Si el estado cacheado ha caducado, se
+    comprueba con `probe` (por defecto, /_ping sobre el socket), que retorna
+    (vivo, error). Las comprobaciones concurrentes esperan a una sola.
+    """
+    with _daemon_status_lock:
+        alive = _daemon_status["alive"]
+        if max_age is None:
+            max_age = config.DOCKER_PING_TTL if alive else config.DOCKER_PING_FAILURE_TTL
+        if alive is None or time.monotonic() - _daemon_status["checked_at"] >= max_age:
+            if probe is None:
+                try:
+                    get_client().ping(timeout=config.DOCKER_PING_TIMEOUT)
+                except DockerAPIError as e:
+                    _set_daemon_status(False, e.message)
+            else:
+                _set_daemon_status(*probe())
+        return _daemon_status["alive"], _daemon_status["error"]
+
+def invalidate_daemon_status():
+    """Fuerza una nueva comprobación en la siguiente llamada a daemon_status()."""
+    _daemon_status.update(alive=None, checked_at=0.0)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Cliente compartido (un único pool de conexiones por proceso)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = DockerClient()
+    return _client
+
+def is_enabled():
+    """
+    True si las operaciones de Docker deben ir por la API: hay socket, no se ha
+    desactivado (SYSADMIN_DOCKER_API=0) y los comandos se ejecutan en el sistema
+    real: al grabar o reproducir (por configuración o con use_recording/use_replay)
+    se usa el CLI, porque las grabaciones de utils.command_backend solo contienen comandos.
+    """
+    return (config.DOCKER_USE_API and isinstance(command_backend.get_backend(), command_backend.LiveBackend)
+            and capabilities.get_docker_socket() is not None)
@@ -0,0 +1,231 @@
+import fnmatch
+import http.client
+import threading
+import time
+import config
+from utils import docker_api
+
+# Eventos de /events que cambian el inventario (los exec_*, attach, top... de los
+# healthchecks se ignoran). En health_status la acción lleva el estado: "health_status: healthy".
+CONTAINER_ACTIONS = {"create", "start", "restart", "die", "stop", "kill", "pause", "unpause",
+                     "rename", "update", "destroy", "health_status", "oom"}
+IMAGE_ACTIONS = {"pull", "tag", "untag", "delete", "import", "load"}
+NETWORK_ACTIONS = {"create", "destroy", "remove"}
+VOLUME_ACTIONS = {"create", "destroy"}
+EVENT_FILTERS = {"type": ["container", "image", "network", "volume"]}
+
+def container_name(container):
+    """Primer nombre del contenedor, sin la barra inicial de la API."""
+    names = container.get("Names") or []
+    return names[0].lstrip("/") if names else container.get("Id", "")[:12]
+
+def container_health(container):
+    """Estado del healthcheck ('healthy', 'unhealthy', 'starting') o '' si no tiene."""
+    status = container.get("Status", "")
+    if "(healthy)" in status:
+        return "healthy"
+    if "(unhealthy)" in status:
+        return "unhealthy"
+    if "(health: starting)" in status:
+        return "starting"
+    return ""
+
+def container_matches(container, name=None, state=None, label=None):
+    """Filtro por nombre (subcadena o comodines), estado y etiqueta ("clave" o "clave=valor")."""
+    if state and container.get("State") != state:
+        return False
+    if name:
+        names = [n.lstrip("/") for n in container.get("Names") or []]
+        pattern = name if any(c in name for c in "*?[") else f"*{name}*"
+        if not any(fnmatch.fnmatchcase(n, pattern) for n in names):
+            return False
+    if label:
+        key, _, value = label.partition("=")
+        labels = container.get("Labels") or {}
+        if key not in labels or (value and labels[key] != value):
+            return False
+    return True
+
+class DockerInventory:
+    """
+    Inventario en memoria de contenedores, imágenes, redes y volúmenes. Se llena una
+    vez con el API y después se mantiene al día con el flujo /events (un hilo de
+    fondo): cada evento de un contenedor vuelve a pedir solo ese contenedor. Las
+    consultas se responden desde memoria; `version` cambia con cada modificación,
+    así que las vistas pueden esperar a wait_for_change() en lugar de consultar al daemon.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or docker_api.get_client()
+        self.version = 0
+        self._containers = {}
+        self._images = []
+        self._networks = []
+        self._volumes = []
+        self._live = False
+        self._stream = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self._changed = threading.Condition()
+        self._stats = {"events": 0, "seeds": 0, "last_event": None, "error": None}
+
+    # --- Ciclo de vida ---
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="docker-inventory", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        stream = self._stream
+        if stream is not None:
+            stream.interrupt()
+
+    def is_live(self):
+        """True si el inventario está cargado y suscrito a los eventos del daemon."""
+        return self._live
+
+    def wait_ready(self, timeout):
+        """Espera hasta `timeout` segundos a la primera carga (no si ya falló). Retorna is_live()."""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while not self._live and self._stats["error"] is None and not self._stopped.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+        return self._live
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                # Primero la suscripción y después la carga: los eventos intermedios se
+                # aplican otra vez, lo que es inocuo, y no se pierde ninguno
+                self._stream = self.client.events(filters=EVENT_FILTERS)
+                self._seed()
+                for event in self._stream.iter_json():
+                    self._apply(event)
+                error = "el daemon cerró el flujo de eventos"
+            except (docker_api.DockerAPIError, http.client.HTTPException, OSError, ValueError) as e:
+                error = str(e)
+            finally:
+                if self._stream is not None:
+                    self._stream.close()
+                    self._stream = None
+            # Sin eventos el inventario no es fiable: las consultas vuelven al daemon
+            self._live = False
+            self._stats["error"] = error
+            self._notify()
+            self._stopped.wait(config.DOCKER_INVENTORY_RETRY)
+
+    def _seed(self):
+        containers = {c["Id"]: c for c in self.client.containers(all=True)}
+        images, networks, volumes = self.client.images(), self.client.networks(), self.client.volumes()
+        with self._changed:
+            self._containers, self._images, self._networks, self._volumes = containers, images, networks, volumes
+            self._live = True
+            self._stats["seeds"] += 1
+            self._stats["error"] = None
+        self._notify()
+
+    # --- Eventos ---
+
+    def _apply(self, event):
+        kind = event.get("Type")
+        action = (event.get("Action") or "").split(":")[0]
+        actor_id = (event.get("Actor") or {}).get("ID") or event.get("id")
+        if kind == "container" and action in CONTAINER_ACTIONS:
+            self._refresh_container(actor_id, removed=action == "destroy")
+        elif kind == "image" and action in IMAGE_ACTIONS:
+            self._images = self.client.images()
+        elif kind == "network" and action in NETWORK_ACTIONS:
+            self._networks = self.client.networks()
+        elif kind == "volume" and action in VOLUME_ACTIONS:
+            self._volumes = self.client.volumes()
+        else:
+            return
+        self._stats["events"] += 1
+        self._stats["last_event"] = time.time()
+        self._notify()
+
+    def _refresh_container(self, container_id, removed=False):
+        found = [] if removed else self.client.containers(all=True, filters={"id": [container_id]})
+        with self._changed:
+            if found:
+                self._containers[found[0]["Id"]] = found[0]
+            else:
+                self._containers.pop(container_id, None)
+
+    def _notify(self):
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, seen_version, timeout):
+        """Espera hasta que `version` sea distinta de `seen_version`. Retorna la versión actual."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != seen_version, timeout)
+            return self.version
+
+    # --- Consultas (desde memoria) ---
+
+    def containers(self, all=True, name=None, state=None, label=None):
+        """
+        Contenedores ordenados por nombre. `name` acepta comodines (web-*) o una
+        subcadena; `label` es "clave" o "clave=valor".
+        """
+        with self._changed:
+            containers = list(self._containers.values())
+        return sorted((c for c in containers
+                       if (all or c.get("State") == "running") and container_matches(c, name, state, label)),
+                      key=container_name)
+
+    def get_container(self, container_id_name):
+        """Contenedor por nombre, ID completo o prefijo del ID; None si no existe."""
+        name = container_id_name.lstrip("/")
+        with self._changed:
+            containers = list(self._containers.values())
+        for container in containers:
+            if name in (n.lstrip("/") for n in container.get("Names") or []) or container["Id"] == name:
+                return container
+        prefixed = [c for c in containers if c["Id"].startswith(name)]
+        return prefixed[0] if len(prefixed) == 1 else None
+
+    def images(self):
+        return list(self._images)
+
+    def networks(self):
+        return list(self._networks)
+
+    def volumes(self):
+        return list(self._volumes)
+
+    def stats(self):
+        with self._changed:
+            return dict(self._stats, live=self._live, version=self.version, containers=len(self._containers),
+                        images=len(self._images), networks=len(self._networks), volumes=len(self._volumes))
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+def is_enabled():
+    return config.DOCKER_INVENTORY and docker_api.is_enabled()
+
+def get_inventory(wait=True):
+    """
+    Inventario compartido del proceso (lo arranca la primera llamada). Retorna None
+    si está desactivado, o si no está al día (el daemon no responde, o la primera
+    carga tarda más de DOCKER_INVENTORY_SEED_TIMEOUT): entonces se consulta al daemon.
+    """
+    global _inventory
+    if not is_enabled():
+        return None
+    if _inventory is None:
+        with _inventory_lock:
+            if _inventory is None:
+                _inventory = DockerInventory().start()
+    if _inventory.is_live() or (wait and _inventory.wait_ready(config.DOCKER_INVENTORY_SEED_TIMEOUT)):
+        return _inventory
+    return None
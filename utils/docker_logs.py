@@ -0,0 +1,344 @@
+import collections
+import datetime
+import fnmatch
+import http.client
+import itertools
+import queue
+import re
+import struct
+import subprocess
+import threading
+import time
+import config
+from utils import docker_api
+from utils import docker_inventory
+from utils.system_info import execute_command
+
+LogLine = collections.namedtuple("LogLine", "container stream timestamp text")
+
+_STREAM_NAMES = {0: "stdin", 1: "stdout", 2: "stderr"}
+_RELATIVE_TIME = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd])$")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_time(value):
+    """
+    Convierte un límite de tiempo en segundos Unix: '30s', '10m', '2h', '1d' (hace
+    ese tiempo), 'AAAA-MM-DD[ HH:MM[:SS]]' (hora local) o un timestamp. None si está vacío.
+    Lanza ValueError si el formato no es válido.
+    """
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    match = _RELATIVE_TIME.match(text)
+    if match:
+        return time.time() - float(match.group(1)) * _UNITS[match.group(2)]
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise ValueError(f"tiempo no válido: '{value}' (use 10m, 2h, 1d, AAAA-MM-DD HH:MM o un timestamp)")
+
+def resolve_containers(spec):
+    """
+    Nombres de los contenedores a seguir: lista separada por comas o espacios, con
+    comodines (cliente*). Vacío: todos los contenedores en ejecución. Los nombres sin
+    comodines se mantienen aunque no estén en ejecución (el daemon dirá si existen).
+    """
+    names = [name for name in re.split(r"[,\s]+", spec or "") if name]
+    if names and not any(any(c in name for c in "*?[") for name in names):
+        return names
+    inventory = docker_inventory.get_inventory(wait=False)
+    if inventory is not None:
+        running = [docker_inventory.container_name(c) for c in inventory.containers(all=False)]
+    elif docker_api.is_enabled():
+        running = [docker_inventory.container_name(c) for c in docker_api.get_client().containers(all=False)]
+    else:
+        output, status = execute_command('docker ps --format "{{.Names}}"')
+        running = output.split() if status == 0 else []
+    if not names:
+        return running
+    resolved = []
+    for name in names:
+        matches = fnmatch.filter(running, name) if any(c in name for c in "*?[") else [name]
+        resolved.extend(match for match in matches if match not in resolved)
+    return resolved
+
+def _seconds(timestamp):
+    # El daemon interpreta la parte decimal como nanosegundos sin normalizar: mejor segundos enteros
+    return None if timestamp is None else int(timestamp)
+
+class _LineSplitter:
+    """Corta en líneas los datos de un flujo; las líneas más largas que DOCKER_LOG_MAX_LINE se truncan."""
+
+    def __init__(self):
+        self.partial = b""
+
+    def feed(self, data):
+        *lines, self.partial = (self.partial + data).split(b"\n")
+        if len(self.partial) > config.DOCKER_LOG_MAX_LINE:
+            lines.append(self.partial[:config.DOCKER_LOG_MAX_LINE])
+            self.partial = b""
+        return [line[:config.DOCKER_LOG_MAX_LINE] for line in lines]
+
+    def flush(self):
+        line, self.partial = self.partial, b""
+        return [line] if line else []
+
+class _ContainerStream(threading.Thread):
+    """Lee los logs de un contenedor (Docker Engine API o, sin socket, `docker logs`) y los entrega al multiplexor."""
+
+    def __init__(self, mux, container):
+        super().__init__(name=f"docker-logs-{container}", daemon=True)
+        self.mux = mux
+        self.container = container
+        self.ring = collections.deque(maxlen=mux.ring_size) # Últimas líneas de este contenedor
+        self.error = None
+        self._stream = None
+        self._process = None
+
+    def run(self):
+        try:
+            source = self._api_lines() if self.mux.client is not None or docker_api.is_enabled() else self._cli_lines()
+            for stream_name, raw in source:
+                if not self._emit(stream_name, raw):
+                    break
+        except docker_api.DockerAPIError as e:
+            self.error = e.message
+        except (http.client.HTTPException, OSError, ValueError) as e:
+            if not self.mux.closed:
+                self.error = str(e)
+        finally:
+            self.stop()
+            if self._stream is not None:
+                self._stream.close()
+            self.mux._finished(self)
+
+    def _emit(self, stream_name, raw):
+        text = raw.decode("utf-8", "replace").rstrip("\r")
+        timestamp = ""
+        # Con timestamps, cada línea empieza por la hora RFC 3339 del daemon
+        head, _, rest = text.partition(" ")
+        if len(head) >= 20 and head[4:5] == "-" and head[10:11] == "T":
+            timestamp, text = head, rest
+        if self.mux.pattern is not None and not self.mux.pattern.search(text):
+            return True
+        line = LogLine(self.container, stream_name, timestamp, text)
+        self.ring.append(line)
+        return self.mux._put(line)
+
+    def _api_lines(self):
+        params = {"stdout": True, "stderr": True, "timestamps": True, "follow": self.mux.follow,
+                  "since": _seconds(self.mux.since), "until": _seconds(self.mux.until), "tail": "all" if self.mux.tail is None else self.mux.tail}
+        _, self._stream = (self.mux.client or docker_api.get_client()).request(
+            "GET", f"/containers/{docker_api._quote(self.container)}/logs", params, stream=True)
+        if self._stream.connection.sock is not None:
+            self._stream.connection.sock.settimeout(None) # En modo follow el flujo puede estar en silencio
+        splitters = {1: _LineSplitter(), 2: _LineSplitter()}
+        buffer = b""
+        multiplexed = None
+        while True:
+            chunk = self._stream.read()
+            if not chunk:
+                break
+            buffer += chunk
+            if multiplexed is None:
+                if buffer[0] in (0, 1, 2) and len(buffer) < 8:
+                    continue
+                # Contenedores sin TTY: tramas con cabecera; con TTY: texto tal cual
+                multiplexed = docker_api._is_multiplexed(buffer)
+            if not multiplexed:
+                yield from (("stdout", line) for line in splitters[1].feed(buffer))
+                buffer = b""
+                continue
+            while len(buffer) >= 8:
+                stream_type, length = struct.unpack(">BxxxL", buffer[:8])
+                if len(buffer) < 8 + length:
+                    break
+                payload, buffer = buffer[8:8 + length], buffer[8 + length:]
+                splitter = splitters.get(stream_type, splitters[1])
+                yield from ((_STREAM_NAMES.get(stream_type, "stdout"), line) for line in splitter.feed(payload))
+        for stream_type, splitter in splitters.items():
+            yield from ((_STREAM_NAMES[stream_type], line) for line in splitter.flush())
+
+    def _cli_lines(self):
+        command = ["docker", "logs", "--timestamps"]
+        if self.mux.follow:
+            command.append("--follow")
+        for option, value in (("--since", _seconds(self.mux.since)), ("--until", _seconds(self.mux.until)),
+                              ("--tail", self.mux.tail)):
+            if value is not None:
+                command += [option, str(value)]
+        # stdout y stderr del contenedor llegan mezclados en un solo flujo
+        self._process = subprocess.Popen(command + [self.container], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        splitter = _LineSplitter()
+        while True:
+            chunk = self._process.stdout.read1(65536)
+            if not chunk:
+                break
+            yield from (("stdout", line) for line in splitter.feed(chunk))
+        yield from (("stdout", line) for line in splitter.flush())
+        if self._process.wait() != 0 and not self.mux.closed:
+            raise ValueError(f"docker logs terminó con código {self._process.returncode}")
+
+    def stop(self):
+        """Corta la lectura (desde cualquier hilo)."""
+        if self._stream is not None:
+            self._stream.interrupt()
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+
+_DONE = object()
+
+class LogMultiplexer:
+    """
+    Sigue los logs de varios contenedores a la vez: un hilo lector por contenedor y
+    una cola común acotada (DOCKER_LOG_QUEUE_SIZE) de la que se consumen las líneas
+    con lines() (generador) o drain(). Si el consumidor va más lento, los lectores se
+    bloquean y dejan de leer del socket, así que el daemon también espera: la memoria
+    está acotada por la cola, un anillo de `ring_size` líneas por contenedor y la
+    longitud máxima de línea. Si nadie consume en DOCKER_LOG_IDLE_TIMEOUT segundos
+    (una pestaña de la GUI cerrada), los lectores se cierran solos.
+    """
+
+    def __init__(self, containers, pattern=None, since=None, until=None, follow=True, tail=None, ring_size=None,
+                 client=None):
+        self.client = client # Por defecto, el cliente compartido (o el CLI si no hay socket)
+        self.pattern = re.compile(pattern) if pattern else None
+        self.since = parse_time(since)
+        self.until = parse_time(until)
+        self.follow = follow
+        self.tail = int(tail) if tail not in (None, "") else None
+        self.ring_size = ring_size or config.DOCKER_LOG_RING_LINES
+        self.closed = False
+        self.last_read = time.monotonic()
+        self.history = collections.deque(maxlen=self.ring_size) # Últimas líneas consumidas, de todos los contenedores
+        self._queue = queue.Queue(maxsize=config.DOCKER_LOG_QUEUE_SIZE)
+        self.streams = [_ContainerStream(self, container) for container in dict.fromkeys(containers)]
+        self._pending = len(self.streams)
+        for stream in self.streams:
+            stream.start()
+
+    def _put(self, item):
+        while not self.closed:
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if time.monotonic() - self.last_read > config.DOCKER_LOG_IDLE_TIMEOUT:
+                    self.close()
+        return False
+
+    def _finished(self, stream):
+        # El aviso de fin no debe perderse aunque la cola esté llena
+        while True:
+            try:
+                self._queue.put(_DONE, timeout=0.5)
+                return
+            except queue.Full:
+                if self.closed:
+                    return
+
+    @property
+    def finished(self):
+        """True cuando todos los lectores han terminado y no quedan líneas por consumir."""
+        return self._pending == 0 and self._queue.empty()
+
+    def _take(self, item):
+        self.last_read = time.monotonic()
+        if item is _DONE:
+            self._pending -= 1
+            return None
+        self.history.append(item)
+        return item
+
+    def lines(self):
+        """Generador de LogLine por orden de llegada. Termina cuando acaban todos los flujos o al cerrarse."""
+        try:
+            while not self.closed and self._pending > 0:
+                try:
+                    item = self._take(self._queue.get(timeout=0.5))
+                except queue.Empty:
+                    self.last_read = time.monotonic()
+                    continue
+                if item is not None:
+                    yield item
+        finally:
+            self.close()
+
+    def drain(self, max_lines=None):
+        """Las líneas disponibles ahora mismo (sin esperar), como mucho `max_lines`."""
+        lines = []
+        self.last_read = time.monotonic()
+        while max_lines is None or len(lines) < max_lines:
+            try:
+                item = self._take(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if item is not None:
+                lines.append(item)
+        return lines
+
+    def errors(self):
+        """{contenedor: error} de los flujos que no pudieron leerse."""
+        return {stream.container: stream.error for stream in self.streams if stream.error}
+
+    def close(self):
+        self.closed = True
+        for stream in self.streams:
+            stream.stop()
+
+def stream_logs(containers, pattern=None, since=None, until=None, follow=True, tail=None):
+    """Generador de LogLine de varios contenedores (ver LogMultiplexer); al cerrarlo se cierran las conexiones."""
+    yield from LogMultiplexer(containers, pattern, since, until, follow, tail).lines()
+
+def format_line(line, width=0):
+    """'[contenedor] hora texto', con el nombre alineado a `width` caracteres."""
+    timestamp = line.timestamp[11:23] if line.timestamp else ""
+    prefix = f"[{line.container}]".ljust(width + 2)
+    marker = " !" if line.stream == "stderr" else ""
+    return f"{prefix}{marker} {timestamp} {line.text}".rstrip()
+
+# Multiplexores abiertos desde la GUI (una sesión de navegador guarda solo el id)
+_multiplexers = {}
+_multiplexers_lock = threading.Lock()
+_multiplexer_ids = itertools.count(1)
+
+def open_multiplexer(containers, **options):
+    mux = LogMultiplexer(containers, **options)
+    mux_id = next(_multiplexer_ids)
+    with _multiplexers_lock:
+        stale = _prune_multiplexers()
+        _multiplexers[mux_id] = mux
+    for old in stale:
+        old.close()
+    return mux_id, mux
+
+def get_multiplexer(mux_id):
+    with _multiplexers_lock:
+        stale = _prune_multiplexers()
+        mux = _multiplexers.get(int(mux_id)) if mux_id else None
+    for old in stale:
+        old.close()
+    return mux
+
+def _prune_multiplexers():
+    """
+    Quita del registro (con el cerrojo tomado) los multiplexores ya cerrados y los que
+    nadie consume desde hace DOCKER_LOG_IDLE_TIMEOUT segundos, junto con su historial.
+    Retorna los quitados para cerrarlos fuera del cerrojo.
+    """
+    now = time.monotonic()
+    stale = [mux_id for mux_id, mux in _multiplexers.items()
+             if mux.closed or now - mux.last_read > config.DOCKER_LOG_IDLE_TIMEOUT]
+    return [_multiplexers.pop(mux_id) for mux_id in stale]
+
+def close_multiplexer(mux_id):
+    with _multiplexers_lock:
+        mux = _multiplexers.pop(int(mux_id), None) if mux_id else None
+    if mux is not None:
+        mux.close()
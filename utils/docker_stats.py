@@ -0,0 +1,340 @@
+import concurrent.futures
+import contextvars
+import http.client
+import os
+import threading
+import time
+import config
+from utils import docker_api
+from utils import docker_inventory
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+SORT_KEYS = {
+    "cpu": lambda row: row["cpu_percent"],
+    "mem": lambda row: row["mem"],
+    "net": lambda row: row["net_rx_rate"] + row["net_tx_rate"],
+    "io": lambda row: row["blk_read_rate"] + row["blk_write_rate"],
+    "name": lambda row: row["name"],
+}
+
+def format_size(value):
+    """Bytes en unidades binarias (1.5M, 320.0K...)."""
+    for unit in ("B", "K", "M", "G", "T"):
+        if abs(value) < 1024 or unit == "T":
+            return f"{value:.1f}{unit}" if unit != "B" else f"{int(value)}B"
+        value /= 1024
+
+def _host_memory():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+class _Counters:
+    """Contadores acumulados de un contenedor en un instante (las tasas salen de dos muestras)."""
+
+    __slots__ = ("at", "cpu_usec", "mem", "mem_limit", "net_rx", "net_tx", "blk_read", "blk_write", "pids")
+
+    def __init__(self, at, cpu_usec=0, mem=0, mem_limit=0, net_rx=0, net_tx=0, blk_read=0, blk_write=0, pids=0):
+        self.at = at
+        self.cpu_usec = cpu_usec
+        self.mem = mem
+        self.mem_limit = mem_limit
+        self.net_rx = net_rx
+        self.net_tx = net_tx
+        self.blk_read = blk_read
+        self.blk_write = blk_write
+        self.pids = pids
+
+class _CgroupReader:
+    """
+    Lee los contadores directamente de los archivos de cgroup v2 del contenedor y
+    los de red de /proc/<pid>/net/dev (el espacio de red del contenedor): unas pocas
+    lecturas de archivos pequeños por muestra, sin peticiones al daemon.
+    """
+
+    source = "cgroup"
+
+    def __init__(self, path, pid):
+        self.path = path
+        self.pid = pid
+
+    @classmethod
+    def open(cls, container_id, pid):
+        """Retorna el lector si el cgroup del proceso `pid` es el del contenedor y es legible; si no, None."""
+        if not pid or not os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+            return None
+        try:
+            with open(f"/proc/{pid}/cgroup") as f:
+                relative = next((line.strip()[3:] for line in f if line.startswith("0::")), None)
+        except OSError:
+            return None
+        # Si este programa corre en otro espacio de PIDs, el pid no es el del contenedor
+        if not relative or container_id not in relative:
+            return None
+        path = os.path.join(CGROUP_ROOT, relative.lstrip("/"))
+        return cls(path, pid) if os.access(os.path.join(path, "cpu.stat"), os.R_OK) else None
+
+    def _read(self, name):
+        with open(os.path.join(self.path, name)) as f:
+            return f.read()
+
+    def sample(self):
+        cpu_usec = 0
+        for line in self._read("cpu.stat").splitlines():
+            if line.startswith("usage_usec "):
+                cpu_usec = int(line.split()[1])
+                break
+        memory = self._read("memory.current").strip()
+        memory = int(memory) if memory.isdigit() else 0
+        # Como `docker stats` (y el flujo del API): la caché de páginas inactivas no cuenta como memoria usada
+        for line in self._read("memory.stat").splitlines():
+            if line.startswith("inactive_file "):
+                memory = max(0, memory - int(line.split()[1]))
+                break
+        limit = self._read("memory.max").strip()
+        blk_read = blk_write = 0
+        for line in self._read("io.stat").splitlines():
+            for field in line.split()[1:]:
+                key, _, value = field.partition("=")
+                if key == "rbytes":
+                    blk_read += int(value)
+                elif key == "wbytes":
+                    blk_write += int(value)
+        net_rx = net_tx = 0
+        with open(f"/proc/{self.pid}/net/dev") as f:
+            for line in f.readlines()[2:]:
+                interface, _, values = line.partition(":")
+                if interface.strip() != "lo":
+                    fields = values.split()
+                    net_rx += int(fields[0])
+                    net_tx += int(fields[8])
+        try:
+            pids = int(self._read("pids.current"))
+        except (OSError, ValueError):
+            pids = 0
+        return _Counters(time.monotonic(), cpu_usec, memory,
+                         int(limit) if limit.isdigit() else 0, net_rx, net_tx, blk_read, blk_write, pids)
+
+    def close(self):
+        pass
+
+class _ApiStreamReader:
+    """
+    Conexión en flujo a /containers/<id>/stats (el daemon envía una muestra por
+    segundo) leída por un hilo propio; sample() retorna la última recibida. Se
+    cierra sola si nadie pide muestras en DOCKER_STATS_IDLE_TIMEOUT segundos.
+    """
+
+    source = "api"
+
+    def __init__(self, client, container_id, engine):
+        self.client = client
+        self.container_id = container_id
+        self.engine = engine
+        self.previous = None
+        self.latest = None
+        self.closed = False
+        self._stream = None
+        threading.Thread(target=self._run, name=f"docker-stats-{container_id[:12]}", daemon=True).start()
+
+    def _run(self):
+        try:
+            _, self._stream = self.client.request("GET", f"/containers/{self.container_id}/stats",
+                                                  {"stream": True}, stream=True)
+            if self._stream.connection.sock is not None:
+                self._stream.connection.sock.settimeout(None)
+            for stats in self._stream.iter_json():
+                self.previous, self.latest = self.latest, self._counters(stats)
+                if self.closed or time.monotonic() - self.engine.last_used > config.DOCKER_STATS_IDLE_TIMEOUT:
+                    break
+        except (docker_api.DockerAPIError, http.client.HTTPException, OSError, ValueError):
+            pass
+        finally:
+            self.closed = True
+            if self._stream is not None:
+                self._stream.close()
+
+    @staticmethod
+    def _counters(stats):
+        memory = stats.get("memory_stats") or {}
+        # Como `docker stats`: la caché de páginas inactivas no cuenta como memoria usada
+        details = memory.get("stats") or {}
+        used = (memory.get("usage") or 0) - details.get("inactive_file", details.get("total_inactive_file", 0))
+        networks = (stats.get("networks") or {}).values()
+        blk_read = blk_write = 0
+        for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+            operation = entry.get("op", "").lower()
+            if operation == "read":
+                blk_read += entry.get("value", 0)
+            elif operation == "write":
+                blk_write += entry.get("value", 0)
+        return _Counters(time.monotonic(),
+                         ((stats.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage", 0) // 1000,
+                         max(0, used), memory.get("limit") or 0,
+                         sum(n.get("rx_bytes", 0) for n in networks), sum(n.get("tx_bytes", 0) for n in networks),
+                         blk_read, blk_write, (stats.get("pids_stats") or {}).get("current") or 0)
+
+    def sample(self):
+        return self.latest
+
+    def close(self):
+        self.closed = True
+        stream = self._stream
+        if stream is not None:
+            stream.interrupt()
+
+class StatsEngine:
+    """
+    Uso de recursos de todos los contenedores en ejecución. Por contenedor se usa
+    cgroup v2 (lectura directa de archivos) si es accesible desde aquí y, si no, una
+    conexión en flujo al endpoint de estadísticas del API; todas se leen a la vez.
+    Las tasas (CPU, red, disco) salen de la diferencia entre las dos últimas muestras
+    de cada contenedor, así que cada tick cuesta una lectura por contenedor.
+    """
+
+    def __init__(self, client=None, source=None):
+        self.client = client or docker_api.get_client()
+        self.source = source or config.DOCKER_STATS_SOURCE
+        self.last_used = time.monotonic()
+        self._readers = {}
+        self._samples = {} # id -> (anterior, actual)
+        self._host_memory = _host_memory()
+        self._lock = threading.Lock()
+
+    def _running_containers(self):
+        inventory = docker_inventory.get_inventory(wait=False)
+        if inventory is not None:
+            return inventory.containers(all=False)
+        return self.client.containers(all=False)
+
+    def _open_reader(self, container):
+        if self.source in ("auto", "cgroup"):
+            try:
+                pid = self.client.inspect_container(container["Id"])["State"].get("Pid")
+            except docker_api.DockerAPIError:
+                pid = None
+            reader = _CgroupReader.open(container["Id"], pid)
+            if reader is not None or self.source == "cgroup":
+                return reader
+        return _ApiStreamReader(self.client, container["Id"], self)
+
+    def sample(self):
+        """
+        Toma una muestra de todos los contenedores en ejecución y retorna sus filas
+        (dicts con cpu_percent, mem, mem_limit, mem_percent, tasas de red y disco en
+        bytes/s y pids). Las tasas son 0 hasta la segunda muestra de cada contenedor.
+        """
+        self.last_used = time.monotonic()
+        containers = {c["Id"]: c for c in self._running_containers()}
+        with self._lock:
+            missing = [container for container_id, container in containers.items()
+                       if container_id not in self._readers
+                       or getattr(self._readers[container_id], "closed", False)]
+        # Los lectores nuevos (un inspect por contenedor) se abren a la vez y fuera del cerrojo,
+        # para que un arranque con muchos contenedores no bloquee las demás consultas
+        opened = self._open_readers(missing)
+
+        with self._lock:
+            for container_id, reader in opened.items():
+                current_reader = self._readers.get(container_id)
+                if container_id in self._readers and not getattr(current_reader, "closed", False):
+                    # Otra consulta simultánea ya lo abrió: se conserva el suyo
+                    if reader is not None:
+                        reader.close()
+                    continue
+                self._readers[container_id] = reader
+            for container_id in set(self._readers) - set(containers):
+                reader = self._readers.pop(container_id)
+                if reader is not None:
+                    reader.close()
+                self._samples.pop(container_id, None)
+            rows = []
+            for container_id, container in containers.items():
+                if container_id not in self._readers:
+                    continue # Lo abrió y descartó (paró) otra consulta simultánea: se abrirá en la próxima
+                reader = self._readers[container_id]
+                if reader is None:
+                    continue # Con DOCKER_STATS_SOURCE='cgroup', contenedor sin cgroup accesible
+                try:
+                    current = reader.sample()
+                except (OSError, ValueError):
+                    # El contenedor acaba de parar (su cgroup ya no existe)
+                    self._readers.pop(container_id, None)
+                    continue
+                if current is None:
+                    continue # El flujo del API aún no ha enviado la primera muestra
+                previous, last = self._samples.get(container_id, (None, None))
+                if last is None or current.at > last.at:
+                    # Los flujos del API traen su muestra anterior (tasas del último segundo)
+                    previous, last = getattr(reader, "previous", None) or last, current
+                    self._samples[container_id] = (previous, last)
+                rows.append(self._row(container, previous, last, reader.source))
+            return rows
+
+    def _open_readers(self, containers):
+        """Abre en paralelo (DOCKER_BULK_PARALLELISM a la vez) los lectores de `containers`. Retorna {id: lector}."""
+        if not containers:
+            return {}
+        if len(containers) == 1:
+            return {containers[0]["Id"]: self._open_reader(containers[0])}
+        workers = min(len(containers), max(1, config.DOCKER_BULK_PARALLELISM))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docker-stats-open") as pool:
+            readers = pool.map(lambda container: contextvars.copy_context().run(self._open_reader, container),
+                               containers)
+            return {container["Id"]: reader for container, reader in zip(containers, readers)}
+
+    def _row(self, container, previous, current, source):
+        limit = current.mem_limit if 0 < current.mem_limit < (1 << 62) else self._host_memory
+        row = {"id": container["Id"][:12], "name": docker_inventory.container_name(container), "source": source,
+               "ready": previous is not None, # False: aún no hay dos muestras y las tasas son 0
+               "cpu_percent": 0.0, "mem": current.mem, "mem_limit": limit,
+               "mem_percent": 100.0 * current.mem / limit if limit else 0.0,
+               "net_rx_rate": 0.0, "net_tx_rate": 0.0, "blk_read_rate": 0.0, "blk_write_rate": 0.0,
+               "pids": current.pids}
+        elapsed = current.at - previous.at if previous is not None else 0
+        if elapsed > 0:
+            # 100% = un núcleo completo, como en `docker stats`
+            row["cpu_percent"] = max(0.0, (current.cpu_usec - previous.cpu_usec) / 1e6 / elapsed * 100)
+            for key, counter in (("net_rx_rate", "net_rx"), ("net_tx_rate", "net_tx"),
+                                 ("blk_read_rate", "blk_read"), ("blk_write_rate", "blk_write")):
+                row[key] = max(0.0, (getattr(current, counter) - getattr(previous, counter)) / elapsed)
+        return row
+
+    def top(self, sort_by="cpu", limit=None):
+        """Filas de sample() ordenadas por `sort_by` (SORT_KEYS), de mayor a menor salvo por nombre."""
+        rows = sorted(self.sample(), key=SORT_KEYS.get(sort_by, SORT_KEYS["cpu"]), reverse=sort_by != "name")
+        return rows[:limit] if limit else rows
+
+    def close(self):
+        with self._lock:
+            for reader in self._readers.values():
+                if reader is not None:
+                    reader.close()
+            self._readers.clear()
+            self._samples.clear()
+
+STATS_COLUMNS = ["CONTAINER ID", "NAME", "CPU %", "MEM", "MEM %", "NET RX/s", "NET TX/s", "BLOCK R/s", "BLOCK W/s", "PIDS"]
+
+def format_row(row):
+    """Fila de la tabla 'top' de contenedores (STATS_COLUMNS)."""
+    return [row["id"], row["name"], f"{row['cpu_percent']:.1f}",
+            f"{format_size(row['mem'])} / {format_size(row['mem_limit'])}", f"{row['mem_percent']:.1f}",
+            format_size(row["net_rx_rate"]), format_size(row["net_tx_rate"]),
+            format_size(row["blk_read_rate"]), format_size(row["blk_write_rate"]), str(row["pids"])]
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_stats_engine():
+    """Motor compartido: las muestras anteriores se conservan entre llamadas (CLI, GUI, API)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = StatsEngine()
+    return _engine
@@ -0,0 +1,324 @@
+import codecs
+import collections
+import contextvars
+import datetime
+import itertools
+import os
+import signal
+import subprocess
+import threading
+import time
+import config
+from utils import display
+from utils import output_capture
+from utils import command_backend
+from utils import result as result_utils
+
+PENDING = "pendiente"
+RUNNING = "en ejecución"
+COMPLETED = "completado"
+FAILED = "fallido"
+CANCELLED = "cancelado"
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Límite de caracteres de salida de comandos que se conserva por trabajo (se descarta lo más antiguo)
+MAX_PROGRESS_CHARS = 256 * 1024
+
+# Trabajo en curso en este contexto (lo heredan los hilos lanzados con contextvars.copy_context())
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+class Job:
+    """
+    Acción de un módulo ejecutada en segundo plano. La salida de print_* y de
+    los comandos que lanza se puede consultar mientras se ejecuta; al cancelarla
+    se mata el grupo de procesos de los comandos en curso y se avisa a lo registrado
+    con on_cancel() (conexiones con el daemon de Docker, flujos de logs...); los bucles
+    largos de las funciones consultan cancel_requested() para terminar antes.
+    """
+
+    def __init__(self, job_id, name, category, func, args, inputs):
+        self.id = job_id
+        self.name = name
+        self.category = category
+        self.func = func
+        self.args = args
+        self.inputs = inputs
+        self.status = PENDING
+        self.created_at = datetime.datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None # utils.result.CommandResult con los mensajes y la tabla de la acción
+        self.error = None
+        self.context = None # display.GuiRequestContext del trabajo (cola de entradas y stdout)
+        self._progress = collections.deque()
+        self._progress_chars = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._processes = set()
+        self._cancel_callbacks = {}
+        self._callback_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def duration(self):
+        if self.started_at is None:
+            return None
+        end = self.finished_at or datetime.datetime.now()
+        return (end - self.started_at).total_seconds()
+
+    def progress(self):
+        """Salida de los comandos del trabajo recibida hasta ahora (como mucho MAX_PROGRESS_CHARS)."""
+        with self._lock:
+            return "".join(self._progress)
+
+    def messages(self):
+        """Mensajes de print_* emitidos hasta ahora (Markdown)."""
+        return self.result.render_markdown() if self.result is not None else ""
+
+    def console_output(self):
+        """print() directos del trabajo hasta ahora."""
+        return self.context.stdout.getvalue() if self.context is not None else ""
+
+    def _on_output(self, chunk):
+        text = self._decoder.decode(bytes(chunk)).replace("\r\n", "\n")
+        if not text:
+            return
+        with self._lock:
+            self._progress.append(text)
+            self._progress_chars += len(text)
+            while self._progress_chars > MAX_PROGRESS_CHARS and len(self._progress) > 1:
+                self._progress_chars -= len(self._progress.popleft())
+
+    def _on_process(self, process, started):
+        with self._lock:
+            if started:
+                self._processes.add(process)
+            else:
+                self._processes.discard(process)
+        if started and self.cancel_requested:
+            _kill_process_group(process)
+
+    def on_cancel(self, callback):
+        """
+        Registra `callback` para cuando se cancele el trabajo (si ya se canceló, se llama
+        ahora). Retorna la función que lo retira.
+        """
+        with self._lock:
+            callback_id = next(self._callback_ids)
+            self._cancel_callbacks[callback_id] = callback
+        if self.cancel_requested:
+            _call_quietly(callback)
+        return lambda: self._cancel_callbacks.pop(callback_id, None)
+
+    def run(self):
+        """
+        Ejecuta la acción en el hilo actual, con su propio contexto de salida y
+        entradas, recogiendo los procesos que lanza para poder cancelarlos. Si ya
+        se pidió cancelarla antes de empezar, termina como cancelada sin ejecutarla.
+        """
+        if self.cancel_requested:
+            self.status = CANCELLED
+            self.finished_at = datetime.datetime.now()
+            return
+        self.status = RUNNING
+        self.started_at = datetime.datetime.now()
+        try:
+            with display.gui_request_context(self.inputs) as context, \
+                    result_utils.collecting(result_utils.CommandResult(self.name)) as result:
+                self.context = context
+                self.result = result
+                listener_token = output_capture.set_chunk_listener(self._on_output)
+                hook_token = command_backend.set_process_hook(self._on_process)
+                job_token = _current_job.set(self)
+                try:
+                    result.value = self.func(*self.args)
+                    self.status = CANCELLED if self.cancel_requested else COMPLETED
+                except Exception as e:
+                    self.error = str(e)
+                    self.status = CANCELLED if self.cancel_requested else FAILED
+                finally:
+                    _current_job.reset(job_token)
+                    command_backend.reset_process_hook(hook_token)
+                    output_capture.reset_chunk_listener(listener_token)
+        finally:
+            self.finished_at = datetime.datetime.now()
+
+    def cancel(self):
+        """Solicita la cancelación, mata los procesos hijos en curso y avisa a lo registrado con on_cancel()."""
+        self._cancel.set()
+        with self._lock:
+            processes = list(self._processes)
+            callbacks = list(self._cancel_callbacks.values())
+        for process in processes:
+            _kill_process_group(process)
+        for callback in callbacks:
+            _call_quietly(callback)
+
+def _call_quietly(callback):
+    try:
+        callback()
+    except Exception:
+        pass # Cerrar algo que ya estaba cerrado no debe impedir cancelar el resto
+
+def current_job():
+    """Trabajo que se está ejecutando en este contexto, o None."""
+    return _current_job.get()
+
+def cancel_requested():
+    """True si se ha pedido cancelar el trabajo en curso (False fuera de un trabajo)."""
+    job = _current_job.get()
+    return job is not None and job.cancel_requested
+
+def on_cancel(callback):
+    """
+    Registra `callback` en el trabajo en curso (ver Job.on_cancel). Retorna la función
+    que lo retira; fuera de un trabajo no registra nada.
+    """
+    job = _current_job.get()
+    return job.on_cancel(callback) if job is not None else (lambda: None)
+
+def _kill_process_group(process, grace=3.0):
+    """Termina el grupo de procesos del hijo (SIGTERM y, si no basta, SIGKILL)."""
+    if process.poll() is not None:
+        return
+    if os.name == 'nt':
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+
+    def escalate():
+        try:
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+    threading.Thread(target=escalate, daemon=True).start()
+
+class JobManager:
+    """
+    Ejecuta trabajos en hilos propios. Cada categoría tiene un límite de trabajos
+    simultáneos (config.JOB_CATEGORY_LIMITS); los que exceden el límite esperan
+    en estado pendiente.
+    """
+
+    def __init__(self, category_limits=None, default_limit=None, history=None):
+        self.category_limits = dict(category_limits if category_limits is not None else config.JOB_CATEGORY_LIMITS)
+        self.default_limit = default_limit or config.JOB_DEFAULT_LIMIT
+        self.history = history or config.JOB_HISTORY
+        self._jobs = collections.OrderedDict()
+        self._semaphores = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _semaphore(self, category):
+        with self._lock:
+            semaphore = self._semaphores.get(category)
+            if semaphore is None:
+                limit = self.category_limits.get(category, self.default_limit)
+                semaphore = self._semaphores[category] = threading.Semaphore(limit)
+            return semaphore
+
+    def submit(self, name, category, func, *args, inputs=None):
+        """
+        Lanza `func(*args)` como trabajo de la categoría `category`. `inputs` son las
+        respuestas para get_user_input (por defecto, los propios argumentos, como en la GUI).
+        Retorna el Job creado.
+        """
+        job = Job(next(self._ids), name, category, func, args, list(inputs if inputs is not None else args))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        threading.Thread(target=self._run, args=(job,), name=f"job-{job.id}", daemon=True).start()
+        return job
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        semaphore = self._semaphore(job.category)
+        while not semaphore.acquire(timeout=0.5):
+            if job.cancel_requested:
+                job.status = CANCELLED
+                job.finished_at = datetime.datetime.now()
+                return
+        try:
+            if job.cancel_requested:
+                job.status = CANCELLED
+                job.finished_at = datetime.datetime.now()
+                return
+            job.run()
+        finally:
+            semaphore.release()
+
+    def get(self, job_id):
+        with self._lock:
+            try:
+                return self._jobs.get(int(job_id))
+            except (TypeError, ValueError):
+                return None
+
+    def list(self):
+        """Trabajos del más reciente al más antiguo."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return False
+        job.cancel()
+        return True
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager()
+    return _manager
+
+def submit_job(name, category, func, *args, inputs=None):
+    """Atajo: lanza un trabajo en el gestor global y retorna el Job."""
+    return get_job_manager().submit(name, category, func, *args, inputs=inputs)
+
+def format_jobs_table(jobs, markdown=True):
+    """Tabla de trabajos (id, nombre, categoría, estado, inicio, duración)."""
+    if not jobs:
+        return "No hay trabajos."
+    rows = []
+    for job in jobs:
+        duration = job.duration()
+        rows.append([str(job.id), job.name, job.category, job.status,
+                     job.created_at.strftime("%H:%M:%S"),
+                     f"{duration:.1f}" if duration is not None else ""])
+    headers = ["Id", "Trabajo", "Categoría", "Estado", "Creado", "Duración (s)"]
+    if markdown:
+        lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+        lines += ["| " + " | ".join(row) + " |" for row in rows]
+        return "\n".join(lines)
+    widths = [max(len(headers[i]), *(len(row[i]) for row in rows)) for i in range(len(headers))]
+    line_format = "  ".join(f"{{:<{width}}}" for width in widths)
+    return "\n".join([line_format.format(*headers)] + [line_format.format(*row) for row in rows])
+
+def wait_for(job, timeout=None):
+    """Espera a que termine un trabajo (útil en la CLI). Retorna True si terminó."""
+    deadline = time.monotonic() + timeout if timeout else None
+    while job.status not in FINISHED_STATES:
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+    return True
@@ -0,0 +1,46 @@
+import importlib
+import threading
+
+class LazyModule:
+    """
+    Proxy de un módulo que solo se importa al acceder por primera vez a uno de
+    sus atributos (por ejemplo, al elegir su opción en el menú). Al cargarse,
+    las funciones públicas del módulo se instrumentan con utils.metrics.
+    """
+
+    def __init__(self, name, instrument=True):
+        self.__dict__["_name"] = name
+        self.__dict__["_instrument"] = instrument
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    if self.__dict__["_instrument"]:
+                        from utils import metrics
+                        metrics.instrument_module(module)
+                    self.__dict__["_module"] = module
+        return module
+
+    @property
+    def is_loaded(self):
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "cargado" if self.is_loaded else "sin cargar"
+        return f"<LazyModule {self.__dict__['_name']} ({state})>"
+
+def lazy_module(name, instrument=True):
+    """Retorna un LazyModule para `name` (ruta de importación completa)."""
+    return LazyModule(name, instrument)
@@ -0,0 +1,481 @@
+import datetime
+import gzip
+import json
+import os
+import re
+import threading
+from utils import logger
+
+# Versión del formato de índice; incrementarla obliga a reconstruir los índices existentes
+_INDEX_VERSION = 1
+_INDEX_SUFFIX = ".idx.json"
+# Tamaño (sin comprimir) de cada bloque gzip independiente de un segmento comprimido
+BLOCK_SIZE = 256 * 1024
+
+# Inicio de un registro en formato texto: [AAAA-MM-DD HH:MM:SS] [módulo] [acción] detalles
+_TEXT_RECORD_RE = re.compile(rb"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] \[(.*?)\] \[(.*?)\] ")
+
+_index_cache = {}
+_index_lock = threading.Lock()
+_build_lock = threading.Lock() # Serializa la construcción/extensión de índices
+
+def index_path(path):
+    return path + _INDEX_SUFFIX
+
+def _starts_record(line, file_format):
+    """En JSON cada línea es un registro; en texto los detalles pueden ocupar varias líneas."""
+    return file_format == "json" or _TEXT_RECORD_RE.match(line) is not None
+
+def _parse_meta(line, file_format):
+    """Extrae (ts, módulo, acción) de la primera línea de un registro, o None si no inicia uno."""
+    if file_format == "json":
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        return record.get("ts", ""), str(record.get("module", "")), str(record.get("action", ""))
+    match = _TEXT_RECORD_RE.match(line)
+    if not match:
+        return None
+    ts, module, action = (group.decode("utf-8", errors="replace") for group in match.groups())
+    return ts.replace(" ", "T"), module, action
+
+def _parse_record(data, file_format):
+    """Convierte los bytes de un registro en un dict con los campos del log."""
+    text = data.decode("utf-8", errors="replace")
+    if file_format == "json":
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+    match = _TEXT_RECORD_RE.match(data)
+    if not match:
+        return None
+    ts, module, action = (group.decode("utf-8", errors="replace") for group in match.groups())
+    details = data[match.end():].decode("utf-8", errors="replace").rstrip("\n")
+    return {"ts": ts.replace(" ", "T"), "module": module, "action": action, "target": None,
+            "details": details, "duration": None, "status": None, "user": None}
+
+class _IndexBuilder:
+    """
+    Construye el índice de un archivo de log a partir de sus líneas:
+    registros (ts, bloque, desplazamiento, longitud), rango temporal y
+    listas de registros por módulo y por acción. Al extender un índice
+    existente, `delta()` retorna solo lo añadido (ver _append_index).
+    """
+
+    def __init__(self, file_format, index=None):
+        self.file_format = file_format
+        self.index = index or {
+            "version": _INDEX_VERSION, "format": file_format, "size": 0,
+            "blocks": None, "ts_min": None, "ts_max": None,
+            "records": [], "modules": {}, "actions": {},
+        }
+        self.first_record = len(self.index["records"])
+        self.resized = None # Registro ya indexado que creció con líneas de continuación
+        self.new_modules = {}
+        self.new_actions = {}
+        self.new_ts_min = None
+        self.new_ts_max = None
+
+    def add_line(self, line, block, offset):
+        meta = _parse_meta(line, self.file_format)
+        records = self.index["records"]
+        if meta is None:
+            # Continuación de un registro de texto multilínea
+            if records and records[-1][1] == block:
+                records[-1][3] += len(line)
+                if len(records) - 1 < self.first_record:
+                    self.resized = len(records) - 1
+            return
+        ts, module, action = meta
+        record_id = len(records)
+        records.append([ts, block, offset, len(line)])
+        for lists, new_lists, key in ((self.index["modules"], self.new_modules, module),
+                                      (self.index["actions"], self.new_actions, action)):
+            lists.setdefault(key, []).append(record_id)
+            new_lists.setdefault(key, []).append(record_id)
+        if ts:
+            if self.index["ts_min"] is None or ts < self.index["ts_min"]:
+                self.index["ts_min"] = ts
+            if self.index["ts_max"] is None or ts > self.index["ts_max"]:
+                self.index["ts_max"] = ts
+            if self.new_ts_min is None or ts < self.new_ts_min:
+                self.new_ts_min = ts
+            if self.new_ts_max is None or ts > self.new_ts_max:
+                self.new_ts_max = ts
+
+    def delta(self):
+        """Lo añadido desde que se creó el constructor, como una línea del diario del índice."""
+        records = self.index["records"]
+        return {
+            "size": self.index["size"], "first": self.first_record, "records": records[self.first_record:],
+            "resize": [self.resized, records[self.resized][3]] if self.resized is not None else None,
+            "modules": self.new_modules, "actions": self.new_actions,
+            "ts_min": self.new_ts_min, "ts_max": self.new_ts_max,
+        }
+
+def _file_format(path):
+    return "json" if ".jsonl" in os.path.basename(path) else "text"
+
+def _index_plain(path, index=None):
+    """
+    Indexa (o extiende incrementalmente) un archivo sin comprimir desde el tamaño ya
+    indexado. Retorna el constructor: su `index` completo y su `delta()`.
+    """
+    builder = _IndexBuilder(_file_format(path), index)
+    with open(path, "rb") as f:
+        f.seek(builder.index["size"])
+        offset = builder.index["size"]
+        for line in f:
+            if not line.endswith(b"\n"):
+                break # Registro a medio escribir: se indexará en la próxima consulta
+            builder.add_line(line, 0, offset)
+            offset += len(line)
+    builder.index["size"] = offset
+    builder.index["inode"] = os.stat(path).st_ino
+    return builder
+
+def _index_gzip(path):
+    """
+    Indexa un archivo comprimido. Solo se conoce el inicio del archivo como punto
+    de acceso (bloque único): los segmentos comprimidos por compress_segment traen
+    su propio índice con un punto de acceso por bloque.
+    """
+    builder = _IndexBuilder(_file_format(path))
+    with gzip.open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            builder.add_line(line, 0, offset)
+            offset += len(line)
+    builder.index["blocks"] = [0]
+    builder.index["size"] = os.path.getsize(path)
+    return builder.index
+
+def compress_segment(path):
+    """
+    Comprime un segmento cerrado como una serie de miembros gzip independientes
+    de BLOCK_SIZE bytes y escribe su índice, de modo que cualquier registro se
+    puede leer descomprimiendo solo su bloque. Retorna la ruta del .gz.
+    """
+    target = path + ".gz"
+    tmp_path = target + ".tmp"
+    builder = _IndexBuilder(_file_format(path))
+    blocks = []
+    try:
+        with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+            buffer = bytearray()
+
+            def flush_block():
+                blocks.append(dst.tell())
+                dst.write(gzip.compress(bytes(buffer), mtime=0))
+                buffer.clear()
+
+            for line in src:
+                # Los bloques solo se cortan al inicio de un registro
+                if len(buffer) + len(line) > BLOCK_SIZE and buffer and _starts_record(line, builder.file_format):
+                    flush_block()
+                builder.add_line(line, len(blocks), len(buffer))
+                buffer.extend(line)
+            if buffer or not blocks:
+                flush_block()
+        builder.index["blocks"] = blocks
+        builder.index["size"] = os.path.getsize(tmp_path)
+        os.replace(tmp_path, target)
+        _save_index(target, builder.index)
+        os.remove(path)
+        _remove_index(path)
+    except OSError:
+        for leftover in (tmp_path, index_path(target)):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+        raise
+    return target
+
+def _save_index(path, index):
+    """Escribe el índice completo de un segmento comprimido (no cambia una vez escrito)."""
+    tmp_path = index_path(path) + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_path, index_path(path))
+    except OSError:
+        pass # Sin índice en disco se reconstruye en la siguiente consulta
+
+def _save_journal(path, index):
+    """
+    Escribe el índice del archivo activo como diario: una cabecera y una línea por
+    cada extensión. La primera contiene todo lo indexado hasta ahora; las siguientes
+    se añaden con _append_index sin reescribir las anteriores.
+    """
+    everything = {
+        "size": index["size"], "first": 0, "records": index["records"], "resize": None,
+        "modules": index["modules"], "actions": index["actions"],
+        "ts_min": index["ts_min"], "ts_max": index["ts_max"],
+    }
+    header = {"version": _INDEX_VERSION, "journal": True, "format": index["format"], "inode": index.get("inode")}
+    tmp_path = index_path(path) + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, separators=(",", ":")) + "\n")
+            f.write(json.dumps(everything, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, index_path(path))
+        index["journal"] = True
+    except OSError:
+        index.pop("journal", None)
+
+def _append_index(path, builder):
+    """Añade al diario del índice solo los registros nuevos de una extensión incremental."""
+    try:
+        with open(index_path(path), "a", encoding="utf-8") as f:
+            f.write(json.dumps(builder.delta(), separators=(",", ":")) + "\n")
+    except OSError:
+        _remove_index(path) # Diario incompleto: se reconstruye en la siguiente consulta
+
+def _apply_delta(index, delta):
+    records = index["records"]
+    if delta["first"] != len(records):
+        raise ValueError("diario del índice incoherente")
+    if delta.get("resize"):
+        record_id, length = delta["resize"]
+        records[record_id][3] = length
+    records.extend(delta["records"])
+    for key in ("modules", "actions"):
+        for name, record_ids in delta[key].items():
+            index[key].setdefault(name, []).extend(record_ids)
+    if delta["ts_min"] and (index["ts_min"] is None or delta["ts_min"] < index["ts_min"]):
+        index["ts_min"] = delta["ts_min"]
+    if delta["ts_max"] and (index["ts_max"] is None or delta["ts_max"] > index["ts_max"]):
+        index["ts_max"] = delta["ts_max"]
+    index["size"] = delta["size"]
+
+def _remove_index(path):
+    with _index_lock:
+        _index_cache.pop(path, None)
+    try:
+        os.remove(index_path(path))
+    except OSError:
+        pass
+
+def _load_index(path):
+    """Lee el índice sidecar (completo o en diario); None si no existe, es de otra versión o está dañado."""
+    try:
+        with open(index_path(path), encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != _INDEX_VERSION:
+                return None
+            if not header.get("journal"):
+                return header # Índice completo en una sola línea (segmentos comprimidos)
+            index = {
+                "version": _INDEX_VERSION, "format": header["format"], "size": 0, "inode": header.get("inode"),
+                "blocks": None, "ts_min": None, "ts_max": None,
+                "records": [], "modules": {}, "actions": {}, "journal": True,
+            }
+            for line in f:
+                _apply_delta(index, json.loads(line))
+            return index
+    except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError):
+        return None
+
+def get_index(path):
+    """
+    Retorna el índice de un archivo de log, cargándolo de su archivo sidecar o
+    construyéndolo. El archivo activo (sin comprimir) se indexa de forma
+    incremental: solo se procesan los bytes añadidos desde la última vez.
+    """
+    with _build_lock:
+        size = os.path.getsize(path)
+        with _index_lock:
+            index = _index_cache.get(path)
+        if index is None:
+            index = _load_index(path)
+
+        compressed = path.endswith(".gz")
+        if index is not None and compressed and index["size"] != size:
+            index = None
+        if index is not None and not compressed and (index["size"] > size or index.get("inode") != os.stat(path).st_ino):
+            index = None # Truncado o reemplazado (rotación del archivo activo)
+
+        if index is None and compressed:
+            index = _index_gzip(path)
+            _save_index(path, index)
+        elif index is None:
+            index = _index_plain(path).index
+            _save_journal(path, index)
+        elif not compressed and index["size"] < size:
+            # Solo se indexan los bytes nuevos y al diario se añade solo lo nuevo
+            indexed = index["size"]
+            builder = _index_plain(path, index)
+            if index["size"] == indexed:
+                pass # Solo había un registro a medio escribir
+            elif index.get("journal"):
+                _append_index(path, builder)
+            else:
+                _save_journal(path, index) # Índice de una versión anterior, completo: pasa a diario
+
+        with _index_lock:
+            _index_cache[path] = index
+        return index
+
+class _SegmentReader:
+    """Lee registros por desplazamiento, descomprimiendo como mucho un bloque a la vez."""
+
+    def __init__(self, path, index):
+        self.path = path
+        self.index = index
+        self.file_format = index["format"]
+        self._file = open(path, "rb")
+        self._block_id = None
+        self._block_data = None
+
+    def read(self, entry):
+        _, block, offset, length = entry
+        if self.index["blocks"] is None:
+            self._file.seek(offset)
+            data = self._file.read(length)
+        else:
+            if block != self._block_id:
+                self._block_data = self._read_block(block)
+                self._block_id = block
+            data = self._block_data[offset:offset + length]
+        return _parse_record(data, self.file_format)
+
+    def _read_block(self, block):
+        blocks = self.index["blocks"]
+        self._file.seek(blocks[block])
+        if block + 1 < len(blocks):
+            return gzip.decompress(self._file.read(blocks[block + 1] - blocks[block]))
+        return gzip.decompress(self._file.read()) # Último bloque (o archivo de un solo miembro)
+
+    def close(self):
+        self._file.close()
+
+def _normalize_time(value, end=False):
+    """Acepta 'AAAA-MM-DD', 'AAAA-MM-DD HH:MM[:SS]' o datetime; retorna un ISO comparable."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        value = value.isoformat()
+    value = str(value).strip().replace(" ", "T")
+    if len(value) == 10 and end:
+        return value + "T99" # Incluye todo el día
+    return value
+
+def _candidate_ids(index, module, action):
+    """Ids de registros que cumplen los filtros indexados (módulo/acción), en orden."""
+    sets = []
+    for postings, wanted in ((index["modules"], module), (index["actions"], action)):
+        if not wanted:
+            continue
+        ids = set()
+        for name, record_ids in list(postings.items()): # Copia: el índice activo puede crecer en paralelo
+            if name.lower() == wanted.lower():
+                ids.update(record_ids)
+        sets.append(ids)
+    if not sets:
+        return range(len(index["records"]))
+    return sorted(set.intersection(*sets))
+
+def _matches(record, text, status):
+    if record is None:
+        return False
+    if status is not None and record.get("status") != status:
+        return False
+    if text:
+        haystack = " ".join(str(record.get(field) or "") for field in ("details", "target", "user")).lower()
+        if text.lower() not in haystack:
+            return False
+    return True
+
+def query_logs(since=None, until=None, module=None, action=None, text=None, status=None,
+               page=1, page_size=50, log_format=None):
+    """
+    Busca registros en los logs, del más reciente al más antiguo.
+    Los archivos fuera del rango temporal se descartan por su nombre y por el
+    rango ts_min/ts_max de su índice; módulo y acción se resuelven con las listas
+    del índice, y solo se leen del disco los registros candidatos.
+    Retorna (registros de la página, total de coincidencias).
+    """
+    logger.flush_logs()
+    since = _normalize_time(since)
+    until = _normalize_time(until, end=True)
+    page = max(1, int(page or 1))
+    page_size = max(1, int(page_size or 50))
+    first = (page - 1) * page_size
+    post_filter = bool(text) or status is not None
+
+    results = []
+    total = 0
+    for day, _, _, _, path in reversed(logger.list_log_files(log_format)):
+        if (since and day < since[:10]) or (until and day > until[:10]):
+            continue
+        try:
+            index = get_index(path)
+        except OSError:
+            continue
+        if index["ts_min"] is None or (since and index["ts_max"] < since) or (until and index["ts_min"] > until):
+            continue
+        records = index["records"]
+        candidates = [record_id for record_id in _candidate_ids(index, module, action)
+                      if (not since or records[record_id][0] >= since)
+                      and (not until or records[record_id][0] <= until)]
+        if not post_filter:
+            # El total se conoce sin leer los registros; solo se leen los de la página
+            start = max(0, first - total)
+            wanted = candidates[::-1][start:start + page_size - len(results)] if len(results) < page_size else []
+            total += len(candidates)
+            if wanted:
+                reader = _SegmentReader(path, index)
+                try:
+                    for record_id in sorted(wanted, reverse=True):
+                        record = reader.read(records[record_id])
+                        if record is not None:
+                            results.append(record)
+                finally:
+                    reader.close()
+            continue
+
+        reader = _SegmentReader(path, index)
+        try:
+            for record_id in reversed(candidates):
+                record = reader.read(records[record_id])
+                if not _matches(record, text, status):
+                    continue
+                if first <= total < first + page_size:
+                    results.append(record)
+                total += 1
+        finally:
+            reader.close()
+    return results, total
+
+def format_records(records, markdown=False):
+    """Tabla con los registros de una consulta (texto plano para la CLI o Markdown para la GUI)."""
+    if not records:
+        return "No se encontraron registros."
+    headers = ["Fecha", "Módulo", "Acción", "Objetivo", "Estado", "Duración (s)", "Usuario", "Detalles"]
+    rows = []
+    for record in records:
+        details = str(record.get("details") or "").replace("\n", " ")
+        if len(details) > 120:
+            details = details[:117] + "..."
+        duration = record.get("duration")
+        rows.append([
+            str(record.get("ts", "")).replace("T", " ")[:19], str(record.get("module", "")),
+            str(record.get("action", "")), str(record.get("target") or ""),
+            "" if record.get("status") is None else str(record.get("status")),
+            "" if duration is None else f"{duration:.3f}", str(record.get("user") or ""), details,
+        ])
+    if markdown:
+        escape = lambda value: value.replace("|", "\\|")
+        lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+        lines += ["| " + " | ".join(escape(value) for value in row) + " |" for row in rows]
+        return "\n".join(lines)
+    widths = [max(len(headers[i]), *(len(row[i]) for row in rows)) for i in range(len(headers) - 1)]
+    line_format = "  ".join(f"{{:<{width}}}" for width in widths) + "  {}"
+    lines = [line_format.format(*headers), "-" * (sum(widths) + 2 * len(widths) + 8)]
+    lines += [line_format.format(*row) for row in rows]
+    return "\n".join(lines)
@@ -0,0 +1,229 @@
+import collections
+import ctypes
+import ctypes.util
+import itertools
+import mmap
+import os
+import select
+import struct
+import threading
+import time
+import config
+
+# Eventos inotify relevantes: escritura, truncado, creación/renombrado (rotación) y borrado
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+POLL_INTERVAL = 1.0
+
+def _decode(line):
+    return line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+def tail_lines(path, count=100):
+    """
+    Retorna las últimas `count` líneas de un archivo sin leerlo entero: el archivo
+    se mapea en memoria y se buscan los saltos de línea desde el final.
+    """
+    count = max(0, int(count))
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0 or count == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = size
+            if mapped[end - 1:end] == b"\n":
+                end -= 1 # El salto de línea final no abre una línea nueva
+            position = end
+            for _ in range(count):
+                position = mapped.rfind(b"\n", 0, position)
+                if position == -1:
+                    break # El archivo tiene menos de `count` líneas
+            start = position + 1
+            return [_decode(line) for line in mapped[start:end].split(b"\n")]
+
+class _Inotify:
+    """Vigilancia mínima con inotify (Linux) vía ctypes; None si no está disponible."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch")
+
+    def wait(self, timeout):
+        """Espera hasta `timeout` segundos a algún evento y descarta los pendientes."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while os.read(self.fd, 64 * _EVENT_HEADER.size + 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+class LogFollower:
+    """
+    Sigue un archivo de log como `tail -F`: `read_new()` retorna solo las líneas
+    completas añadidas desde la llamada anterior. Detecta la rotación (el archivo
+    se renombra y se crea otro con el mismo nombre: se termina de leer el antiguo
+    y se pasa al nuevo) y el truncado (se vuelve a leer desde el principio).
+    La espera de cambios usa inotify si está disponible y, si no, sondeo periódico.
+    """
+
+    def __init__(self, path, initial_lines=100, max_lines=1000):
+        self.path = path
+        self.lines = collections.deque(maxlen=max_lines) # Últimas líneas, para vistas que muestran una ventana
+        self._file = None
+        self._inode = None
+        self._partial = b""
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.last_read = time.monotonic()
+        if initial_lines and os.path.exists(path):
+            self.lines.extend(tail_lines(path, initial_lines))
+        self._open(at_end=True)
+        if os.name != 'nt':
+            try:
+                self._watcher = _Inotify(os.path.dirname(os.path.abspath(path)) or ".")
+            except (OSError, AttributeError):
+                self._watcher = None # Sin inotify: sondeo
+
+    def _open(self, at_end=False):
+        try:
+            self._file = open(self.path, "rb")
+        except OSError:
+            self._file = None
+            self._inode = None
+            return
+        stat = os.fstat(self._file.fileno())
+        self._inode = (stat.st_dev, stat.st_ino)
+        if at_end:
+            self._file.seek(0, os.SEEK_END)
+
+    def _read_available(self):
+        data = self._file.read()
+        if not data:
+            return []
+        data = self._partial + data
+        lines = data.split(b"\n")
+        self._partial = lines.pop() # Línea aún incompleta
+        return [_decode(line) for line in lines]
+
+    def read_new(self):
+        """Retorna la lista de líneas nuevas desde la última llamada."""
+        with self._lock:
+            self.last_read = time.monotonic()
+            if self._file is None:
+                self._open()
+                if self._file is None:
+                    return []
+            new_lines = self._read_available()
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                stat = None # Rotado y aún sin archivo nuevo: se sigue leyendo el antiguo
+            if stat is not None:
+                if (stat.st_dev, stat.st_ino) != self._inode:
+                    # Rotación: lo que quedara del archivo antiguo ya se leyó arriba
+                    if self._partial:
+                        new_lines.append(_decode(self._partial))
+                        self._partial = b""
+                    self._file.close()
+                    self._open()
+                    if self._file is not None:
+                        new_lines += self._read_available()
+                elif stat.st_size < self._file.tell():
+                    # Truncado: se vuelve a leer desde el principio
+                    self._file.seek(0)
+                    self._partial = b""
+                    new_lines += self._read_available()
+            self.lines.extend(new_lines)
+            return new_lines
+
+    def wait(self, timeout=POLL_INTERVAL):
+        """Espera a que haya cambios (inotify) o a que pase el intervalo de sondeo."""
+        if self._watcher is not None:
+            return self._watcher.wait(timeout)
+        time.sleep(timeout)
+        return True
+
+    def follow(self):
+        """Generador infinito de líneas nuevas (para la CLI)."""
+        while True:
+            for line in self.read_new():
+                yield line
+            self.wait()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+
+# Seguimientos abiertos desde la GUI (una sesión de navegador guarda solo el id)
+_followers = {}
+_followers_lock = threading.Lock()
+_follower_ids = itertools.count(1)
+_reaper = None # Hilo que cierra los seguimientos sin lecturas (solo mientras haya alguno abierto)
+
+def open_follower(path, initial_lines=100, max_lines=1000):
+    """Abre un seguimiento y retorna su id junto con las últimas líneas del archivo."""
+    global _reaper
+    follower = LogFollower(path, initial_lines, max_lines)
+    follower_id = next(_follower_ids)
+    with _followers_lock:
+        _followers[follower_id] = follower
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_idle_followers, name="log-follow-reaper", daemon=True)
+            _reaper.start()
+    return follower_id, list(follower.lines)
+
+def get_follower(follower_id):
+    with _followers_lock:
+        return _followers.get(int(follower_id)) if follower_id else None
+
+def close_follower(follower_id):
+    with _followers_lock:
+        follower = _followers.pop(int(follower_id), None) if follower_id else None
+    if follower is not None:
+        follower.close()
+
+def _reap_idle_followers():
+    """
+    Cierra los seguimientos que nadie lee desde hace LOG_FOLLOW_IDLE_TIMEOUT segundos
+    (la pestaña del navegador se cerró sin pulsar Detener), liberando el archivo y el
+    descriptor de inotify. El hilo termina cuando no queda ningún seguimiento.
+    """
+    global _reaper
+    while True:
+        time.sleep(max(1.0, config.LOG_FOLLOW_IDLE_TIMEOUT / 4))
+        now = time.monotonic()
+        with _followers_lock:
+            idle = [follower_id for follower_id, follower in _followers.items()
+                    if now - follower.last_read > config.LOG_FOLLOW_IDLE_TIMEOUT]
+            closed = [_followers.pop(follower_id) for follower_id in idle]
+            finished = not _followers
+            if finished:
+                _reaper = None
+        for follower in closed:
+            follower.close()
+        if finished:
+            return
@@ -1,17 +1,444 @@
+import atexit
+import contextlib
 import datetime
+import getpass
+import gzip
+import json
 import os
+import queue
+import re
+import sys
+import threading
+import time
+import config
 from config import LOG_DIR
+from utils import metrics
+
+try:
+    import fcntl
+except ImportError: # Windows: sin bloqueos entre procesos
+    fcntl = None
+
+# Nombre de los archivos: <día>_system_admin[.<segmento>].<log|jsonl>[.gz]
+_LOG_NAME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})_system_admin(?:\.(\d+))?\.(log|jsonl)(\.gz)?$")
+
+# Archivo de bloqueo que serializa entre procesos (CLI, GUI, API, TUI) las rotaciones y renombrados
+_LOCK_NAME = ".system_admin.lock"
 
 def setup_log_directory():
     """Crea el directorio de logs si no existe."""
     if not os.path.exists(LOG_DIR):
         os.makedirs(LOG_DIR)
 
-def log_action(module, action, details):
-    """Registra una acción en un archivo de log."""
+def _extension(log_format):
+    return "jsonl" if log_format == "json" else "log"
+
+def _log_file_path(day, log_format="text", segment=None):
+    suffix = f".{segment:03d}" if segment is not None else ""
+    return os.path.join(LOG_DIR, f"{day.strftime('%Y-%m-%d')}_system_admin{suffix}.{_extension(log_format)}")
+
+def current_log_file():
+    """Ruta del archivo de log activo de hoy (según el formato configurado)."""
+    return _log_file_path(datetime.date.today(), config.LOG_FORMAT)
+
+def _current_user():
+    # Con sudo interesa quién lanzó la herramienta, no 'root'
+    user = os.environ.get("SUDO_USER")
+    if user:
+        return user
+    try:
+        return getpass.getuser()
+    except Exception:
+        return None
+
+_USER = _current_user()
+
+def render_text(record):
+    """Representa un registro (dict) con el formato de texto clásico: [ts] [módulo] [acción] detalles."""
+    timestamp = record["ts"].replace("T", " ")[:19]
+    return f"[{timestamp}] [{record['module']}] [{record['action']}] {record['details']}\n"
+
+def render_json(record):
+    """Representa un registro como una línea JSON."""
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+def list_log_files(log_format=None):
+    """
+    Lista los archivos de log como tuplas (día, segmento, formato, comprimido, ruta),
+    ordenadas cronológicamente. El archivo activo de cada día tiene segmento None
+    y va después de sus segmentos cerrados.
+    """
+    files = []
+    try:
+        names = os.listdir(LOG_DIR)
+    except OSError:
+        return files
+    for name in names:
+        match = _LOG_NAME_RE.match(name)
+        if not match:
+            continue
+        day, segment, ext, gz = match.groups()
+        file_format = "json" if ext == "jsonl" else "text"
+        if log_format and file_format != log_format:
+            continue
+        files.append((day, int(segment) if segment else None, file_format, bool(gz), os.path.join(LOG_DIR, name)))
+    files.sort(key=lambda item: (item[0], item[1] is None, item[1] or 0))
+    return files
+
+def open_log_file(path):
+    """Abre un archivo de log (comprimido o no) en modo texto."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+def read_records(path):
+    """Itera los registros (dict) de un archivo JSON-lines, comprimido o no."""
+    with open_log_file(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue # Línea incompleta (por ejemplo, un corte de luz a mitad de escritura)
+
+@contextlib.contextmanager
+def _directory_lock():
+    """Bloqueo exclusivo sobre el directorio de logs compartido por todos los procesos."""
+    if fcntl is None:
+        yield
+        return
     setup_log_directory()
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_file_path = os.path.join(LOG_DIR, f"{datetime.date.today().strftime('%Y-%m-%d')}_system_admin.log")
-    
-    with open(log_file_path, "a") as f:
-        f.write(f"[{timestamp}] [{module}] [{action}] {details}\n")
\ No newline at end of file
+    with open(os.path.join(LOG_DIR, _LOCK_NAME), "ab") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _is_current(path, f):
+    """True si `path` sigue apuntando al archivo abierto `f` (no lo han renombrado ni eliminado)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    opened = os.fstat(f.fileno())
+    return (st.st_dev, st.st_ino) == (opened.st_dev, opened.st_ino)
+
+def _compress(path):
+    """
+    Comprime un segmento cerrado a .gz (por bloques indexados, ver utils.log_query) y
+    elimina el original. Los escritores mantienen un bloqueo compartido sobre el archivo
+    que tienen abierto: si algún proceso aún escribe en el segmento, no se comprime.
+    """
+    from utils import log_query # Importación diferida: log_query depende de este módulo
+    try:
+        with open(path, "rb") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if _is_current(path, f): # Otro proceso pudo comprimirlo mientras se esperaba
+                log_query.compress_segment(path)
+    except OSError:
+        pass # Se reintenta en el siguiente mantenimiento
+
+def _remove_log_file(path):
+    """Elimina un archivo de log junto con su índice (sidecar .idx.json)."""
+    for target in (path, path + ".idx.json"):
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+
+class LogWriter:
+    """
+    Escritor de logs en segundo plano. Las llamadas a `submit` solo encolan el
+    registro; un hilo dedicado los agrupa en lotes, los escribe sobre un archivo
+    que mantiene abierto y lo rota a medianoche (un archivo por día, según la
+    fecha de cada registro) o al superar `max_bytes`. Los segmentos cerrados se
+    numeran (<día>_system_admin.001.jsonl, ...), se comprimen con gzip en otro
+    hilo y se eliminan pasados `retention_days` días.
+
+    Varios procesos pueden escribir en el mismo directorio: las rotaciones se
+    serializan con un bloqueo (flock) y, antes de cada lote, se comprueba que el
+    archivo abierto sigue siendo el activo; si otro proceso lo rotó, se reabre.
+
+    Formatos (`log_format`): 'text' (líneas [ts] [módulo] [acción] detalles) o
+    'json' (un objeto JSON por línea con campos tipados).
+
+    Política de fsync (`fsync_policy`):
+      - 'never': solo se vacía el buffer al sistema operativo tras cada lote.
+      - 'batch': fsync tras cada lote escrito.
+      - 'interval': fsync como mucho cada `fsync_interval` segundos.
+    """
+
+    def __init__(self, fsync_policy='never', fsync_interval=5.0, batch_size=256, flush_interval=0.5,
+                 log_format='text', max_bytes=None, retention_days=None, compress=True):
+        if fsync_policy not in ('never', 'batch', 'interval'):
+            raise ValueError(f"Política de fsync no válida: {fsync_policy}")
+        if log_format not in ('text', 'json'):
+            raise ValueError(f"Formato de log no válido: {log_format}")
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.log_format = log_format
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.compress = compress
+        self._render = render_json if log_format == 'json' else render_text
+        self._queue = queue.SimpleQueue() # Sin límite: encolar nunca bloquea
+        self._file = None
+        self._file_day = None
+        self._file_size = 0
+        self._last_fsync = time.monotonic()
+        self._maintenance = []
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        self._queue.put(record)
+
+    def flush(self, timeout=5.0):
+        """Espera a que todo lo encolado hasta ahora esté escrito en disco."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Escribe lo pendiente, cierra el archivo y detiene el hilo."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        for thread in self._maintenance:
+            thread.join(timeout)
+
+    def _run(self):
+        self._start_maintenance()
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._reopen_if_rotated()
+            waiters = []
+            for item in batch:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    try:
+                        self._write(item)
+                    except Exception as e:
+                        # Un registro defectuoso no debe detener el hilo escritor
+                        print(f"[log-writer] Registro descartado ({type(e).__name__}: {e}): {item!r:.200}",
+                              file=sys.stderr)
+            self._sync(force=bool(waiters) and self.fsync_policy != 'never')
+            for waiter in waiters:
+                waiter.set()
+        self._close_file()
+
+    def _write(self, record):
+        day = datetime.date.fromisoformat(record["ts"][:10])
+        line = self._render(record).encode("utf-8")
+        try:
+            if day != self._file_day:
+                self._open(day)
+            elif self.max_bytes and self._file_size + len(line) > self.max_bytes and self._file_size:
+                self._rotate()
+                self._open(day)
+            self._file.write(line)
+            self._file_size += len(line)
+        except OSError:
+            self._close_file() # Se reintenta abrir en el siguiente registro
+
+    def _open(self, day):
+        if self._file is not None:
+            previous_day = self._file_day
+            self._close_file()
+            if previous_day != day:
+                # Cambio de día: el archivo del día anterior queda cerrado definitivamente
+                self._start_maintenance()
+        setup_log_directory()
+        path = _log_file_path(day, self.log_format)
+        while True:
+            f = open(path, "ab")
+            try:
+                if fcntl is not None:
+                    # Compartido: impide que otro proceso comprima el archivo mientras se escribe en él
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                if _is_current(path, f):
+                    break
+            except OSError:
+                f.close()
+                raise
+            f.close() # Se rotó entre la apertura y el bloqueo
+        self._file = f
+        self._file_day = day
+        self._file_size = self._file.tell()
+
+    def _reopen_if_rotated(self):
+        """Reabre el archivo activo si otro proceso lo ha rotado o comprimido desde que se abrió."""
+        if self._file is None or _is_current(_log_file_path(self._file_day, self.log_format), self._file):
+            return
+        try:
+            self._open(self._file_day)
+        except OSError:
+            self._close_file()
+            return
+        # El segmento que se acaba de soltar quizá no se pudo comprimir mientras estaba abierto
+        self._start_maintenance()
+
+    def _rotate(self):
+        """Cierra el archivo activo por tamaño y lo renombra como el siguiente segmento del día."""
+        day = self._file_day
+        active_path = _log_file_path(day, self.log_format)
+        with _directory_lock():
+            rotated = not _is_current(active_path, self._file) # Ya lo rotó otro proceso
+            self._close_file()
+            if rotated:
+                return
+            segment_path = _log_file_path(day, self.log_format, self._next_segment(day))
+            try:
+                os.replace(active_path, segment_path)
+            except OSError:
+                return
+        try:
+            os.remove(active_path + ".idx.json") # El índice del archivo activo ya no corresponde
+        except OSError:
+            pass
+        if self.compress:
+            self._spawn(_compress, segment_path)
+
+    def _next_segment(self, day):
+        day_str = day.strftime('%Y-%m-%d')
+        segments = [segment for file_day, segment, file_format, _, _ in list_log_files(self.log_format)
+                    if file_day == day_str and segment is not None]
+        return max(segments, default=0) + 1
+
+    def _start_maintenance(self):
+        self._spawn(self._maintain)
+
+    def _spawn(self, target, *args):
+        self._maintenance = [thread for thread in self._maintenance if thread.is_alive()]
+        thread = threading.Thread(target=target, args=args, name="log-maintenance", daemon=True)
+        self._maintenance.append(thread)
+        thread.start()
+
+    def _maintain(self):
+        """
+        Tareas en segundo plano: aplica la retención, y convierte en segmentos
+        comprimidos los archivos de días anteriores (y los segmentos que quedaran
+        sin comprimir, por ejemplo tras una salida brusca).
+        """
+        today = datetime.date.today()
+        cutoff = today - datetime.timedelta(days=self.retention_days) if self.retention_days else None
+        for file_day, segment, file_format, compressed, path in list_log_files():
+            day = datetime.date.fromisoformat(file_day)
+            if cutoff is not None and day < cutoff:
+                _remove_log_file(path)
+                continue
+            if compressed or not self.compress or file_format != self.log_format:
+                continue
+            if segment is None:
+                if day >= today:
+                    continue # Archivo activo
+                with _directory_lock():
+                    if not os.path.exists(path):
+                        continue # Ya lo convirtió en segmento otro proceso
+                    segment_path = _log_file_path(day, file_format, self._next_segment(day))
+                    try:
+                        os.replace(path, segment_path)
+                    except OSError:
+                        continue
+                path = segment_path
+            _compress(path)
+
+    def _sync(self, force=False):
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            now = time.monotonic()
+            if force or self.fsync_policy == 'batch' or (
+                    self.fsync_policy == 'interval' and now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+        except OSError:
+            pass
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.flush()
+                if self.fsync_policy != 'never':
+                    os.fsync(self._file.fileno())
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+        self._file_day = None
+        self._file_size = 0
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+def get_log_writer():
+    """Retorna el escritor global, creándolo la primera vez (y de nuevo tras un fork)."""
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer_pid != os.getpid():
+                _writer = LogWriter(config.LOG_FSYNC_POLICY, config.LOG_FSYNC_INTERVAL,
+                                    config.LOG_BATCH_SIZE, config.LOG_FLUSH_INTERVAL,
+                                    config.LOG_FORMAT, config.LOG_MAX_BYTES,
+                                    config.LOG_RETENTION_DAYS, config.LOG_COMPRESS)
+                _writer_pid = os.getpid()
+    return _writer
+
+def flush_logs(timeout=5.0):
+    """Bloquea hasta que los registros encolados se hayan escrito (útil antes de leer los logs)."""
+    if _writer is not None and _writer_pid == os.getpid():
+        return _writer.flush(timeout)
+    return True
+
+@atexit.register
+def shutdown_logging():
+    """Vacía y cierra el escritor de logs al terminar el proceso."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer_pid == os.getpid():
+            _writer.close()
+        _writer = None
+
+def log_action(module, action, details, target=None, duration=None, status=None):
+    """
+    Registra una acción en un archivo de log. No bloquea: la escritura se hace en segundo plano.
+    Si no se indican `duration` y `status`, se toman del último comando ejecutado
+    por la acción en curso (ver utils.metrics.last_command).
+    """
+    if duration is None or status is None:
+        last = metrics.last_command()
+        if last is not None:
+            _, last_duration, last_status = last
+            duration = last_duration if duration is None else duration
+            status = last_status if status is None else status
+    get_log_writer().submit({
+        "ts": datetime.datetime.now().isoformat(timespec="milliseconds"),
+        "module": module,
+        "action": action,
+        "target": target,
+        "details": details,
+        "duration": round(duration, 6) if duration is not None else None,
+        "status": status,
+        "user": _USER,
+    })
@@ -0,0 +1,230 @@
+import collections
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+from utils import result as result_utils
+
+# Número máximo de muestras que se conservan por clave (las más recientes)
+MAX_SAMPLES_PER_KEY = 2048
+
+# Acción de módulo en curso (módulo, acción); la fijan las funciones instrumentadas
+_current_action = contextvars.ContextVar("current_action", default=None)
+# Último comando (comando, duración, estado) ejecutado dentro de la acción en curso
+_last_command = contextvars.ContextVar("last_command", default=None)
+# CPU de los comandos de la acción en curso ([segundos]); es mutable para que la sumen
+# también los hilos que la acción lanza con contextvars.copy_context()
+_action_cpu = contextvars.ContextVar("action_cpu", default=None)
+
+class Histogram:
+    """
+    Histograma de latencias de una operación. Conserva las últimas muestras
+    para calcular percentiles y acumula totales de CPU, bytes y errores.
+    """
+
+    def __init__(self):
+        self.samples = collections.deque(maxlen=MAX_SAMPLES_PER_KEY)
+        self.count = 0
+        self.errors = 0
+        self.total_wall = 0.0
+        self.max_wall = 0.0
+        self.total_cpu = 0.0
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+        self.last_command = ""
+
+    def add(self, wall, cpu=None, status=0, stdout_bytes=0, stderr_bytes=0, command=""):
+        self.samples.append(wall)
+        self.count += 1
+        self.total_wall += wall
+        self.max_wall = max(self.max_wall, wall)
+        if cpu is not None:
+            self.total_cpu += cpu
+        if status not in (0, None):
+            self.errors += 1
+        self.stdout_bytes += stdout_bytes
+        self.stderr_bytes += stderr_bytes
+        if command:
+            self.last_command = command
+
+    def percentile(self, p):
+        """Retorna el percentil p (0-100) de las muestras conservadas, en segundos."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max_wall,
+            "avg": self.total_wall / self.count if self.count else 0.0,
+            "cpu": self.total_cpu,
+            "stdout_bytes": self.stdout_bytes,
+            "stderr_bytes": self.stderr_bytes,
+            "last_command": self.last_command,
+        }
+
+_registry = {} # (tipo, módulo, acción) -> Histogram
+_registry_lock = threading.Lock()
+
+def _histogram(kind, module, action):
+    """Retorna (creándolo si no existe) el histograma de una clave. Requiere _registry_lock."""
+    key = (kind, module, action)
+    hist = _registry.get(key)
+    if hist is None:
+        hist = _registry[key] = Histogram()
+    return hist
+
+def _caller_module_action():
+    """
+    Determina el módulo/acción que originó un comando. Usa la acción
+    instrumentada en curso o, si no la hay, el primer marco fuera de utils/.
+    """
+    current = _current_action.get()
+    if current is not None:
+        return current
+    frame = sys._getframe(2)
+    utils_dir = os.path.dirname(os.path.abspath(__file__))
+    while frame is not None and os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == utils_dir:
+        frame = frame.f_back
+    if frame is None:
+        return ("desconocido", "desconocido")
+    module_name = frame.f_globals.get("__name__", "desconocido").rsplit(".", 1)[-1]
+    return (module_name, frame.f_code.co_name)
+
+def record_command(command, wall, cpu=None, status=0, stdout_bytes=0, stderr_bytes=0):
+    """Registra la ejecución de un comando del sistema (llamado desde execute_command)."""
+    module, action = _caller_module_action()
+    if _current_action.get() is not None:
+        _last_command.set((command, wall, status))
+    action_cpu = _action_cpu.get()
+    with _registry_lock:
+        _histogram("command", module, action).add(wall, cpu, status, stdout_bytes, stderr_bytes, command)
+        if action_cpu is not None and cpu is not None:
+            action_cpu[0] += cpu
+
+def last_command():
+    """
+    Retorna (comando, duración, estado) del último comando ejecutado por la
+    acción instrumentada en curso, o None fuera de una acción.
+    """
+    if _current_action.get() is None:
+        return None
+    return _last_command.get()
+
+def record_action(module, action, wall, cpu=None, status=0):
+    """Registra la ejecución completa de una función de módulo."""
+    with _registry_lock:
+        _histogram("action", module, action).add(wall, cpu, status)
+
+def track_action(module, func):
+    """
+    Envuelve una función de módulo para registrar su tiempo total y atribuirle
+    los comandos que ejecute.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_action.set((module, func.__name__))
+        last_token = _last_command.set(None)
+        outer_cpu = _action_cpu.get()
+        action_cpu = [0.0]
+        cpu_token = _action_cpu.set(action_cpu)
+        start_wall = time.perf_counter()
+        result = result_utils.current_result()
+        first_message = len(result.messages) if result is not None else 0
+        status = 0
+        try:
+            value = func(*args, **kwargs)
+            if result is not None and any(level == result_utils.ERROR for level, _ in result.messages[first_message:]):
+                status = 1 # La acción informó de errores en el resultado en curso (utils.result)
+            return value
+        except BaseException:
+            status = 1
+            raise
+        finally:
+            _current_action.reset(token)
+            _last_command.reset(last_token)
+            _action_cpu.reset(cpu_token)
+            if outer_cpu is not None:
+                with _registry_lock:
+                    outer_cpu[0] += action_cpu[0] # Una acción llamada desde otra también cuenta en esta
+            record_action(module, func.__name__, time.perf_counter() - start_wall, action_cpu[0], status)
+    wrapper.__metrics_wrapped__ = True
+    return wrapper
+
+def instrument_module(module_obj, module_label=None):
+    """
+    Instrumenta las funciones públicas definidas en un módulo de gestión.
+    Los menús interactivos (`*_menu`) se excluyen porque su duración es la de la sesión.
+    """
+    label = module_label or module_obj.__name__.rsplit(".", 1)[-1]
+    for name, value in list(vars(module_obj).items()):
+        if (name.startswith("_") or name.endswith("_menu") or not callable(value)
+                or getattr(value, "__module__", None) != module_obj.__name__
+                or getattr(value, "__metrics_wrapped__", False) or isinstance(value, type)):
+            continue
+        setattr(module_obj, name, track_action(label, value))
+
+def snapshot(kind=None):
+    """Retorna una lista de diccionarios con el resumen de cada operación registrada."""
+    with _registry_lock:
+        items = list(_registry.items())
+    rows = []
+    for (entry_kind, module, action), hist in items:
+        if kind and entry_kind != kind:
+            continue
+        with _registry_lock:
+            row = hist.summary()
+        row.update({"kind": entry_kind, "module": module, "action": action})
+        rows.append(row)
+    return rows
+
+def slowest_operations(limit=10, kind=None):
+    """Retorna las operaciones ordenadas por p95 descendente."""
+    return sorted(snapshot(kind), key=lambda r: r["p95"], reverse=True)[:limit]
+
+def reset():
+    """Vacía el registro."""
+    with _registry_lock:
+        _registry.clear()
+
+def format_summary(rows=None, markdown=False):
+    """Formatea un resumen p50/p95/p99 como tabla de texto o Markdown."""
+    rows = rows if rows is not None else sorted(snapshot(), key=lambda r: (r["kind"], r["module"], r["action"]))
+    if not rows:
+        return "No hay operaciones registradas."
+    if markdown:
+        lines = [
+            "| Tipo | Módulo | Acción | N | Errores | p50 (ms) | p95 (ms) | p99 (ms) | Máx (ms) | CPU hijos (s) | stdout (B) | stderr (B) |",
+            "|---|---|---|---|---|---|---|---|---|---|---|---|",
+        ]
+        for r in rows:
+            lines.append(
+                f"| {r['kind']} | {r['module']} | {r['action']} | {r['count']} | {r['errors']} | "
+                f"{r['p50']*1000:.1f} | {r['p95']*1000:.1f} | {r['p99']*1000:.1f} | {r['max']*1000:.1f} | "
+                f"{r['cpu']:.2f} | {r['stdout_bytes']} | {r['stderr_bytes']} |"
+            )
+        return "\n".join(lines)
+
+    header = f"{'TIPO':<8} {'MÓDULO':<22} {'ACCIÓN':<32} {'N':>5} {'ERR':>4} {'p50ms':>9} {'p95ms':>9} {'p99ms':>9} {'MAXms':>9} {'CPU(s)':>7} {'OUT(B)':>10}"
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r['kind']:<8} {r['module'][:22]:<22} {r['action'][:32]:<32} {r['count']:>5} {r['errors']:>4} "
+            f"{r['p50']*1000:>9.1f} {r['p95']*1000:>9.1f} {r['p99']*1000:>9.1f} {r['max']*1000:>9.1f} "
+            f"{r['cpu']:>7.2f} {r['stdout_bytes']:>10}"
+        )
+    return "\n".join(lines)
+
+def print_summary():
+    """Imprime el resumen de latencias (usado por --profile al salir)."""
+    print("\n--- RESUMEN DE RENDIMIENTO (--profile) ---\n")
+    print(format_summary())
@@ -0,0 +1,266 @@
+import atexit
+import collections
+import contextvars
+import itertools
+import locale
+import os
+import tempfile
+import threading
+import config
+
+# Salidas volcadas a disco en esta sesión: id -> CapturedOutput (las más antiguas se eliminan)
+_spills = collections.OrderedDict()
+_spills_lock = threading.Lock()
+_spill_ids = itertools.count(1)
+
+# Función que recibe cada bloque de salida en cuanto llega (p. ej. el progreso de un trabajo en segundo plano)
+_chunk_listener = contextvars.ContextVar("output_chunk_listener", default=None)
+
+# Misma codificación que usa subprocess con text=True
+_ENCODING = locale.getpreferredencoding(False)
+
+def _decode(data):
+    """Decodifica bytes de un comando normalizando los saltos de línea (como text=True)."""
+    return bytes(data).decode(_ENCODING, errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+class CapturedOutput(str):
+    """
+    Texto de salida de un comando. Si la salida superó el límite de captura,
+    el texto contiene solo el inicio y el final, y la salida completa queda en
+    `spill_path`, paginable con `read_page`.
+    """
+
+    def __new__(cls, text, total_bytes=0, spill_path=None, spill_id=None):
+        obj = super().__new__(cls, text)
+        obj.total_bytes = total_bytes
+        obj.spill_path = spill_path
+        obj.spill_id = spill_id
+        obj._line_offsets = None
+        return obj
+
+    @property
+    def truncated(self):
+        return self.spill_path is not None
+
+    def _index_lines(self):
+        """Construye (una sola vez) la tabla de desplazamientos de inicio de línea del archivo."""
+        if self._line_offsets is not None:
+            return self._line_offsets
+        offsets = [0]
+        position = 0
+        with open(self.spill_path, "rb") as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                start = 0
+                while True:
+                    index = chunk.find(b"\n", start)
+                    if index == -1:
+                        break
+                    offsets.append(position + index + 1)
+                    start = index + 1
+                position += len(chunk)
+        if offsets[-1] == position and len(offsets) > 1:
+            offsets.pop() # El archivo termina en salto de línea: no hay línea vacía final
+        self._line_offsets = offsets
+        return offsets
+
+    def line_count(self):
+        if not self.truncated:
+            return len(str(self).splitlines())
+        return len(self._index_lines())
+
+    def page_count(self, lines_per_page=500):
+        return max(1, -(-self.line_count() // lines_per_page))
+
+    def read_page(self, page, lines_per_page=500):
+        """Retorna el texto de la página `page` (empezando en 1) de la salida completa."""
+        page = max(1, int(page))
+        if not self.truncated:
+            lines = str(self).splitlines()
+            return "\n".join(lines[(page - 1) * lines_per_page:page * lines_per_page])
+        offsets = self._index_lines()
+        first = (page - 1) * lines_per_page
+        if first >= len(offsets):
+            return ""
+        last = first + lines_per_page
+        with open(self.spill_path, "rb") as f:
+            f.seek(offsets[first])
+            size = offsets[last] - offsets[first] if last < len(offsets) else -1
+            return _decode(f.read(size)).rstrip("\n")
+
+class BoundedCapture:
+    """
+    Acumula la salida de un flujo con memoria acotada. Mientras el total no
+    supere `limit` se guarda completo en memoria; a partir de ahí todo se
+    vuelca a un archivo temporal y en memoria solo se retienen los primeros
+    `head` bytes y los últimos `tail` bytes.
+    """
+
+    def __init__(self, limit=None, head=None, tail=None, listener=None):
+        self.listener = listener
+        self.limit = limit if limit is not None else config.OUTPUT_CAPTURE_LIMIT
+        self.head_size = head if head is not None else config.OUTPUT_HEAD_BYTES
+        self.tail_size = tail if tail is not None else config.OUTPUT_TAIL_BYTES
+        self.total_bytes = 0
+        self._buffer = bytearray() # Salida completa mientras no se supere el límite
+        self._head = None
+        self._tail = None
+        self._spill = None
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        if self.listener is not None:
+            self.listener(chunk)
+        self.total_bytes += len(chunk)
+        if self._spill is None:
+            self._buffer.extend(chunk)
+            if len(self._buffer) > self.limit:
+                self._start_spill()
+            return
+        self._spill.write(chunk)
+        self._tail.extend(chunk)
+        if len(self._tail) > self.tail_size:
+            del self._tail[:len(self._tail) - self.tail_size]
+
+    def _start_spill(self):
+        self._spill = tempfile.NamedTemporaryFile(
+            prefix="sysadmin_output_", suffix=".log", dir=config.OUTPUT_SPILL_DIR, delete=False
+        )
+        self._spill.write(self._buffer)
+        self._head = bytes(self._buffer[:self.head_size])
+        self._tail = bytearray(self._buffer[-self.tail_size:]) if self.tail_size else bytearray()
+        self._buffer = bytearray()
+
+    @property
+    def spilled(self):
+        return self._spill is not None
+
+    def copy_to(self, target):
+        """Escribe la salida completa en un archivo abierto en modo binario."""
+        if self._spill is None:
+            target.write(self._buffer)
+            return
+        self._spill.flush()
+        with open(self._spill.name, "rb") as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                target.write(chunk)
+
+    def full_text(self):
+        """Texto completo de la salida, leyendo el archivo volcado si lo hay."""
+        if self._spill is None:
+            return _decode(self._buffer)
+        self._spill.flush()
+        with open(self._spill.name, "rb") as f:
+            return _decode(f.read())
+
+    def text(self):
+        """Texto en memoria: completo, o inicio + aviso + final si se volcó a disco."""
+        if self._spill is None:
+            return _decode(self._buffer)
+        omitted = self.total_bytes - len(self._head) - len(self._tail)
+        return (
+            _decode(self._head)
+            + f"\n\n... [{omitted} bytes omitidos de {self.total_bytes} en total] ...\n\n"
+            + _decode(self._tail)
+        )
+
+    def detach_spill(self, *appended):
+        """
+        Cierra el archivo volcado tras añadirle la salida completa de otras capturas
+        y retorna su ruta. El archivo deja de pertenecer a esta captura.
+        """
+        for capture in appended:
+            capture.copy_to(self._spill)
+        self._spill.close()
+        path = self._spill.name
+        self._spill = None
+        self._buffer = bytearray()
+        return path
+
+    def discard(self):
+        """Elimina el archivo temporal, si existe."""
+        if self._spill is not None:
+            self._spill.close()
+            try:
+                os.remove(self._spill.name)
+            except OSError:
+                pass
+
+def new_capture():
+    """
+    Crea un BoundedCapture con los límites configurados en config.py. Si el contexto
+    actual tiene un oyente de salida (set_chunk_listener), recibirá cada bloque.
+    """
+    return BoundedCapture(listener=_chunk_listener.get())
+
+def set_chunk_listener(listener):
+    """Registra un oyente de salida para el contexto actual. Retorna el token para reset_chunk_listener."""
+    return _chunk_listener.set(listener)
+
+def reset_chunk_listener(token):
+    _chunk_listener.reset(token)
+
+def combine(stdout_capture, stderr_capture):
+    """
+    Une las capturas de stdout y stderr (en ese orden) en un único CapturedOutput.
+    Si alguna se volcó a disco, la salida completa combinada queda en un archivo
+    temporal registrado para que la CLI/GUI pueda paginarlo.
+    """
+    if not stdout_capture.spilled and not stderr_capture.spilled:
+        text = stdout_capture.text() + stderr_capture.text()
+        return CapturedOutput(text, stdout_capture.total_bytes + stderr_capture.total_bytes)
+
+    text = stdout_capture.text() + stderr_capture.text()
+    total = stdout_capture.total_bytes + stderr_capture.total_bytes
+    if stdout_capture.spilled:
+        # Caso habitual: se reutiliza el archivo de stdout y se le añade stderr al final
+        spill_path = stdout_capture.detach_spill(stderr_capture)
+    else:
+        with tempfile.NamedTemporaryFile(prefix="sysadmin_output_", suffix=".log",
+                                         dir=config.OUTPUT_SPILL_DIR, delete=False) as combined:
+            stdout_capture.copy_to(combined)
+            stderr_capture.copy_to(combined)
+            spill_path = combined.name
+    stderr_capture.discard()
+
+    spill_id = next(_spill_ids)
+    text += f"\n[Salida truncada: {total} bytes en total. Salida completa (id {spill_id}) en: {spill_path}]"
+    result = CapturedOutput(text, total, spill_path, spill_id)
+    _register_spill(result)
+    return result
+
+def _register_spill(output):
+    with _spills_lock:
+        _spills[output.spill_id] = output
+        while len(_spills) > config.OUTPUT_MAX_SPILLS:
+            _, oldest = _spills.popitem(last=False)
+            _remove_file(oldest.spill_path)
+
+def get_spilled_output(spill_id):
+    """Retorna el CapturedOutput volcado a disco con ese id, o None."""
+    with _spills_lock:
+        return _spills.get(int(spill_id))
+
+def list_spilled_outputs():
+    """Lista (id, bytes totales, ruta) de las salidas volcadas a disco, de la más reciente a la más antigua."""
+    with _spills_lock:
+        return [(sid, out.total_bytes, out.spill_path) for sid, out in reversed(_spills.items())]
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+@atexit.register
+def _cleanup_spills():
+    with _spills_lock:
+        for output in _spills.values():
+            _remove_file(output.spill_path)
+        _spills.clear()
@@ -0,0 +1,231 @@
+import collections
+import contextlib
+import contextvars
+import itertools
+import json
+import threading
+import config
+
+# Niveles de los mensajes (los de print_header, print_info, print_success, ...)
+HEADER = "header"
+INFO = "info"
+SUCCESS = "success"
+WARNING = "warning"
+ERROR = "error"
+OUTPUT = "output" # Salida en bruto de un comando
+TABLE = "table" # Posición de la tabla entre los mensajes
+
+# Estados de un resultado
+STATUS_OK = "ok"
+STATUS_WARNING = "warning"
+STATUS_ERROR = "error"
+
+class CommandResult:
+    """
+    Resultado estructurado de una función de módulo: mensajes (nivel, texto) en
+    orden, incluidos los bloques de salida en bruto de los comandos, una tabla
+    opcional (columnas y filas) y el valor que retornó la función. La CLI y la
+    GUI lo renderizan cada una a su manera, sin capturar stdout.
+    """
+
+    def __init__(self, title=None, echo=True):
+        self.title = title
+        self.echo = echo # En la CLI, los print_* también se muestran en la terminal al momento
+        self.messages = []
+        self.columns = []
+        self.rows = []
+        self.value = None
+        self._status = None
+
+    def add_message(self, level, text):
+        if level == HEADER:
+            self.title = str(text) # El encabezado de la función da título al resultado
+        self.messages.append((level, str(text)))
+
+    def add_output(self, text):
+        self.messages.append((OUTPUT, str(text)))
+
+    @property
+    def outputs(self):
+        return [text for level, text in self.messages if level == OUTPUT]
+
+    def set_table(self, columns, rows):
+        if self.has_table:
+            # Una función que genera varias tablas (ej. los informes): la anterior pasa a texto
+            position = self.messages.index((TABLE, ""))
+            self.messages[position] = (OUTPUT, format_table(self.columns, self.rows))
+        self.messages.append((TABLE, ""))
+        self.columns = [str(column) for column in columns]
+        width = len(self.columns)
+        self.rows = [(["" if cell is None else str(cell) for cell in row] + [""] * width)[:width] for row in rows]
+
+    @property
+    def has_table(self):
+        return bool(self.columns)
+
+    @property
+    def status(self):
+        """Estado explícito (set_status) o, si no lo hay, el deducido de los mensajes."""
+        if self._status is not None:
+            return self._status
+        levels = {level for level, _ in self.messages}
+        if ERROR in levels:
+            return STATUS_ERROR
+        if WARNING in levels:
+            return STATUS_WARNING
+        return STATUS_OK
+
+    def set_status(self, status):
+        self._status = status
+
+    @property
+    def ok(self):
+        return self.status != STATUS_ERROR
+
+    def page(self, page=1, page_size=None):
+        """Retorna (filas de la página, página efectiva, número de páginas)."""
+        page_size = max(1, int(page_size or config.RESULT_PAGE_SIZE))
+        total_pages = max(1, -(-len(self.rows) // page_size))
+        page = min(max(1, int(page or 1)), total_pages)
+        start = (page - 1) * page_size
+        return self.rows[start:start + page_size], page, total_pages
+
+    def to_dict(self):
+        """Representación serializable (JSON)."""
+        return {
+            "title": self.title,
+            "status": self.status,
+            "messages": [{"level": level, "text": text} for level, text in self.messages if level != TABLE],
+            "columns": list(self.columns),
+            "rows": [list(row) for row in self.rows],
+        }
+
+    def render_markdown(self, include_table=True):
+        """Mensajes y salidas en Markdown (con el mismo formato que usaba el buffer de la GUI)."""
+        parts = []
+        labels = {INFO: "INFO", SUCCESS: "ÉXITO", WARNING: "ADVERTENCIA", ERROR: "ERROR"}
+        for level, text in self.messages:
+            if level == HEADER:
+                parts.append(f"## {text}\n---")
+            elif level == OUTPUT:
+                parts.append(f"```\n{text}\n```")
+            elif level == TABLE:
+                if include_table:
+                    parts.append(format_table(self.columns, self.rows, markdown=True))
+            else:
+                parts.append(f"**[{labels.get(level, level.upper())}]** {text}")
+        return "\n\n".join(parts)
+
+    def __repr__(self):
+        return (f"<CommandResult {self.title!r} {self.status} mensajes={len(self.messages)} "
+                f"filas={len(self.rows)}>")
+
+# Resultado que recoge los print_* de la llamada en curso
+_current_result = contextvars.ContextVar("command_result", default=None)
+
+def current_result():
+    return _current_result.get()
+
+@contextlib.contextmanager
+def collecting(result=None, echo=True):
+    """Activa `result` (o uno nuevo) como destino de los print_* del bloque."""
+    result = result if result is not None else CommandResult(echo=echo)
+    token = _current_result.set(result)
+    try:
+        yield result
+    finally:
+        _current_result.reset(token)
+
+def returns_result(func):
+    """
+    Marca una función de módulo cuya salida (print_*, print_output y print_table)
+    se recoge en un CommandResult. La función retorna siempre su valor original,
+    tal como indica su anotación; quien necesite el resultado estructurado (la CLI
+    de acciones, la API, la GUI, los trabajos y los playbooks) la ejecuta con
+    `call_with_result`, que deja ese valor en `result.value`.
+    """
+    func.__returns_result__ = True
+    return func
+
+def call_with_result(func, *args, echo=True, **kwargs):
+    """Ejecuta cualquier función recogiendo su salida; retorna el CommandResult."""
+    with collecting(CommandResult(getattr(func, "__name__", None), echo=echo)) as result:
+        result.value = func(*args, **kwargs)
+    return result
+
+def jsonable(value):
+    """`value` si se puede serializar en JSON; si no, su representación en texto."""
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
+
+def format_table(columns, rows, markdown=False):
+    """Tabla de texto alineada o Markdown."""
+    if not rows:
+        return "Sin resultados."
+    if markdown:
+        escape = lambda cell: str(cell).replace("|", "\\|").replace("\n", " ")
+        lines = ["| " + " | ".join(escape(column) for column in columns) + " |",
+                 "|" + "---|" * len(columns)]
+        lines += ["| " + " | ".join(escape(cell) for cell in row) + " |" for row in rows]
+        return "\n".join(lines)
+    widths = [len(str(column)) for column in columns]
+    for row in rows:
+        for i, cell in enumerate(row[:len(widths)]):
+            widths[i] = max(widths[i], len(str(cell)))
+    line_format = "  ".join(f"{{:<{width}}}" for width in widths)
+    pad = lambda row: list(row[:len(widths)]) + [""] * (len(widths) - len(row))
+    lines = [line_format.format(*columns), line_format.format(*("-" * width for width in widths))]
+    lines += [line_format.format(*pad(row)).rstrip() for row in rows]
+    return "\n".join(lines)
+
+def parse_columns(output, columns=None, max_split=None):
+    """
+    Convierte una salida con columnas separadas por espacios (ps, df, docker ps...)
+    en filas. Si no se indican `columns`, la primera línea es la cabecera.
+    La última columna se queda con el resto de la línea.
+    """
+    lines = [line for line in output.splitlines() if line.strip()]
+    if not lines:
+        return list(columns or []), []
+    if columns is None:
+        columns, lines = lines[0].split(), lines[1:]
+    max_split = max_split if max_split is not None else len(columns) - 1
+    return list(columns), [line.split(None, max_split) for line in lines]
+
+# Resultados recientes de la GUI, para paginar sus tablas en el servidor
+_stored_results = collections.OrderedDict()
+_stored_lock = threading.Lock()
+_stored_ids = itertools.count(1)
+_pinned_results = {} # id fijo -> resultado (vistas compartidas de la GUI)
+
+def store_result(result):
+    """Guarda un resultado (se conservan los RESULT_STORE_SIZE más recientes) y retorna su id."""
+    result_id = next(_stored_ids)
+    with _stored_lock:
+        _stored_results[result_id] = result
+        while len(_stored_results) > config.RESULT_STORE_SIZE:
+            _stored_results.popitem(last=False)
+    return result_id
+
+def pin_result(name, result):
+    """
+    Guarda un resultado con el id fijo `name` (sustituye al anterior con ese id).
+    Los resultados fijados no cuentan para RESULT_STORE_SIZE: los usan las vistas
+    compartidas de la GUI, cuya tabla debe seguir disponible aunque otras sesiones
+    guarden muchos resultados.
+    """
+    with _stored_lock:
+        _pinned_results[name] = result
+    return name
+
+def get_stored_result(result_id):
+    try:
+        with _stored_lock:
+            if isinstance(result_id, str) and result_id in _pinned_results:
+                return _pinned_results[result_id]
+            return _stored_results.get(int(result_id))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,218 @@
+import os
+import queue
+import select
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from utils import output_capture
+
+# Código de retorno usado cuando un comando supera el tiempo máximo (igual que `timeout`)
+TIMEOUT_STATUS = 124
+
+class ShellWorker:
+    """
+    Coproceso /bin/sh de larga duración que recibe comandos por su stdin.
+    Cada comando se delimita con un marcador único (sentinel) escrito tanto en
+    stdout como en stderr, seguido del código de salida del comando.
+    """
+
+    def __init__(self, shell="/bin/sh"):
+        self.shell = shell
+        self.process = None
+        self.commands_run = 0
+        self._start()
+
+    def _start(self):
+        """Lanza el coproceso en su propia sesión para poder matar sus hijos."""
+        self.process = subprocess.Popen(
+            [self.shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+            bufsize=0
+        )
+        self.commands_run = 0
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self):
+        """Mata el coproceso y todo su grupo de procesos."""
+        if self.process is None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        for stream in (self.process.stdin, self.process.stdout, self.process.stderr):
+            try:
+                stream.close()
+            except Exception:
+                pass
+        self.process = None
+
+    def restart(self):
+        self.kill()
+        self._start()
+
+    def run(self, command, timeout=None):
+        """
+        Ejecuta un comando en el coproceso y retorna (stdout, stderr, status).
+        stdout y stderr se acumulan en capturas acotadas (utils.output_capture).
+        Si el comando supera `timeout` o el coproceso muere, el worker se reinicia.
+        """
+        stdout_capture = output_capture.new_capture()
+        stderr_capture = output_capture.new_capture()
+        status = self._run_captured(command, timeout, stdout_capture, stderr_capture)
+        return stdout_capture, stderr_capture, status
+
+    def _run_captured(self, command, timeout, stdout_capture, stderr_capture):
+        if not self.is_alive():
+            self.restart()
+
+        token = f"__SYSADMIN_DONE_{uuid.uuid4().hex}__"
+        # El comando se evalúa dentro de un subshell: un 'exit', un 'cd' o un error
+        # de sintaxis no afectan al coproceso. stdin se cierra para que ningún
+        # comando consuma el canal de órdenes.
+        script = (
+            f"( eval {shlex.quote(command)} ) </dev/null; __rc=$?; "
+            f"printf '\\n%s %d\\n' '{token}' \"$__rc\"; "
+            f"printf '\\n%s\\n' '{token}' >&2\n"
+        )
+        try:
+            self.process.stdin.write(script.encode())
+        except (BrokenPipeError, OSError) as e:
+            self.restart()
+            stderr_capture.feed(f"El worker de shell terminó inesperadamente: {e}".encode())
+            return 1
+
+        marker = f"\n{token}".encode()
+        # Bytes retenidos al final de cada flujo por si contienen parte del marcador
+        keep = len(marker) + 16
+        stdout_fd = self.process.stdout.fileno()
+        captures = {stdout_fd: stdout_capture, self.process.stderr.fileno(): stderr_capture}
+        pending = {fd: bytearray() for fd in captures}
+        status = None
+        deadline = time.monotonic() + timeout if timeout else None
+
+        while pending:
+            wait = None
+            if deadline is not None:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    self.restart()
+                    stderr_capture.feed(f"Tiempo de espera agotado ({timeout}s) ejecutando: {command}".encode())
+                    return TIMEOUT_STATUS
+            readable, _, _ = select.select(list(pending), [], [], wait)
+            for fd in readable:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    self.restart()
+                    stderr_capture.feed("El worker de shell terminó inesperadamente.".encode())
+                    return 1
+                buf = pending[fd]
+                buf.extend(chunk)
+                index = buf.find(marker)
+                if index != -1:
+                    rest = buf[index + len(marker):]
+                    if fd == stdout_fd:
+                        if b"\n" not in rest.lstrip(b" "):
+                            continue # Falta el código de salida tras el marcador
+                        code = rest.split()[0]
+                        status = int(code) if code.lstrip(b'-').isdigit() else 1
+                    captures[fd].feed(bytes(buf[:index]))
+                    del pending[fd]
+                elif len(buf) > keep:
+                    captures[fd].feed(bytes(buf[:-keep]))
+                    del buf[:-keep]
+
+        self.commands_run += 1
+        return status if status is not None else 1
+
+class ShellPool:
+    """
+    Pool de coprocesos ShellWorker. Los workers se crean bajo demanda hasta
+    `size` y se reutilizan entre llamadas; varios hilos pueden ejecutar
+    comandos en paralelo, cada uno en su propio worker.
+    """
+
+    def __init__(self, size=4, shell="/bin/sh"):
+        self.size = size
+        self.shell = shell
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return ShellWorker(self.shell)
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get()
+
+    def _release(self, worker):
+        if self._closed:
+            worker.kill()
+        else:
+            self._idle.put(worker)
+
+    def run(self, command, timeout=None):
+        """Ejecuta un comando en un worker libre. Retorna (stdout, stderr, status) como BoundedCapture."""
+        worker = self._acquire()
+        try:
+            return worker.run(command, timeout=timeout)
+        finally:
+            self._release(worker)
+
+    def shutdown(self):
+        """Cierra todos los workers inactivos; los ocupados se cierran al liberarse."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_shell_pool():
+    """Retorna el pool global si está habilitado, o None."""
+    return _pool
+
+def enable_shell_pool(size=None, shell="/bin/sh"):
+    """
+    Habilita el pool global de shells persistentes. Tras llamarla,
+    `execute_command` enruta los comandos a través del pool.
+    """
+    global _pool
+    import config
+    with _pool_lock:
+        if _pool is None:
+            _pool = ShellPool(size or getattr(config, 'SHELL_POOL_SIZE', 4), shell)
+    return _pool
+
+def disable_shell_pool():
+    """Deshabilita y cierra el pool global."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
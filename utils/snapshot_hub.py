@@ -0,0 +1,113 @@
+import itertools
+import threading
+import time
+import config
+
+class Snapshot:
+    """Valor recogido por un colector en un momento dado."""
+
+    def __init__(self, key, value, version, collected_at, duration):
+        self.key = key
+        self.value = value
+        self.version = version
+        self.collected_at = collected_at # time.monotonic()
+        self.timestamp = time.time()
+        self.duration = duration
+
+    def age(self):
+        return time.monotonic() - self.collected_at
+
+class _Call:
+    """Recogida en curso: las peticiones que llegan mientras tanto esperan su resultado."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.snapshot = None
+        self.error = None
+
+class SnapshotHub:
+    """
+    Instantáneas compartidas de vistas costosas (docker ps, systemctl list-units, top...).
+    Cada clave se recoge como mucho una vez por intervalo: las peticiones dentro del
+    intervalo reciben la última instantánea y las que llegan durante una recogida
+    esperan a esa misma recogida (singleflight). Así el coste para el sistema es el
+    mismo con uno o con muchos navegadores abiertos.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or config.SNAPSHOT_INTERVAL
+        self._collectors = {}
+        self._snapshots = {}
+        self._inflight = {}
+        self._stats = {}
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def register(self, key, collector):
+        """Registra la función sin argumentos que recoge la vista `key`."""
+        with self._lock:
+            self._collectors[key] = collector
+            self._stats.setdefault(key, {"collections": 0, "served": 0, "shared": 0})
+
+    def get(self, key, max_age=None):
+        """
+        Retorna la instantánea de `key` si tiene menos de `max_age` segundos (por
+        defecto, el intervalo); si no, la recoge o espera a la recogida en curso.
+        """
+        max_age = self.interval if max_age is None else max_age
+        with self._lock:
+            collector = self._collectors[key]
+            stats = self._stats[key]
+            stats["served"] += 1
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot.age() < max_age:
+                stats["shared"] += 1
+                return snapshot
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                stats["shared"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.snapshot
+
+        start = time.monotonic()
+        try:
+            value = collector()
+            call.snapshot = Snapshot(key, value, next(self._versions), time.monotonic(), time.monotonic() - start)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.snapshot is not None:
+                    self._snapshots[key] = call.snapshot
+                    stats["collections"] += 1
+                del self._inflight[key]
+            call.event.set()
+        return call.snapshot
+
+    def refresh(self, key):
+        """Fuerza una recogida nueva (la comparten las peticiones concurrentes)."""
+        return self.get(key, max_age=0)
+
+    def stats(self):
+        """Por clave: recogidas hechas, peticiones atendidas y peticiones servidas sin recoger."""
+        with self._lock:
+            return {key: dict(values) for key, values in self._stats.items()}
+
+_hub = None
+_hub_lock = threading.Lock()
+
+def get_snapshot_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = SnapshotHub()
+    return _hub
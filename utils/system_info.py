@@ -1,5 +1,10 @@
 import os
-import subprocess
+import atexit
+import time
+from utils import shell_pool
+from utils import metrics
+from utils import output_capture
+from utils import command_backend
 
 def get_os_type():
     """Retorna 'windows' o 'linux'."""
@@ -9,20 +14,21 @@ def execute_command(command, sudo=False, shell=True):
     """
     Ejecuta un comando en el sistema operativo y retorna su salida y código de retorno.
     Añade 'sudo' automáticamente si es necesario en Linux y la opción sudo es True.
+    La ejecución se delega en el backend activo (utils.command_backend): el sistema
+    real (subprocess o pool de shells persistentes), una grabación o una reproducción.
+    Cada ejecución se registra en utils.metrics (tiempo, CPU de hijos, bytes, estado).
+    Las salidas muy grandes se truncan en memoria (inicio + final) y se vuelcan completas
+    a un archivo temporal; ver utils.output_capture.CapturedOutput.
     """
     if get_os_type() == 'linux' and sudo:
         command = f"sudo {command}"
-    
-    try:
-        process = subprocess.run(
-            command, 
-            shell=shell, 
-            capture_output=True, 
-            text=True, 
-            check=False # No lanza excepción para códigos de retorno no cero
-        )
-        output = process.stdout + process.stderr # Captura stdout y stderr
-        status = process.returncode
-        return output, status
-    except Exception as e:
-        return f"Excepción al ejecutar comando: {e}", 1 # Retorna un error genérico y código 1
\ No newline at end of file
+
+    backend = command_backend.get_backend()
+    start_wall = time.perf_counter()
+    stdout, stderr, status = backend.run(command, shell)
+    wall = time.perf_counter() - start_wall
+    cpu = command_backend.last_child_cpu() if backend.measures_child_cpu() else None
+    metrics.record_command(command, wall, cpu, status, stdout.total_bytes, stderr.total_bytes)
+    return output_capture.combine(stdout, stderr), status # Captura stdout y stderr
+
+atexit.register(shell_pool.disable_shell_pool)